@@ -0,0 +1 @@
+"""Microbenchmarks for data-layer hot paths (python -m benchmarks.run)."""
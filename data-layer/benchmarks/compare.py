@@ -0,0 +1,70 @@
+"""Compare two benchmark result files: python -m benchmarks.compare base.json new.json
+
+Compares the median time per call for every benchmark present in both files.
+A benchmark that got slower by more than --threshold (percent, default 10)
+is a regression, and the exit status is 1 if there is any, so this can gate
+CI. Differences smaller than the two runs' combined spread are reported as
+noise even past the threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+REGRESSION = "REGRESSION"
+IMPROVED = "improved"
+NOISE = "noise"
+OK = "ok"
+
+
+def compare(base: dict, new: dict, threshold_pct: float = 10.0) -> list[dict]:
+    """Per-benchmark verdicts for two result documents (run.run_suite output)."""
+    rows = []
+    for name, b in base["results"].items():
+        n = new["results"].get(name)
+        if n is None or not b["median_ns"]:
+            continue
+        change = (n["median_ns"] / b["median_ns"] - 1) * 100
+        spread = (b["stdev_ns"] + n["stdev_ns"]) / b["median_ns"] * 100
+        if abs(change) <= threshold_pct:
+            verdict = OK
+        elif abs(change) <= spread:
+            verdict = NOISE
+        else:
+            verdict = REGRESSION if change > 0 else IMPROVED
+        rows.append({
+            "name": name,
+            "base_ns": b["median_ns"],
+            "new_ns": n["median_ns"],
+            "change_pct": round(change, 1),
+            "verdict": verdict,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    if base.get("params") != new.get("params"):
+        print("warning: runs used different workload params; numbers are not comparable",
+              file=sys.stderr)
+
+    rows = compare(base, new, args.threshold)
+    for r in rows:
+        print(f"{r['name']:36s} {r['base_ns'] / 1e3:10.1f} → {r['new_ns'] / 1e3:10.1f} µs"
+              f"  {r['change_pct']:+7.1f}%  {r['verdict']}")
+    regressions = [r for r in rows if r["verdict"] == REGRESSION]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Synthetic workloads shaped like the live Hyperliquid feeds.
+
+All generators are seeded, so every run of a benchmark sees the same data.
+"""
+
+import random
+import time
+
+from hynous_data.core.db import Database
+
+COINS = [
+    "BTC", "ETH", "SOL", "HYPE", "XRP", "DOGE", "SUI", "AVAX", "LINK", "BNB",
+    "ADA", "TRX", "LTC", "DOT", "ARB", "OP", "APT", "NEAR", "TIA", "SEI",
+]
+
+
+def coins(n: int) -> list[str]:
+    """First n coin names (synthetic ones past the real list)."""
+    return COINS[:n] + [f"C{i}" for i in range(len(COINS), n)]
+
+
+def mid_for(coin: str) -> float:
+    return 100.0 + 10.0 * (sum(map(ord, coin)) % 50)
+
+
+def _address(rng: random.Random) -> str:
+    return "0x%040x" % rng.getrandbits(160)
+
+
+def trade_messages(
+    n_trades: int,
+    rate: float,
+    coin_list: list[str],
+    start: float | None = None,
+    per_message: int = 3,
+    liq_frac: float = 0.002,
+    seed: int = 0,
+) -> list[dict]:
+    """WS `trades` messages totalling n_trades, arriving at `rate` trades/s.
+
+    Each message carries `per_message` fills of one coin, as the exchange
+    batches them. A share of fills is large enough for address discovery,
+    and `liq_frac` of them are liquidations.
+    """
+    rng = random.Random(seed)
+    start = time.time() - n_trades / rate if start is None else start
+    users = [_address(rng) for _ in range(max(64, n_trades // 20))]
+    msgs = []
+    for k in range(0, n_trades, per_message):
+        coin = rng.choice(coin_list)
+        mid = mid_for(coin)
+        t_ms = int((start + k / rate) * 1000)
+        data = []
+        for _ in range(min(per_message, n_trades - k)):
+            trade = {
+                "coin": coin,
+                "px": f"{mid * (1 + rng.uniform(-0.001, 0.001)):.4f}",
+                "sz": f"{rng.choice((0.01, 0.1, 1, 5, 50)):g}",
+                "side": "B" if rng.random() < 0.5 else "A",
+                "time": t_ms,
+                "users": [rng.choice(users), rng.choice(users)],
+            }
+            if rng.random() < liq_frac:
+                trade["liquidation"] = True
+            data.append(trade)
+        msgs.append({"channel": "trades", "data": data})
+    return msgs
+
+
+def book_message(coin: str, depth: int, ts: float, seed: int = 0) -> dict:
+    """WS `l2Book` message with `depth` levels per side around the coin's mid."""
+    rng = random.Random(f"{coin}:{seed}")
+    mid = mid_for(coin)
+    tick = mid * 1e-4
+    bids = [{"px": f"{mid - tick * (i + 1):.4f}", "sz": f"{rng.uniform(0.1, 20):.3f}", "n": 1}
+            for i in range(depth)]
+    asks = [{"px": f"{mid + tick * (i + 1):.4f}", "sz": f"{rng.uniform(0.1, 20):.3f}", "n": 1}
+            for i in range(depth)]
+    return {"channel": "l2Book", "data": {"coin": coin, "time": int(ts * 1000), "levels": [bids, asks]}}
+
+
+def positions(n_wallets: int, coin_list: list[str], now: float | None = None,
+              per_wallet: int = 2, seed: int = 0) -> list[dict]:
+    """Position rows as PositionPoller._poll_address builds them."""
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    out = []
+    for _ in range(n_wallets):
+        addr = _address(rng)
+        for coin in rng.sample(coin_list, min(per_wallet, len(coin_list))):
+            mid = mid_for(coin)
+            is_long = rng.random() < 0.5
+            lev = rng.choice((2, 5, 10, 20, 40))
+            size = rng.uniform(2_000, 2_000_000) / mid
+            liq = mid * (1 - 0.9 / lev) if is_long else mid * (1 + 0.9 / lev)
+            out.append({
+                "address": addr,
+                "coin": coin,
+                "side": "long" if is_long else "short",
+                "size": size,
+                "size_usd": size * mid,
+                "entry_px": mid,
+                "mark_px": mid,
+                "leverage": lev,
+                "margin_used": size * mid / lev,
+                "liq_px": liq,
+                "unrealized_pnl": 0.0,
+                "updated_at": now,
+            })
+    return out
+
+
+def populate_prunable(db: Database, rows: int, days: int = 7, seed: int = 0) -> None:
+    """Fill the tables prune_old_data sweeps; about half the rows are past `days`."""
+    rng = random.Random(seed)
+    now = time.time()
+    old = now - (days + 1) * 86400
+    n_addr = max(10, rows // 10)
+    addrs = [_address(rng) for _ in range(n_addr)]
+
+    def ts(i):
+        return (old if i % 2 else now) - rng.uniform(0, 3600)
+
+    with db.write_lock:
+        conn = db.conn
+        conn.executemany(
+            "INSERT OR REPLACE INTO addresses (address, first_seen, last_seen, tier) VALUES (?, ?, ?, ?)",
+            [(a, now - 40 * 86400, now - (40 * 86400 if i % 3 == 0 else 0), 3)
+             for i, a in enumerate(addrs)],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO pnl_snapshots (address, snapshot_at, equity) VALUES (?, ?, ?)",
+            [(addrs[i % n_addr], ts(i) + i * 1e-3, 1e5) for i in range(rows)],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO hlp_snapshots (vault_address, coin, snapshot_at, side, size, "
+            "size_usd, entry_px, mark_px) VALUES ('0xhlp', ?, ?, 'long', 1, 100, 100, 100)",
+            [(COINS[i % len(COINS)], ts(i) + i * 1e-3) for i in range(rows // 4)],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO wallet_profiles (address, computed_at) VALUES (?, ?)",
+            [(a, now) for a in addrs],
+        )
+        conn.executemany(
+            "INSERT INTO wallet_trades (address, coin, side, entry_px, size_usd, entry_time) "
+            "VALUES (?, 'BTC', 'long', 100, 1000, ?)",
+            [(addrs[i % n_addr], ts(i)) for i in range(rows // 4)],
+        )
+        conn.commit()
@@ -0,0 +1,81 @@
+"""Timing harness — stable, comparable measurements of one callable.
+
+`measure()` warms up, picks a loop count so one sample lasts at least
+`min_time`, then takes `repeat` samples with the garbage collector off.
+Per-sample setup (fresh DB rows to prune, say) runs outside the timed
+region. The headline number is the median per call. The median is robust
+to the odd scheduler hiccup, and `compare.py` judges regressions on it.
+"""
+
+import gc
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    setup: Callable[[], Any] | None = None,
+    *,
+    items: int = 1,
+    number: int | None = None,
+    repeat: int = 7,
+    min_time: float = 0.05,
+    warmup: int = 1,
+) -> dict:
+    """Time `fn(state)` where `state = setup()` (None without setup).
+
+    `items` is the work units one call processes (trades, positions, rows),
+    so results also report ns per item. `number` fixes the calls per sample.
+    It defaults to 1 with a setup and is otherwise calibrated from min_time.
+    """
+    state = setup() if setup else None
+    for _ in range(warmup):
+        fn(state)
+        if setup:
+            state = setup()
+
+    if number is None:
+        number = 1 if setup else _calibrate(fn, state, min_time)
+
+    samples: list[float] = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            if setup:
+                state = setup()
+            t0 = time.perf_counter_ns()
+            for _ in range(number):
+                fn(state)
+            samples.append((time.perf_counter_ns() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    median = statistics.median(samples)
+    return {
+        "median_ns": round(median, 1),
+        "min_ns": round(min(samples), 1),
+        "max_ns": round(max(samples), 1),
+        "stdev_ns": round(statistics.stdev(samples), 1) if len(samples) > 1 else 0.0,
+        "items": items,
+        "ns_per_item": round(median / items, 2),
+        "items_per_s": round(items * 1e9 / median, 1) if median else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _calibrate(fn, state, min_time: float) -> int:
+    """Smallest power-of-two loop count whose run takes at least min_time."""
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn(state)
+        if time.perf_counter() - t0 >= min_time or n >= 1 << 20:
+            return n
+        n *= 2
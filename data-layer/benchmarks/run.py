@@ -0,0 +1,310 @@
+"""Data-layer hot-path benchmarks: python -m benchmarks.run [--out results.json]
+
+Each benchmark builds its workload from the seeded generators in
+generators.py against a scratch Database. No network access is needed. The
+workload knobs (trade rate, coins, book depth, wallet count, DB size) are
+CLI flags and are recorded in the output. Compare two result files with
+`python -m benchmarks.compare`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import generators as gen
+from benchmarks.harness import measure
+from hynous_data.collectors import position_poller
+from hynous_data.collectors.l2_subscriber import L2Subscriber
+from hynous_data.collectors.position_poller import PositionPoller
+from hynous_data.collectors.trade_stream import TradeStream, clear_all_buffers, get_trade_buffer
+from hynous_data.core.config import HeatmapConfig, PositionPollerConfig
+from hynous_data.core.db import Database
+from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.engine.liq_heatmap import LiqHeatmapEngine
+from hynous_data.engine.order_flow import OrderFlowEngine
+from hynous_data.engine.tick_collector import TickCollector
+from hynous_data.engine.tick_flow import TickFlow
+
+
+@dataclass
+class Params:
+    trade_rate: float = 50.0   # trades/s in synthetic feeds
+    coins: int = 10
+    book_depth: int = 100      # L2 levels per side
+    wallets: int = 5000        # wallets with positions (heatmap index size)
+    upsert_batch: int = 100    # wallets per position-poller flush
+    db_rows: int = 50_000      # pnl_snapshots rows for the prune benchmark
+    repeat: int = 7
+    min_time: float = 0.05
+
+    @classmethod
+    def quick(cls) -> "Params":
+        return cls(trade_rate=20, coins=3, book_depth=20, wallets=300,
+                   upsert_batch=20, db_rows=2000, repeat=3, min_time=0.005)
+
+
+BENCHMARKS: dict[str, Callable[[Params, Path], dict]] = {}
+
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _db(workdir: Path, name: str, writer: bool = False) -> Database:
+    db = Database(workdir / f"{name}.db")
+    db.connect()
+    db.init_schema()
+    if writer:
+        db.start_writer()
+    return db
+
+
+class _OfflineInfo:
+    """Info stand-in for constructing PositionPoller without network access."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+
+@benchmark("trade_stream.on_trade")
+def bench_on_trade(p: Params, workdir: Path) -> dict:
+    """One minute of trades messages through TradeStream._on_trade (per trade)."""
+    clear_all_buffers()
+    coin_list = gen.coins(p.coins)
+    db = _db(workdir, "on_trade", writer=True)
+    ts = TradeStream(db)
+    ts.set_order_flow(OrderFlowEngine())
+    ts.set_tick_flow(TickFlow(coin_list))
+    msgs = gen.trade_messages(max(1000, int(p.trade_rate * 60)), p.trade_rate, coin_list)
+    n_trades = sum(len(m["data"]) for m in msgs)
+
+    def run(_):
+        for m in msgs:
+            ts._on_trade(m)
+
+    try:
+        return measure(run, items=n_trades, repeat=p.repeat, min_time=p.min_time)
+    finally:
+        db.close()
+
+
+@benchmark("order_flow.get_order_flow")
+def bench_order_flow(p: Params, workdir: Path) -> dict:
+    """All default CVD windows for one coin with an hour of trades buffered (per window)."""
+    coin_list = gen.coins(p.coins)
+    engine = OrderFlowEngine()
+    now = time.time()
+    n = int(p.trade_rate * 3600)
+    rng = np.random.default_rng(0)
+    t_ms = ((now - 3600 + np.sort(rng.uniform(0, 3600, n))) * 1000).astype(np.int64)
+    coin_idx = rng.integers(0, len(coin_list), n)
+    notional = rng.uniform(10, 50_000, n)
+    is_buy = rng.random(n) < 0.5
+    for t, c, usd, b in zip(t_ms.tolist(), coin_idx.tolist(), notional.tolist(), is_buy.tolist()):
+        engine.record_trade(coin_list[c], t, usd, b)
+    windows = len(engine.get_order_flow(coin_list[0])["windows"])
+    return measure(lambda _: engine.get_order_flow(coin_list[0]), items=windows,
+                   repeat=p.repeat, min_time=p.min_time)
+
+
+@benchmark("tick_collector.tick")
+def bench_tick(p: Params, workdir: Path) -> dict:
+    """One 1Hz tick: trade-flow compute plus TickCollector._compute per coin (per coin)."""
+    coin_list = gen.coins(p.coins)
+    now = time.time()
+    l2 = L2Subscriber(coins=coin_list)
+    for coin in coin_list:
+        l2._handle_message(gen.book_message(coin, p.book_depth, now), now=now)
+    tc = TickCollector(l2, coin_list, workdir / "satellite.db")
+    clear_all_buffers()
+    for m in gen.trade_messages(int(p.trade_rate * 60), p.trade_rate, coin_list, start=now - 60):
+        for t in m["data"]:
+            px, sz = float(t["px"]), float(t["sz"])
+            # Window edges are read from the trade buffers, as in production
+            get_trade_buffer(t["coin"]).append(t["time"], px, sz, t["side"])
+            tc.flow.record_trade(t["coin"], t["time"], px, sz, t["side"] == "B")
+
+    def run(_):
+        tc.tick(now)
+        tc._write_buffer.clear()
+
+    result = measure(run, items=len(coin_list), repeat=p.repeat, min_time=p.min_time)
+    assert not tc.compute_errors, "tick benchmark hit compute errors"
+    return result
+
+
+def _heatmap(p: Params, workdir: Path, name: str):
+    coin_list = gen.coins(p.coins)
+    db = _db(workdir, name)
+    engine = LiqHeatmapEngine(db, HeatmapConfig())
+    engine.on_positions_upserted(gen.positions(p.wallets, coin_list))
+    coin = coin_list[0]
+    mid = gen.mid_for(coin)
+    engine._compute_coin_heatmap(coin, mid)  # anchor the buckets
+    return db, engine, coin, mid
+
+
+@benchmark("liq_heatmap.render")
+def bench_heatmap_render(p: Params, workdir: Path) -> dict:
+    """Apply one position delta, then re-render the coin's heatmap (per render)."""
+    db, engine, coin, mid = _heatmap(p, workdir, "heatmap_render")
+    delta = gen.positions(1, [coin], seed=1)
+
+    def run(_):
+        engine.on_positions_upserted(delta)
+        engine._compute_coin_heatmap(coin, mid)
+
+    try:
+        return measure(run, repeat=p.repeat, min_time=p.min_time)
+    finally:
+        db.close()
+
+
+@benchmark("liq_heatmap.rebucket")
+def bench_heatmap_rebucket(p: Params, workdir: Path) -> dict:
+    """Render after a mid move past rebucket_drift_pct (per indexed position)."""
+    db, engine, coin, mid = _heatmap(p, workdir, "heatmap_rebucket")
+    n_positions = len(engine._coins[coin].positions)
+    mids = [mid * 1.01, mid]
+    state = {"i": 0}
+
+    def run(_):
+        state["i"] ^= 1
+        engine._compute_coin_heatmap(coin, mids[state["i"]])
+
+    try:
+        return measure(run, items=n_positions, repeat=p.repeat, min_time=p.min_time)
+    finally:
+        db.close()
+
+
+@benchmark("position_poller.upsert_positions")
+def bench_upsert_positions(p: Params, workdir: Path) -> dict:
+    """One flush of positions: batched upsert, commit, heatmap deltas (per position).
+
+    Runs without the DbWriter, so writes commit inline. Through the writer the
+    cost would be hidden behind its group-commit delay.
+    """
+    coin_list = gen.coins(p.coins)
+    db = _db(workdir, "upsert")
+    real_info = position_poller.Info
+    position_poller.Info = _OfflineInfo
+    try:
+        pp = PositionPoller(db, RateLimiter(), PositionPollerConfig())
+    finally:
+        position_poller.Info = real_info
+    pp.set_liq_heatmap(LiqHeatmapEngine(db, HeatmapConfig()))
+    batch = gen.positions(p.upsert_batch, coin_list)
+
+    def run(_):
+        pp._upsert_positions(batch)
+
+    try:
+        return measure(run, items=len(batch), repeat=p.repeat, min_time=p.min_time)
+    finally:
+        db.close()
+
+
+@benchmark("db.prune_old_data")
+def bench_prune(p: Params, workdir: Path) -> dict:
+    """prune_old_data over db_rows snapshots, half of them expired (per row)."""
+    db = _db(workdir, "prune")
+
+    def setup():
+        gen.populate_prunable(db, p.db_rows)
+
+    try:
+        return measure(lambda _: db.prune_old_data(7), setup, items=p.db_rows,
+                       repeat=min(p.repeat, 5))
+    finally:
+        db.close()
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=5, cwd=Path(__file__).parent)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(params: Params, names: list[str] | None = None) -> dict:
+    """Run the selected benchmarks (all by default) and return the result document."""
+    selected = names or list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="hynous-bench-") as tmp:
+        for name in selected:
+            workdir = Path(tmp) / name
+            workdir.mkdir()
+            results[name] = BENCHMARKS[name](params, workdir)
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "params": asdict(params),
+        "results": results,
+    }
+
+
+def main():
+    defaults = Params()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--out", help="Write the JSON result document here")
+    parser.add_argument("--quick", action="store_true", help="Tiny workloads (smoke run)")
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    params = Params.quick() if args.quick else defaults
+    for field in asdict(defaults):
+        value = getattr(args, field)
+        if value is not None:
+            setattr(params, field, value)
+
+    names = [n for n in BENCHMARKS if not args.pattern or args.pattern in n]
+    if not names:
+        sys.exit(f"No benchmark matches {args.pattern!r}")
+    doc = run_suite(params, names)
+
+    for name, r in doc["results"].items():
+        print(f"{name:36s} {r['median_ns'] / 1e3:12.1f} µs/call  {r['ns_per_item']:12.1f} ns/item"
+              f"  ±{r['stdev_ns'] / r['median_ns'] * 100 if r['median_ns'] else 0:4.1f}%")
+    if args.out:
+        Path(args.out).write_text(json.dumps(doc, indent=2))
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,33 @@
 """REST + WebSocket API endpoints for hynous-data."""
 
-import asyncio
 import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import APIRouter, Query, Body, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, Body, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
+from hynous_data.core.response_cache import ResponseCache, dumps
+
 log = logging.getLogger(__name__)
 
+BATCH_MAX_ITEMS = 64
+BATCH_WORKERS = 8
+
 
 def create_router(c: dict) -> APIRouter:
     """Create router with all endpoints. `c` is the components dict from main."""
     router = APIRouter()
+    # Pre-serialized bodies for the hot read routes (see core/response_cache.py)
+    cache: ResponseCache = c.setdefault("response_cache", ResponseCache())
 
     @router.get("/health")
     def health():
         db = c["db"]
         start_time = c.get("start_time", 0)
-        addr_count = db.conn.execute("SELECT COUNT(*) as cnt FROM addresses").fetchone()["cnt"]
-        pos_count = db.conn.execute("SELECT COUNT(*) as cnt FROM positions").fetchone()["cnt"]
+        addr_count = db.read_conn.execute("SELECT COUNT(*) as cnt FROM addresses").fetchone()["cnt"]
+        pos_count = db.read_conn.execute("SELECT COUNT(*) as cnt FROM positions").fetchone()["cnt"]
 
         # Check component health
         ts = c.get("trade_stream")
@@ -45,65 +52,149 @@ def create_router(c: dict) -> APIRouter:
             "tick_collector": tick_info,
         }
 
-    @router.get("/v1/heatmap/{coin}")
-    def heatmap(coin: str):
+    # ------------------------------------------------------------------
+    # Cached reads — each reader returns (cache key, version, render, ttl)
+    # or an error Response. Shared by the GET routes and /v1/batch.
+    # ------------------------------------------------------------------
+
+    def _unavailable(name: str) -> JSONResponse:
+        return JSONResponse(status_code=503, content={"error": f"{name} not available"})
+
+    def _read_heatmap(coin: str):
         if "liq_heatmap" not in c:
-            return JSONResponse(status_code=503, content={"error": "Heatmap engine not available"})
+            return _unavailable("Heatmap engine")
         engine = c["liq_heatmap"]
-        result = engine.get_heatmap(coin.upper())
-        if not result:
-            return JSONResponse(
-                status_code=404,
-                content={"error": f"No heatmap data for {coin.upper()}", "available": engine.get_available_coins()},
-            )
-        # Add freshness
-        computed = result.get("summary", {}).get("computed_at", 0)
-        result["data_age_seconds"] = round(time.time() - computed, 1) if computed else None
-        return result
-
-    @router.get("/v1/hlp/positions")
-    def hlp_positions():
+        coin = coin.upper()
+
+        def render():
+            result = engine.get_heatmap(coin)
+            if not result:
+                return JSONResponse(
+                    status_code=404,
+                    content={"error": f"No heatmap data for {coin}", "available": engine.get_available_coins()},
+                )
+            # Add freshness
+            computed = result.get("summary", {}).get("computed_at", 0)
+            result["data_age_seconds"] = round(time.time() - computed, 1) if computed else None
+            return result
+
+        # Short TTL: mid_price follows the live L2 mid between deltas
+        return ("heatmap", coin), engine.version(coin), render, 1.0
+
+    def _read_hlp_positions():
         if "hlp_tracker" not in c:
-            return JSONResponse(status_code=503, content={"error": "HLP tracker not available"})
+            return _unavailable("HLP tracker")
         tracker = c["hlp_tracker"]
-        positions = tracker.get_positions()
-        return {
-            "positions": positions,
-            "count": len(positions),
-        }
 
-    @router.get("/v1/hlp/sentiment")
-    def hlp_sentiment(hours: float = Query(24, ge=1, le=168)):
+        def render():
+            positions = tracker.get_positions()
+            return {
+                "positions": positions,
+                "count": len(positions),
+            }
+
+        return ("hlp_positions",), tracker.version, render, None
+
+    def _read_hlp_sentiment(hours: float):
         if "hlp_tracker" not in c:
-            return JSONResponse(status_code=503, content={"error": "HLP tracker not available"})
+            return _unavailable("HLP tracker")
         tracker = c["hlp_tracker"]
-        return {"sentiment": tracker.get_sentiment(hours), "hours": hours}
+        return (
+            ("hlp_sentiment", hours), tracker.version,
+            lambda: {"sentiment": tracker.get_sentiment(hours), "hours": hours}, None,
+        )
 
-    @router.get("/v1/orderflow/{coin}")
-    def order_flow(coin: str):
+    def _read_order_flow(coin: str, windows: str):
         if "order_flow" not in c:
-            return JSONResponse(status_code=503, content={"error": "Order flow engine not available"})
+            return _unavailable("Order flow engine")
         engine = c["order_flow"]
-        result = engine.get_order_flow(coin.upper())
-        result["computed_at"] = time.time()
-        return result
-
-    @router.get("/v1/whales/{coin}")
-    def whales(coin: str, top_n: int = Query(50, ge=1, le=500)):
+        # Optional custom windows, e.g. ?windows=30,120,7200 (seconds, capped at horizon)
+        try:
+            custom = [int(w) for w in windows.split(",") if w.strip()] if windows else None
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "windows must be comma-separated seconds"})
+        if custom and any(w <= 0 for w in custom):
+            return JSONResponse(status_code=400, content={"error": "windows must be positive"})
+        coin = coin.upper()
+
+        def render():
+            result = engine.get_order_flow(coin, custom)
+            result["computed_at"] = time.time()
+            return result
+
+        # Windows slide with the clock even without new trades
+        return ("orderflow", coin, tuple(custom or ())), engine.version(coin), render, 1.0
+
+    def _read_whales(coin: str, top_n: int):
         if "whale_tracker" not in c:
-            return JSONResponse(status_code=503, content={"error": "Whale tracker not available"})
+            return _unavailable("Whale tracker")
         tracker = c["whale_tracker"]
-        result = tracker.get_whales(coin.upper(), top_n)
-        # Add freshness — oldest position in result
-        positions = result.get("positions", [])
-        if positions:
-            oldest = min(p.get("updated_at", 0) for p in positions)
-            result["oldest_position_age_seconds"] = round(time.time() - oldest, 1)
-        return result
+        coin = coin.upper()
+
+        def render():
+            result = tracker.get_whales(coin, top_n)
+            # Add freshness — oldest position in result
+            positions = result.get("positions", [])
+            if positions:
+                oldest = min(p.get("updated_at", 0) for p in positions)
+                result["oldest_position_age_seconds"] = round(time.time() - oldest, 1)
+            return result
+
+        return ("whales", coin, top_n), tracker.version, render, 5.0
+
+    def _read_smart_money(top_n: int, offset: int, min_win_rate: float, style: str,
+                          exclude_bots: bool, min_trades: int, min_equity: float,
+                          max_hold_hours: float):
+        if "smart_money" not in c:
+            return _unavailable("Smart money engine")
+        engine = c["smart_money"]
+        style_set = frozenset(s.strip() for s in style.split(",") if s.strip()) if style else None
+        key = ("smart_money", top_n, offset, min_win_rate, style_set, exclude_bots,
+               min_trades, min_equity, max_hold_hours)
+        # Rankings change per rebuild; the attached positions per poller flush
+        wt = c.get("whale_tracker")
+        version = (engine.version, wt.version if wt else 0)
+        return key, version, lambda: engine.get_rankings(
+            top_n,
+            offset=offset,
+            min_win_rate=min_win_rate,
+            styles=style_set,
+            exclude_bots=exclude_bots,
+            min_trades=min_trades,
+            min_equity=min_equity,
+            max_hold_hours=max_hold_hours,
+        ), None
+
+    def _serve(request: Request, read) -> Response:
+        if isinstance(read, Response):
+            return read
+        return cache.respond(request, *read)
+
+    @router.get("/v1/heatmap/{coin}")
+    def heatmap(request: Request, coin: str):
+        return _serve(request, _read_heatmap(coin))
+
+    @router.get("/v1/hlp/positions")
+    def hlp_positions(request: Request):
+        return _serve(request, _read_hlp_positions())
+
+    @router.get("/v1/hlp/sentiment")
+    def hlp_sentiment(request: Request, hours: float = Query(24, ge=1, le=168)):
+        return _serve(request, _read_hlp_sentiment(hours))
+
+    @router.get("/v1/orderflow/{coin}")
+    def order_flow(request: Request, coin: str, windows: str = Query("")):
+        return _serve(request, _read_order_flow(coin, windows))
+
+    @router.get("/v1/whales/{coin}")
+    def whales(request: Request, coin: str, top_n: int = Query(50, ge=1, le=500)):
+        return _serve(request, _read_whales(coin, top_n))
 
     @router.get("/v1/smart-money")
     def smart_money(
+        request: Request,
         top_n: int = Query(50, ge=1, le=200),
+        offset: int = Query(0, ge=0),
         min_win_rate: float = Query(0, ge=0, le=1),
         style: str = Query(""),
         exclude_bots: bool = Query(False),
@@ -111,26 +202,104 @@ def create_router(c: dict) -> APIRouter:
         min_equity: float = Query(0, ge=0),
         max_hold_hours: float = Query(0, ge=0),
     ):
-        if "smart_money" not in c:
-            return JSONResponse(status_code=503, content={"error": "Smart money engine not available"})
-        engine = c["smart_money"]
-        # get_rankings already fetches 3x for filter headroom
-        data = engine.get_rankings(top_n)
-        rankings = data.get("rankings") or []
-
-        style_set = {s.strip() for s in style.split(",") if s.strip()} if style else set()
-        filtered = [
-            r for r in rankings
-            if (not min_win_rate or (r.get("win_rate") or 0) >= min_win_rate)
-            and (not style_set or r.get("style", "") in style_set)
-            and (not exclude_bots or not r.get("is_bot"))
-            and (not min_trades or (r.get("trade_count") or 0) >= min_trades)
-            and (not min_equity or (r.get("equity") or 0) >= min_equity)
-            and (not max_hold_hours or (r.get("avg_hold_hours") or 999) <= max_hold_hours)
-        ][:top_n]
-
-        data["rankings"] = filtered
-        return data
+        return _serve(request, _read_smart_money(
+            top_n, offset, min_win_rate, style, exclude_bots, min_trades, min_equity, max_hold_hours,
+        ))
+
+    # ------------------------------------------------------------------
+    # Batch — many cached reads in one round trip
+    # ------------------------------------------------------------------
+
+    def _clamp(value, lo, hi, cast):
+        return max(lo, min(hi, cast(value)))
+
+    def _flag(value) -> bool:
+        # Same values FastAPI's Query(bool) accepts; anything else is a 400
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str):
+            v = value.strip().lower()
+            if v in ("true", "1", "yes", "on", "t", "y"):
+                return True
+            if v in ("false", "0", "no", "off", "f", "n"):
+                return False
+        raise ValueError(f"invalid boolean: {value!r}")
+
+    # kind → (needs coin, reader(coin, params)); params mirror the GET query strings
+    batch_kinds = {
+        "heatmap": (True, lambda coin, p: _read_heatmap(coin)),
+        "orderflow": (True, lambda coin, p: _read_order_flow(coin, str(p.get("windows", "")))),
+        "whales": (True, lambda coin, p: _read_whales(
+            coin, _clamp(p.get("top_n", 50), 1, 500, int))),
+        "hlp_positions": (False, lambda coin, p: _read_hlp_positions()),
+        "hlp_sentiment": (False, lambda coin, p: _read_hlp_sentiment(
+            _clamp(p.get("hours", 24), 1, 168, float))),
+        "smart_money": (False, lambda coin, p: _read_smart_money(
+            _clamp(p.get("top_n", 50), 1, 200, int),
+            _clamp(p.get("offset", 0), 0, 1_000_000, int),
+            _clamp(p.get("min_win_rate", 0), 0, 1, float),
+            str(p.get("style", "")),
+            _flag(p.get("exclude_bots", False)),
+            _clamp(p.get("min_trades", 0), 0, 1_000_000, int),
+            _clamp(p.get("min_equity", 0), 0, float("inf"), float),
+            _clamp(p.get("max_hold_hours", 0), 0, float("inf"), float),
+        )),
+    }
+    batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="api-batch")
+
+    def _batch_one(item) -> tuple[int, bytes]:
+        if not isinstance(item, dict) or item.get("kind") not in batch_kinds:
+            return 400, dumps({"error": f"unknown kind, expected one of {sorted(batch_kinds)}"})
+        needs_coin, reader = batch_kinds[item["kind"]]
+        coin = item.get("coin")
+        if coin is not None and not isinstance(coin, str):
+            return 400, dumps({"error": "coin must be a string"})
+        if needs_coin and not coin:
+            return 400, dumps({"error": f"{item['kind']} requires a coin"})
+        params = item.get("params") or {}
+        if not isinstance(params, dict):
+            return 400, dumps({"error": "params must be an object"})
+        try:
+            read = reader(coin, params)
+        except (TypeError, ValueError):
+            return 400, dumps({"error": "invalid params"})
+        if isinstance(read, Response):
+            return read.status_code, bytes(read.body)
+        try:
+            status, body, _ = cache.get(*read)
+        except Exception:
+            log.exception("Batch item %s failed", item.get("kind"))
+            return 500, dumps({"error": "internal error"})
+        return status, body
+
+    @router.post("/v1/batch")
+    def batch(body: dict = Body(...)):
+        """Run many cached reads in parallel and return them in one response.
+
+        Body: {"requests": [{"kind": "heatmap", "coin": "BTC", "params": {...}}, ...]}.
+        Results come back in request order as {"kind", "coin", "status", "data"};
+        a failed item carries its error body and status without failing the batch.
+        """
+        items = body.get("requests")
+        if not isinstance(items, list):
+            return JSONResponse(status_code=400, content={"error": "requests must be a list"})
+        if len(items) > BATCH_MAX_ITEMS:
+            return JSONResponse(
+                status_code=400, content={"error": f"at most {BATCH_MAX_ITEMS} requests per batch"},
+            )
+        t0 = time.perf_counter()
+        results = list(batch_pool.map(_batch_one, items))
+        # Splice the cached bodies in as-is — no decode/re-encode
+        parts = []
+        for item, (status, data) in zip(items, results):
+            meta = item if isinstance(item, dict) else {}
+            head = dumps({"kind": meta.get("kind"), "coin": meta.get("coin"), "status": status})
+            parts.append(head[:-1] + b',"data":' + data + b"}")
+        tail = dumps({"count": len(parts), "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2)})
+        content = b'{"results":[' + b",".join(parts) + b"]," + tail[1:]
+        return Response(content=content, media_type="application/json")
 
     @router.get("/v1/stats")
     def stats():
@@ -138,7 +307,12 @@ def create_router(c: dict) -> APIRouter:
         result = {
             "uptime_seconds": round(time.time() - start_time, 1),
             "rate_limiter": c["rate_limiter"].stats(),
+            "db": c["db"].read_stats(),
+            "db_history": c["db"].history.stats(),
         }
+        writer = c["db"].writer
+        if writer:
+            result["db_writer"] = writer.stats()
         if "trade_stream" in c:
             result["trade_stream"] = c["trade_stream"].stats()
         if "position_poller" in c:
@@ -147,8 +321,17 @@ def create_router(c: dict) -> APIRouter:
             result["hlp_tracker"] = c["hlp_tracker"].stats()
         if "liq_heatmap" in c:
             result["liq_heatmap"] = c["liq_heatmap"].stats()
+        if "smart_money" in c:
+            result["smart_money"] = c["smart_money"].stats()
+        result["response_cache"] = cache.stats()
         if "tick_collector" in c:
             result["tick_collector"] = c["tick_collector"].stats()
+        if "tick_hub" in c:
+            result["tick_hub"] = c["tick_hub"].stats()
+        if "tick_archiver" in c:
+            result["tick_archiver"] = c["tick_archiver"].stats()
+        if "feed_recorder" in c:
+            result["feed_recorder"] = c["feed_recorder"].stats()
         return result
 
     # ---- Smart Money: Wallet Tracker ----
@@ -174,7 +357,7 @@ def create_router(c: dict) -> APIRouter:
     def sm_trades(address: str, limit: int = Query(50, ge=1, le=200)):
         db = c["db"]
         address = address.strip().lower()
-        rows = db.conn.execute(
+        rows = db.read_conn.execute(
             """
             SELECT coin, side, entry_px, exit_px, size_usd, pnl_usd,
                    pnl_pct, hold_hours, entry_time, exit_time, is_win
@@ -191,7 +374,7 @@ def create_router(c: dict) -> APIRouter:
     def sm_changes(minutes: int = Query(30, ge=1, le=1440)):
         db = c["db"]
         cutoff = time.time() - minutes * 60
-        rows = db.conn.execute(
+        rows = db.read_conn.execute(
             """
             SELECT pc.address, pc.coin, pc.action, pc.side, pc.size_usd,
                    pc.price, pc.detected_at,
@@ -234,7 +417,7 @@ def create_router(c: dict) -> APIRouter:
         """Update label/notes/tags on a tracked wallet."""
         db = c["db"]
         address = address.strip().lower()
-        row = db.conn.execute(
+        row = db.read_conn.execute(
             "SELECT address FROM watched_wallets WHERE address = ? AND is_active = 1",
             (address,),
         ).fetchone()
@@ -288,7 +471,7 @@ def create_router(c: dict) -> APIRouter:
         """List active alerts for an address."""
         db = c["db"]
         address = address.strip().lower()
-        rows = db.conn.execute(
+        rows = db.read_conn.execute(
             "SELECT id, alert_type, min_size_usd, coins, enabled, created_at FROM wallet_alerts WHERE address = ? AND enabled = 1",
             (address,),
         ).fetchall()
@@ -307,7 +490,7 @@ def create_router(c: dict) -> APIRouter:
     def sm_active_alerts():
         """All active alerts, batch (for scanner)."""
         db = c["db"]
-        rows = db.conn.execute(
+        rows = db.read_conn.execute(
             "SELECT id, address, alert_type, min_size_usd, coins, created_at FROM wallet_alerts WHERE enabled = 1",
         ).fetchall()
         return {"alerts": [dict(r) for r in rows]}
@@ -328,62 +511,58 @@ def create_router(c: dict) -> APIRouter:
         oi = body.get("oi", {})
         volume = body.get("volume", {})
 
-        with db.write_lock:
-            for coin, rate in funding.items():
-                if rate is not None:
-                    db.conn.execute(
-                        "INSERT OR IGNORE INTO funding_history "
-                        "(coin, recorded_at, rate) VALUES (?, ?, ?)",
-                        (coin, now, rate),
-                    )
-                    recorded += 1
-            for coin, oi_usd in oi.items():
-                if oi_usd is not None:
-                    db.conn.execute(
-                        "INSERT OR IGNORE INTO oi_history "
-                        "(coin, recorded_at, oi_usd) VALUES (?, ?, ?)",
-                        (coin, now, oi_usd),
-                    )
-                    recorded += 1
-            for coin, vol in volume.items():
-                if vol is not None:
-                    db.conn.execute(
-                        "INSERT OR IGNORE INTO volume_history "
-                        "(coin, recorded_at, volume_usd) VALUES (?, ?, ?)",
-                        (coin, now, vol),
-                    )
-                    recorded += 1
-            db.conn.commit()
+        rows_by_sql = [
+            ("INSERT OR IGNORE INTO funding_history (coin, recorded_at, rate) VALUES (?, ?, ?)",
+             [(coin, now, v) for coin, v in funding.items() if v is not None]),
+            ("INSERT OR IGNORE INTO oi_history (coin, recorded_at, oi_usd) VALUES (?, ?, ?)",
+             [(coin, now, v) for coin, v in oi.items() if v is not None]),
+            ("INSERT OR IGNORE INTO volume_history (coin, recorded_at, volume_usd) VALUES (?, ?, ?)",
+             [(coin, now, v) for coin, v in volume.items() if v is not None]),
+        ]
+        for sql, rows in rows_by_sql:
+            db.write_many(sql, rows)
+            recorded += len(rows)
 
         return {"status": "ok", "recorded": recorded}
 
     # ---- WebSocket: Tick Snapshot Stream ----
-    # Streams the latest tick snapshot every ~1s to connected clients.
+    # TickCollector publishes each snapshot once to the BroadcastHub, which
+    # serializes it once and fans the frame out to every client.
     # Used by Monte Carlo visualization for near-realtime updates.
+    #   ?coins=BTC,ETH  — only these coins (default: all)
+    #   ?delta=true     — after the first full frame per coin, send only changed
+    #                     fields plus coin/timestamp, flagged "delta": true
 
     @router.websocket("/ws/ticks")
-    async def tick_stream(websocket: WebSocket):
+    async def tick_stream(
+        websocket: WebSocket,
+        coins: str | None = None,
+        delta: bool = False,
+    ):
         await websocket.accept()
-        tc = c.get("tick_collector")
-        if not tc:
+        hub = c.get("tick_hub")
+        if not hub:
             await websocket.send_json({"error": "tick_collector not running"})
             await websocket.close()
             return
 
-        log.info("Tick WS client connected")
-        last_ts = 0
+        topics = {x.strip().upper() for x in coins.split(",") if x.strip()} if coins else None
+        sub = hub.subscribe(topics=topics, delta=delta)
+        log.info("Tick WS client connected (coins=%s, delta=%s)", coins or "all", delta)
         try:
             while True:
-                snap = tc.get_latest_snapshot()
-                if snap and snap.get("timestamp", 0) != last_ts:
-                    last_ts = snap["timestamp"]
-                    await websocket.send_json(snap)
-                await asyncio.sleep(1)
+                frame = await sub.get()
+                if frame is None:
+                    # Fell too far behind — drop rather than buffer unboundedly
+                    await websocket.close(code=1013)
+                    break
+                await websocket.send_text(frame)
         except WebSocketDisconnect:
             pass
         except Exception:
             log.debug("Tick WS error", exc_info=True)
         finally:
+            hub.unsubscribe(sub)
             log.info("Tick WS client disconnected")
 
     return router
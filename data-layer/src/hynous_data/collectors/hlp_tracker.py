@@ -35,6 +35,7 @@ class HlpTracker:
         self._positions_lock = threading.Lock()
         # Stats
         self.total_polls = 0
+        self.version = 0  # bumped after every poll cycle (positions + snapshots)
         self.total_snapshots = 0
 
     def start(self):
@@ -130,6 +131,7 @@ class HlpTracker:
                 self.total_snapshots += len(snapshot_rows)
             except Exception:
                 log.exception("Failed to write HLP snapshots")
+        self.version += 1
 
     def get_positions(self) -> list[dict]:
         """Get latest HLP positions (thread-safe)."""
@@ -139,7 +141,7 @@ class HlpTracker:
     def get_sentiment(self, hours: float = 24) -> dict:
         """Compute HLP sentiment: net delta, flips, side per coin over N hours."""
         cutoff = time.time() - hours * 3600
-        conn = self._db.conn
+        conn = self._db.read_conn
         rows = conn.execute(
             """
             SELECT coin, side, size_usd, snapshot_at
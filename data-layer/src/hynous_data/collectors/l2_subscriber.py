@@ -3,6 +3,11 @@
 Maintains an in-memory snapshot of the order book for each subscribed coin.
 Updated in real-time via Hyperliquid WebSocket push.
 
+Each coin's book is an `L2Book`: preallocated float64 price/size arrays plus
+cumulative bid/ask notional, all filled in place on ingest. Depth, imbalance
+and microprice reads are O(1) index lookups, and the WS thread creates no
+per-level Python tuples.
+
 Design: SPEC-01, ml-011 §3
 """
 
@@ -11,17 +16,129 @@ import logging
 import threading
 import time
 
+import numpy as np
+
 log = logging.getLogger(__name__)
 
+MAX_LEVELS = 100  # Hyperliquid l2Book depth per side
+
+
+class L2Book:
+    """Array-backed order book for one coin.
 
-def safe_float(val, default: float = 0.0) -> float:
-    """Convert to float safely."""
-    if val is None:
-        return default
-    try:
-        return float(val)
-    except (TypeError, ValueError):
-        return default
+    `apply()` overwrites the preallocated arrays in place. Readers that need
+    several values from the same update should hold `lock`. The individual
+    accessors take it themselves, and the lock is reentrant.
+    """
+
+    def __init__(self, coin: str, max_levels: int = MAX_LEVELS):
+        self.coin = coin
+        self.max_levels = max_levels
+        self.lock = threading.RLock()
+        self.bid_px = np.zeros(max_levels)
+        self.bid_sz = np.zeros(max_levels)
+        self.ask_px = np.zeros(max_levels)
+        self.ask_sz = np.zeros(max_levels)
+        self.bid_cum = np.zeros(max_levels)  # cumulative bid notional, best → worst
+        self.ask_cum = np.zeros(max_levels)
+        self.n_bids = 0
+        self.n_asks = 0
+        self.updated_at = 0.0
+        self.updates = 0
+
+    @staticmethod
+    def _fill(levels: list, px: np.ndarray, sz: np.ndarray, cum: np.ndarray) -> int:
+        n = min(len(levels), len(px))
+        if n:
+            # numpy parses the decimal strings straight into the float buffers
+            px[:n] = [lvl["px"] for lvl in levels[:n]]
+            sz[:n] = [lvl["sz"] for lvl in levels[:n]]
+            np.multiply(px[:n], sz[:n], out=cum[:n])
+            np.cumsum(cum[:n], out=cum[:n])
+        return n
+
+    def apply(self, bids: list, asks: list, ts: float | None = None) -> None:
+        """Replace the book from raw WS levels ([{"px": str, "sz": str, ...}, ...])."""
+        with self.lock:
+            try:
+                self.n_bids = self._fill(bids, self.bid_px, self.bid_sz, self.bid_cum)
+                self.n_asks = self._fill(asks, self.ask_px, self.ask_sz, self.ask_cum)
+            except (KeyError, TypeError, ValueError):
+                self.n_bids = self.n_asks = 0  # malformed — treat as empty until next push
+                raise
+            self.updated_at = ts if ts is not None else time.time()
+            self.updates += 1
+
+    # --- O(1) accessors ---
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_px[0]) if self.n_bids else 0.0
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_px[0]) if self.n_asks else 0.0
+
+    @property
+    def mid(self) -> float:
+        with self.lock:
+            bb, ba = self.best_bid, self.best_ask
+            return (bb + ba) / 2 if bb and ba else 0.0
+
+    @property
+    def spread(self) -> float:
+        with self.lock:
+            bb, ba = self.best_bid, self.best_ask
+            return ba - bb if bb and ba else 0.0
+
+    def depth_at(self, k: int) -> tuple[float, float]:
+        """(bid_usd, ask_usd) notional across the top `k` levels of each side."""
+        with self.lock:
+            kb = min(k, self.n_bids)
+            ka = min(k, self.n_asks)
+            return (
+                float(self.bid_cum[kb - 1]) if kb > 0 else 0.0,
+                float(self.ask_cum[ka - 1]) if ka > 0 else 0.0,
+            )
+
+    def imbalance(self, k: int) -> float:
+        """Bid share of top-`k` notional (0.5 when both sides are empty)."""
+        bid, ask = self.depth_at(k)
+        total = bid + ask
+        return bid / total if total > 0 else 0.5
+
+    @property
+    def microprice(self) -> float:
+        """Top-of-book size-weighted price; leans toward the thinner side's quote."""
+        with self.lock:
+            if not (self.n_bids and self.n_asks):
+                return 0.0
+            bid_sz, ask_sz = float(self.bid_sz[0]), float(self.ask_sz[0])
+            total = bid_sz + ask_sz
+            if total <= 0:
+                return self.mid
+            return (self.best_bid * ask_sz + self.best_ask * bid_sz) / total
+
+    def to_dict(self) -> dict:
+        """Legacy snapshot dict (bids/asks as (price, size) lists). Built on demand."""
+        with self.lock:
+            bids = list(zip(self.bid_px[:self.n_bids].tolist(), self.bid_sz[:self.n_bids].tolist()))
+            asks = list(zip(self.ask_px[:self.n_asks].tolist(), self.ask_sz[:self.n_asks].tolist()))
+            mid = self.mid
+            spread = self.spread
+            bid_depth, ask_depth = self.depth_at(self.max_levels)
+            return {
+                "bids": bids,
+                "asks": asks,
+                "mid": mid,
+                "spread": spread,
+                "spread_bps": spread / mid * 10000 if mid else 0,
+                "microprice": self.microprice,
+                "bid_depth_usd": bid_depth,
+                "ask_depth_usd": ask_depth,
+                "levels_count": self.n_bids,
+                "updated_at": self.updated_at,
+            }
 
 
 class L2Subscriber:
@@ -33,7 +150,8 @@ class L2Subscriber:
     Usage:
         sub = L2Subscriber(coins=["BTC", "ETH", "SOL"])
         sub.start()
-        book = sub.get_book("BTC")  # {bids: [...], asks: [...], mid: float}
+        book = sub.get_l2("BTC")  # L2Book: depth_at(k), imbalance(k), microprice
+        sub.get_book("BTC")       # legacy dict {bids: [...], asks: [...], mid: float}
         sub.stop()
     """
 
@@ -44,12 +162,12 @@ class L2Subscriber:
     ):
         self._coins = coins
         self._url = url
-        self._books: dict[str, dict] = {}
-        self._books_lock = threading.Lock()
+        self._books: dict[str, L2Book] = {c: L2Book(c) for c in coins}
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
         self._connected = False
         self._last_update: dict[str, float] = {}
+        self._recorder = None  # FeedRecorder, wired via set_recorder()
 
     def start(self) -> None:
         """Start WebSocket connection in background thread."""
@@ -66,21 +184,30 @@ class L2Subscriber:
         if self._thread:
             self._thread.join(timeout=5)
 
+    def set_recorder(self, recorder) -> None:
+        """Wire a FeedRecorder so every raw l2Book message is appended to disk."""
+        self._recorder = recorder
+
+    def get_l2(self, coin: str) -> L2Book | None:
+        """Live array-backed book for a coin. None if no data received yet."""
+        book = self._books.get(coin)
+        return book if book is not None and book.updates else None
+
     def get_book(self, coin: str) -> dict | None:
         """Get current order book snapshot for a coin.
 
         Returns:
-            Dict with keys: bids, asks, mid, spread, updated_at.
+            Dict with keys: bids, asks, mid, spread, microprice, updated_at.
             Each bid/ask is (price, size) sorted by price.
             None if no data received yet.
         """
-        with self._books_lock:
-            return self._books.get(coin)
+        book = self.get_l2(coin)
+        return book.to_dict() if book else None
 
     def get_mid(self, coin: str) -> float | None:
         """Get current mid price for a coin."""
-        book = self.get_book(coin)
-        return book["mid"] if book else None
+        book = self.get_l2(coin)
+        return book.mid if book else None
 
     @property
     def is_healthy(self) -> bool:
@@ -131,11 +258,17 @@ class L2Subscriber:
 
         self._connected = False
 
-    def _handle_message(self, data: dict) -> None:
-        """Process incoming L2 book message."""
+    def _handle_message(self, data: dict, now: float | None = None) -> None:
+        """Process incoming L2 book message.
+
+        `now` overrides the receive time (FeedReplayer passes the recorded one).
+        """
         channel = data.get("channel")
         if channel != "l2Book":
             return
+        now = time.time() if now is None else now
+        if self._recorder is not None:
+            self._recorder.record(data, now)
 
         book_data = data.get("data", {})
         coin = book_data.get("coin")
@@ -146,41 +279,18 @@ class L2Subscriber:
         if len(levels) < 2:
             return
 
-        bids = [
-            (safe_float(lvl["px"]), safe_float(lvl["sz"]))
-            for lvl in levels[0]
-        ]
-        asks = [
-            (safe_float(lvl["px"]), safe_float(lvl["sz"]))
-            for lvl in levels[1]
-        ]
-
-        best_bid = bids[0][0] if bids else 0
-        best_ask = asks[0][0] if asks else 0
-        mid = (best_bid + best_ask) / 2 if best_bid and best_ask else 0
-
-        snapshot = {
-            "bids": bids,
-            "asks": asks,
-            "mid": mid,
-            "spread": best_ask - best_bid if best_bid and best_ask else 0,
-            "spread_bps": (
-                (best_ask - best_bid) / mid * 10000 if mid else 0
-            ),
-            "bid_depth_usd": sum(px * sz for px, sz in bids),
-            "ask_depth_usd": sum(px * sz for px, sz in asks),
-            "levels_count": len(bids),
-            "updated_at": time.time(),
-        }
-
-        with self._books_lock:
-            self._books[coin] = snapshot
-        self._last_update[coin] = time.time()
+        try:
+            self._books[coin].apply(levels[0], levels[1], ts=now)
+        except (KeyError, TypeError, ValueError):
+            log.debug("Malformed l2Book message for %s", coin)
+            return
+        self._last_update[coin] = now
 
     def stats(self) -> dict:
         return {
             "connected": self._connected,
             "healthy": self.is_healthy,
             "coins": self._coins,
-            "books_cached": len(self._books),
+            "books_cached": sum(1 for b in self._books.values() if b.updates),
+            "updates": sum(b.updates for b in self._books.values()),
         }
@@ -1,15 +1,35 @@
-"""Tiered position polling — polls user_state for discovered addresses."""
-
+"""Tiered position polling — polls user_state for discovered addresses.
+
+Scheduling is deadline-based rather than cycle-based. Every active address
+sits in an in-memory min-heap keyed by its next-due time:
+
+    due = last_polled + interval
+    interval = tier interval (30s / 120s / 600s)
+               capped at the tier-1 interval for watched wallets
+               × active_boost if the address traded since its last poll
+
+A fixed pool of worker threads pulls the earliest due address, acquires
+RateLimiter weight and polls it, then reschedules it under its new tier.
+A slow address only occupies one worker; the others keep draining the heap.
+Results go to a queue. The poller thread batches them into DB writes every
+`flush_interval` seconds. The addresses table is read incrementally every
+`refresh_interval` seconds to pick up newly discovered and recently active
+wallets, so there is no per-cycle tier query.
+"""
+
+import heapq
+import itertools
+import queue
 import time
 import threading
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
 
 from hyperliquid.info import Info
 
 from hynous_data.core.config import PositionPollerConfig
 from hynous_data.core.db import Database
-from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.core.rate_limiter import CRITICAL, NORMAL, RateLimiter
 from hynous_data.core.utils import safe_float
 from hynous_data.engine.smart_money import SmartMoneyEngine
 from hynous_data.engine.position_tracker import PositionChangeTracker
@@ -18,6 +38,218 @@ log = logging.getLogger(__name__)
 
 USER_STATE_WEIGHT = 2  # Hyperliquid API weight for clearinghouseState
 ADDRESS_MAX_AGE_DAYS = 7  # Stop polling addresses inactive for this long
+RETRY_DELAY_S = 15  # Re-poll delay after a failed or rate-limited poll
+LAG_SAMPLES = 1000  # Recent dispatch lags kept per tier for percentiles
+
+
+class _Entry:
+    __slots__ = ("tier", "last_polled", "last_seen", "due", "inflight")
+
+    def __init__(self, tier: int, last_polled: float | None, last_seen: float):
+        self.tier = tier
+        self.last_polled = last_polled
+        self.last_seen = last_seen
+        self.due = 0.0
+        self.inflight = False
+
+
+class PollScheduler:
+    """Thread-safe min-heap of addresses keyed by next-due time.
+
+    Heap items are (due, tier, seq, address). Rescheduling pushes a new item
+    and leaves the old one in place. `next()` skips items whose due no longer
+    matches the entry (lazy deletion), so every operation is O(log n).
+    """
+
+    def __init__(self, intervals: dict[int, float], active_boost: float = 0.5,
+                 max_age_s: float = ADDRESS_MAX_AGE_DAYS * 86400):
+        self._intervals = intervals
+        self._boost = active_boost
+        self._max_age = max_age_s
+        self._heap: list[tuple[float, int, int, str]] = []
+        self._entries: dict[str, _Entry] = {}
+        self._watched: set[str] = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._lags: dict[int, deque] = {t: deque(maxlen=LAG_SAMPLES) for t in intervals}
+        self._dispatched: dict[int, int] = {t: 0 for t in intervals}
+        self._max_lag: dict[int, float] = {t: 0.0 for t in intervals}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def interval(self, address: str, entry: _Entry) -> float:
+        interval = self._intervals.get(entry.tier, self._intervals[max(self._intervals)])
+        if address in self._watched:
+            interval = min(interval, self._intervals[1])
+        if entry.last_polled is not None and entry.last_seen > entry.last_polled:
+            interval *= self._boost  # traded since we last looked
+        return interval
+
+    def _schedule(self, address: str, entry: _Entry, due: float):
+        """Push a new heap item (must hold lock)."""
+        entry.due = due
+        heapq.heappush(self._heap, (due, entry.tier, next(self._seq), address))
+
+    def _due_for(self, address: str, entry: _Entry, now: float) -> float:
+        if entry.last_polled is None:
+            return now
+        return entry.last_polled + self.interval(address, entry)
+
+    def upsert(self, address: str, tier: int, last_polled: float | None,
+               last_seen: float, now: float | None = None):
+        """Add an address, or fold in a newer last_seen for a known one.
+
+        For known addresses the in-memory tier/last_polled win: they are
+        fresher than the DB row, which is written asynchronously.
+        """
+        now = now if now is not None else time.time()
+        with self._cond:
+            entry = self._entries.get(address)
+            if entry is None:
+                entry = _Entry(tier, last_polled, last_seen)
+                self._entries[address] = entry
+                self._schedule(address, entry, self._due_for(address, entry, now))
+                self._cond.notify()
+                return
+            if last_seen <= entry.last_seen:
+                return
+            entry.last_seen = last_seen
+            if entry.inflight:
+                return
+            due = self._due_for(address, entry, now)
+            if due < entry.due:  # activity pulls the deadline forward
+                self._schedule(address, entry, due)
+                self._cond.notify()
+
+    def set_watched(self, addresses: set[str], now: float | None = None):
+        """Replace the watched set; watched wallets poll at least every tier-1 interval."""
+        now = now if now is not None else time.time()
+        with self._cond:
+            added = addresses - self._watched
+            self._watched = set(addresses)
+            for addr in added:
+                entry = self._entries.get(addr)
+                if entry is None:
+                    entry = _Entry(1, None, now)
+                    self._entries[addr] = entry
+                elif entry.inflight:
+                    continue
+                due = self._due_for(addr, entry, now)
+                if entry.due == 0.0 or due < entry.due:
+                    self._schedule(addr, entry, due)
+            if added:
+                self._cond.notify_all()
+
+    def is_watched(self, address: str) -> bool:
+        return address in self._watched
+
+    def next(self, timeout: float | None = None, now_fn=time.time) -> tuple[str, int, float] | None:
+        """Block until the earliest address is due; returns (address, tier, due).
+
+        The address is marked in-flight until `done()` or `retry()`. Returns
+        None on timeout or `wake()`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = now_fn()
+                while self._heap:
+                    due, _, _, addr = self._heap[0]
+                    entry = self._entries.get(addr)
+                    if entry is None or entry.inflight or entry.due != due:
+                        heapq.heappop(self._heap)  # superseded
+                        continue
+                    if addr not in self._watched and entry.last_seen < now - self._max_age:
+                        heapq.heappop(self._heap)  # went quiet — stop polling
+                        del self._entries[addr]
+                        continue
+                    break
+                wait = None
+                if self._heap:
+                    due, tier, _, addr = self._heap[0]
+                    if due <= now:
+                        heapq.heappop(self._heap)
+                        self._entries[addr].inflight = True
+                        return addr, tier, due
+                    wait = due - now
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                if not self._cond.wait(wait):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return None
+
+    def record_lag(self, tier: int, lag: float):
+        """Record how late past its deadline an address was actually polled."""
+        lag = max(0.0, lag)
+        with self._cond:
+            self._lags.setdefault(tier, deque(maxlen=LAG_SAMPLES)).append(lag)
+            self._dispatched[tier] = self._dispatched.get(tier, 0) + 1
+            self._max_lag[tier] = max(self._max_lag.get(tier, 0.0), lag)
+
+    def done(self, address: str, tier: int, polled_at: float):
+        """Reschedule after a successful poll under the (possibly new) tier."""
+        with self._cond:
+            entry = self._entries.get(address)
+            if entry is None:
+                return
+            entry.inflight = False
+            entry.tier = tier
+            entry.last_polled = polled_at
+            self._schedule(address, entry, polled_at + self.interval(address, entry))
+            self._cond.notify()
+
+    def retry(self, address: str, delay: float, now: float | None = None):
+        """Reschedule after a failed poll without touching last_polled."""
+        now = now if now is not None else time.time()
+        with self._cond:
+            entry = self._entries.get(address)
+            if entry is None:
+                return
+            entry.inflight = False
+            self._schedule(address, entry, now + delay)
+            self._cond.notify()
+
+    def remove(self, address: str):
+        with self._cond:
+            self._entries.pop(address, None)
+
+    def wake(self):
+        """Wake every blocked `next()` caller (used on shutdown)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self, now: float | None = None) -> dict:
+        """Per-tier queue depth, overdue count, staleness and dispatch lag."""
+        now = now if now is not None else time.time()
+        with self._cond:
+            tiers: dict[int, dict] = {}
+            for entry in self._entries.values():
+                t = tiers.setdefault(entry.tier, {"tracked": 0, "overdue": 0, "max_staleness_s": 0.0})
+                t["tracked"] += 1
+                if not entry.inflight and entry.due <= now:
+                    t["overdue"] += 1
+                if entry.last_polled is not None:
+                    t["max_staleness_s"] = max(t["max_staleness_s"], now - entry.last_polled)
+            for tier, lags in self._lags.items():
+                t = tiers.setdefault(tier, {"tracked": 0, "overdue": 0, "max_staleness_s": 0.0})
+                ordered = sorted(lags)
+                n = len(ordered)
+                t["polls"] = self._dispatched.get(tier, 0)
+                t["lag_p50_s"] = round(ordered[n // 2], 3) if n else 0.0
+                t["lag_p95_s"] = round(ordered[min(n - 1, int(n * 0.95))], 3) if n else 0.0
+                t["lag_max_s"] = round(self._max_lag.get(tier, 0.0), 3)
+            for t in tiers.values():
+                t["max_staleness_s"] = round(t["max_staleness_s"], 1)
+            return {
+                "tracked": len(self._entries),
+                "watched": len(self._watched),
+                "heap_size": len(self._heap),
+                "tiers": dict(sorted(tiers.items())),
+            }
 
 
 class PositionPoller:
@@ -36,11 +268,23 @@ class PositionPoller:
         self._info = Info(base_url=base_url, skip_ws=True, timeout=10)
         self._smart_money: SmartMoneyEngine | None = None
         self._position_tracker: PositionChangeTracker | None = None
+        self._liq_heatmap = None
+        self._whale_tracker = None
         self._watched_addresses: set[str] = set()
         self._watched_refresh_at: float = 0
+        self._scheduler = PollScheduler(
+            {
+                1: config.tier1_interval,
+                2: config.tier2_interval,
+                3: config.tier3_interval,
+            },
+            active_boost=config.active_boost,
+        )
+        self._results: queue.Queue = queue.Queue()
+        self._refreshed_at: float = 0  # last addresses-table refresh (0 = never)
         self._thread: threading.Thread | None = None
+        self._workers: list[threading.Thread] = []
         self._stop_event = threading.Event()
-        self._executor = ThreadPoolExecutor(max_workers=config.workers)
         self._equity_snapshots: list[tuple[str, float, float]] = []  # (addr, equity, unrealized)
         self._equity_lock = threading.Lock()
         # Stats
@@ -48,6 +292,7 @@ class PositionPoller:
         self.total_positions_upserted = 0
         self.total_positions_deleted = 0
         self.total_errors = 0
+        self.total_flushes = 0
 
     def set_smart_money(self, engine: SmartMoneyEngine):
         """Wire the smart money engine for PnL snapshot recording."""
@@ -57,18 +302,34 @@ class PositionPoller:
         """Wire the position change tracker for watched wallet alerts."""
         self._position_tracker = tracker
 
+    def set_liq_heatmap(self, engine):
+        """Wire the liquidation heatmap engine for incremental position deltas."""
+        self._liq_heatmap = engine
+
+    def set_whale_tracker(self, tracker):
+        """Wire the whale tracker so cached position reads see each flush."""
+        self._whale_tracker = tracker
+
     def start(self):
+        for i in range(self._cfg.workers):
+            t = threading.Thread(target=self._worker, name=f"position-poll-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
         self._thread = threading.Thread(target=self._run, name="position-poller", daemon=True)
         self._thread.start()
 
     def _run(self):
+        """Refresh the schedule from the DB and flush worker results in batches."""
         log.info("PositionPoller starting (workers=%d)", self._cfg.workers)
         while not self._stop_event.is_set():
             try:
-                self._poll_cycle()
+                self._refresh_addresses()
+                self._flush_results(self._drain_results())
             except Exception:
-                log.exception("PositionPoller cycle error")
-            self._stop_event.wait(5)  # Brief sleep between cycles
+                log.exception("PositionPoller flush error")
+            self._stop_event.wait(self._cfg.flush_interval)
+        # Persist whatever the workers finished before shutdown
+        self._flush_results(self._drain_results())
 
     def _refresh_watched(self):
         """Refresh watched addresses set periodically (every 60s)."""
@@ -76,88 +337,105 @@ class PositionPoller:
         if self._position_tracker and now - self._watched_refresh_at > 60:
             self._watched_addresses = self._position_tracker.get_watched_addresses()
             self._watched_refresh_at = now
+            self._scheduler.set_watched(self._watched_addresses, now)
 
-    def _poll_cycle(self):
-        """Fetch stale addresses and poll them in parallel."""
-        now = time.time()
-        conn = self._db.conn
-        self._refresh_watched()
-
-        # Get addresses that are due for re-polling, ordered by tier then staleness
-        # Skip addresses not seen trading in ADDRESS_MAX_AGE_DAYS
-        active_cutoff = now - ADDRESS_MAX_AGE_DAYS * 86400
-        rows = conn.execute(
-            """
-            SELECT address, tier FROM addresses
-            WHERE last_seen >= ?
-            AND (
-                (tier = 1 AND (last_polled IS NULL OR last_polled < ?))
-                OR (tier = 2 AND (last_polled IS NULL OR last_polled < ?))
-                OR (tier = 3 AND (last_polled IS NULL OR last_polled < ?))
-            )
-            ORDER BY tier ASC, last_polled ASC
-            LIMIT 200
-            """,
-            (
-                active_cutoff,
-                now - self._cfg.tier1_interval,
-                now - self._cfg.tier2_interval,
-                now - self._cfg.tier3_interval,
-            ),
-        ).fetchall()
+    def _refresh_addresses(self, now: float | None = None):
+        """Feed new and recently active addresses into the scheduler.
 
-        # Always include watched addresses regardless of tier/staleness
-        polled_set = {r["address"] for r in rows}
-        for addr in self._watched_addresses:
-            if addr not in polled_set:
-                rows = list(rows) if not isinstance(rows, list) else rows
-                rows.append({"address": addr, "tier": 1})
-
-        if not rows:
-            self._stop_event.wait(2)
+        The first call loads every active address. Later calls only read rows
+        whose last_seen moved since the previous refresh (idx_addresses_last_seen).
+        """
+        now = now or time.time()
+        self._refresh_watched()
+        if self._refreshed_at and now - self._refreshed_at < self._cfg.refresh_interval:
             return
+        since = now - ADDRESS_MAX_AGE_DAYS * 86400
+        if self._refreshed_at:
+            # Small overlap so rows committed mid-refresh aren't missed
+            since = max(since, self._refreshed_at - self._cfg.refresh_interval)
+        rows = self._db.read_conn.execute(
+            "SELECT address, tier, last_polled, last_seen FROM addresses WHERE last_seen >= ?",
+            (since,),
+        ).fetchall()
+        for r in rows:
+            self._scheduler.upsert(r["address"], r["tier"], r["last_polled"], r["last_seen"], now)
+        self._refreshed_at = now
 
-        # Submit polling tasks
-        futures = {}
-        for row in rows:
-            if self._stop_event.is_set():
-                break
-            addr = row["address"]
-            fut = self._executor.submit(self._poll_address, addr)
-            futures[fut] = addr
-
-        # Collect results and batch upsert
-        all_positions = []
-        polled_addrs = []
-        polled_results: list[tuple[str, set[str]]] = []  # (addr, {coins with positions})
-        for fut in as_completed(futures):
-            addr = futures[fut]
+    def _worker(self):
+        """Continuously poll the earliest due address."""
+        while not self._stop_event.is_set():
+            item = self._scheduler.next(timeout=1.0)
+            if item is None:
+                continue
+            addr, tier, due = item
+            # Tier-1 and watched wallets jump ahead of bulk/normal API work
+            priority = CRITICAL if tier == 1 or self._scheduler.is_watched(addr) else NORMAL
+            if not self._rl.acquire(USER_STATE_WEIGHT, timeout=10, priority=priority):
+                self._scheduler.retry(addr, RETRY_DELAY_S)
+                continue
+            self._scheduler.record_lag(tier, time.time() - due)
             try:
-                positions, total_size, active_coins = fut.result()
-                if positions is not None:
-                    all_positions.extend(positions)
-                    polled_addrs.append((addr, total_size))
-                    polled_results.append((addr, active_coins))
+                positions, total_size, active_coins = self._poll_address(addr, acquire=False)
             except Exception:
                 self.total_errors += 1
                 log.debug("Poll failed for %s", addr)
+                positions, total_size, active_coins = None, 0, set()
+            if positions is None:
+                self._scheduler.retry(addr, RETRY_DELAY_S)
+                continue
+            self._scheduler.done(addr, self._classify(total_size), time.time())
+            self._results.put((addr, positions, total_size, active_coins))
+
+    def _classify(self, total_size: float) -> int:
+        """Tier for a total position size (mirrors the CASE in _update_address_meta)."""
+        if total_size >= self._cfg.whale_threshold:
+            return 1
+        if total_size >= self._cfg.mid_threshold:
+            return 2
+        return 3
+
+    def _drain_results(self) -> list[tuple]:
+        """Take every result the workers have queued since the last flush."""
+        batch = []
+        try:
+            while True:
+                batch.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _flush_results(self, batch: list[tuple]):
+        """Batch-write one flush worth of poll results."""
+        if not batch:
+            return
+        all_positions = []
+        polled_addrs = []
+        polled_results: list[tuple[str, set[str]]] = []  # (addr, {coins with positions})
+        for addr, positions, total_size, active_coins in batch:
+            all_positions.extend(positions)
+            polled_addrs.append((addr, total_size))
+            polled_results.append((addr, active_coins))
 
         # Batch upsert positions + delete closed ones
         if all_positions:
             self._upsert_positions(all_positions)
-        if polled_results:
-            self._delete_closed_positions(polled_results)
+        self._delete_closed_positions(polled_results)
+        if self._whale_tracker:
+            # Bump only once the queued position writes are committed, or a
+            # reader could cache the old positions under the new version
+            self._db.flush_writes()
+            self._whale_tracker.mark_changed()
 
         # Detect position changes for watched wallets
-        if self._position_tracker and self._watched_addresses and all_positions:
+        if self._position_tracker and self._watched_addresses:
             self._detect_position_changes(all_positions, polled_results)
 
         # Update address metadata
-        if polled_addrs:
-            self._update_address_meta(polled_addrs)
+        self._update_address_meta(polled_addrs)
 
         # Flush equity snapshots for smart money
         self._flush_equity_snapshots()
+        self.total_flushes += 1
 
     def _detect_position_changes(
         self, all_positions: list[dict], polled_results: list[tuple[str, set[str]]]
@@ -181,9 +459,15 @@ class PositionPoller:
             except Exception:
                 log.debug("Position change detection failed for %s", addr[:10])
 
-    def _poll_address(self, address: str) -> tuple[list[dict] | None, float, set[str]]:
-        """Poll a single address. Returns (positions, total_size_usd, active_coins)."""
-        if not self._rl.acquire(USER_STATE_WEIGHT, timeout=10):
+    def _poll_address(
+        self, address: str, acquire: bool = True,
+    ) -> tuple[list[dict] | None, float, set[str]]:
+        """Poll a single address. Returns (positions, total_size_usd, active_coins).
+
+        Workers acquire rate-limit weight themselves (acquire=False) so that
+        they can reschedule on timeout.
+        """
+        if acquire and not self._rl.acquire(USER_STATE_WEIGHT, timeout=10):
             return None, 0, set()
 
         try:
@@ -255,24 +539,28 @@ class PositionPoller:
 
     def _delete_closed_positions(self, polled_results: list[tuple[str, set[str]]]):
         """Delete DB rows for positions an address no longer holds."""
-        conn = self._db.conn
+        polled_results = list(polled_results)
+
+        def _op(conn):
+            for addr, active_coins in polled_results:
+                if active_coins:
+                    placeholders = ",".join("?" for _ in active_coins)
+                    cur = conn.execute(
+                        f"DELETE FROM positions WHERE address = ? AND coin NOT IN ({placeholders})",
+                        (addr, *active_coins),
+                    )
+                else:
+                    cur = conn.execute(
+                        "DELETE FROM positions WHERE address = ?", (addr,)
+                    )
+                self.total_positions_deleted += cur.rowcount
+
         try:
-            with self._db.write_lock:
-                for addr, active_coins in polled_results:
-                    if active_coins:
-                        placeholders = ",".join("?" for _ in active_coins)
-                        cur = conn.execute(
-                            f"DELETE FROM positions WHERE address = ? AND coin NOT IN ({placeholders})",
-                            (addr, *active_coins),
-                        )
-                    else:
-                        cur = conn.execute(
-                            "DELETE FROM positions WHERE address = ?", (addr,)
-                        )
-                    self.total_positions_deleted += cur.rowcount
-                conn.commit()
+            self._db.write(_op)
         except Exception:
             log.exception("Failed to delete closed positions")
+        if self._liq_heatmap:
+            self._liq_heatmap.on_positions_closed(polled_results)
 
     def _flush_equity_snapshots(self):
         """Write queued equity snapshots for smart money tracking."""
@@ -290,70 +578,68 @@ class PositionPoller:
 
     def _upsert_positions(self, positions: list[dict]):
         """Batch INSERT OR REPLACE positions."""
-        conn = self._db.conn
         try:
-            with self._db.write_lock:
-                conn.executemany(
-                    """
-                    INSERT OR REPLACE INTO positions
-                    (address, coin, side, size, size_usd, entry_px, mark_px,
-                     leverage, margin_used, liq_px, unrealized_pnl, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    [
-                        (
-                            p["address"], p["coin"], p["side"], p["size"], p["size_usd"],
-                            p["entry_px"], p["mark_px"], p["leverage"], p["margin_used"],
-                            p["liq_px"], p["unrealized_pnl"], p["updated_at"],
-                        )
-                        for p in positions
-                    ],
-                )
-                conn.commit()
+            self._db.write_many(
+                """
+                INSERT OR REPLACE INTO positions
+                (address, coin, side, size, size_usd, entry_px, mark_px,
+                 leverage, margin_used, liq_px, unrealized_pnl, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        p["address"], p["coin"], p["side"], p["size"], p["size_usd"],
+                        p["entry_px"], p["mark_px"], p["leverage"], p["margin_used"],
+                        p["liq_px"], p["unrealized_pnl"], p["updated_at"],
+                    )
+                    for p in positions
+                ],
+            )
             self.total_positions_upserted += len(positions)
         except Exception:
             log.exception("Failed to upsert %d positions", len(positions))
+        if self._liq_heatmap:
+            self._liq_heatmap.on_positions_upserted(positions)
 
     def _update_address_meta(self, polled: list[tuple[str, float]]):
         """Update last_polled + reclassify tiers."""
         now = time.time()
-        conn = self._db.conn
         try:
-            with self._db.write_lock:
-                conn.executemany(
-                    """
-                    UPDATE addresses SET
-                        last_polled = ?,
-                        total_size_usd = ?,
-                        tier = CASE
-                            WHEN ? >= ? THEN 1
-                            WHEN ? >= ? THEN 2
-                            ELSE 3
-                        END
-                    WHERE address = ?
-                    """,
-                    [
-                        (
-                            now, total_size,
-                            total_size, self._cfg.whale_threshold,
-                            total_size, self._cfg.mid_threshold,
-                            addr,
-                        )
-                        for addr, total_size in polled
-                    ],
-                )
-                conn.commit()
+            self._db.write_many(
+                """
+                UPDATE addresses SET
+                    last_polled = ?,
+                    total_size_usd = ?,
+                    tier = CASE
+                        WHEN ? >= ? THEN 1
+                        WHEN ? >= ? THEN 2
+                        ELSE 3
+                    END
+                WHERE address = ?
+                """,
+                [
+                    (
+                        now, total_size,
+                        total_size, self._cfg.whale_threshold,
+                        total_size, self._cfg.mid_threshold,
+                        addr,
+                    )
+                    for addr, total_size in polled
+                ],
+            )
         except Exception:
             log.exception("Failed to update address meta")
 
     def stop(self):
         self._stop_event.set()
-        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._scheduler.wake()
+        for t in self._workers:
+            t.join(timeout=15)
         if self._thread:
             self._thread.join(timeout=5)
 
     def stats(self) -> dict:
-        conn = self._db.conn
+        conn = self._db.read_conn
         counts = conn.execute(
             "SELECT tier, COUNT(*) as cnt FROM addresses GROUP BY tier"
         ).fetchall()
@@ -362,5 +648,8 @@ class PositionPoller:
             "total_polls": self.total_polls,
             "total_positions_upserted": self.total_positions_upserted,
             "total_errors": self.total_errors,
+            "total_flushes": self.total_flushes,
+            "queued_results": self._results.qsize(),
             "tier_counts": tier_counts,
+            "scheduler": self._scheduler.stats(),
         }
@@ -1,38 +1,57 @@
-"""WebSocket trade stream — address discovery + raw trade data for order flow."""
+"""WebSocket trade stream — address discovery + raw trade data for order flow.
+
+Coins are sharded across several WebSocket connections (`shards`), each
+with its own `Info` client, supervisor thread, health check and reconnect
+loop. One silent or dropped socket reconnects only its own coins, and no
+single socket or callback thread carries the whole market. Coins are dealt
+round-robin in volume order, so every shard carries some liquid markets and
+a quiet shard really is a dead one.
+
+`top_n` widens the configured coin list with the top-N perps by 24h notional
+volume, resolved once from `metaAndAssetCtxs` at startup.
+
+Every coin lives on exactly one shard. Each per-coin structure (TradeBuffer,
+OrderFlow accumulator, TickFlow buckets) therefore keeps a single writer. Shared state
+(address batch, flow buckets, counters) is behind locks.
+"""
 
 import time
 import threading
 import logging
-from collections import deque
 from typing import Any
 
 from hyperliquid.info import Info
 
 from hynous_data.core.db import Database
+from hynous_data.core.trade_buffer import TradeBuffer
 from hynous_data.core.utils import safe_float
 
 log = logging.getLogger(__name__)
 
-# Shared trade buffer for OrderFlow engine (thread-safe deques per coin)
-# Format: {"coin": str, "side": "B"|"A", "px": float, "sz": float, "time": int}
-_trade_buffers: dict[str, deque] = {}
+# Shared per-coin trade store (columnar ring buffer per coin). Read windows via
+# buf.window(since_ms) → TradeWindow of detached column copies (time, px, sz, side).
+_trade_buffers: dict[str, TradeBuffer] = {}
 _buffer_lock = threading.Lock()
 
-MAX_BUFFER_SIZE = 5_000  # per-coin trade buffer cap (was 50K — reduced for memory)
+# Per-coin trade buffer cap. Columnar storage is ~50 bytes/trade (mirrored),
+# so 50K trades ≈ 2.5MB/coin — the old 5K cap was for dict-per-trade deques.
+MAX_BUFFER_SIZE = 50_000
 WS_DEAD_THRESHOLD = 30  # seconds with no trades = WS considered dead
 WS_RECONNECT_DELAY = 5  # seconds to wait before reconnecting
+WS_SETTLE_DELAY = 2  # seconds between opening a WS and subscribing
+SHARD_STAGGER_S = 0.5  # delay between initial shard connects
 
 
-def get_trade_buffer(coin: str) -> deque:
+def get_trade_buffer(coin: str) -> TradeBuffer:
     """Get or create a trade buffer for a coin."""
     with _buffer_lock:
         if coin not in _trade_buffers:
-            _trade_buffers[coin] = deque(maxlen=MAX_BUFFER_SIZE)
+            _trade_buffers[coin] = TradeBuffer(MAX_BUFFER_SIZE)
         return _trade_buffers[coin]
 
 
-def get_all_buffers() -> dict[str, deque]:
-    """Return snapshot copy of all trade buffers (keys only, deques are shared)."""
+def get_all_buffers() -> dict[str, TradeBuffer]:
+    """Return snapshot copy of all trade buffers (keys only, buffers are shared)."""
     with _buffer_lock:
         return dict(_trade_buffers)
 
@@ -43,21 +62,147 @@ def clear_all_buffers():
         _trade_buffers.clear()
 
 
+def assign_shards(coins: list[str], n: int) -> list[list[str]]:
+    """Deal coins round-robin into at most `n` non-empty shards.
+
+    Pass coins busiest first. Every shard then gets a share of the liquid
+    markets and never sits silent long enough to look dead.
+    """
+    if not coins:
+        return []
+    n = max(1, min(n, len(coins)))
+    return [coins[i::n] for i in range(n)]
+
+
+def top_perps(info: Info, n: int) -> list[str]:
+    """Names of the top-`n` listed perps by 24h notional volume, busiest first."""
+    meta, ctxs = info.meta_and_asset_ctxs()
+    ranked = []
+    for asset, ctx in zip(meta.get("universe", []), ctxs):
+        if asset.get("isDelisted"):
+            continue
+        ranked.append((safe_float(ctx.get("dayNtlVlm", 0)), asset["name"]))
+    ranked.sort(key=lambda r: r[0], reverse=True)
+    return [name for _, name in ranked[:n]]
+
+
+class _Shard:
+    """One WebSocket connection carrying the trades of a slice of the coins."""
+
+    def __init__(self, stream: "TradeStream", index: int, coins: list[str]):
+        self.stream = stream
+        self.index = index
+        self.coins = coins
+        self.info: Info | None = None
+        self.thread: threading.Thread | None = None
+        self.connected = False
+        self.subscribed: list[str] = []
+        self.last_trade_time = 0.0
+        self.reconnect_count = 0
+        self.trades = 0
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self._run_with_reconnect, name=f"trade-stream-{self.index}", daemon=True,
+        )
+        self.thread.start()
+
+    def _run_with_reconnect(self):
+        """Outer loop: reconnects this shard's WS if it dies."""
+        stop = self.stream._stop_event
+        if stop.wait(self.index * SHARD_STAGGER_S):
+            return
+        while not stop.is_set():
+            try:
+                self._connect_and_subscribe()
+                self._watch()
+            except Exception:
+                log.exception("TradeStream shard %d error — will reconnect in %ds",
+                              self.index, WS_RECONNECT_DELAY)
+            finally:
+                self.cleanup()
+
+            if not stop.is_set():
+                self.reconnect_count += 1
+                log.warning("TradeStream shard %d reconnecting (attempt #%d)",
+                            self.index, self.reconnect_count)
+                stop.wait(WS_RECONNECT_DELAY)
+
+    def _connect_and_subscribe(self):
+        stop = self.stream._stop_event
+        self.info = Info(base_url=self.stream._base_url)
+        if stop.wait(WS_SETTLE_DELAY):
+            return
+        self.subscribed = []
+        for coin in self.coins:
+            if stop.is_set():
+                return
+            self.info.subscribe({"type": "trades", "coin": coin}, self.on_trade)
+            self.subscribed.append(coin)
+        self.connected = True
+        self.last_trade_time = time.time()
+        log.info("TradeStream shard %d subscribed to %d coins", self.index, len(self.subscribed))
+
+    def _watch(self):
+        """Return once this shard has been silent past WS_DEAD_THRESHOLD (or on stop)."""
+        stop = self.stream._stop_event
+        while not stop.wait(1.0):
+            silence = time.time() - self.last_trade_time
+            if silence > WS_DEAD_THRESHOLD:
+                log.warning("TradeStream shard %d: no trades for %.0fs — WS dead, forcing reconnect",
+                            self.index, silence)
+                return
+
+    def cleanup(self):
+        """Disconnect this shard's WS."""
+        self.connected = False
+        info, self.info = self.info, None
+        if info:
+            try:
+                info.disconnect_websocket()
+            except Exception:
+                pass
+
+    def on_trade(self, msg: dict[str, Any]):
+        self.stream._on_trade(msg, self)
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.connected and (time.time() - self.last_trade_time) < WS_DEAD_THRESHOLD
+
+    def stats(self, now: float) -> dict:
+        return {
+            "coins": len(self.coins),
+            "subscribed": len(self.subscribed),
+            "connected": self.connected,
+            "healthy": self.is_healthy,
+            "trades": self.trades,
+            "last_trade_age_s": round(now - self.last_trade_time, 1) if self.last_trade_time else None,
+            "reconnect_count": self.reconnect_count,
+        }
+
+
 class TradeStream:
-    """Subscribes to trades WS for all coins, extracts addresses, buffers trades.
+    """Subscribes to trades WS over sharded connections, extracts addresses, buffers trades.
 
-    Includes health monitoring: if no trades arrive for 30s, kills and reconnects WS.
+    Includes health monitoring: a shard with no trades for 30s kills and reconnects its WS.
     """
 
-    # Only subscribe to tracked coins. Subscribing to all 1000+ coins wastes
-    # 600-800MB RAM on trade buffers that no one reads.
+    # Default coin set when none is configured. Columnar buffers cost ~2.5MB/coin,
+    # so tracking the top 100 perps is fine; all 1000+ still wastes WS bandwidth.
     TRACKED_COINS: list[str] = ["BTC", "ETH", "SOL"]
 
-    def __init__(self, db: Database, base_url: str = "https://api.hyperliquid.xyz", coins: list[str] | None = None):
+    def __init__(self, db: Database, base_url: str = "https://api.hyperliquid.xyz",
+                 coins: list[str] | None = None, shards: int = 1, top_n: int = 0):
         self._db = db
         self._base_url = base_url
         self._tracked_coins = coins or self.TRACKED_COINS
-        self._info: Info | None = None
+        self._num_shards = max(1, shards)
+        self._top_n = top_n
+        self._order_flow = None  # OrderFlowEngine, wired via set_order_flow()
+        self._tick_flow = None  # TickFlow, wired via set_tick_flow()
+        self._recorder = None  # FeedRecorder, wired via set_recorder()
+        self._shards: list[_Shard] = []
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
         # Batch address discovery
@@ -69,94 +214,82 @@ class TradeStream:
         self._flow_buckets: dict[tuple[str, int], dict] = {}  # (coin, bucket) → {buy, sell}
         self._flow_lock = threading.Lock()
         self._last_flow_flush: float = 0.0
-        # Health monitoring
+        # Health monitoring (per-connection state lives on each _Shard)
         self._last_trade_time = 0.0
-        self._reconnect_count = 0
-        self._ws_connected = False
         # Stats
+        self._count_lock = threading.Lock()
         self.total_trades = 0
         self.total_addresses_discovered = 0
         self.total_invalid_trades = 0
-        self._subscribed_coins: list[str] = []
 
-    def start(self):
-        """Start the trade stream in a background thread."""
-        clear_all_buffers()  # Prevent stale data from prior runs
-        self._thread = threading.Thread(target=self._run_with_reconnect, name="trade-stream", daemon=True)
-        self._thread.start()
+    def set_order_flow(self, engine):
+        """Wire the order flow engine so every trade updates its CVD buckets."""
+        self._order_flow = engine
 
-    def _run_with_reconnect(self):
-        """Outer loop: reconnects WS if it dies."""
-        while not self._stop_event.is_set():
-            try:
-                self._connect_and_subscribe()
-                self._monitor_loop()
-            except Exception:
-                log.exception("TradeStream error — will reconnect in %ds", WS_RECONNECT_DELAY)
-            finally:
-                self._cleanup_ws()
+    def set_tick_flow(self, flow):
+        """Wire TickCollector's rolling trade buckets so tick features update on arrival."""
+        self._tick_flow = flow
 
-            if not self._stop_event.is_set():
-                self._reconnect_count += 1
-                log.warning("TradeStream reconnecting (attempt #%d)", self._reconnect_count)
-                self._stop_event.wait(WS_RECONNECT_DELAY)
+    def set_recorder(self, recorder):
+        """Wire a FeedRecorder so every raw trades message is appended to disk."""
+        self._recorder = recorder
 
-    def _connect_and_subscribe(self):
-        """Connect WS and subscribe to tracked coins only.
-
-        Previously subscribed to ALL 1000+ coins, wasting 600-800MB on
-        trade buffers. Now only BTC/ETH/SOL (or configured coins).
-        """
-        log.info("TradeStream connecting to WS...")
-        self._info = Info(base_url=self._base_url)
-        time.sleep(2)
-
-        coins = self._tracked_coins
-        log.info("Subscribing to trades for %d coins: %s", len(coins), coins)
-
-        self._subscribed_coins.clear()
-        for coin in coins:
-            if self._stop_event.is_set():
-                return
-            self._info.subscribe({"type": "trades", "coin": coin}, self._on_trade)
-            self._subscribed_coins.append(coin)
+    def start(self):
+        """Start the trade stream: shard connections plus the flush thread."""
+        clear_all_buffers()  # Prevent stale data from prior runs
+        self._thread = threading.Thread(target=self._run, name="trade-stream", daemon=True)
+        self._thread.start()
 
-        self._ws_connected = True
-        self._last_trade_time = time.time()
-        log.info("TradeStream subscribed to %d coins", len(self._subscribed_coins))
+    def _resolve_coins(self) -> list[str]:
+        """Configured coins, widened by the top-N perps by volume (busiest first)."""
+        coins = list(self._tracked_coins)
+        if self._top_n <= 0:
+            return coins
+        try:
+            top = top_perps(Info(base_url=self._base_url, skip_ws=True, timeout=10), self._top_n)
+        except Exception:
+            log.warning("TradeStream: failed to resolve top %d perps, using configured coins",
+                        self._top_n, exc_info=True)
+            return coins
+        return top + [c for c in coins if c not in top]
+
+    def _run(self):
+        """Resolve coins, start one shard per slice, then flush until stopped."""
+        coins = self._resolve_coins()
+        if self._stop_event.is_set():
+            return
+        self._shards = [
+            _Shard(self, i, chunk)
+            for i, chunk in enumerate(assign_shards(coins, self._num_shards))
+        ]
+        log.info("TradeStream subscribing to %d coins over %d connections",
+                 len(coins), len(self._shards))
+        for shard in self._shards:
+            shard.start()
+        self._monitor_loop()
 
     def _monitor_loop(self):
-        """Flush addresses + trade flow + check WS health."""
+        """Flush addresses + trade flow (shards watch their own health)."""
         while not self._stop_event.is_set():
             self._flush_addresses()
             self._flush_trade_flow()
-
-            # Health check: if no trades for WS_DEAD_THRESHOLD, force reconnect
-            if self._last_trade_time > 0:
-                silence = time.time() - self._last_trade_time
-                if silence > WS_DEAD_THRESHOLD:
-                    log.warning("TradeStream: no trades for %.0fs — WS dead, forcing reconnect", silence)
-                    return  # Exit to trigger reconnect
-
             self._stop_event.wait(self._flush_interval)
 
-    def _cleanup_ws(self):
-        """Disconnect current WS."""
-        self._ws_connected = False
-        if self._info:
-            try:
-                self._info.disconnect_websocket()
-            except Exception:
-                pass
-            self._info = None
+    def _on_trade(self, msg: dict[str, Any], shard: _Shard | None = None, now: float | None = None):
+        """Callback for each trade message from a shard's WS thread.
 
-    def _on_trade(self, msg: dict[str, Any]):
-        """Callback for each trade message from WS."""
+        `now` overrides the receive time (FeedReplayer passes the recorded one).
+        """
         if msg.get("channel") != "trades":
             return
 
-        now = time.time()
+        now = time.time() if now is None else now
+        if self._recorder is not None:
+            self._recorder.record(msg, now)
         self._last_trade_time = now
+        if shard is not None:
+            shard.last_trade_time = now
+        valid = invalid = 0
 
         for trade in msg.get("data", []):
             # Validate trade data
@@ -166,10 +299,10 @@ class TradeStream:
             side = trade.get("side", "")
 
             if not coin or px <= 0 or sz <= 0 or side not in ("B", "A"):
-                self.total_invalid_trades += 1
+                invalid += 1
                 continue
 
-            self.total_trades += 1
+            valid += 1
 
             # Accumulate into 5-minute buy/sell buckets for trade_flow_history
             trade_time_s = trade.get("time", 0) / 1000 if trade.get("time", 0) > 1e12 else trade.get("time", 0)
@@ -184,15 +317,13 @@ class TradeStream:
                 else:
                     self._flow_buckets[flow_key]["sell"] += notional
 
-            # Buffer trade for order flow
-            buf = get_trade_buffer(coin)
-            buf.append({
-                "coin": coin,
-                "side": side,
-                "px": px,
-                "sz": sz,
-                "time": trade.get("time", 0),
-            })
+            # Buffer trade + feed incremental CVD and tick-flow buckets
+            trade_time_ms = int(trade.get("time", 0))
+            get_trade_buffer(coin).append(trade_time_ms, px, sz, side)
+            if self._order_flow is not None:
+                self._order_flow.record_trade(coin, trade_time_ms, notional, side == "B")
+            if self._tick_flow is not None:
+                self._tick_flow.record_trade(coin, trade_time_ms, px, sz, side == "B")
 
             # Record liquidation events (SPEC-01)
             if trade.get("liquidation") or trade.get("liq"):
@@ -210,14 +341,14 @@ class TradeStream:
                             if users_list and isinstance(users_list, list)
                             else None
                         )
-                        with self._db.write_lock:
-                            self._db.conn.execute(
-                                "INSERT INTO liquidation_events "
-                                "(coin, occurred_at, side, size_usd, price, address) "
-                                "VALUES (?, ?, ?, ?, ?, ?)",
-                                (coin, now, normalized_side, size_usd, px, address),
-                            )
-                            self._db.conn.commit()
+                        # Queued for group commit; never block the WS callback on disk
+                        self._db.write_sql(
+                            "INSERT INTO liquidation_events "
+                            "(coin, occurred_at, side, size_usd, price, address) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (coin, now, normalized_side, size_usd, px, address),
+                            block=False,
+                        )
                 except Exception:
                     pass  # never crash trade stream for liq recording
 
@@ -241,6 +372,13 @@ class TradeStream:
                                 "count": 1,
                             }
 
+        # Shards call in concurrently; count once per message
+        with self._count_lock:
+            self.total_trades += valid
+            self.total_invalid_trades += invalid
+        if shard is not None:
+            shard.trades += valid
+
     def _flush_addresses(self):
         """Batch insert/update discovered addresses to SQLite."""
         with self._addr_lock:
@@ -249,37 +387,39 @@ class TradeStream:
             batch = self._pending_addresses.copy()
             self._pending_addresses.clear()
 
-        conn = self._db.conn
-        try:
-            with self._db.write_lock:
-                # Count only genuinely new inserts (not re-seen addresses)
-                before = conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
-                conn.executemany(
-                    """
-                    INSERT INTO addresses (address, first_seen, last_seen, trade_count)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(address) DO UPDATE SET
-                        last_seen = MAX(last_seen, excluded.last_seen),
-                        trade_count = trade_count + excluded.trade_count
-                    """,
-                    [
-                        (addr, d["first_seen"], d["last_seen"], d["count"])
-                        for addr, d in batch.items()
-                    ],
-                )
-                conn.commit()
-                after = conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+        rows = [
+            (addr, d["first_seen"], d["last_seen"], d["count"])
+            for addr, d in batch.items()
+        ]
+
+        def _op(conn):
+            # Count only genuinely new inserts (not re-seen addresses)
+            before = conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+            conn.executemany(
+                """
+                INSERT INTO addresses (address, first_seen, last_seen, trade_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(address) DO UPDATE SET
+                    last_seen = MAX(last_seen, excluded.last_seen),
+                    trade_count = trade_count + excluded.trade_count
+                """,
+                rows,
+            )
+            after = conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
             self.total_addresses_discovered += (after - before)
+
+        try:
+            self._db.write(_op)
         except Exception:
             log.exception("Failed to flush %d addresses", len(batch))
 
-    def _flush_trade_flow(self):
+    def _flush_trade_flow(self, now: float | None = None):
         """Write accumulated 5-minute buy/sell volume buckets to trade_flow_history.
 
         Only flushes completed buckets (older than current 5-min window).
         This populates the table that satellite ML reads for CVD features.
         """
-        now = time.time()
+        now = time.time() if now is None else now
         # Only flush every 60s to avoid excessive DB writes
         if now - self._last_flow_flush < 60:
             return
@@ -304,41 +444,47 @@ class TradeStream:
                 (coin, float(bucket_ts), data["buy"], data["sell"])
                 for (coin, bucket_ts), data in completed.items()
             ]
-            with self._db.write_lock:
-                self._db.conn.executemany(
-                    "INSERT OR REPLACE INTO trade_flow_history "
-                    "(coin, recorded_at, buy_volume_usd, sell_volume_usd) "
-                    "VALUES (?, ?, ?, ?)",
-                    rows,
-                )
-                self._db.conn.commit()
+            self._db.write_many(
+                "INSERT OR REPLACE INTO trade_flow_history "
+                "(coin, recorded_at, buy_volume_usd, sell_volume_usd) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
             log.debug("Flushed %d trade_flow buckets", len(rows))
         except Exception:
             log.exception("Failed to flush trade_flow buckets")
 
     def stop(self):
         self._stop_event.set()
-        self._cleanup_ws()
+        for shard in self._shards:
+            shard.cleanup()
+        for shard in self._shards:
+            if shard.thread:
+                shard.thread.join(timeout=5)
         if self._thread:
             self._thread.join(timeout=5)
 
     @property
     def is_healthy(self) -> bool:
-        """True if WS is connected and received trades recently."""
-        if not self._ws_connected:
-            return False
-        return (time.time() - self._last_trade_time) < WS_DEAD_THRESHOLD
+        """True if every shard's WS is connected and received trades recently."""
+        return bool(self._shards) and all(s.is_healthy for s in self._shards)
 
     def stats(self) -> dict:
         now = time.time()
+        buffers = get_all_buffers()
+        shards = list(self._shards)
         return {
-            "subscribed_coins": len(self._subscribed_coins),
+            "subscribed_coins": sum(len(s.subscribed) for s in shards),
+            "buffered_trades": sum(len(b) for b in buffers.values()),
+            "buffer_mb": round(sum(b.nbytes for b in buffers.values()) / 1e6, 1),
             "total_trades": self.total_trades,
             "total_invalid_trades": self.total_invalid_trades,
             "total_addresses_discovered": self.total_addresses_discovered,
             "pending_flush": len(self._pending_addresses),
-            "ws_connected": self._ws_connected,
+            "ws_connected": bool(shards) and all(s.connected for s in shards),
             "ws_healthy": self.is_healthy,
             "last_trade_age_s": round(now - self._last_trade_time, 1) if self._last_trade_time else None,
-            "reconnect_count": self._reconnect_count,
+            "reconnect_count": sum(s.reconnect_count for s in shards),
+            "shards_healthy": sum(1 for s in shards if s.is_healthy),
+            "shards": [s.stats(now) for s in shards],
         }
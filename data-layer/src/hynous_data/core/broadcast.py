@@ -0,0 +1,166 @@
+"""Broadcast hub — publish once, fan out to many WebSocket subscribers.
+
+A producer thread (TickCollector) calls `publish(topic, payload)` once per
+snapshot. The hub serializes it once as a full frame and once as a delta
+frame (only fields that changed since the topic's previous payload), then
+hands both to every event loop with subscribers in a single
+`call_soon_threadsafe`. Each subscriber gets a pre-serialized string. Sending
+costs no JSON work per client, so N dashboards cost about the same as one.
+
+Subscribers filter by topic (coin) and opt into deltas. The first frame a
+delta subscriber sees for a topic is always a full frame. Each subscriber has
+a bounded queue. A consumer that falls `max_queue` frames behind is dropped:
+its queue is replaced by a single `None` sentinel and the route closes the
+socket. It never stalls the producer or the other clients.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+# Keys always carried in delta frames so clients can apply them
+_DELTA_KEYS = ("coin", "timestamp")
+
+
+def _dumps(payload: dict) -> str:
+    # Same encoding Starlette's send_json uses
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+class Subscriber:
+    """One consumer's view of the hub. Read frames with `await sub.get()`."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, topics: set[str] | None,
+                 delta: bool, max_queue: int):
+        self.loop = loop
+        self.topics = topics
+        self.delta = delta
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.seen: set[str] = set()  # topics that already got a full frame
+        self.dropped = False
+        self.frames_sent = 0
+        self.connected_at = time.time()
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    async def get(self) -> str | None:
+        """Next frame, or None once this subscriber has been dropped."""
+        return await self.queue.get()
+
+    def _offer(self, topic: str, full: str, delta: str | None) -> bool:
+        """Enqueue the right frame (event-loop thread). False if it overflowed."""
+        if self.dropped or not self.wants(topic):
+            return True
+        if self.delta and delta is not None and topic in self.seen:
+            frame = delta
+        else:
+            frame = full
+            self.seen.add(topic)
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Wake the consumer with the drop sentinel
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+        self.frames_sent += 1
+        return True
+
+
+class BroadcastHub:
+    """Thread-safe publish, asyncio fan-out."""
+
+    def __init__(self, max_queue: int = 64):
+        self._max_queue = max_queue
+        self._subs: dict[asyncio.AbstractEventLoop, set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._last: dict[str, dict] = {}        # topic → last payload
+        self._last_full: dict[str, str] = {}    # topic → last full frame
+        # Stats
+        self.total_published = 0
+        self.total_frames = 0
+        self.total_dropped = 0
+        self.total_bytes_serialized = 0
+
+    # ------------------------------------------------------------------
+    # Producer side (any thread)
+    # ------------------------------------------------------------------
+
+    def publish(self, topic: str, payload: dict[str, Any]) -> None:
+        """Serialize once and schedule fan-out on every subscriber loop."""
+        full = _dumps(payload)
+        with self._lock:
+            prev = self._last.get(topic)
+            self._last[topic] = payload
+            self._last_full[topic] = full
+            loops = list(self._subs)
+        delta = None
+        if prev is not None:
+            changed = {k: v for k, v in payload.items() if prev.get(k) != v}
+            for k in _DELTA_KEYS:
+                if k in payload:
+                    changed[k] = payload[k]
+            changed["delta"] = True
+            delta = _dumps(changed)
+        self.total_published += 1
+        self.total_bytes_serialized += len(full) + (len(delta) if delta else 0)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._fanout, loop, topic, full, delta)
+            except RuntimeError:
+                # Loop closed under us — forget its subscribers
+                with self._lock:
+                    self._subs.pop(loop, None)
+
+    def _fanout(self, loop: asyncio.AbstractEventLoop, topic: str, full: str, delta: str | None):
+        with self._lock:
+            subs = list(self._subs.get(loop, ()))
+        for sub in subs:
+            before = sub.frames_sent
+            if not sub._offer(topic, full, delta):
+                self.total_dropped += 1
+                log.info("Dropped slow WS subscriber (%d frames behind)", self._max_queue)
+            self.total_frames += sub.frames_sent - before
+
+    # ------------------------------------------------------------------
+    # Consumer side (event-loop thread)
+    # ------------------------------------------------------------------
+
+    def subscribe(self, topics: set[str] | None = None, delta: bool = False) -> Subscriber:
+        """Register a subscriber on the running loop; primes it with the latest frames."""
+        loop = asyncio.get_running_loop()
+        sub = Subscriber(loop, topics, delta, self._max_queue)
+        with self._lock:
+            self._subs.setdefault(loop, set()).add(sub)
+            latest = [(t, f) for t, f in self._last_full.items() if sub.wants(t)]
+        for topic, full in latest:
+            sub._offer(topic, full, None)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.loop)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.loop]
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = [s for group in self._subs.values() for s in group]
+        return {
+            "subscribers": len(subs),
+            "delta_subscribers": sum(1 for s in subs if s.delta),
+            "published": self.total_published,
+            "frames_sent": self.total_frames,
+            "dropped_subscribers": self.total_dropped,
+            "bytes_serialized": self.total_bytes_serialized,
+        }
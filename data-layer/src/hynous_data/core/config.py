@@ -20,23 +20,41 @@ def _find_project_root() -> Path:
 class ServerConfig:
     host: str = "127.0.0.1"
     port: int = 8100
+    ws_max_queue: int = 64  # Frames a WS client may lag before it is dropped
+    response_cache_entries: int = 1024  # Pre-serialized read responses kept (LRU)
 
 
 @dataclass
 class DbConfig:
     path: str = "storage/hynous-data.db"
     prune_days: int = 7
+    # Write-behind group-commit writer
+    writer_queue_size: int = 10_000   # Max queued writes before backpressure/drops
+    writer_batch_size: int = 500      # Max ops per commit
+    writer_max_delay_ms: int = 250    # Max wait after the first op before committing
+    # Per-thread read connections
+    read_cache_mb: int = 32           # Page cache per read connection
+    read_mmap_mb: int = 256           # Memory-mapped I/O per read connection
+    slow_query_ms: float = 250        # Log reads slower than this
+    # Time-partitioned historical series
+    history_retention_days: int = 90  # Partitions older than this are dropped
+    history_partition_days: int = 7   # Width of one partition table
 
 
 @dataclass
 class RateLimitConfig:
     max_weight_per_min: int = 1200
     safety_pct: int = 85
+    reserve_critical_pct: int = 20  # budget only critical calls may spend
+    reserve_normal_pct: int = 10    # budget bulk calls may not spend
 
 
 @dataclass
 class TradeStreamConfig:
     enabled: bool = True
+    coins: list[str] = field(default_factory=lambda: ["BTC", "ETH", "SOL"])
+    top_n: int = 0      # also subscribe the top-N perps by 24h volume (0 = coins only)
+    shards: int = 4     # WebSocket connections to spread the coins over
 
 
 @dataclass
@@ -48,6 +66,10 @@ class PositionPollerConfig:
     tier3_interval: int = 600
     whale_threshold: float = 1_000_000
     mid_threshold: float = 100_000
+    # Deadline scheduler
+    active_boost: float = 0.5       # Interval multiplier for addresses that traded since last poll
+    refresh_interval: int = 30      # Seconds between incremental addresses-table reads
+    flush_interval: float = 1.0     # Seconds between batched result writes
 
 
 @dataclass
@@ -63,14 +85,16 @@ class HlpTrackerConfig:
 
 @dataclass
 class HeatmapConfig:
-    recompute_interval: int = 60  # was 10s — positions don't change that fast
+    recompute_interval: int = 60  # staleness/bot-flag sweep (deltas apply immediately)
     bucket_count: int = 50
     range_pct: float = 15.0
+    rebucket_drift_pct: float = 0.5  # re-anchor buckets once mid moves this far
 
 
 @dataclass
 class OrderFlowConfig:
     windows: list[int] = field(default_factory=lambda: [60, 300, 900, 3600])
+    horizon: int = 14400  # Longest custom window served (seconds of per-second buckets)
 
 
 @dataclass
@@ -84,6 +108,17 @@ class TickCollectorConfig:
     enabled: bool = True
     coins: list[str] = field(default_factory=lambda: ["BTC"])
     satellite_db_path: str = "storage/satellite.db"
+    # Cold storage: closed days are compacted into npz segments
+    archive_dir: str = ""          # default: tick_archive/ next to satellite.db
+    hot_hours: int = 48            # Rows kept in SQLite before compaction
+    retention_days: int = 30       # Segments older than this are deleted
+
+
+@dataclass
+class RecorderConfig:
+    enabled: bool = False
+    dir: str = "storage/feeds"     # Hourly feeds-YYYYMMDD-HH.jsonl.gz files
+    flush_interval: float = 1.0    # Seconds between gzip sync flushes
 
 
 @dataclass
@@ -97,6 +132,9 @@ class SmartMoneyConfig:
     max_profiles_per_cycle: int = 50
     alert_min_size_usd: float = 50_000
     alert_min_win_rate: float = 0.55
+    # Rolling rankings
+    rank_top_k: int = 500
+    rank_interval: int = 60
     # Auto-curation
     auto_curate_enabled: bool = True
     auto_curate_min_win_rate: float = 0.55
@@ -119,6 +157,7 @@ class Config:
     smart_money: SmartMoneyConfig = field(default_factory=SmartMoneyConfig)
     l2_subscriber: L2SubscriberConfig = field(default_factory=L2SubscriberConfig)
     tick_collector: TickCollectorConfig = field(default_factory=TickCollectorConfig)
+    recorder: RecorderConfig = field(default_factory=RecorderConfig)
     project_root: Path = field(default_factory=_find_project_root)
 
 
@@ -160,5 +199,6 @@ def load_config(config_path: str | None = None) -> Config:
         smart_money=_sub(SmartMoneyConfig, "smart_money"),
         l2_subscriber=_sub(L2SubscriberConfig, "l2_subscriber"),
         tick_collector=_sub(TickCollectorConfig, "tick_collector"),
+        recorder=_sub(RecorderConfig, "recorder"),
         project_root=root,
     )
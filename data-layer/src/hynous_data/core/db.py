@@ -3,16 +3,38 @@
 Thread-safe: all writes go through a single lock. Reads are concurrent
 (WAL allows this). The write_lock must be used by all callers that do
 INSERT/UPDATE/DELETE + commit.
+
+Readers use `read_conn` — a per-thread, query_only connection (separate from
+the writer connection) so API handlers and engines read in parallel under
+WAL instead of serializing on one connection object. Read queries are timed
+and reported to registered query hooks.
+
+High-rate writers (trade stream, poller, PnL snapshots) should go through
+`write()` / `write_sql()` / `write_many()` instead — with the write-behind
+writer started these are queued and group-committed off-thread; without it
+they run synchronously under write_lock.
+
+Historical series (funding/OI/volume history, liquidation events, trade
+flow, candles) are time-partitioned — see core/partitions.py. Their names
+are views, so plain SQL against them works as before.
 """
 
 import sqlite3
 import threading
 import time
 import logging
+import weakref
 from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from hynous_data.core.db_writer import DbWriter, WriteOp
+from hynous_data.core.partitions import PartitionedHistory
 
 log = logging.getLogger(__name__)
 
+# hook(sql, elapsed_ms, row_count) — called after every read_conn query
+QueryHook = Callable[[str, float, int], None]
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS addresses (
     address     TEXT PRIMARY KEY,
@@ -69,6 +91,35 @@ CREATE TABLE IF NOT EXISTS pnl_snapshots (
 CREATE INDEX IF NOT EXISTS idx_pnl_snapshot_at ON pnl_snapshots(snapshot_at);
 CREATE INDEX IF NOT EXISTS idx_pnl_addr_snap ON pnl_snapshots(address, snapshot_at, equity);
 
+-- Rolling 24h first/last equity per address (maintained with each snapshot batch)
+CREATE TABLE IF NOT EXISTS pnl_rollup (
+    address      TEXT PRIMARY KEY,
+    first_at     REAL NOT NULL,
+    first_equity REAL NOT NULL,
+    last_at      REAL NOT NULL,
+    last_equity  REAL NOT NULL,
+    pnl          REAL GENERATED ALWAYS AS (last_equity - first_equity) STORED
+);
+CREATE INDEX IF NOT EXISTS idx_pnl_rollup_pnl ON pnl_rollup(pnl);
+CREATE INDEX IF NOT EXISTS idx_pnl_rollup_first ON pnl_rollup(first_at);
+
+-- Smart Money: Precomputed leaderboard (top-K by 24h PnL, rebuilt on a timer)
+CREATE TABLE IF NOT EXISTS smart_money_rankings (
+    rank           INTEGER PRIMARY KEY,
+    address        TEXT NOT NULL,
+    equity_start   REAL NOT NULL,
+    equity         REAL NOT NULL,
+    pnl_24h        REAL NOT NULL,
+    pnl_pct_24h    REAL NOT NULL,
+    win_rate       REAL,
+    style          TEXT,
+    is_bot         INTEGER NOT NULL DEFAULT 0,
+    trade_count    INTEGER,
+    profit_factor  REAL,
+    avg_hold_hours REAL,
+    has_profile    INTEGER NOT NULL DEFAULT 0
+);
+
 CREATE TABLE IF NOT EXISTS metadata (
     key   TEXT PRIMARY KEY,
     value TEXT
@@ -97,7 +148,7 @@ CREATE TABLE IF NOT EXISTS wallet_profiles (
     equity         REAL
 );
 
--- Smart Money: Cached matched trades (recomputed with profiles)
+-- Smart Money: Cached matched trades (appended by incremental profile refresh)
 CREATE TABLE IF NOT EXISTS wallet_trades (
     id         INTEGER PRIMARY KEY AUTOINCREMENT,
     address    TEXT NOT NULL,
@@ -115,6 +166,16 @@ CREATE TABLE IF NOT EXISTS wallet_trades (
 );
 CREATE INDEX IF NOT EXISTS idx_wt_address ON wallet_trades(address);
 CREATE INDEX IF NOT EXISTS idx_wt_entry_time ON wallet_trades(entry_time);
+CREATE INDEX IF NOT EXISTS idx_wt_address_exit ON wallet_trades(address, exit_time);
+
+-- Smart Money: Incremental fill ingestion (cursor + in-progress FIFO trades)
+CREATE TABLE IF NOT EXISTS wallet_fill_state (
+    address     TEXT PRIMARY KEY,
+    cursor_ms   INTEGER NOT NULL,            -- time of the newest ingested fill
+    cursor_keys TEXT NOT NULL DEFAULT '[]',  -- fill ids at cursor_ms (overlap dedup)
+    open_trades TEXT NOT NULL DEFAULT '{}',  -- coin → in-progress trade (JSON)
+    updated_at  REAL NOT NULL
+);
 
 -- Smart Money: Detected position changes (entry/exit events)
 CREATE TABLE IF NOT EXISTS position_changes (
@@ -129,47 +190,38 @@ CREATE TABLE IF NOT EXISTS position_changes (
 );
 CREATE INDEX IF NOT EXISTS idx_pc_address ON position_changes(address);
 CREATE INDEX IF NOT EXISTS idx_pc_detected ON position_changes(detected_at);
+"""
 
--- Historical: Funding rate snapshots (one per coin per deriv poll)
-CREATE TABLE IF NOT EXISTS funding_history (
-    coin        TEXT NOT NULL,
-    recorded_at REAL NOT NULL,
-    rate        REAL NOT NULL,
-    PRIMARY KEY (coin, recorded_at)
-);
-CREATE INDEX IF NOT EXISTS idx_fh_coin_time ON funding_history(coin, recorded_at);
 
--- Historical: Open interest snapshots (one per coin per deriv poll)
-CREATE TABLE IF NOT EXISTS oi_history (
-    coin        TEXT NOT NULL,
-    recorded_at REAL NOT NULL,
-    oi_usd      REAL NOT NULL,
-    PRIMARY KEY (coin, recorded_at)
-);
-CREATE INDEX IF NOT EXISTS idx_oh_coin_time ON oi_history(coin, recorded_at);
+class QueryResult(list):
+    """Materialized rows with the cursor methods read sites use."""
 
--- Historical: Volume snapshots (one per coin per deriv poll)
-CREATE TABLE IF NOT EXISTS volume_history (
-    coin        TEXT NOT NULL,
-    recorded_at REAL NOT NULL,
-    volume_usd  REAL NOT NULL,
-    PRIMARY KEY (coin, recorded_at)
-);
-CREATE INDEX IF NOT EXISTS idx_vh_coin_time ON volume_history(coin, recorded_at);
+    def fetchall(self) -> list:
+        return list(self)
 
--- Historical: Liquidation events (individual events, not aggregates)
-CREATE TABLE IF NOT EXISTS liquidation_events (
-    id          INTEGER PRIMARY KEY AUTOINCREMENT,
-    coin        TEXT NOT NULL,
-    occurred_at REAL NOT NULL,
-    side        TEXT NOT NULL,
-    size_usd    REAL NOT NULL,
-    price       REAL NOT NULL,
-    address     TEXT
-);
-CREATE INDEX IF NOT EXISTS idx_le_coin_time ON liquidation_events(coin, occurred_at);
-CREATE INDEX IF NOT EXISTS idx_le_time ON liquidation_events(occurred_at);
-"""
+    def fetchone(self):
+        return self[0] if self else None
+
+
+class _ReadConnection:
+    """Read-only connection wrapper that times each query end-to-end.
+
+    execute() runs the statement and fetches all rows before returning, so
+    the measured time covers the full scan, not just the first step.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, db: "Database"):
+        self._conn = conn
+        self._db = db
+
+    def execute(self, sql: str, params: tuple | list = ()) -> QueryResult:
+        t0 = time.perf_counter()
+        rows = QueryResult(self._conn.execute(sql, params).fetchall())
+        self._db._record_query(sql, (time.perf_counter() - t0) * 1000, len(rows))
+        return rows
+
+    def close(self):
+        self._conn.close()
 
 
 class Database:
@@ -179,11 +231,42 @@ class Database:
     write_lock to prevent concurrent writer conflicts.
     """
 
-    def __init__(self, db_path: str | Path):
+    def __init__(
+        self,
+        db_path: str | Path,
+        read_cache_mb: int = 32,
+        read_mmap_mb: int = 256,
+        slow_query_ms: float = 250,
+        history_retention_days: int = 90,
+        history_partition_days: int = 7,
+    ):
         self._path = Path(db_path)
         self._path.parent.mkdir(parents=True, exist_ok=True)
         self._conn: sqlite3.Connection | None = None
         self.write_lock = threading.Lock()
+        self._writer: DbWriter | None = None
+        # Per-thread read connections
+        self._read_cache_mb = read_cache_mb
+        self._read_mmap_mb = read_mmap_mb
+        self._local = threading.local()
+        # Live readers only: a thread's reader is dropped with its threading.local
+        # when the thread exits, and a finalizer closes the connection
+        self._readers: weakref.WeakSet[_ReadConnection] = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+        # Query timing
+        self._slow_query_ms = slow_query_ms
+        self._query_hooks: list[QueryHook] = []
+        self._stats_lock = threading.Lock()
+        self.total_queries = 0
+        self.total_query_ms = 0.0
+        self.max_query_ms = 0.0
+        self.slow_queries = 0
+        # Time-partitioned historical series
+        self.history = PartitionedHistory(
+            self,
+            retention_days=history_retention_days,
+            partition_days=history_partition_days,
+        )
 
     def connect(self) -> sqlite3.Connection:
         """Open connection with WAL mode."""
@@ -203,6 +286,8 @@ class Database:
         assert self._conn is not None, "Call connect() first"
         self._conn.executescript(SCHEMA)
         self._run_migrations()
+        with self.write_lock:
+            self.history.setup(self._conn)
         log.info("Database schema initialized at %s", self._path)
 
     def _run_migrations(self):
@@ -237,11 +322,129 @@ class Database:
         assert self._conn is not None, "Call connect() first"
         return self._conn
 
+    # ------------------------------------------------------------------
+    # Read pool (one query_only connection per thread)
+    # ------------------------------------------------------------------
+
+    @property
+    def read_conn(self) -> _ReadConnection:
+        """This thread's read-only connection (created on first use).
+
+        The connection is closed once the thread exits, so threadpool churn
+        doesn't accumulate open connections. In-memory databases can't share
+        data across connections, so they read through the writer connection
+        instead.
+        """
+        reader = getattr(self._local, "reader", None)
+        if reader is not None:
+            return reader
+        if str(self._path) == ":memory:":
+            reader = _ReadConnection(self.conn, self)
+        else:
+            conn = sqlite3.connect(str(self._path), check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA query_only=ON")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(f"PRAGMA cache_size=-{self._read_cache_mb * 1024}")
+            conn.execute(f"PRAGMA mmap_size={self._read_mmap_mb * 1024 * 1024}")
+            conn.row_factory = sqlite3.Row
+            reader = _ReadConnection(conn, self)
+            weakref.finalize(reader, conn.close)
+            with self._readers_lock:
+                self._readers.add(reader)
+        self._local.reader = reader
+        return reader
+
+    def add_query_hook(self, hook: QueryHook):
+        """Register hook(sql, elapsed_ms, row_count), called after each read query."""
+        self._query_hooks.append(hook)
+
+    def _record_query(self, sql: str, elapsed_ms: float, row_count: int):
+        with self._stats_lock:
+            self.total_queries += 1
+            self.total_query_ms += elapsed_ms
+            if elapsed_ms > self.max_query_ms:
+                self.max_query_ms = elapsed_ms
+            slow = elapsed_ms >= self._slow_query_ms
+            if slow:
+                self.slow_queries += 1
+        if slow:
+            log.warning("Slow query (%.0fms, %d rows): %s",
+                        elapsed_ms, row_count, " ".join(sql.split())[:200])
+        for hook in self._query_hooks:
+            try:
+                hook(sql, elapsed_ms, row_count)
+            except Exception:
+                log.debug("Query hook failed", exc_info=True)
+
+    def read_stats(self) -> dict:
+        with self._stats_lock:
+            n = self.total_queries
+            return {
+                "read_connections": len(self._readers),
+                "queries": n,
+                "avg_query_ms": round(self.total_query_ms / n, 2) if n else 0,
+                "max_query_ms": round(self.max_query_ms, 2),
+                "slow_queries": self.slow_queries,
+            }
+
+    # ------------------------------------------------------------------
+    # Write-behind writer
+    # ------------------------------------------------------------------
+
+    def start_writer(self, max_queue: int = 10_000, max_batch: int = 500,
+                     max_delay: float = 0.25) -> DbWriter:
+        """Start the group-commit writer thread. Subsequent write() calls are queued."""
+        if self._writer is None:
+            self._writer = DbWriter(self, max_queue=max_queue, max_batch=max_batch,
+                                    max_delay=max_delay)
+        self._writer.start()
+        return self._writer
+
+    @property
+    def writer(self) -> DbWriter | None:
+        return self._writer
+
+    def write(self, op: WriteOp, block: bool = True) -> bool:
+        """Apply `op(conn)` — queued if the writer is running, else inline + commit.
+
+        block=False never waits: if the queue is full the write is dropped
+        and False is returned (for latency-critical callers like WS callbacks).
+        """
+        writer = self._writer
+        if writer is not None and writer.running:
+            return writer.submit(op, block=block)
+        with self.write_lock:
+            try:
+                op(self.conn)
+            except Exception:
+                self.conn.rollback()  # nothing from a failed op is committed
+                raise
+            self.conn.commit()
+        return True
+
+    def write_sql(self, sql: str, params: tuple | list = (), block: bool = True) -> bool:
+        """Queue a single statement (see write())."""
+        return self.write(lambda conn: conn.execute(sql, params), block=block)
+
+    def write_many(self, sql: str, rows: Iterable[Any], block: bool = True) -> bool:
+        """Queue an executemany (see write()). `rows` is materialized up front."""
+        rows = list(rows)
+        if not rows:
+            return True
+        return self.write(lambda conn: conn.executemany(sql, rows), block=block)
+
+    def flush_writes(self, timeout: float = 10.0) -> bool:
+        """Wait until all queued writes are committed (no-op without a writer)."""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
     def prune_old_data(self, days: int = 7):
         """Delete time-series rows older than N days.
 
-        Historical tables (funding, OI, volume, liquidation events) use
-        90-day retention for ML feature computation.
+        Historical tables (funding, OI, volume, liquidation events, candles,
+        trade flow) keep `history_retention_days` (default 90) for ML feature
+        computation; they are retired by dropping whole partitions.
         """
         cutoff = time.time() - days * 86400
         conn = self._conn
@@ -253,32 +456,6 @@ class Database:
             cur2 = conn.execute(
                 "DELETE FROM pnl_snapshots WHERE snapshot_at < ?", (cutoff,)
             )
-            # Historical tables: keep longer (90 days) for ML feature computation
-            hist_cutoff = time.time() - 90 * 86400
-            cur3 = conn.execute(
-                "DELETE FROM funding_history WHERE recorded_at < ?",
-                (hist_cutoff,),
-            )
-            cur4 = conn.execute(
-                "DELETE FROM oi_history WHERE recorded_at < ?", (hist_cutoff,)
-            )
-            cur5 = conn.execute(
-                "DELETE FROM volume_history WHERE recorded_at < ?",
-                (hist_cutoff,),
-            )
-            cur6 = conn.execute(
-                "DELETE FROM liquidation_events WHERE occurred_at < ?",
-                (hist_cutoff,),
-            )
-            # Candles + trade flow: 90-day retention (was never pruned — Artemis backfill grew to 8GB)
-            cur6b = conn.execute(
-                "DELETE FROM candles_history WHERE open_time < ?",
-                (hist_cutoff,),
-            )
-            cur6c = conn.execute(
-                "DELETE FROM trade_flow_history WHERE recorded_at < ?",
-                (hist_cutoff,),
-            )
             # Prune inactive addresses (not seen in 30+ days, low tier)
             # Prevents unbounded growth from trade stream address discovery.
             addr_cutoff = time.time() - 30 * 86400
@@ -293,16 +470,31 @@ class Database:
             cur9 = conn.execute(
                 "DELETE FROM wallet_trades WHERE address NOT IN (SELECT address FROM addresses)",
             )
-
-            deleted = sum(
-                cur.rowcount
-                for cur in [cur1, cur2, cur3, cur4, cur5, cur6, cur6b, cur6c, cur7, cur8, cur9]
+            cur10 = conn.execute(
+                "DELETE FROM wallet_fill_state WHERE address NOT IN (SELECT address FROM addresses)",
             )
+
+            deleted = sum(cur.rowcount for cur in [cur1, cur2, cur7, cur8, cur9, cur10])
             conn.commit()
+            # Historical series: O(1) partition drops (+ a small overflow sweep)
+            parts_dropped, overflow_expired = self.history.maintain(conn)
         if deleted:
             log.info("Pruned %d old rows (time-series + %d inactive addresses)", deleted, cur7.rowcount)
+        if parts_dropped or overflow_expired:
+            log.info("Dropped %d history partitions (+%d overflow rows)",
+                     parts_dropped, overflow_expired)
 
     def close(self):
+        if self._writer:
+            self._writer.stop()
+        with self._readers_lock:
+            for reader in list(self._readers):
+                try:
+                    reader.close()
+                except Exception:
+                    pass
+            self._readers.clear()
+        self._local = threading.local()
         if self._conn:
             self._conn.close()
             self._conn = None
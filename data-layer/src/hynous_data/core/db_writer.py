@@ -0,0 +1,235 @@
+"""Write-behind group-commit writer for the data-layer Database.
+
+Collectors enqueue writes instead of committing inline. A single writer
+thread drains the queue and applies everything it picked up in one
+transaction (one fsync), bounded by a size budget (`max_batch` ops) and a
+time budget (`max_delay` seconds after the first op of a batch).
+
+Each op runs in its own SAVEPOINT inside the group transaction, so an op
+that fails is rolled back to where it started — none of its statements are
+committed — and the rest of the batch still commits.
+
+Backpressure: the queue is bounded. `submit(block=True)` waits for space
+(producer threads like the poller) and logs an error if it still has to drop
+the write; `submit(block=False)` drops and counts the op instead (the WS
+callback — it must never wait on disk).
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+WriteOp = Callable[[sqlite3.Connection], None]
+
+
+class _FlushWaiter:
+    """Queue marker released once the batch it lands in is committed."""
+
+    __slots__ = ("event", "ok")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.ok = False
+
+    def resolve(self, ok: bool):
+        self.ok = ok
+        self.event.set()
+
+
+class DbWriter:
+    """Single writer thread applying queued ops in group commits."""
+
+    def __init__(
+        self,
+        db,
+        max_queue: int = 10_000,
+        max_batch: int = 500,
+        max_delay: float = 0.25,
+    ):
+        self._db = db
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._max_queue = max_queue
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        # Stats
+        self.total_enqueued = 0
+        self.total_applied = 0
+        self.total_dropped = 0
+        self.total_errors = 0
+        self.total_commits = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self._commit_ms_sum = 0.0
+        self.max_queue_depth = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout: float = 10.0):
+        """Drain everything still queued, then stop the thread."""
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    def submit(self, op: WriteOp, block: bool = True, timeout: float | None = 5.0) -> bool:
+        """Enqueue a write. Returns False if the op was dropped (queue full)."""
+        try:
+            if block:
+                self._queue.put(op, timeout=timeout)
+            else:
+                self._queue.put_nowait(op)
+        except queue.Full:
+            self.total_dropped += 1
+            if block:
+                # A producer that was willing to wait still lost data
+                log.error("DbWriter queue full (%d) for %.1fs — dropped a blocking write "
+                          "(%d dropped total)", self._max_queue, timeout or 0,
+                          self.total_dropped)
+            elif self.total_dropped <= 5 or self.total_dropped % 1000 == 0:
+                log.warning("DbWriter queue full (%d) — dropped %d writes",
+                            self._max_queue, self.total_dropped)
+            return False
+        self.total_enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything enqueued so far is committed.
+
+        Returns False on timeout or if the batch it waited on was rolled back.
+        """
+        if not self.running:
+            return self._queue.empty()
+        waiter = _FlushWaiter()
+        try:
+            self._queue.put(waiter, timeout=timeout)
+        except queue.Full:
+            return False
+        return waiter.event.wait(timeout) and waiter.ok
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        log.info("DbWriter started (queue=%d, batch=%d, delay=%.0fms)",
+                 self._max_queue, self._max_batch, self._max_delay * 1000)
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self._max_delay
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0 or self._stop_event.is_set():
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._apply(batch)
+        log.info("DbWriter stopped (%d applied, %d dropped)", self.total_applied, self.total_dropped)
+
+    def _apply(self, batch: list):
+        """Run a batch of ops in one transaction.
+
+        A failing op is rolled back to its savepoint and skipped, not fatal.
+        Flush waiters in the batch are released only after the commit, so a
+        reader on another connection sees everything queued before them.
+        """
+        conn = self._db.conn
+        waiters = [op for op in batch if isinstance(op, _FlushWaiter)]
+        ops = [op for op in batch if not isinstance(op, _FlushWaiter)]
+        t0 = time.perf_counter()
+        try:
+            with self._db.write_lock:
+                for op in ops:
+                    # Open the transaction first: a SAVEPOINT that starts one
+                    # would commit it on RELEASE
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN")
+                    conn.execute("SAVEPOINT write_op")
+                    try:
+                        op(conn)
+                        conn.execute("RELEASE write_op")
+                        self.total_applied += 1
+                    except Exception:
+                        self.total_errors += 1
+                        if self.total_errors <= 5 or self.total_errors % 100 == 0:
+                            log.warning("DbWriter op failed (%d total)", self.total_errors,
+                                        exc_info=True)
+                        conn.execute("ROLLBACK TO write_op")
+                        conn.execute("RELEASE write_op")
+                conn.commit()
+        except Exception:
+            self.total_errors += 1
+            log.exception("DbWriter commit failed (%d ops lost)", len(ops))
+            # Never leave a half-applied batch for the next commit to pick up
+            with self._db.write_lock:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+            for waiter in waiters:
+                waiter.resolve(False)
+            return
+        for waiter in waiters:
+            waiter.resolve(True)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.total_commits += 1
+        self.last_commit_ms = elapsed_ms
+        self._commit_ms_sum += elapsed_ms
+        if elapsed_ms > self.max_commit_ms:
+            self.max_commit_ms = elapsed_ms
+
+    def stats(self) -> dict:
+        commits = self.total_commits
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._max_queue,
+            "max_queue_depth": self.max_queue_depth,
+            "enqueued": self.total_enqueued,
+            "applied": self.total_applied,
+            "dropped": self.total_dropped,
+            "errors": self.total_errors,
+            "commits": commits,
+            "avg_batch": round(self.total_applied / commits, 1) if commits else 0,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+            "avg_commit_ms": round(self._commit_ms_sum / commits, 2) if commits else 0,
+            "max_commit_ms": round(self.max_commit_ms, 2),
+        }
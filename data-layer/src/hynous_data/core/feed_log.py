@@ -0,0 +1,226 @@
+"""Feed recording and replay — reproduce data-layer load offline.
+
+FeedRecorder appends every raw WebSocket message that TradeStream and
+L2Subscriber receive (`trades`, `l2Book`) to gzip-compressed JSON-lines
+files, one per UTC hour: `feeds-YYYYMMDD-HH.jsonl.gz`. Each line is
+`[recv_ts, msg]`. Files are append-only. After a restart the recorder
+appends a new gzip member, and gzip readers concatenate members
+transparently. The stream is sync-flushed every `flush_interval` seconds,
+so a crash loses at most that much.
+
+FeedReplayer reads recordings back in order and pushes each message into
+the entry points the live sockets use. Each message carries its recorded
+receive time instead of the wall clock, and TickCollector is stepped once
+per replayed second. Output is therefore a pure function of the recording
+at any speed: 1x, 10x or as fast as the collectors go (speed 0).
+"""
+
+import gzip
+import json
+import logging
+import math
+import threading
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+FEED_GLOB = "feeds-*.jsonl.gz"
+
+
+class FeedRecorder:
+    """Thread-safe append-only recorder of raw WS messages.
+
+    Usage:
+        rec = FeedRecorder("storage/feeds")
+        trade_stream.set_recorder(rec)
+        l2_subscriber.set_recorder(rec)
+        ...
+        rec.stop()
+    """
+
+    def __init__(self, directory: str | Path, flush_interval: float = 1.0):
+        self._dir = Path(directory)
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file: gzip.GzipFile | None = None
+        self._path: Path | None = None
+        self._hour: int | None = None
+        self._last_flush = 0.0
+        # Stats
+        self.messages = 0
+        self.bytes_raw = 0
+        self.errors = 0
+
+    def _open_for(self, ts: float) -> gzip.GzipFile:
+        """File for `ts`'s UTC hour, rotating if needed (must hold lock)."""
+        hour = int(ts // 3600)
+        if hour != self._hour or self._file is None:
+            self._close()
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._path = self._dir / time.strftime("feeds-%Y%m%d-%H.jsonl.gz", time.gmtime(ts))
+            self._file = gzip.open(self._path, "ab", compresslevel=6)
+            self._hour = hour
+        return self._file
+
+    def record(self, msg: dict, ts: float | None = None) -> None:
+        """Append one raw message. Never raises into the WS callback."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            try:
+                line = json.dumps([ts, msg], separators=(",", ":")).encode() + b"\n"
+                f = self._open_for(ts)
+                f.write(line)
+                if ts - self._last_flush >= self._flush_interval:
+                    f.flush()  # Z_SYNC_FLUSH: everything so far is decodable
+                    self._last_flush = ts
+            except (OSError, TypeError, ValueError):
+                self.errors += 1
+                if self.errors <= 5 or self.errors % 1000 == 0:
+                    log.warning("Feed record error (%d total)", self.errors, exc_info=True)
+                return
+            self.messages += 1
+            self.bytes_raw += len(line)
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                log.warning("Failed to close feed file %s", self._path, exc_info=True)
+            self._file = None
+
+    def stop(self) -> None:
+        with self._lock:
+            self._close()
+
+    def stats(self) -> dict:
+        return {
+            "messages": self.messages,
+            "raw_mb": round(self.bytes_raw / 1e6, 1),
+            "errors": self.errors,
+            "file": str(self._path) if self._path else None,
+        }
+
+
+def feed_files(paths: Iterable[str | Path]) -> list[Path]:
+    """Expand directories to their recordings, in chronological order."""
+    out: list[Path] = []
+    for p in map(Path, paths):
+        out.extend(sorted(p.glob(FEED_GLOB)) if p.is_dir() else [p])
+    return out
+
+
+def read_feed(paths: Iterable[str | Path]) -> Iterator[tuple[float, dict]]:
+    """Yield (recv_ts, msg) from recordings in order.
+
+    A torn last line or a truncated gzip tail (crash mid-write) ends that
+    file early with a warning instead of failing the replay.
+    """
+    for path in feed_files(paths):
+        try:
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    try:
+                        ts, msg = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield ts, msg
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            log.warning("Feed file %s is truncated — replayed up to the damage", path)
+
+
+class FeedReplayer:
+    """Push a recording through the collectors on the recorded clock.
+
+    Any collector may be None. `speed` is a multiple of real time; 0 replays
+    as fast as possible (throughput benchmarks).
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str | Path],
+        speed: float = 1.0,
+        trade_stream=None,
+        l2_subscriber=None,
+        tick_collector=None,
+    ):
+        self._paths = list(paths)
+        self._speed = speed
+        self._trade_stream = trade_stream
+        self._l2 = l2_subscriber
+        self._tick_collector = tick_collector
+        self._last_write = 0.0
+        # Stats
+        self.messages = 0
+        self.trade_messages = 0
+        self.l2_messages = 0
+        self.ticks = 0
+
+    def _step(self, now: float):
+        """One replayed second: tick features, then the collectors' periodic flushes."""
+        tc = self._tick_collector
+        if tc is not None:
+            tc.tick(now)
+            self.ticks += 1
+            if now - self._last_write >= tc.WRITE_INTERVAL:
+                tc._flush_buffer()
+                self._last_write = now
+        ts = self._trade_stream
+        if ts is not None:
+            ts._flush_addresses()
+            ts._flush_trade_flow(now)
+
+    def _dispatch(self, now: float, msg: dict):
+        channel = msg.get("channel")
+        if channel == "trades":
+            self.trade_messages += 1
+            if self._trade_stream is not None:
+                self._trade_stream._on_trade(msg, now=now)
+        elif channel == "l2Book":
+            self.l2_messages += 1
+            if self._l2 is not None:
+                self._l2._handle_message(msg, now=now)
+
+    def run(self, limit: int | None = None) -> dict:
+        """Replay every message (or the first `limit`) and return throughput stats."""
+        wall0 = time.perf_counter()
+        ts0 = ts = None
+        next_step = 0
+        for ts, msg in read_feed(self._paths):
+            if ts0 is None:
+                ts0 = ts
+                next_step = math.floor(ts) + 1
+                self._last_write = ts
+            if self._speed > 0:
+                ahead = (ts - ts0) / self._speed - (time.perf_counter() - wall0)
+                if ahead > 0:
+                    time.sleep(ahead)
+            # Whole seconds of replay clock that have passed before this message
+            while next_step <= ts:
+                self._step(next_step)
+                next_step += 1
+            self._dispatch(ts, msg)
+            self.messages += 1
+            if limit is not None and self.messages >= limit:
+                break
+
+        if self._tick_collector is not None:
+            self._tick_collector._flush_buffer()
+        if self._trade_stream is not None:
+            self._trade_stream._flush_addresses()
+
+        wall = time.perf_counter() - wall0
+        span = (ts - ts0) if ts0 is not None else 0.0
+        return {
+            "messages": self.messages,
+            "trade_messages": self.trade_messages,
+            "l2_messages": self.l2_messages,
+            "ticks": self.ticks,
+            "span_s": round(span, 3),
+            "wall_s": round(wall, 3),
+            "messages_per_s": round(self.messages / wall, 1) if wall > 0 else 0.0,
+            "speedup": round(span / wall, 1) if wall > 0 else 0.0,
+        }
@@ -0,0 +1,419 @@
+"""Time-partitioned storage for the historical series tables.
+
+Each series (funding_history, oi_history, ...) is split into one table per
+`partition_days` window, e.g. `funding_history_p20261012`, plus an
+`<series>_overflow` table for rows that land outside the partitioned range
+(backfills older than retention, clock-skewed future rows).
+
+Existing SQL keeps working unchanged: the series name is a view over all
+partitions (UNION ALL — SQLite pushes WHERE clauses into each arm, so each
+partition's index is used), with INSTEAD OF INSERT/DELETE triggers routing
+rows to the right partition. The outer statement's conflict clause
+(INSERT OR IGNORE / OR REPLACE) applies inside the trigger, so dedup on the
+primary key behaves as before.
+
+Retention is a DROP TABLE per expired partition instead of a row-by-row
+DELETE, so pruning never rewrites the B-tree and the freed pages are reused
+by new partitions without a VACUUM. Recent partitions stay small enough to
+live in the page cache.
+
+Partition bounds live in `history_partitions` (series, name, lo, hi).
+
+Caveats of the view:
+- Writes through the triggers report `cursor.rowcount` as 0 (SQLite does not
+  count changes made inside a trigger); SELECT COUNT(*) if a count matters.
+- `liquidation_events.id` is a per-partition rowid, unique only together
+  with `occurred_at`.
+- "Latest row at or before t" (ORDER BY time DESC LIMIT 1) through the view
+  probes every partition. Hot as-of readers walk `history_partitions` newest
+  first and stop at the first hit instead (satellite's `_SqlSeries.asof`).
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_partitions (
+    name   TEXT PRIMARY KEY,
+    series TEXT NOT NULL,
+    lo     REAL NOT NULL,
+    hi     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hp_series ON history_partitions(series, lo);
+"""
+
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    """Layout of one partitioned series."""
+
+    name: str
+    time_col: str
+    columns: tuple[str, ...]
+    ddl: str                              # column definitions for CREATE TABLE
+    key: tuple[str, ...]                  # identifies a row (DELETE routing)
+    indexes: tuple[str, ...] = ()         # secondary index column lists
+    defaults: dict = field(default_factory=dict)  # column → SQL default for omitted values
+
+
+HISTORY_SERIES: tuple[SeriesSpec, ...] = (
+    # Funding rate snapshots (one per coin per deriv poll)
+    SeriesSpec(
+        "funding_history", "recorded_at", ("coin", "recorded_at", "rate"),
+        "coin TEXT NOT NULL, recorded_at REAL NOT NULL, rate REAL NOT NULL, "
+        "PRIMARY KEY (coin, recorded_at)",
+        key=("coin", "recorded_at"),
+    ),
+    # Open interest snapshots (one per coin per deriv poll)
+    SeriesSpec(
+        "oi_history", "recorded_at", ("coin", "recorded_at", "oi_usd"),
+        "coin TEXT NOT NULL, recorded_at REAL NOT NULL, oi_usd REAL NOT NULL, "
+        "PRIMARY KEY (coin, recorded_at)",
+        key=("coin", "recorded_at"),
+    ),
+    # Volume snapshots (one per coin per deriv poll)
+    SeriesSpec(
+        "volume_history", "recorded_at", ("coin", "recorded_at", "volume_usd"),
+        "coin TEXT NOT NULL, recorded_at REAL NOT NULL, volume_usd REAL NOT NULL, "
+        "PRIMARY KEY (coin, recorded_at)",
+        key=("coin", "recorded_at"),
+    ),
+    # Individual liquidation events (ids are per-partition)
+    SeriesSpec(
+        "liquidation_events", "occurred_at",
+        ("id", "coin", "occurred_at", "side", "size_usd", "price", "address"),
+        "id INTEGER PRIMARY KEY, coin TEXT NOT NULL, occurred_at REAL NOT NULL, "
+        "side TEXT NOT NULL, size_usd REAL NOT NULL, price REAL NOT NULL, address TEXT",
+        key=("id", "occurred_at"),
+        indexes=("coin, occurred_at", "occurred_at"),
+    ),
+    # 5-minute buy/sell volume buckets (TradeStream, Artemis)
+    SeriesSpec(
+        "trade_flow_history", "recorded_at",
+        ("coin", "recorded_at", "buy_volume_usd", "sell_volume_usd"),
+        "coin TEXT NOT NULL, recorded_at REAL NOT NULL, "
+        "buy_volume_usd REAL DEFAULT 0, sell_volume_usd REAL DEFAULT 0, "
+        "PRIMARY KEY (coin, recorded_at)",
+        key=("coin", "recorded_at"),
+        defaults={"buy_volume_usd": "0", "sell_volume_usd": "0"},
+    ),
+    # OHLCV candles (Artemis reconstruction, candle backfill)
+    SeriesSpec(
+        "candles_history", "open_time",
+        ("coin", "interval", "open_time", "open", "high", "low", "close", "volume"),
+        "coin TEXT NOT NULL, interval TEXT NOT NULL, open_time REAL NOT NULL, "
+        "open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, "
+        "close REAL NOT NULL, volume REAL NOT NULL, "
+        "PRIMARY KEY (coin, interval, open_time)",
+        key=("coin", "interval", "open_time"),
+    ),
+)
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    lo: float
+    hi: float
+
+
+class PartitionedHistory:
+    """Creates, routes, and retires time partitions for the historical series.
+
+    All mutating methods take the writer connection and must be called under
+    the Database write_lock; they commit before returning.
+    """
+
+    def __init__(
+        self,
+        db,
+        retention_days: int = 90,
+        partition_days: int = 7,
+        lookahead_days: int = 14,
+        series: tuple[SeriesSpec, ...] = HISTORY_SERIES,
+    ):
+        self._db = db
+        self.retention_s = retention_days * 86400
+        self.width_s = partition_days * 86400
+        self.lookahead_s = lookahead_days * 86400
+        self.series = {s.name: s for s in series}
+        self._parts: dict[str, list[Partition]] = {}
+        # Stats
+        self.total_dropped = 0
+        self.total_expired_rows = 0
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _floor(self, ts: float) -> int:
+        return int(ts // self.width_s) * self.width_s
+
+    def _partition_name(self, spec: SeriesSpec, lo: float) -> str:
+        day = datetime.fromtimestamp(lo, tz=timezone.utc).strftime("%Y%m%d")
+        return f"{spec.name}_p{day}"
+
+    @staticmethod
+    def overflow_name(spec: SeriesSpec) -> str:
+        return f"{spec.name}_overflow"
+
+    def _create_table(self, conn, spec: SeriesSpec, table: str):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({spec.ddl})")
+        for i, cols in enumerate(spec.indexes):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{i} ON {table}({cols})")
+
+    def _load(self, conn):
+        self._parts = {name: [] for name in self.series}
+        for r in conn.execute(
+            "SELECT series, name, lo, hi FROM history_partitions ORDER BY series, lo"
+        ).fetchall():
+            if r[0] in self._parts:
+                self._parts[r[0]].append(Partition(r[1], r[2], r[3]))
+
+    def partitions(self, series: str, since: float | None = None,
+                   until: float | None = None) -> list[Partition]:
+        """Partitions of `series` overlapping [since, until)."""
+        return [
+            p for p in self._parts.get(series, [])
+            if (since is None or p.hi > since) and (until is None or p.lo < until)
+        ]
+
+    # ------------------------------------------------------------------
+    # Setup / maintenance (writer connection, under write_lock)
+    # ------------------------------------------------------------------
+
+    def setup(self, conn, now: float | None = None):
+        """Create partitions, views and triggers; migrate legacy flat tables."""
+        now = now or time.time()
+        conn.executescript(REGISTRY_SCHEMA)
+        self._load(conn)
+        for spec in self.series.values():
+            legacy = self._detach_legacy(conn, spec)
+            self._create_table(conn, spec, self.overflow_name(spec))
+            self._ensure_range(conn, spec, now - self.retention_s, now + self.lookahead_s)
+            if legacy:
+                self._import_legacy(conn, spec, legacy, now - self.retention_s)
+            self._rebuild_view(conn, spec)
+        conn.commit()
+
+    def maintain(self, conn, now: float | None = None) -> tuple[int, int]:
+        """Drop expired partitions, roll new ones forward, rehome overflow rows.
+
+        Returns (partitions_dropped, overflow_rows_expired).
+        """
+        now = now or time.time()
+        cutoff = now - self.retention_s
+        dropped = expired = 0
+        for spec in self.series.values():
+            parts = self._parts.get(spec.name, [])
+            old = [p for p in parts if p.hi <= cutoff]
+            changed = self._ensure_range(conn, spec, cutoff, now + self.lookahead_s)
+            if old:
+                # Point the view away from the old partitions before dropping them
+                self._parts[spec.name] = [p for p in self._parts[spec.name] if p not in old]
+                changed = True
+            if changed:
+                self._rebuild_view(conn, spec)
+            for p in old:
+                conn.execute(f"DROP TABLE IF EXISTS {p.name}")
+                conn.execute("DELETE FROM history_partitions WHERE name = ?", (p.name,))
+            dropped += len(old)
+            expired += self._rehome_overflow(conn, spec, cutoff)
+        conn.commit()
+        self.total_dropped += dropped
+        self.total_expired_rows += expired
+        return dropped, expired
+
+    def _ensure_range(self, conn, spec: SeriesSpec, start: float, end: float) -> bool:
+        """Create missing partitions so [start, end) is covered contiguously."""
+        parts = self._parts.setdefault(spec.name, [])
+        have = {p.lo for p in parts}
+        lo = self._floor(min([start] + [p.lo for p in parts]))
+        created = False
+        while lo < end:
+            if lo not in have:
+                p = Partition(self._partition_name(spec, lo), lo, lo + self.width_s)
+                self._create_table(conn, spec, p.name)
+                conn.execute(
+                    "INSERT OR REPLACE INTO history_partitions (name, series, lo, hi) "
+                    "VALUES (?, ?, ?, ?)",
+                    (p.name, spec.name, p.lo, p.hi),
+                )
+                parts.append(p)
+                created = True
+            lo += self.width_s
+        parts.sort(key=lambda p: p.lo)
+        return created
+
+    def _rebuild_view(self, conn, spec: SeriesSpec):
+        """Recreate the series view and its routing triggers (one transaction)."""
+        parts = self._parts.get(spec.name, [])
+        cols = ", ".join(spec.columns)
+        t = spec.time_col
+        overflow = self.overflow_name(spec)
+        new_vals = ", ".join(
+            f"COALESCE(NEW.{c}, {spec.defaults[c]})" if c in spec.defaults else f"NEW.{c}"
+            for c in spec.columns
+        )
+        key_match = " AND ".join(f"{k} = OLD.{k}" for k in spec.key)
+
+        arms = [f"SELECT {cols} FROM {p.name}" for p in parts]
+        arms.append(f"SELECT {cols} FROM {overflow}")
+
+        inserts = [
+            f"INSERT INTO {p.name} ({cols}) SELECT {new_vals} "
+            f"WHERE NEW.{t} >= {p.lo!r} AND NEW.{t} < {p.hi!r};"
+            for p in parts
+        ]
+        deletes = [
+            f"DELETE FROM {p.name} WHERE OLD.{t} >= {p.lo!r} AND OLD.{t} < {p.hi!r} "
+            f"AND {key_match};"
+            for p in parts
+        ]
+        if parts:
+            in_range = f"NEW.{t} >= {parts[0].lo!r} AND NEW.{t} < {parts[-1].hi!r}"
+            inserts.append(
+                f"INSERT INTO {overflow} ({cols}) SELECT {new_vals} "
+                f"WHERE NEW.{t} IS NULL OR NOT ({in_range});"
+            )
+        else:
+            inserts.append(f"INSERT INTO {overflow} ({cols}) SELECT {new_vals};")
+        deletes.append(f"DELETE FROM {overflow} WHERE {key_match};")
+
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute(f"DROP VIEW IF EXISTS {spec.name}")
+        conn.execute(f"CREATE VIEW {spec.name} ({cols}) AS " + " UNION ALL ".join(arms))
+        conn.execute(
+            f"CREATE TRIGGER {spec.name}_insert INSTEAD OF INSERT ON {spec.name} "
+            f"BEGIN {' '.join(inserts)} END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {spec.name}_delete INSTEAD OF DELETE ON {spec.name} "
+            f"BEGIN {' '.join(deletes)} END"
+        )
+
+    def _rehome_overflow(self, conn, spec: SeriesSpec, cutoff: float) -> int:
+        """Move overflow rows into partitions that now cover them; expire the rest."""
+        overflow = self.overflow_name(spec)
+        t = spec.time_col
+        if conn.execute(f"SELECT 1 FROM {overflow} LIMIT 1").fetchone() is None:
+            return 0
+        cols = ", ".join(spec.columns)
+        for p in self._parts.get(spec.name, []):
+            conn.execute(
+                f"INSERT OR IGNORE INTO {p.name} ({cols}) SELECT {cols} FROM {overflow} "
+                f"WHERE {t} >= ? AND {t} < ?",
+                (p.lo, p.hi),
+            )
+        parts = self._parts.get(spec.name, [])
+        floor = parts[0].lo if parts else cutoff
+        expired = conn.execute(
+            f"SELECT COUNT(*) FROM {overflow} WHERE {t} < ?", (floor,)
+        ).fetchone()[0]
+        # Everything below the newest partition's end is now either rehomed or expired
+        conn.execute(
+            f"DELETE FROM {overflow} WHERE {t} < ?", (parts[-1].hi if parts else cutoff,)
+        )
+        return expired
+
+    def _detach_legacy(self, conn, spec: SeriesSpec) -> str | None:
+        """Rename a pre-partitioning flat table out of the way (kept until imported)."""
+        row = conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = ?", (spec.name,)
+        ).fetchone()
+        if not row or row[0] != "table":
+            return None
+        legacy = f"{spec.name}_legacy"
+        conn.execute(f"DROP TABLE IF EXISTS {legacy}")
+        conn.execute(f"ALTER TABLE {spec.name} RENAME TO {legacy}")
+        return legacy
+
+    def _import_legacy(self, conn, spec: SeriesSpec, legacy: str, cutoff: float):
+        """One-time copy of in-retention rows from a legacy flat table, then drop it."""
+        legacy_cols = {r[1] for r in conn.execute(f"PRAGMA table_info({legacy})").fetchall()}
+        cols = ", ".join(c for c in spec.columns if c in legacy_cols)
+        t = spec.time_col
+        moved = 0
+        for p in self._parts.get(spec.name, []):
+            if p.hi <= cutoff:
+                continue
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO {p.name} ({cols}) SELECT {cols} FROM {legacy} "
+                f"WHERE {t} >= ? AND {t} < ?",
+                (p.lo, p.hi),
+            )
+            moved += max(cur.rowcount, 0)
+        parts = self._parts.get(spec.name, [])
+        if parts:
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO {self.overflow_name(spec)} ({cols}) "
+                f"SELECT {cols} FROM {legacy} WHERE {t} >= ?",
+                (parts[-1].hi,),
+            )
+            moved += max(cur.rowcount, 0)
+        conn.execute(f"DROP TABLE {legacy}")
+        log.info("Migrated %s into %d partitions (%d rows kept)", spec.name, len(parts), moved)
+
+    # ------------------------------------------------------------------
+    # Read router
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        series: str,
+        columns: str = "*",
+        where: str = "",
+        params: tuple | list = (),
+        since: float | None = None,
+        until: float | None = None,
+        order_by: str | None = None,
+        limit: int | None = None,
+    ):
+        """Read rows in [since, until) touching only the overlapping partitions.
+
+        `where`/`params` add extra conditions (e.g. "coin = ?"). Runs on the
+        caller's per-thread read connection.
+        """
+        spec = self.series[series]
+        t = spec.time_col
+        cond, args = [], []
+        if since is not None:
+            cond.append(f"{t} >= ?")
+            args.append(since)
+        if until is not None:
+            cond.append(f"{t} < ?")
+            args.append(until)
+        if where:
+            cond.append(f"({where})")
+            args.extend(params)
+        clause = f" WHERE {' AND '.join(cond)}" if cond else ""
+        cols = ", ".join(spec.columns)
+        tables = [p.name for p in self.partitions(series, since, until)]
+        tables.append(self.overflow_name(spec))
+
+        arms = [f"SELECT {cols} FROM {name}{clause}" for name in tables]
+        sql = f"SELECT {columns} FROM ({' UNION ALL '.join(arms)})"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self._db.read_conn.execute(sql, tuple(args) * len(arms))
+
+    def stats(self) -> dict:
+        return {
+            "series": {
+                name: {
+                    "partitions": len(parts),
+                    "oldest": parts[0].lo if parts else None,
+                    "newest": parts[-1].hi if parts else None,
+                }
+                for name, parts in self._parts.items()
+            },
+            "partitions_dropped": self.total_dropped,
+            "overflow_rows_expired": self.total_expired_rows,
+        }
@@ -1,24 +1,89 @@
-"""Token bucket rate limiter for Hyperliquid API (1200 weight/min)."""
+"""Token bucket rate limiter for Hyperliquid API (1200 weight/min).
 
+Callers acquire weight under a priority class:
+
+    critical  tier-1 / watched-wallet position polls
+    normal    other position polls, HLP vault polls (default)
+    bulk      wallet profiling fill fetches
+
+Waiters are served strictly by class, FIFO within a class. Each class above
+bulk also reserves a share of the bucket that lower classes cannot spend, so
+a burst of bulk work never drains the tokens a critical poll needs next.
+Critical calls can spend the whole bucket.
+
+Waiting is event-driven. The head waiter sleeps on a condition variable for
+exactly its token deficit. Every other waiter sleeps until a grant or a
+departure notifies it. `acquire_async()` uses the same queue from asyncio
+code, so the event loop is never blocked.
+"""
+
+import asyncio
+import bisect
+import math
 import time
 import threading
 import logging
+from collections import deque
 
 log = logging.getLogger(__name__)
 
+CRITICAL = "critical"
+NORMAL = "normal"
+BULK = "bulk"
+PRIORITIES = (CRITICAL, NORMAL, BULK)  # highest first
+
+# Upper bounds (seconds) of the per-class wait histogram buckets; last is +inf
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class _Waiter:
+    __slots__ = ("weight", "priority", "loop", "event")
+
+    def __init__(self, weight: float, priority: str,
+                 loop: asyncio.AbstractEventLoop | None = None,
+                 event: asyncio.Event | None = None):
+        self.weight = weight
+        self.priority = priority
+        self.loop = loop
+        self.event = event
+
+
+class _ClassStats:
+    __slots__ = ("acquired", "weight", "timeouts", "waited_s", "hist", "recent")
+
+    def __init__(self):
+        self.acquired = 0
+        self.weight = 0
+        self.timeouts = 0
+        self.waited_s = 0.0
+        self.hist = [0] * (len(WAIT_BUCKETS) + 1)
+        self.recent: deque[tuple[float, float]] = deque()  # (monotonic, weight), last 60s
+
 
 class RateLimiter:
-    """Thread-safe token bucket rate limiter.
+    """Thread-safe, priority-aware token bucket rate limiter.
 
     Tokens refill continuously. acquire() blocks until enough tokens are available.
     """
 
-    def __init__(self, max_weight: int = 1200, safety_pct: int = 85):
+    def __init__(self, max_weight: int = 1200, safety_pct: int = 85,
+                 reserve_critical_pct: int = 0, reserve_normal_pct: int = 0):
         self._max = max_weight * safety_pct // 100  # effective budget
         self._tokens = float(self._max)
         self._refill_rate = self._max / 60.0  # tokens per second
         self._last_refill = time.monotonic()
         self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Tokens a class must leave in the bucket for the classes above it
+        reserve_critical = self._max * reserve_critical_pct / 100
+        reserve_normal = self._max * reserve_normal_pct / 100
+        self._floor = {
+            CRITICAL: 0.0,
+            NORMAL: reserve_critical,
+            BULK: reserve_critical + reserve_normal,
+        }
+        self._queues: dict[str, deque[_Waiter]] = {p: deque() for p in PRIORITIES}
+        self._stats = {p: _ClassStats() for p in PRIORITIES}
         # Stats
         self.total_acquired = 0
         self.total_waited_s = 0.0
@@ -36,33 +101,155 @@ class RateLimiter:
         self._tokens = min(self._max, self._tokens + elapsed * self._refill_rate)
         self._last_refill = now
 
-    def acquire(self, weight: int = 2, timeout: float = 30.0) -> bool:
+    # ------------------------------------------------------------------
+    # Queue (must hold lock)
+    # ------------------------------------------------------------------
+
+    def _check_priority(self, priority: str):
+        if priority not in self._queues:
+            raise ValueError(f"Unknown rate limit priority {priority!r}")
+
+    def _is_head(self, waiter: _Waiter) -> bool:
+        for p in PRIORITIES:
+            q = self._queues[p]
+            if q:
+                return q[0] is waiter
+        return False
+
+    def _try_grant(self, waiter: _Waiter) -> float:
+        """Grant if `waiter` is next and its tokens are there.
+
+        Returns 0.0 on grant, the seconds until its deficit refills if it is
+        next in line, else inf (wait for a notify).
+        """
+        if not self._is_head(waiter):
+            return math.inf
+        self._refill()
+        need = waiter.weight + self._floor[waiter.priority]
+        if self._tokens >= need:
+            self._tokens -= waiter.weight
+            return 0.0
+        if need > self._max:
+            return math.inf  # can never be granted; wait out the timeout
+        return (need - self._tokens) / self._refill_rate
+
+    def _leave(self, waiter: _Waiter):
+        """Dequeue and wake whoever is next."""
+        try:
+            self._queues[waiter.priority].remove(waiter)
+        except ValueError:
+            pass
+        self._cond.notify_all()
+        for q in self._queues.values():
+            for w in q:
+                if w.loop is not None:
+                    try:
+                        w.loop.call_soon_threadsafe(w.event.set)
+                    except RuntimeError:
+                        pass  # loop closed; its waiter times out on its own
+
+    def _record(self, waiter: _Waiter, waited: float, granted: bool):
+        st = self._stats[waiter.priority]
+        st.waited_s += waited
+        self.total_waited_s += waited
+        if not granted:
+            st.timeouts += 1
+            return
+        st.acquired += 1
+        st.weight += waiter.weight
+        st.hist[bisect.bisect_left(WAIT_BUCKETS, waited)] += 1
+        st.recent.append((time.monotonic(), waiter.weight))
+        self.total_acquired += waiter.weight
+
+    # ------------------------------------------------------------------
+    # Acquire
+    # ------------------------------------------------------------------
+
+    def acquire(self, weight: int = 2, timeout: float = 30.0, priority: str = NORMAL) -> bool:
         """Block until `weight` tokens are available. Returns False on timeout."""
-        deadline = time.monotonic() + timeout
-        while True:
-            with self._lock:
-                self._refill()
-                if self._tokens >= weight:
-                    self._tokens -= weight
-                    self.total_acquired += weight
+        self._check_priority(priority)
+        start = time.monotonic()
+        deadline = start + timeout
+        waiter = _Waiter(weight, priority)
+        with self._cond:
+            self._queues[priority].append(waiter)
+            granted = False
+            try:
+                while True:
+                    wait = self._try_grant(waiter)
+                    if wait == 0.0:
+                        granted = True
+                        return True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        log.warning("Rate limiter timeout acquiring %d weight (%s)", weight, priority)
+                        return False
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._record(waiter, time.monotonic() - start, granted)
+                self._leave(waiter)
+
+    async def acquire_async(self, weight: int = 2, timeout: float = 30.0,
+                            priority: str = NORMAL) -> bool:
+        """acquire() for asyncio callers; waits without blocking the event loop."""
+        self._check_priority(priority)
+        start = time.monotonic()
+        deadline = start + timeout
+        waiter = _Waiter(weight, priority, asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._queues[priority].append(waiter)
+        granted = False
+        try:
+            while True:
+                # Cleared before checking: a wakeup scheduled meanwhile runs
+                # on the loop only after we await, so it is never lost
+                waiter.event.clear()
+                with self._lock:
+                    wait = self._try_grant(waiter)
+                if wait == 0.0:
+                    granted = True
                     return True
-            # Not enough tokens — wait and retry
-            wait = weight / self._refill_rate  # estimated wait
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                log.warning("Rate limiter timeout acquiring %d weight", weight)
-                return False
-            sleep_time = min(wait * 0.5, remaining, 1.0)
-            time.sleep(sleep_time)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    log.warning("Rate limiter timeout acquiring %d weight (%s)", weight, priority)
+                    return False
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), min(wait, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
             with self._lock:
-                self.total_waited_s += sleep_time
+                self._record(waiter, time.monotonic() - start, granted)
+                self._leave(waiter)
 
     def stats(self) -> dict:
         with self._lock:
             self._refill()
+            now = time.monotonic()
+            classes = {}
+            for p in PRIORITIES:
+                st = self._stats[p]
+                while st.recent and now - st.recent[0][0] > 60:
+                    st.recent.popleft()
+                weight_1m = sum(w for _, w in st.recent)
+                classes[p] = {
+                    "acquired": st.acquired,
+                    "weight": st.weight,
+                    "weight_1m": weight_1m,
+                    "utilization_1m": round(weight_1m / self._max, 3) if self._max else 0.0,
+                    "floor": round(self._floor[p], 1),
+                    "waiting": len(self._queues[p]),
+                    "timeouts": st.timeouts,
+                    "waited_s": round(st.waited_s, 2),
+                    "wait_hist": {
+                        **{f"le_{b:g}s": n for b, n in zip(WAIT_BUCKETS, st.hist)},
+                        f"gt_{WAIT_BUCKETS[-1]:g}s": st.hist[-1],
+                    },
+                }
             return {
                 "available": round(self._tokens, 1),
                 "max": self._max,
                 "total_acquired": self.total_acquired,
                 "total_waited_s": round(self.total_waited_s, 2),
+                "classes": classes,
             }
@@ -0,0 +1,141 @@
+"""Versioned response cache — serve repeated reads as pre-serialized bytes.
+
+Read routes ask the cache for `(route, params)` along with the source
+engine's current version. If the stored entry has the same version, the
+route returns the stored bytes and ETag without touching the engine. A
+matching `If-None-Match` gets an empty 304. Otherwise the route renders,
+serializes once (orjson when installed) and stores the result.
+
+Engines bump their version whenever their data changes. Some payloads also
+drift with the clock: sliding order-flow windows, `*_age_seconds` fields.
+For those the route passes `ttl`, and an entry older than that is
+re-rendered even if the version has not moved.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # optional: `pip install hynous-data[fast]`
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to compact JSON bytes (numpy scalars/arrays allowed)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def _default(obj):
+    # numpy fallback for the stdlib encoder
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _Entry:
+    __slots__ = ("version", "body", "etag", "created")
+
+    def __init__(self, version: Hashable, body: bytes, created: float):
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.created = created
+
+
+class ResponseCache:
+    """LRU of rendered JSON bodies keyed by (route, params), validated by version."""
+
+    def __init__(self, max_entries: int = 1024):
+        self._max = max_entries
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.render_ms = 0.0
+
+    def get(
+        self,
+        key: Hashable,
+        version: Hashable,
+        render: Callable[[], Any],
+        ttl: float | None = None,
+    ) -> tuple[int, bytes, str | None]:
+        """(status, body, etag) for `key` at `version`, rendering on a miss.
+
+        `render()` returns the JSON-able payload, or a Response for errors.
+        Error responses are passed through uncached with etag None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version and (
+                ttl is None or now - entry.created < ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return 200, entry.body, entry.etag
+
+        t0 = time.perf_counter()
+        payload = render()
+        if isinstance(payload, Response):
+            return payload.status_code, bytes(payload.body), None
+        entry = _Entry(version, dumps(payload), now)
+        with self._lock:
+            self.misses += 1
+            self.render_ms += (time.perf_counter() - t0) * 1000
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return 200, entry.body, entry.etag
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        version: Hashable,
+        render: Callable[[], Any],
+        ttl: float | None = None,
+    ) -> Response:
+        """HTTP response for get(), honouring If-None-Match."""
+        status, body, etag = self.get(key, version, render, ttl)
+        if etag is None:
+            return Response(content=body, status_code=status, media_type="application/json")
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in {t.strip() for t in if_none_match.split(",")}:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+            cached_bytes = sum(len(e.body) for e in self._entries.values())
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "cached_kb": round(cached_bytes / 1024, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "avg_render_ms": round(self.render_ms / self.misses, 2) if self.misses else 0.0,
+            "encoder": "orjson" if orjson is not None else "json",
+        }
@@ -0,0 +1,136 @@
+"""Columnar ring buffer for per-coin trade history.
+
+Replaces the old deque-of-dicts buffers (~400 bytes per trade) with
+preallocated parallel numpy arrays (25 bytes per trade). Every write lands
+twice — at `i` and `i + capacity` — so the most recent N trades are always
+one contiguous slice and a window read is one slice copy per column, taken
+under the lock.
+
+Trades are stored in arrival order with time clamped to be non-decreasing,
+which keeps the time column sorted for bisect-by-time window lookups.
+"""
+
+import threading
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+class TradeWindow(NamedTuple):
+    """Columns of a contiguous run of trades (oldest first).
+
+    Arrays are copies, detached from the ring buffer — later appends never
+    change a window already handed out.
+    """
+
+    time: np.ndarray  # int64, epoch ms
+    px: np.ndarray    # float64
+    sz: np.ndarray    # float64
+    side: np.ndarray  # int8, +1 buy / -1 sell
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def notional(self) -> np.ndarray:
+        return self.px * self.sz
+
+    @property
+    def is_buy(self) -> np.ndarray:
+        return self.side > 0
+
+
+class TradeBuffer:
+    """Fixed-capacity columnar ring buffer of trades for a single coin.
+
+    Thread-safe for one writer (the WS callback) and many readers.
+    """
+
+    def __init__(self, capacity: int = 50_000):
+        self._cap = capacity
+        self._time = np.zeros(capacity * 2, dtype=np.int64)
+        self._px = np.zeros(capacity * 2, dtype=np.float64)
+        self._sz = np.zeros(capacity * 2, dtype=np.float64)
+        self._side = np.zeros(capacity * 2, dtype=np.int8)
+        self._head = 0   # next write slot in [0, capacity)
+        self._count = 0
+        self._last_time = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._cap
+
+    @property
+    def nbytes(self) -> int:
+        return self._time.nbytes + self._px.nbytes + self._sz.nbytes + self._side.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def append(self, time_ms: int, px: float, sz: float, side: str) -> None:
+        """Append one trade. `side` is "B" (buy) or "A" (sell)."""
+        with self._lock:
+            # Clamp out-of-order timestamps so the time column stays sorted
+            t = time_ms if time_ms > self._last_time else self._last_time
+            self._last_time = t
+            s = SIDE_BUY if side == "B" else SIDE_SELL
+            i = self._head
+            j = i + self._cap
+            self._time[i] = self._time[j] = t
+            self._px[i] = self._px[j] = px
+            self._sz[i] = self._sz[j] = sz
+            self._side[i] = self._side[j] = s
+            self._head = (i + 1) % self._cap
+            if self._count < self._cap:
+                self._count += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = 0
+            self._count = 0
+            self._last_time = 0
+
+    def _span(self) -> tuple[int, int]:
+        """Start/end indices of the live region in the doubled arrays (must hold lock)."""
+        end = self._head + self._cap if self._count == self._cap else self._head
+        return end - self._count, end
+
+    def window(self, since_ms: int = 0, until_ms: int | None = None) -> TradeWindow:
+        """Trades with since_ms <= time <= until_ms, copied out under the lock.
+
+        A view would be unsafe: once the window spans the whole buffer, the
+        next append overwrites its oldest slot in place.
+        """
+        with self._lock:
+            start, end = self._span()
+            times = self._time[start:end]
+            lo = start + int(np.searchsorted(times, since_ms, side="left"))
+            hi = end if until_ms is None else start + int(
+                np.searchsorted(times, until_ms, side="right")
+            )
+            return TradeWindow(
+                self._time[lo:hi].copy(), self._px[lo:hi].copy(),
+                self._sz[lo:hi].copy(), self._side[lo:hi].copy(),
+            )
+
+    def snapshot(self) -> TradeWindow:
+        """All buffered trades (detached, safe to hold onto)."""
+        return self.window()
+
+    @property
+    def latest_time(self) -> int:
+        """Epoch ms of the most recent trade (0 if empty)."""
+        return self._last_time if self._count else 0
+
+    def __iter__(self) -> Iterator[dict]:
+        """Yield trades as dicts (oldest first). Slow path — debugging/tests only."""
+        w = self.snapshot()
+        for t, px, sz, s in zip(w.time.tolist(), w.px.tolist(), w.sz.tolist(), w.side.tolist()):
+            yield {"side": "B" if s > 0 else "A", "px": px, "sz": sz, "time": t}
@@ -1,183 +1,356 @@
-"""Liquidation heatmap engine — positions → liquidation price buckets."""
+"""Liquidation heatmap engine — positions → liquidation price buckets.
+
+Maintained incrementally: PositionPoller pushes upserts/closures into the
+engine, which keeps a per-coin position index plus numpy bucket arrays.
+Each delta is an O(1) bucket add/remove. Bucket edges are anchored to the
+mid price and only re-bucketed (one vectorized pass over the coin's
+positions) when the mid drifts past `rebucket_drift_pct`.
+
+Mid prices come from L2Subscriber when it has a fresh book for the coin,
+falling back to the latest mark price seen in position updates — no REST
+calls, so no rate-limit weight is spent.
+"""
 
 import time
 import threading
 import logging
 
-from hyperliquid.info import Info
+import numpy as np
 
 from hynous_data.core.config import HeatmapConfig
 from hynous_data.core.db import Database
-from hynous_data.core.rate_limiter import RateLimiter
 
 log = logging.getLogger(__name__)
 
+MIN_POSITION_USD = 1000
+STALENESS_S = 1200  # Tier 3 worst case: 600s poll × 2
+BOT_REFRESH_S = 60
+
+
+class _CoinLiqIndex:
+    """Positions with a liquidation price for one coin, plus anchored bucket sums."""
+
+    def __init__(self, n_buckets: int):
+        self.n = n_buckets
+        # address → (is_long, size_usd, liq_px, updated_at, is_bot)
+        self.positions: dict[str, tuple[bool, float, float, float, bool]] = {}
+        self.anchor_mid = 0.0
+        self.low = 0.0
+        self.high = 0.0
+        self.width = 0.0
+        self.long_usd = np.zeros(n_buckets)
+        self.short_usd = np.zeros(n_buckets)
+        self.long_n = np.zeros(n_buckets, dtype=np.int64)
+        self.short_n = np.zeros(n_buckets, dtype=np.int64)
+        self.updated_at = 0.0
+        self.version = 0
+        self.dirty = False  # deltas applied since last full re-bucket
+
+    def _bucket(self, liq_px: float) -> int:
+        if self.width <= 0 or liq_px < self.low or liq_px >= self.high:
+            return -1
+        return min(int((liq_px - self.low) / self.width), self.n - 1)
+
+    def _apply(self, entry: tuple, sign: int):
+        is_long, size_usd, liq_px, _, is_bot = entry
+        if is_bot:
+            return
+        idx = self._bucket(liq_px)
+        if idx < 0:
+            return
+        if is_long:
+            self.long_usd[idx] += sign * size_usd
+            self.long_n[idx] += sign
+        else:
+            self.short_usd[idx] += sign * size_usd
+            self.short_n[idx] += sign
+
+    def upsert(self, address: str, entry: tuple):
+        old = self.positions.get(address)
+        if old is not None:
+            self._apply(old, -1)
+        self.positions[address] = entry
+        self._apply(entry, +1)
+        self.dirty = True
+        self.version += 1
+
+    def remove(self, address: str) -> bool:
+        old = self.positions.pop(address, None)
+        if old is None:
+            return False
+        self._apply(old, -1)
+        self.dirty = True
+        self.version += 1
+        return True
+
+    def rebucket(self, mid_px: float, range_pct: float):
+        """Re-anchor edges at mid_px and rebuild sums in one vectorized pass."""
+        self.anchor_mid = mid_px
+        self.low = mid_px * (1 - range_pct)
+        self.high = mid_px * (1 + range_pct)
+        self.width = (self.high - self.low) / self.n
+        self.long_usd[:] = 0
+        self.short_usd[:] = 0
+        self.long_n[:] = 0
+        self.short_n[:] = 0
+        if self.positions:
+            cols = list(zip(*self.positions.values()))
+            is_long = np.array(cols[0], dtype=bool)
+            size = np.array(cols[1], dtype=np.float64)
+            liq = np.array(cols[2], dtype=np.float64)
+            keep = ~np.array(cols[4], dtype=bool) & (liq >= self.low) & (liq < self.high)
+            idx = np.minimum(((liq - self.low) / self.width).astype(np.int64), self.n - 1)
+            for mask, usd, cnt in ((keep & is_long, self.long_usd, self.long_n),
+                                   (keep & ~is_long, self.short_usd, self.short_n)):
+                usd += np.bincount(idx[mask], weights=size[mask], minlength=self.n)
+                cnt += np.bincount(idx[mask], minlength=self.n)
+        self.dirty = False
+        self.version += 1
+
+    @property
+    def eligible_count(self) -> int:
+        return sum(1 for e in self.positions.values() if not e[4])
+
 
 class LiqHeatmapEngine:
-    """Periodically recomputes liquidation heatmaps from the positions table."""
+    """Incrementally maintained liquidation heatmaps, fed by PositionPoller deltas."""
 
-    def __init__(self, db: Database, config: HeatmapConfig,
-                 base_url: str = "https://api.hyperliquid.xyz",
-                 rate_limiter: RateLimiter | None = None):
+    def __init__(self, db: Database, config: HeatmapConfig, l2_subscriber=None):
         self._db = db
         self._cfg = config
-        self._rl = rate_limiter
-        self._info = Info(base_url=base_url, skip_ws=True, timeout=10)
-        # Cache: coin → heatmap dict
-        self._cache: dict[str, dict] = {}
-        self._cache_lock = threading.Lock()
+        self._l2 = l2_subscriber
+        self._coins: dict[str, _CoinLiqIndex] = {}
+        self._addr_coins: dict[str, set[str]] = {}  # address → coins indexed
+        self._marks: dict[str, float] = {}  # coin → latest mark_px from polls
+        self._bots: set[str] = set()
+        self._bots_refreshed = 0.0
+        self._lock = threading.Lock()
+        # Rendered heatmap cache: coin → (version, dict)
+        self._rendered: dict[str, tuple[int, dict]] = {}
+        # Last version of swept-out indexes, so a re-created index keeps counting up
+        self._retired_versions: dict[str, int] = {}
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
         self._last_recompute = 0.0
+        # Stats
+        self.total_deltas = 0
+        self.total_rebuckets = 0
+
+    def set_l2_subscriber(self, l2_subscriber):
+        """Wire L2Subscriber for real-time mid prices."""
+        self._l2 = l2_subscriber
 
     def start(self):
+        try:
+            self.load_from_db()
+        except Exception:
+            log.exception("Heatmap seed from DB failed")
         self._thread = threading.Thread(target=self._run, name="liq-heatmap", daemon=True)
         self._thread.start()
 
     def _run(self):
-        log.info("LiqHeatmapEngine starting (interval=%ds)", self._cfg.recompute_interval)
-        while not self._stop_event.is_set():
+        log.info("LiqHeatmapEngine starting (sweep interval=%ds)", self._cfg.recompute_interval)
+        while not self._stop_event.wait(self._cfg.recompute_interval):
             try:
-                self._recompute_all()
+                self._sweep()
             except Exception:
-                log.exception("Heatmap recompute error")
-            self._stop_event.wait(self._cfg.recompute_interval)
+                log.exception("Heatmap sweep error")
 
-    def _recompute_all(self):
-        """Recompute heatmaps for all coins with positions."""
-        conn = self._db.conn
+    # ------------------------------------------------------------------
+    # Position deltas (called from PositionPoller)
+    # ------------------------------------------------------------------
 
-        # Get distinct coins with positions
-        coins = [r["coin"] for r in conn.execute(
-            "SELECT DISTINCT coin FROM positions"
-        ).fetchall()]
+    def load_from_db(self):
+        """Seed the index from the positions table (startup / tests)."""
+        self._refresh_bots(force=True)
+        rows = self._db.read_conn.execute(
+            """
+            SELECT address, coin, side, size_usd, mark_px, liq_px, updated_at
+            FROM positions
+            WHERE liq_px IS NOT NULL AND liq_px > 0 AND updated_at >= ?
+            """,
+            (time.time() - STALENESS_S,),
+        ).fetchall()
+        self.on_positions_upserted([dict(r) for r in rows])
 
-        # Fetch current mid prices (counted against rate limiter)
-        if self._rl and not self._rl.acquire(2, timeout=10):
-            log.debug("Rate limiter blocked heatmap all_mids()")
-            return
-        try:
-            mids = self._info.all_mids()
-        except Exception:
-            log.debug("Failed to fetch mid prices for heatmap")
+    def on_positions_upserted(self, positions: list[dict]):
+        """Apply upserted positions (PositionPoller._upsert_positions rows)."""
+        with self._lock:
+            for p in positions:
+                coin = p["coin"]
+                addr = p["address"]
+                if p.get("mark_px"):
+                    self._marks[coin] = p["mark_px"]
+                liq_px = p.get("liq_px")
+                idx = self._coins.get(coin)
+                if not liq_px or liq_px <= 0 or p["size_usd"] < MIN_POSITION_USD:
+                    # No longer qualifies — drop any previous entry
+                    if idx is not None and idx.remove(addr):
+                        self._addr_coins.get(addr, set()).discard(coin)
+                        idx.updated_at = p["updated_at"]
+                    continue
+                if idx is None:
+                    idx = self._coins[coin] = _CoinLiqIndex(self._cfg.bucket_count)
+                    idx.version = self._retired_versions.pop(coin, 0) + 1
+                idx.upsert(addr, (
+                    p["side"] == "long", p["size_usd"], liq_px,
+                    p["updated_at"], addr in self._bots,
+                ))
+                idx.updated_at = p["updated_at"]
+                self._addr_coins.setdefault(addr, set()).add(coin)
+                self.total_deltas += 1
+
+    def on_positions_closed(self, polled_results: list[tuple[str, set[str]]]):
+        """Drop positions an address no longer holds (PositionPoller._delete_closed_positions)."""
+        now = time.time()
+        with self._lock:
+            for addr, active_coins in polled_results:
+                coins = self._addr_coins.get(addr)
+                if not coins:
+                    continue
+                for coin in list(coins - active_coins):
+                    idx = self._coins.get(coin)
+                    if idx is not None and idx.remove(addr):
+                        idx.updated_at = now
+                        self.total_deltas += 1
+                    coins.discard(coin)
+                if not coins:
+                    del self._addr_coins[addr]
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+
+    def _refresh_bots(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._bots_refreshed < BOT_REFRESH_S:
             return
+        rows = self._db.read_conn.execute(
+            "SELECT address FROM wallet_profiles WHERE is_bot = 1"
+        ).fetchall()
+        bots = {r["address"] for r in rows}
+        self._bots_refreshed = now
+        with self._lock:
+            if bots == self._bots:
+                return
+            changed = bots ^ self._bots
+            self._bots = bots
+            for addr in changed:
+                for coin in self._addr_coins.get(addr, ()):
+                    idx = self._coins[coin]
+                    e = idx.positions.get(addr)
+                    if e is not None:
+                        idx.upsert(addr, (*e[:4], addr in bots))
 
-        new_cache = {}
-        for coin in coins:
-            mid_px = float(mids.get(coin, 0))
-            if mid_px <= 0:
-                continue
-            heatmap = self._compute_coin_heatmap(coin, mid_px)
-            if heatmap:
-                new_cache[coin] = heatmap
-
-        with self._cache_lock:
-            self._cache = new_cache
+    def _sweep(self):
+        """Expire stale positions, refresh bot flags, and clean up float drift."""
+        self._refresh_bots()
+        cutoff = time.time() - STALENESS_S
+        with self._lock:
+            for coin, idx in list(self._coins.items()):
+                stale = [a for a, e in idx.positions.items() if e[3] < cutoff]
+                for addr in stale:
+                    idx.remove(addr)
+                    coins = self._addr_coins.get(addr)
+                    if coins:
+                        coins.discard(coin)
+                        if not coins:
+                            del self._addr_coins[addr]
+                if not idx.positions:
+                    del self._coins[coin]
+                    self._rendered.pop(coin, None)
+                    self._retired_versions[coin] = idx.version
+                elif idx.dirty and idx.anchor_mid > 0:
+                    # Rebuild from scratch so repeated +/- deltas can't accumulate error
+                    idx.rebucket(idx.anchor_mid, self._cfg.range_pct / 100)
         self._last_recompute = time.time()
 
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _mid(self, coin: str) -> float:
+        if self._l2 is not None:
+            mid = self._l2.get_mid(coin)
+            if mid:
+                return float(mid)
+        return float(self._marks.get(coin, 0) or 0)
+
     def _compute_coin_heatmap(self, coin: str, mid_px: float) -> dict | None:
-        """Compute heatmap for a single coin with noise filtering.
+        """Render the heatmap for a coin, re-bucketing if mid drifted from the anchor.
 
         Filters applied (SPEC-01, ml-011):
           - Minimum $1K position size
-          - Exclude is_bot=1 wallets (joined with wallet_profiles)
+          - Exclude is_bot=1 wallets (wallet_profiles)
           - Staleness filter: exclude positions not updated within 1200s
         """
-        conn = self._db.conn
-        now = time.time()
-        staleness_cutoff = now - 1200  # Tier 3 worst case: 600s poll × 2
-
-        rows = conn.execute(
-            """
-            SELECT p.side, p.size_usd, p.liq_px
-            FROM positions p
-            LEFT JOIN wallet_profiles wp ON p.address = wp.address
-            WHERE p.coin = ?
-              AND p.size_usd >= 1000
-              AND p.liq_px IS NOT NULL
-              AND p.liq_px > 0
-              AND p.updated_at >= ?
-              AND COALESCE(wp.is_bot, 0) = 0
-            """,
-            (coin, staleness_cutoff),
-        ).fetchall()
+        range_pct = self._cfg.range_pct / 100
+        with self._lock:
+            idx = self._coins.get(coin)
+            if idx is None or mid_px <= 0:
+                return None
+            total_positions = idx.eligible_count
+            if not total_positions:
+                return None
 
-        if not rows:
-            return None
+            drift = abs(mid_px - idx.anchor_mid) / idx.anchor_mid if idx.anchor_mid else 1.0
+            if drift * 100 > self._cfg.rebucket_drift_pct:
+                idx.rebucket(mid_px, range_pct)
+                self.total_rebuckets += 1
 
-        # Define price range
-        range_pct = self._cfg.range_pct / 100
-        low = mid_px * (1 - range_pct)
-        high = mid_px * (1 + range_pct)
-        n_buckets = self._cfg.bucket_count
-        bucket_size = (high - low) / n_buckets
-
-        # Initialize buckets
-        buckets = []
-        for i in range(n_buckets):
-            price_low = low + i * bucket_size
-            price_high = price_low + bucket_size
-            buckets.append({
-                "price_low": round(price_low, 2),
-                "price_high": round(price_high, 2),
-                "price_mid": round((price_low + price_high) / 2, 2),
-                "long_liq_usd": 0.0,
-                "short_liq_usd": 0.0,
-                "long_count": 0,
-                "short_count": 0,
-            })
-
-        # Assign liquidation prices to buckets
-        total_long_liq = 0.0
-        total_short_liq = 0.0
-
-        for row in rows:
-            liq_px = row["liq_px"]
-            if liq_px is None or liq_px <= 0:
-                continue
-            if liq_px < low or liq_px >= high:
-                continue
-
-            idx = int((liq_px - low) / bucket_size)
-            idx = min(idx, n_buckets - 1)
-            size_usd = row["size_usd"]
-
-            if row["side"] == "long":
-                buckets[idx]["long_liq_usd"] += size_usd
-                buckets[idx]["long_count"] += 1
-                total_long_liq += size_usd
-            else:
-                buckets[idx]["short_liq_usd"] += size_usd
-                buckets[idx]["short_count"] += 1
-                total_short_liq += size_usd
-
-        # Round values
-        for b in buckets:
-            b["long_liq_usd"] = round(b["long_liq_usd"], 2)
-            b["short_liq_usd"] = round(b["short_liq_usd"], 2)
+            cached = self._rendered.get(coin)
+            if cached and cached[0] == idx.version:
+                result = dict(cached[1])
+                result["mid_price"] = mid_px
+                return result
 
-        return {
-            "coin": coin,
-            "mid_price": mid_px,
-            "range_pct": self._cfg.range_pct,
-            "bucket_count": n_buckets,
-            "buckets": buckets,
-            "summary": {
-                "total_long_liq_usd": round(total_long_liq, 2),
-                "total_short_liq_usd": round(total_short_liq, 2),
-                "total_positions": len(rows),
-                "computed_at": time.time(),
-            },
-        }
+            n = idx.n
+            edges = idx.low + idx.width * np.arange(n + 1)
+            long_usd = np.maximum(idx.long_usd, 0).round(2)
+            short_usd = np.maximum(idx.short_usd, 0).round(2)
+            long_n = idx.long_n.tolist()
+            short_n = idx.short_n.tolist()
+            buckets = [
+                {
+                    "price_low": round(float(edges[i]), 2),
+                    "price_high": round(float(edges[i + 1]), 2),
+                    "price_mid": round(float(edges[i] + edges[i + 1]) / 2, 2),
+                    "long_liq_usd": float(long_usd[i]),
+                    "short_liq_usd": float(short_usd[i]),
+                    "long_count": long_n[i],
+                    "short_count": short_n[i],
+                }
+                for i in range(n)
+            ]
+            result = {
+                "coin": coin,
+                "mid_price": mid_px,
+                "range_pct": self._cfg.range_pct,
+                "bucket_count": n,
+                "buckets": buckets,
+                "summary": {
+                    "total_long_liq_usd": round(float(long_usd.sum()), 2),
+                    "total_short_liq_usd": round(float(short_usd.sum()), 2),
+                    "total_positions": total_positions,
+                    "computed_at": idx.updated_at or time.time(),
+                },
+            }
+            self._rendered[coin] = (idx.version, result)
+            return dict(result)
 
     def get_heatmap(self, coin: str) -> dict | None:
-        """Get cached heatmap for a coin."""
-        with self._cache_lock:
-            return self._cache.get(coin)
+        """Current heatmap for a coin (rendered from the incremental index)."""
+        return self._compute_coin_heatmap(coin, self._mid(coin))
+
+    def version(self, coin: str) -> int:
+        """Monotonic per-coin version; bumps on every delta and re-bucket."""
+        with self._lock:
+            idx = self._coins.get(coin)
+            return idx.version if idx is not None else self._retired_versions.get(coin, 0)
 
     def get_available_coins(self) -> list[str]:
-        with self._cache_lock:
-            return list(self._cache.keys())
+        with self._lock:
+            return [c for c, idx in self._coins.items() if idx.eligible_count]
 
     def stop(self):
         self._stop_event.set()
@@ -185,7 +358,13 @@ class LiqHeatmapEngine:
             self._thread.join(timeout=5)
 
     def stats(self) -> dict:
+        with self._lock:
+            indexed = sum(len(idx.positions) for idx in self._coins.values())
+            coins = len(self._coins)
         return {
-            "cached_coins": len(self._cache),
+            "cached_coins": coins,
+            "positions_indexed": indexed,
+            "total_deltas": self.total_deltas,
+            "total_rebuckets": self.total_rebuckets,
             "last_recompute": self._last_recompute,
         }
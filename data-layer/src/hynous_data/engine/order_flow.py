@@ -1,84 +1,177 @@
-"""Order flow engine — CVD (Cumulative Volume Delta) from trade buffers."""
+"""Order flow engine — CVD (Cumulative Volume Delta) from incremental per-second buckets.
+
+TradeStream feeds every trade into `record_trade()`. Each coin keeps a ring of
+per-second running totals (buy/sell notional + counts), so any window ending
+now is a single subtraction: cum[now] - cum[now - W]. Queries cost O(1) per
+window regardless of trade rate, and arbitrary windows up to `horizon` work.
+"""
 
 import time
 import logging
-
-from hynous_data.collectors.trade_stream import get_trade_buffer, get_all_buffers
+import threading
+from array import array
 
 log = logging.getLogger(__name__)
 
+# Column indices into the cumulative ring
+_BUY_USD, _SELL_USD, _BUY_N, _SELL_N = range(4)
+
+
+class _FlowAccumulator:
+    """Per-coin prefix sums over 1-second buckets, stored in a ring.
+
+    cum[k][sec % size] holds the running total of column k through the end
+    of second `sec`. Seconds without trades are forward-filled on the next
+    write, so every slot in the live range is a valid prefix sum. The ring
+    has horizon + 1 slots so a full-horizon window still has its base slot.
+    """
+
+    def __init__(self, horizon: int):
+        self._size = horizon + 1
+        self._cum = [array("d", bytes(8 * self._size)) for _ in range(4)]
+        self._running = [0.0, 0.0, 0.0, 0.0]
+        self._first_sec = -1
+        self._last_sec = -1
+        self._lock = threading.Lock()
+
+    def add(self, sec: int, notional: float, is_buy: bool) -> None:
+        with self._lock:
+            running = self._running
+            last = self._last_sec
+            if last < 0:
+                self._first_sec = self._last_sec = sec
+            elif sec > last:
+                # Forward-fill skipped seconds with the previous total (bounded by ring size)
+                for s in range(max(last + 1, sec - self._size + 1), sec):
+                    slot = s % self._size
+                    for k in range(4):
+                        self._cum[k][slot] = running[k]
+                self._last_sec = sec
+            # Late trades (sec < last) are folded into the latest second
+            if is_buy:
+                running[_BUY_USD] += notional
+                running[_BUY_N] += 1
+            else:
+                running[_SELL_USD] += notional
+                running[_SELL_N] += 1
+            slot = self._last_sec % self._size
+            for k in range(4):
+                self._cum[k][slot] = running[k]
+
+    def window(self, now_sec: int, window_s: int) -> tuple[float, float, int, int]:
+        """(buy_usd, sell_usd, buy_count, sell_count) for seconds in (now - W, now]."""
+        with self._lock:
+            last = self._last_sec
+            base_sec = now_sec - window_s
+            if last < 0 or base_sec >= last:
+                return 0.0, 0.0, 0, 0
+            if base_sec < self._first_sec:
+                base = (0.0, 0.0, 0.0, 0.0)
+            else:
+                # Clamp to the oldest retained slot (only hit when trade
+                # timestamps run ahead of the local clock)
+                slot = max(base_sec, last - self._size + 1) % self._size
+                base = tuple(self._cum[k][slot] for k in range(4))
+            r = self._running
+            return (
+                r[_BUY_USD] - base[_BUY_USD],
+                r[_SELL_USD] - base[_SELL_USD],
+                int(r[_BUY_N] - base[_BUY_N]),
+                int(r[_SELL_N] - base[_SELL_N]),
+            )
+
+    @property
+    def total_trades(self) -> int:
+        return int(self._running[_BUY_N] + self._running[_SELL_N])
+
 
 class OrderFlowEngine:
     """Computes buy/sell volume + CVD per coin across configurable windows."""
 
-    def __init__(self, windows: list[int] | None = None):
+    def __init__(self, windows: list[int] | None = None, horizon: int | None = None):
         self._windows = windows or [60, 300, 900, 3600]  # seconds
+        self._horizon = max(horizon or 0, max(self._windows))
+        self._coins: dict[str, _FlowAccumulator] = {}
+        self._coins_lock = threading.Lock()
+
+    @property
+    def horizon(self) -> int:
+        return self._horizon
+
+    def record_trade(self, coin: str, time_ms: int, notional: float, is_buy: bool) -> None:
+        """Fold one trade into the coin's buckets. Called from TradeStream._on_trade."""
+        acc = self._coins.get(coin)
+        if acc is None:
+            with self._coins_lock:
+                acc = self._coins.setdefault(coin, _FlowAccumulator(self._horizon))
+        acc.add(time_ms // 1000, notional, is_buy)
+
+    def clear(self) -> None:
+        with self._coins_lock:
+            self._coins.clear()
+
+    def version(self, coin: str) -> int:
+        """Trades recorded for `coin` so far (changes whenever its flow does)."""
+        acc = self._coins.get(coin)
+        return acc.total_trades if acc is not None else 0
+
+    def get_window(self, coin: str, window_s: int, now: float | None = None) -> dict:
+        """Order flow for one arbitrary window (seconds, capped at horizon)."""
+        acc = self._coins.get(coin)
+        now_sec = int(now if now is not None else time.time())
+        window_s = min(int(window_s), self._horizon)
+        if acc is None:
+            buy_vol, sell_vol, buy_count, sell_count = 0.0, 0.0, 0, 0
+        else:
+            buy_vol, sell_vol, buy_count, sell_count = acc.window(now_sec, window_s)
+
+        cvd = buy_vol - sell_vol
+        total = buy_vol + sell_vol
+        return {
+            "window_seconds": window_s,
+            "buy_volume_usd": round(buy_vol, 2),
+            "sell_volume_usd": round(sell_vol, 2),
+            "cvd": round(cvd, 2),
+            "buy_count": buy_count,
+            "sell_count": sell_count,
+            "buy_pct": round(buy_vol / total * 100, 1) if total else 0,
+        }
 
-    def get_order_flow(self, coin: str) -> dict:
-        """Compute order flow metrics for a coin across all windows."""
-        buf = get_trade_buffer(coin)
-        if not buf:
+    def get_order_flow(self, coin: str, windows: list[int] | None = None) -> dict:
+        """Compute order flow metrics for a coin across all (or the given) windows."""
+        acc = self._coins.get(coin)
+        if acc is None or not acc.total_trades:
             return {"coin": coin, "windows": {}, "total_trades": 0}
 
-        now_ms = int(time.time() * 1000)
+        now = time.time()
         results = {}
-
-        for window_s in self._windows:
-            cutoff_ms = now_ms - window_s * 1000
-            buy_vol = 0.0
-            sell_vol = 0.0
-            buy_count = 0
-            sell_count = 0
-
-            # Snapshot then iterate (deque can be mutated by WS thread)
-            for trade in reversed(list(buf)):
-                if trade["time"] < cutoff_ms:
-                    break
-                notional = trade["px"] * trade["sz"]
-                if trade["side"] == "B":
-                    buy_vol += notional
-                    buy_count += 1
-                else:
-                    sell_vol += notional
-                    sell_count += 1
-
-            cvd = buy_vol - sell_vol
-            total = buy_vol + sell_vol
-            label = f"{window_s // 60}m" if window_s < 3600 else f"{window_s // 3600}h"
-
-            results[label] = {
-                "window_seconds": window_s,
-                "buy_volume_usd": round(buy_vol, 2),
-                "sell_volume_usd": round(sell_vol, 2),
-                "cvd": round(cvd, 2),
-                "buy_count": buy_count,
-                "sell_count": sell_count,
-                "buy_pct": round(buy_vol / total * 100, 1) if total else 0,
-            }
+        for window_s in windows or self._windows:
+            flow = self.get_window(coin, window_s, now)
+            # Label the window actually used (after the horizon cap)
+            results[_window_label(flow["window_seconds"])] = flow
 
         return {
             "coin": coin,
             "windows": results,
-            "total_trades": len(buf),
+            "total_trades": acc.total_trades,
         }
 
     def get_all_cvd_summary(self) -> dict[str, float]:
         """Quick 5m CVD for all coins (for scanner integration)."""
-        buffers = get_all_buffers()
-        cutoff_ms = int(time.time() * 1000) - 300_000  # 5min
+        now_sec = int(time.time())
+        with self._coins_lock:
+            coins = list(self._coins.items())
         summary = {}
-
-        for coin, buf in list(buffers.items()):
-            buy = 0.0
-            sell = 0.0
-            for trade in reversed(list(buf)):
-                if trade["time"] < cutoff_ms:
-                    break
-                notional = trade["px"] * trade["sz"]
-                if trade["side"] == "B":
-                    buy += notional
-                else:
-                    sell += notional
+        for coin, acc in coins:
+            buy, sell, _, _ = acc.window(now_sec, min(300, self._horizon))
             summary[coin] = round(buy - sell, 2)
-
         return summary
+
+
+def _window_label(window_s: int) -> str:
+    """Unique label per window: "1h", "90m", "90s" (no rounding, so no collisions)."""
+    if window_s >= 3600 and window_s % 3600 == 0:
+        return f"{window_s // 3600}h"
+    if window_s >= 60 and window_s % 60 == 0:
+        return f"{window_s // 60}m"
+    return f"{window_s}s"
@@ -30,7 +30,7 @@ class PositionChangeTracker:
         Also seeds empty snapshots for watched wallets with no positions,
         so they don't trigger false entries on first poll.
         """
-        conn = self._db.conn
+        conn = self._db.read_conn
 
         # All active watched addresses (even those with no positions)
         watched_rows = conn.execute(
@@ -193,7 +193,7 @@ class PositionChangeTracker:
 
     def get_watched_addresses(self) -> set[str]:
         """Get set of active watched wallet addresses."""
-        rows = self._db.conn.execute(
+        rows = self._db.read_conn.execute(
             "SELECT address FROM watched_wallets WHERE is_active = 1"
         ).fetchall()
         return {r["address"] for r in rows}
@@ -1,5 +1,15 @@
-"""Wallet profiler — fetch fills, compute win rate / style, manage watchlist."""
-
+"""Wallet profiler — fetch fills, compute win rate / style, manage watchlist.
+
+Profiles are refreshed incrementally. Each address keeps a fill cursor and
+its in-progress FIFO trades in `wallet_fill_state`. A refresh fetches only
+the fills since the cursor, continues matching from the saved open trades,
+and appends newly closed trades to `wallet_trades`. The windowed stats
+(win rate, profit factor, drawdown, style) are then aggregated from that
+cache. The full N-day history is fetched only the first time, or when the
+cursor has fallen out of the profiling window.
+"""
+
+import json
 import time
 import logging
 
@@ -7,13 +17,31 @@ from hyperliquid.info import Info
 
 from hynous_data.core.config import SmartMoneyConfig
 from hynous_data.core.db import Database
-from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.core.rate_limiter import BULK, RateLimiter
 
 log = logging.getLogger(__name__)
 
 FILLS_WEIGHT = 20  # Hyperliquid API weight for user_fills_by_time
 
 
+def _trade_row(address: str, t: dict) -> tuple:
+    """wallet_trades row for a matched trade."""
+    return (
+        address,
+        t.get("coin", ""),
+        t.get("side", ""),
+        t.get("entry_px", 0),
+        t.get("exit_px", t.get("entry_px", 0)),
+        round(t.get("entry_px", 0) * t.get("entry_size", 0), 2),
+        round(t.get("pnl_usd", 0), 2),
+        round(t.get("pnl_pct", 0), 6),
+        round(t.get("hold_hours", 0), 3),
+        t.get("entry_time", 0),
+        t.get("exit_time", 0),
+        1 if t.get("pnl_usd", 0) > 0 else 0,
+    )
+
+
 class WalletProfiler:
     """Fetches trade history, computes profiles, manages watchlist."""
 
@@ -28,6 +56,9 @@ class WalletProfiler:
         self._rl = rate_limiter
         self._cfg = config
         self._info = Info(base_url=base_url, skip_ws=True, timeout=10)
+        # Stats
+        self.total_fills_ingested = 0
+        self.total_incremental = 0  # refreshes that resumed from a cursor
 
     # ------------------------------------------------------------------
     # Fill fetching
@@ -40,17 +71,20 @@ class WalletProfiler:
         """
         window = days or self._cfg.profile_window_days
         start_ms = int((time.time() - window * 86400) * 1000)
+        return self._fetch_fills_since(address, start_ms) or []
 
-        if not self._rl.acquire(FILLS_WEIGHT, timeout=30):
+    def _fetch_fills_since(self, address: str, start_ms: int) -> list[dict] | None:
+        """Fills with time >= start_ms (one API page). None on failure."""
+        if not self._rl.acquire(FILLS_WEIGHT, timeout=30, priority=BULK):
             log.warning("Rate limit timeout fetching fills for %s", address[:10])
-            return []
+            return None
 
         try:
             fills = self._info.user_fills_by_time(address, start_ms)
             return fills if isinstance(fills, list) else []
         except Exception:
             log.exception("Failed to fetch fills for %s", address[:10])
-            return []
+            return None
 
     # ------------------------------------------------------------------
     # Profile computation
@@ -79,6 +113,13 @@ class WalletProfiler:
             coin_fills.sort(key=lambda x: x.get("time", 0))
             trades.extend(self._match_trades(coin, coin_fills))
 
+        profile = self._aggregate(trades)
+        if profile:
+            profile["_trades"] = trades  # raw matched trades for DB storage
+        return profile
+
+    def _aggregate(self, trades: list[dict]) -> dict:
+        """Profile stats over matched trades (in the order given)."""
         if len(trades) < self._cfg.min_trades_for_profile:
             return {}
 
@@ -150,7 +191,6 @@ class WalletProfiler:
             "max_drawdown": round(max_dd, 2),
             "style": style,
             "is_bot": 1 if is_bot else 0,
-            "_trades": trades,  # raw matched trades for DB storage
         }
 
     def _match_trades(self, coin: str, fills: list[dict]) -> list[dict]:
@@ -164,8 +204,22 @@ class WalletProfiler:
         prices, never derived from PnL — deriving from PnL causes overflow
         when entry_size is only the first fill (not total position size).
         """
+        trades, current_trade = self._match_fills(coin, fills)
+
+        # Finalize any open trade
+        if current_trade is not None and current_trade["pnl_usd"] != 0:
+            self._finalize_trade(current_trade, trades)
+
+        return trades
+
+    def _match_fills(
+        self, coin: str, fills: list[dict], current_trade: dict | None = None,
+    ) -> tuple[list[dict], dict | None]:
+        """Run FIFO matching over time-sorted fills, resuming from `current_trade`.
+
+        Returns (closed trades, in-progress trade or None).
+        """
         trades = []
-        current_trade: dict | None = None
 
         for f in fills:
             px = float(f.get("px", 0))
@@ -213,11 +267,7 @@ class WalletProfiler:
                     self._finalize_trade(current_trade, trades)
                     current_trade = None
 
-        # Finalize any open trade
-        if current_trade is not None and current_trade["pnl_usd"] != 0:
-            self._finalize_trade(current_trade, trades)
-
-        return trades
+        return trades, current_trade
 
     def _finalize_trade(self, trade: dict, trades: list[dict]):
         """Compute derived fields and append to trades list."""
@@ -242,6 +292,127 @@ class WalletProfiler:
 
         trades.append(trade)
 
+    # ------------------------------------------------------------------
+    # Incremental ingestion (cursor + persisted FIFO state)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fill_key(f: dict) -> str:
+        tid = f.get("tid")
+        if tid is not None:
+            return str(tid)
+        return f"{f.get('hash', '')}:{f.get('oid', '')}:{f.get('px', '')}:{f.get('sz', '')}"
+
+    def update_profile(self, address: str, now: float | None = None) -> dict:
+        """Ingest fills since the address's cursor and return its windowed profile.
+
+        Newly closed trades are appended to wallet_trades and the cursor and
+        open trades are saved in one transaction. The returned profile
+        carries no `_trades`, since they are already stored. Returns {} if
+        the fetch failed or there are too few trades in the window.
+        """
+        now = now or time.time()
+        window_start = now - self._cfg.profile_window_days * 86400
+        window_start_ms = int(window_start * 1000)
+        conn = self._db.read_conn
+
+        row = conn.execute(
+            "SELECT cursor_ms, cursor_keys, open_trades FROM wallet_fill_state WHERE address = ?",
+            (address,),
+        ).fetchone()
+        reset = row is None or row["cursor_ms"] < window_start_ms
+        if reset:
+            # First run, or the gap is wider than the window: full-window fetch
+            cursor_ms, cursor_keys, open_trades = window_start_ms, set(), {}
+        else:
+            cursor_ms = row["cursor_ms"]
+            cursor_keys = set(json.loads(row["cursor_keys"]))
+            open_trades = json.loads(row["open_trades"])
+
+        fills = self._fetch_fills_since(address, cursor_ms)
+        if fills is None:
+            return {}
+
+        # Drop the overlap: fills at exactly cursor_ms that were already ingested
+        new_fills = []
+        for f in fills:
+            t = f.get("time", 0)
+            if t < cursor_ms or (t == cursor_ms and self._fill_key(f) in cursor_keys):
+                continue
+            new_fills.append(f)
+        if new_fills:
+            last_ms = max(f.get("time", 0) for f in new_fills)
+            at_last = {self._fill_key(f) for f in new_fills if f.get("time", 0) == last_ms}
+            cursor_keys = (cursor_keys | at_last) if last_ms == cursor_ms else at_last
+            cursor_ms = last_ms
+
+        # Resume FIFO matching per coin from the saved in-progress trades
+        by_coin: dict[str, list[dict]] = {}
+        for f in new_fills:
+            coin = f.get("coin", "")
+            if coin:
+                by_coin.setdefault(coin, []).append(f)
+        closed: list[dict] = []
+        for coin, coin_fills in by_coin.items():
+            coin_fills.sort(key=lambda x: x.get("time", 0))
+            trades, current = self._match_fills(coin, coin_fills, open_trades.get(coin))
+            closed.extend(trades)
+            if current is None:
+                open_trades.pop(coin, None)
+            else:
+                open_trades[coin] = current
+
+        # Windowed trade set: cached closed trades + new ones + provisional partial closes
+        cached = [] if reset else [
+            dict(r) for r in conn.execute(
+                """
+                SELECT pnl_usd, pnl_pct, hold_hours, entry_time, exit_time
+                FROM wallet_trades WHERE address = ? AND exit_time >= ?
+                """,
+                (address, window_start),
+            ).fetchall()
+        ]
+        provisional: list[dict] = []
+        for trade in open_trades.values():
+            if trade["pnl_usd"] != 0:
+                self._finalize_trade(dict(trade), provisional)
+        window_trades = cached + [t for t in closed + provisional if t["exit_time"] >= window_start]
+        window_trades.sort(key=lambda t: t["exit_time"])
+
+        with self._db.write_lock:
+            db = self._db.conn
+            if reset:
+                db.execute("DELETE FROM wallet_trades WHERE address = ?", (address,))
+            else:
+                db.execute(
+                    "DELETE FROM wallet_trades WHERE address = ? AND exit_time < ?",
+                    (address, window_start),
+                )
+            if closed:
+                db.executemany(
+                    """
+                    INSERT INTO wallet_trades
+                    (address, coin, side, entry_px, exit_px, size_usd, pnl_usd,
+                     pnl_pct, hold_hours, entry_time, exit_time, is_win)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [_trade_row(address, t) for t in closed],
+                )
+            db.execute(
+                """
+                INSERT OR REPLACE INTO wallet_fill_state
+                (address, cursor_ms, cursor_keys, open_trades, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (address, cursor_ms, json.dumps(sorted(cursor_keys)),
+                 json.dumps(open_trades), time.time()),
+            )
+            db.commit()
+
+        self.total_fills_ingested += len(new_fills)
+        self.total_incremental += 0 if reset else 1
+        return self._aggregate(window_trades)
+
     # ------------------------------------------------------------------
     # Profile refresh (called periodically by orchestrator)
     # ------------------------------------------------------------------
@@ -254,7 +425,7 @@ class WalletProfiler:
         2. Watched wallets needing refresh
         3. Stale profiles past refresh window
         """
-        conn = self._db.conn
+        conn = self._db.read_conn
         now = time.time()
         profile_cutoff = now - self._cfg.profile_refresh_hours * 3600
         limit = self._cfg.max_profiles_per_cycle
@@ -268,32 +439,19 @@ class WalletProfiler:
                     addresses.append(a)
 
         # 1. Top-ranked by 24h PnL that have no profile or stale profile.
-        #    Same ranking logic as get_rankings — these are what the
-        #    leaderboard shows, so they MUST have profile data.
+        #    Reads the same rolling pnl_rollup the leaderboard is built from —
+        #    these are what the leaderboard shows, so they MUST have profile data.
         ranked = conn.execute(
             """
-            WITH top_pnl AS (
-                SELECT address,
-                       MIN(snapshot_at) AS first_snap,
-                       MAX(snapshot_at) AS last_snap
-                FROM pnl_snapshots
-                WHERE snapshot_at >= ?
-                GROUP BY address
-                HAVING COUNT(*) >= 2
-            )
-            SELECT tp.address,
-                   ps_last.equity - ps_first.equity AS pnl
-            FROM top_pnl tp
-            JOIN pnl_snapshots ps_first
-                ON ps_first.address = tp.address AND ps_first.snapshot_at = tp.first_snap
-            JOIN pnl_snapshots ps_last
-                ON ps_last.address = tp.address AND ps_last.snapshot_at = tp.last_snap
-            LEFT JOIN wallet_profiles wp ON tp.address = wp.address
-            WHERE wp.address IS NULL OR wp.computed_at < ?
-            ORDER BY pnl DESC
+            SELECT r.address
+            FROM pnl_rollup r
+            LEFT JOIN wallet_profiles wp ON r.address = wp.address
+            WHERE r.last_at > r.first_at
+            AND (wp.address IS NULL OR wp.computed_at < ?)
+            ORDER BY r.pnl DESC
             LIMIT ?
             """,
-            (now - 86400, profile_cutoff, limit),
+            (profile_cutoff, limit),
         ).fetchall()
         _add([r["address"] for r in ranked])
 
@@ -318,10 +476,7 @@ class WalletProfiler:
         profiled = 0
         for addr in addresses:
             try:
-                fills = self.fetch_fills(addr)
-                if not fills:
-                    continue
-                profile = self.compute_profile(fills)
+                profile = self.update_profile(addr, now)
                 if not profile:
                     continue
 
@@ -366,9 +521,11 @@ class WalletProfiler:
                     equity,
                 ),
             )
-            # Replace cached trades for this address
+            # Replace cached trades for this address (and restart incremental
+            # ingestion from a full window, since the cursor no longer matches)
             if trades:
                 conn.execute("DELETE FROM wallet_trades WHERE address = ?", (address,))
+                conn.execute("DELETE FROM wallet_fill_state WHERE address = ?", (address,))
                 conn.executemany(
                     """
                     INSERT INTO wallet_trades
@@ -376,23 +533,7 @@ class WalletProfiler:
                      pnl_pct, hold_hours, entry_time, exit_time, is_win)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
-                    [
-                        (
-                            address,
-                            t.get("coin", ""),
-                            t.get("side", ""),
-                            t.get("entry_px", 0),
-                            t.get("exit_px", t.get("entry_px", 0)),
-                            round(t.get("entry_px", 0) * t.get("entry_size", 0), 2),
-                            round(t.get("pnl_usd", 0), 2),
-                            round(t.get("pnl_pct", 0), 6),
-                            round(t.get("hold_hours", 0), 3),
-                            t.get("entry_time", 0),
-                            t.get("exit_time", 0),
-                            1 if t.get("pnl_usd", 0) > 0 else 0,
-                        )
-                        for t in trades
-                    ],
+                    [_trade_row(address, t) for t in trades],
                 )
             conn.commit()
 
@@ -406,7 +547,7 @@ class WalletProfiler:
         Returns count of newly added wallets.
         """
         cfg = self._cfg
-        conn = self._db.conn
+        conn = self._db.read_conn
 
         # Count existing auto-curated wallets
         auto_count = conn.execute(
@@ -491,7 +632,7 @@ class WalletProfiler:
 
     def get_watchlist(self) -> list[dict]:
         """Get all active watched wallets with profile data + position counts + notes/tags."""
-        conn = self._db.conn
+        conn = self._db.read_conn
         rows = conn.execute(
             """
             SELECT
@@ -525,7 +666,7 @@ class WalletProfiler:
             days: how many days of fill history to analyze (default 30 for on-demand)
         """
         address = address.strip().lower()
-        conn = self._db.conn
+        conn = self._db.read_conn
 
         # Check existing profile — recompute if missing or if requesting
         # a deeper window than what was cached (stale = older than refresh window)
@@ -1,4 +1,17 @@
-"""Smart money engine — PnL tracking and most-profitable address ranking."""
+"""Smart money engine — PnL tracking and most-profitable address ranking.
+
+Rankings are maintained incrementally instead of being recomputed per request:
+
+- `pnl_rollup` holds each address's first/last equity inside the 24h window.
+  Every snapshot batch upserts the "last" side in the same write as the
+  snapshot rows. The "first" side only moves when the window start passes it.
+- The ranker thread runs every `rank_interval` seconds. It expires rows that
+  left the window, slides `first_*` forward to the earliest in-window
+  snapshot, and rebuilds `smart_money_rankings`: the top-K rows by PnL,
+  joined with their wallet profiles.
+- `get_rankings()` filters and pages that small indexed table. No request
+  scans pnl_snapshots.
+"""
 
 import time
 import logging
@@ -12,14 +25,25 @@ log = logging.getLogger(__name__)
 # Don't re-queue an address within this window (seconds)
 _QUEUE_DEDUP_TTL = 300  # 5 minutes
 
+WINDOW_S = 86400  # ranking window (24h)
+
 
 class SmartMoneyEngine:
     """Tracks equity over time and ranks addresses by profitability."""
 
-    def __init__(self, db: Database, profiler=None, min_equity: float = 50_000):
+    def __init__(self, db: Database, profiler=None, min_equity: float = 50_000,
+                 top_k: int = 500, rank_interval: float = 60):
         self._db = db
         self._profiler = profiler
         self._min_equity = min_equity
+        self._top_k = top_k
+        self._rank_interval = rank_interval
+        self._ranker: threading.Thread | None = None
+        self._ranker_stop = threading.Event()
+        # Stats
+        self.total_rebuilds = 0
+        self.last_rebuild_at: float = 0
+        self.last_rebuild_ms: float = 0
         # Persistent profiling queue + drainer thread
         self._profile_queue: deque[str] = deque()
         self._queue_lock = threading.Lock()
@@ -39,13 +63,42 @@ class SmartMoneyEngine:
         )
         self._drainer.start()
 
+    def start_ranker(self):
+        """Rebuild the rollup from pnl_snapshots, then start the ranker thread."""
+        if self._ranker and self._ranker.is_alive():
+            return
+        try:
+            self.rebuild_rollup()
+            self.rebuild_rankings()
+        except Exception:
+            log.exception("Initial smart money ranking failed")
+        self._ranker_stop.clear()
+        self._ranker = threading.Thread(
+            target=self._rank_loop, daemon=True, name="smart-money-ranker"
+        )
+        self._ranker.start()
+
+    def stop(self):
+        self._ranker_stop.set()
+        if self._ranker:
+            self._ranker.join(timeout=5)
+
+    def _rank_loop(self):
+        log.info("Smart money ranker started (every %ss, top %d)", self._rank_interval, self._top_k)
+        while not self._ranker_stop.wait(self._rank_interval):
+            try:
+                self.expire_window()
+                self.rebuild_rankings()
+            except Exception:
+                log.exception("Smart money ranking cycle failed")
+
     def _refresh_profiled_set(self):
         """Cache the set of addresses that already have profiles (every 60s)."""
         now = time.time()
         if now - self._profiled_addrs_ts < 60:
             return
         try:
-            rows = self._db.conn.execute(
+            rows = self._db.read_conn.execute(
                 "SELECT address FROM wallet_profiles"
             ).fetchall()
             self._profiled_addrs = {r["address"] for r in rows}
@@ -98,13 +151,10 @@ class SmartMoneyEngine:
         if not profiler:
             return
         try:
-            fills = profiler.fetch_fills(addr)
-            if not fills:
-                return
-            profile = profiler.compute_profile(fills)
+            profile = profiler.update_profile(addr)
             if not profile:
                 return
-            conn = self._db.conn
+            conn = self._db.read_conn
             eq_row = conn.execute(
                 "SELECT equity FROM pnl_snapshots WHERE address = ? ORDER BY snapshot_at DESC LIMIT 1",
                 (addr,),
@@ -129,24 +179,42 @@ class SmartMoneyEngine:
         """Record a PnL snapshot for a single address."""
         self.batch_snapshot_pnl([(address, equity, unrealized)])
 
-    def batch_snapshot_pnl(self, snapshots: list[tuple[str, float, float]]):
+    def batch_snapshot_pnl(self, snapshots: list[tuple[str, float, float]],
+                           now: float | None = None):
         """Record PnL snapshots for multiple addresses in one transaction.
 
-        Also queues high-equity addresses without profiles for immediate profiling.
+        The rollup's last equity is updated in the same write. Also queues
+        high-equity addresses without profiles for immediate profiling.
         """
         if not snapshots:
             return
-        now = time.time()
-        conn = self._db.conn
+        now = now or time.time()
         rows = [(addr, now, eq, unr) for addr, eq, unr in snapshots]
+        rollup = [(addr, now, eq, now, eq) for addr, eq, _ in snapshots]
+
+        def _op(conn):
+            conn.executemany(
+                "INSERT OR REPLACE INTO pnl_snapshots "
+                "(address, snapshot_at, equity, unrealized) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            # A re-snapshot at the same timestamp replaces the first side too
+            conn.executemany(
+                """
+                INSERT INTO pnl_rollup (address, first_at, first_equity, last_at, last_equity)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(address) DO UPDATE SET
+                    first_equity = CASE WHEN first_at = excluded.last_at
+                                        THEN excluded.last_equity ELSE first_equity END,
+                    last_at = excluded.last_at,
+                    last_equity = excluded.last_equity
+                WHERE excluded.last_at >= pnl_rollup.last_at
+                """,
+                rollup,
+            )
+
         try:
-            with self._db.write_lock:
-                conn.executemany(
-                    "INSERT OR REPLACE INTO pnl_snapshots "
-                    "(address, snapshot_at, equity, unrealized) VALUES (?, ?, ?, ?)",
-                    rows,
-                )
-                conn.commit()
+            self._db.write(_op)
         except Exception:
             log.exception("Failed to write %d PnL snapshots", len(rows))
             return
@@ -162,112 +230,201 @@ class SmartMoneyEngine:
                 self._enqueue(need_profile)
 
     # ------------------------------------------------------------------
-    # Rankings
+    # Rolling window maintenance
     # ------------------------------------------------------------------
 
-    def get_rankings(self, top_n: int = 50) -> dict:
-        """Rank addresses by equity growth over the last 24h.
+    def rebuild_rollup(self, now: float | None = None):
+        """Recompute pnl_rollup from pnl_snapshots (startup / recovery)."""
+        cutoff = (now or time.time()) - WINDOW_S
+
+        def _op(conn):
+            conn.execute("DELETE FROM pnl_rollup")
+            conn.execute(
+                """
+                WITH addr_range AS (
+                    SELECT address,
+                           MIN(snapshot_at) AS first_snap,
+                           MAX(snapshot_at) AS last_snap
+                    FROM pnl_snapshots
+                    WHERE snapshot_at >= ?
+                    GROUP BY address
+                )
+                INSERT INTO pnl_rollup (address, first_at, first_equity, last_at, last_equity)
+                SELECT ar.address, ar.first_snap, ps_first.equity, ar.last_snap, ps_last.equity
+                FROM addr_range ar
+                JOIN pnl_snapshots ps_first
+                    ON ps_first.address = ar.address AND ps_first.snapshot_at = ar.first_snap
+                JOIN pnl_snapshots ps_last
+                    ON ps_last.address = ar.address AND ps_last.snapshot_at = ar.last_snap
+                """,
+                (cutoff,),
+            )
+
+        self._db.write(_op)
 
-        Uses window functions to get first/last equity in a single query,
-        then joins positions. Avoids N+1 queries.
+    def expire_window(self, now: float | None = None):
+        """Slide the rollup's window start to now - 24h.
+
+        Addresses with no snapshot left in the window are dropped. The rest
+        move their first side to the earliest in-window snapshot, which is one
+        (address, snapshot_at) index seek each, and only for rows that expired.
         """
-        cutoff = time.time() - 86400  # 24h
-        conn = self._db.conn
+        cutoff = (now or time.time()) - WINDOW_S
+
+        def _op(conn):
+            conn.execute("DELETE FROM pnl_rollup WHERE last_at < ?", (cutoff,))
+            conn.execute(
+                """
+                UPDATE pnl_rollup SET (first_at, first_equity) = (
+                    SELECT ps.snapshot_at, ps.equity FROM pnl_snapshots ps
+                    WHERE ps.address = pnl_rollup.address AND ps.snapshot_at >= ?
+                    ORDER BY ps.snapshot_at LIMIT 1
+                )
+                WHERE first_at < ?
+                """,
+                (cutoff, cutoff),
+            )
 
-        # Single query: compute PnL, sort, and limit in SQL (avoids fetching 10k+ rows)
-        # Fetch 3x top_n to allow for post-filtering in the API route
-        fetch_n = top_n * 3
-        rows = conn.execute(
-            """
-            WITH addr_range AS (
-                SELECT
-                    address,
-                    MIN(snapshot_at) AS first_snap,
-                    MAX(snapshot_at) AS last_snap
-                FROM pnl_snapshots
-                WHERE snapshot_at >= ?
-                GROUP BY address
-                HAVING COUNT(*) >= 2
+        self._db.write(_op)
+
+    def rebuild_rankings(self):
+        """Materialize the top-K addresses by window PnL, joined with profiles."""
+        def _op(conn):
+            t0 = time.perf_counter()
+            conn.execute("DELETE FROM smart_money_rankings")
+            conn.execute(
+                """
+                INSERT INTO smart_money_rankings
+                (rank, address, equity_start, equity, pnl_24h, pnl_pct_24h,
+                 win_rate, style, is_bot, trade_count, profit_factor,
+                 avg_hold_hours, has_profile)
+                SELECT ROW_NUMBER() OVER (ORDER BY r.pnl DESC, r.address),
+                       r.address, r.first_equity, r.last_equity, r.pnl,
+                       CASE WHEN r.first_equity > 0 THEN r.pnl / r.first_equity * 100 ELSE 0 END,
+                       wp.win_rate, wp.style, COALESCE(wp.is_bot, 0), wp.trade_count,
+                       wp.profit_factor, wp.avg_hold_hours, wp.address IS NOT NULL
+                FROM (
+                    SELECT * FROM pnl_rollup
+                    WHERE last_at > first_at
+                    ORDER BY pnl DESC
+                    LIMIT ?
+                ) r
+                LEFT JOIN wallet_profiles wp ON wp.address = r.address
+                """,
+                (self._top_k,),
             )
-            SELECT
-                ar.address,
-                ps_first.equity AS equity_start,
-                ps_last.equity AS equity_end,
-                (ps_last.equity - ps_first.equity) AS pnl
-            FROM addr_range ar
-            JOIN pnl_snapshots ps_first
-                ON ps_first.address = ar.address AND ps_first.snapshot_at = ar.first_snap
-            JOIN pnl_snapshots ps_last
-                ON ps_last.address = ar.address AND ps_last.snapshot_at = ar.last_snap
-            ORDER BY pnl DESC
-            LIMIT ?
-            """,
-            (cutoff, fetch_n),
+            self.last_rebuild_ms = (time.perf_counter() - t0) * 1000
+
+        self._db.write(_op)
+        # The rebuild count is the /v1/smart-money cache version: bump it only
+        # after the new rankings are committed
+        self._db.flush_writes()
+        self.total_rebuilds += 1
+        self.last_rebuild_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Rankings
+    # ------------------------------------------------------------------
+
+    def get_rankings(
+        self,
+        top_n: int = 50,
+        offset: int = 0,
+        min_win_rate: float = 0,
+        styles: set[str] | None = None,
+        exclude_bots: bool = False,
+        min_trades: int = 0,
+        min_equity: float = 0,
+        max_hold_hours: float = 0,
+    ) -> dict:
+        """Page of the precomputed 24h leaderboard, filtered in SQL.
+
+        Rankings cover the top `rank_top_k` addresses as of the last ranker
+        cycle. Live positions are attached for the returned page only.
+        """
+        where = []
+        params: list = []
+        if min_win_rate:
+            where.append("COALESCE(win_rate, 0) >= ?")
+            params.append(min_win_rate)
+        if styles:
+            where.append(f"style IN ({','.join('?' for _ in styles)})")
+            params.extend(sorted(styles))
+        if exclude_bots:
+            where.append("is_bot = 0")
+        if min_trades:
+            where.append("COALESCE(trade_count, 0) >= ?")
+            params.append(min_trades)
+        if min_equity:
+            where.append("equity >= ?")
+            params.append(min_equity)
+        if max_hold_hours:
+            where.append("COALESCE(avg_hold_hours, 999) <= ?")
+            params.append(max_hold_hours)
+
+        conn = self._db.read_conn
+        rows = conn.execute(
+            "SELECT address, equity, pnl_24h, pnl_pct_24h, win_rate, style, is_bot, "
+            "trade_count, profit_factor, avg_hold_hours, has_profile "
+            "FROM smart_money_rankings"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY rank LIMIT ? OFFSET ?",
+            (*params, top_n, offset),
         ).fetchall()
 
+        result = {
+            "rankings": [],
+            "count": 0,
+            "offset": offset,
+            "window_hours": 24,
+            "computed_at": self.last_rebuild_at,
+        }
         if not rows:
-            return {"rankings": [], "count": 0, "window_hours": 24}
-
-        addr_pnl = []
-        for row in rows:
-            start = row["equity_start"]
-            pnl = row["pnl"]
-            pnl_pct = (pnl / start * 100) if start > 0 else 0
-            addr_pnl.append({
-                "address": row["address"],
-                "equity": round(row["equity_end"], 2),
-                "pnl_24h": round(pnl, 2),
-                "pnl_pct_24h": round(pnl_pct, 2),
-            })
-
-        # Batch fetch positions for top addresses (1 query instead of N)
-        top_addrs = [a["address"] for a in addr_pnl]
+            return result
+
+        # Batch fetch positions for the page (1 query instead of N)
+        top_addrs = [r["address"] for r in rows]
         placeholders = ",".join("?" for _ in top_addrs)
         pos_rows = conn.execute(
             f"SELECT address, coin, side, size_usd, unrealized_pnl "
             f"FROM positions WHERE address IN ({placeholders})",
             top_addrs,
         ).fetchall()
-
-        # Group positions by address
         pos_map: dict[str, list[dict]] = {}
         for p in pos_rows:
-            addr = p["address"]
-            if addr not in pos_map:
-                pos_map[addr] = []
-            pos_map[addr].append(dict(p))
-
-        # Batch fetch profiles (win_rate, style) if table exists
-        profile_map: dict[str, dict] = {}
-        try:
-            prof_rows = conn.execute(
-                f"SELECT address, win_rate, style, is_bot, trade_count, profit_factor "
-                f"FROM wallet_profiles WHERE address IN ({placeholders})",
-                top_addrs,
-            ).fetchall()
-            for pr in prof_rows:
-                profile_map[pr["address"]] = dict(pr)
-        except Exception:
-            pass  # Table may not exist yet
+            pos_map.setdefault(p["address"], []).append(dict(p))
 
-        # Attach positions + profile data; queue any missing for profiling
+        # Attach positions; queue any unprofiled addresses for profiling
+        rankings = []
         missing_profile = []
-        for entry in addr_pnl:
+        for r in rows:
+            entry = dict(r)
+            entry["equity"] = round(entry["equity"], 2)
+            entry["pnl_24h"] = round(entry["pnl_24h"], 2)
+            entry["pnl_pct_24h"] = round(entry["pnl_pct_24h"], 2)
             entry["positions"] = pos_map.get(entry["address"], [])
-            prof = profile_map.get(entry["address"], {})
-            entry["win_rate"] = prof.get("win_rate")
-            entry["style"] = prof.get("style")
-            entry["is_bot"] = prof.get("is_bot", 0)
-            entry["trade_count"] = prof.get("trade_count")
-            entry["profit_factor"] = prof.get("profit_factor")
-            if not prof:
+            if not entry.pop("has_profile"):
                 missing_profile.append(entry["address"])
+            rankings.append(entry)
 
         if missing_profile:
             self._enqueue(missing_profile)
 
+        result["rankings"] = rankings
+        result["count"] = len(rankings)
+        return result
+
+    @property
+    def version(self) -> int:
+        """Bumped by every rankings rebuild."""
+        return self.total_rebuilds
+
+    def stats(self) -> dict:
         return {
-            "rankings": addr_pnl,
-            "count": len(addr_pnl),
-            "window_hours": 24,
+            "top_k": self._top_k,
+            "rank_interval": self._rank_interval,
+            "rebuilds": self.total_rebuilds,
+            "last_rebuild_at": self.last_rebuild_at,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+            "profile_queue": len(self._profile_queue),
         }
@@ -0,0 +1,192 @@
+"""Tick snapshot archiver — rolls closed days of tick_snapshots into npz segments.
+
+TickCollector writes one 26-feature row per coin per second into
+satellite.db. Rows older than the hot window are compacted into one
+compressed columnar segment per (coin, schema_version, UTC day) and deleted
+from SQLite, so satellite.db only holds the last `hot_hours` of ticks and
+training reads whole days as numpy arrays instead of millions of rows.
+
+Segment layout (readers: satellite/tick_archive.py — keep in sync):
+    <archive_dir>/<COIN>/v<schema_version>/<YYYYMMDD>.npz
+    arrays: "timestamp" (float64, sorted, unique) + one float64 array per
+            feature column (NaN where the row had NULL)
+
+Runs from the Orchestrator's hourly pruner thread.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from hynous_data.engine.tick_collector import TICK_FEATURE_NAMES
+
+log = logging.getLogger(__name__)
+
+DAY_S = 86400
+
+
+def default_archive_dir(satellite_db_path: str | Path) -> Path:
+    """Archive directory next to satellite.db (storage/tick_archive)."""
+    return Path(satellite_db_path).parent / "tick_archive"
+
+
+def segment_path(archive_dir: Path, coin: str, schema_version: int, day_start: float) -> Path:
+    day = datetime.fromtimestamp(day_start, tz=timezone.utc).strftime("%Y%m%d")
+    return archive_dir / coin / f"v{schema_version}" / f"{day}.npz"
+
+
+def _load_segment(path: Path) -> dict[str, np.ndarray]:
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files}
+
+
+def _write_segment(path: Path, arrays: dict[str, np.ndarray]):
+    """Write atomically (tmp file + rename) so readers never see a partial segment."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".npz.tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+class TickArchiver:
+    """Compacts cold tick_snapshots rows into per-day npz segments."""
+
+    def __init__(
+        self,
+        satellite_db_path: str | Path,
+        archive_dir: str | Path | None = None,
+        hot_hours: int = 48,
+        retention_days: int = 30,
+    ):
+        self._db_path = Path(satellite_db_path)
+        self._archive_dir = Path(archive_dir) if archive_dir else default_archive_dir(self._db_path)
+        self._hot_s = hot_hours * 3600
+        self._retention_s = retention_days * DAY_S
+        # Stats
+        self.total_rows_archived = 0
+        self.total_segments_written = 0
+        self.total_segments_pruned = 0
+        self.last_run = 0.0
+
+    @property
+    def archive_dir(self) -> Path:
+        return self._archive_dir
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def run(self, now: float | None = None) -> int:
+        """Prune expired data, then compact closed days. Returns rows archived."""
+        now = now or time.time()
+        self.prune(now)
+        archived = self.compact(now)
+        self.last_run = time.time()
+        return archived
+
+    def compact(self, now: float | None = None) -> int:
+        """Move every closed UTC day older than the hot window into segments."""
+        now = now or time.time()
+        # Last day boundary that is fully outside the hot window
+        boundary = (int(now - self._hot_s) // DAY_S) * DAY_S
+        conn = self._connect()
+        try:
+            days = conn.execute(
+                "SELECT coin, schema_version, CAST(timestamp / ? AS INTEGER) AS day "
+                "FROM tick_snapshots WHERE timestamp < ? GROUP BY 1, 2, 3 ORDER BY 3",
+                (DAY_S, boundary),
+            ).fetchall()
+            archived = 0
+            for coin, version, day in days:
+                archived += self._compact_day(conn, coin, int(version), day * DAY_S)
+        finally:
+            conn.close()
+        if archived:
+            log.info("Archived %d tick rows (%d coin-days) → %s",
+                     archived, len(days), self._archive_dir)
+        return archived
+
+    def _compact_day(self, conn: sqlite3.Connection, coin: str, version: int,
+                     day_start: float) -> int:
+        cols = ["timestamp"] + TICK_FEATURE_NAMES
+        day_end = day_start + DAY_S
+        rows = conn.execute(
+            f"SELECT {', '.join(cols)} FROM tick_snapshots "
+            "WHERE coin = ? AND schema_version = ? AND timestamp >= ? AND timestamp < ? "
+            "ORDER BY timestamp",
+            (coin, version, day_start, day_end),
+        ).fetchall()
+        if not rows:
+            return 0
+
+        matrix = np.array(rows, dtype=np.float64)  # NULL → NaN
+        arrays = {c: matrix[:, i] for i, c in enumerate(cols)}
+
+        path = segment_path(self._archive_dir, coin, version, day_start)
+        if path.exists():
+            # Re-run or late rows: merge, keeping the already-archived row on conflict
+            old = _load_segment(path)
+            n_old = len(old["timestamp"])
+            arrays = {
+                c: np.concatenate([old.get(c, np.full(n_old, np.nan)), arrays[c]])
+                for c in cols
+            }
+        _, keep = np.unique(arrays["timestamp"], return_index=True)
+        arrays = {c: a[keep] for c, a in arrays.items()}
+        _write_segment(path, arrays)
+
+        # Only drop the hot rows once the segment is safely on disk
+        conn.execute(
+            "DELETE FROM tick_snapshots "
+            "WHERE coin = ? AND schema_version = ? AND timestamp >= ? AND timestamp < ?",
+            (coin, version, day_start, day_end),
+        )
+        conn.commit()
+        self.total_rows_archived += len(rows)
+        self.total_segments_written += 1
+        return len(rows)
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete segments (and any stray hot rows) older than retention."""
+        now = now or time.time()
+        cutoff = now - self._retention_s
+        conn = self._connect()
+        try:
+            cur = conn.execute("DELETE FROM tick_snapshots WHERE timestamp < ?", (cutoff,))
+            conn.commit()
+            if cur.rowcount:
+                log.info("Pruned %d old tick_snapshots rows", cur.rowcount)
+        finally:
+            conn.close()
+
+        removed = 0
+        cutoff_day = datetime.fromtimestamp(
+            (int(cutoff) // DAY_S) * DAY_S, tz=timezone.utc,
+        ).strftime("%Y%m%d")
+        for path in self._archive_dir.glob("*/v*/*.npz"):
+            if path.stem < cutoff_day:
+                path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            self.total_segments_pruned += removed
+            log.info("Pruned %d tick archive segments", removed)
+        return removed
+
+    def stats(self) -> dict:
+        segments = list(self._archive_dir.glob("*/v*/*.npz"))
+        return {
+            "archive_dir": str(self._archive_dir),
+            "segments": len(segments),
+            "archive_mb": round(sum(p.stat().st_size for p in segments) / 1e6, 2),
+            "rows_archived": self.total_rows_archived,
+            "segments_written": self.total_segments_written,
+            "segments_pruned": self.total_segments_pruned,
+            "last_run": self.last_run,
+        }
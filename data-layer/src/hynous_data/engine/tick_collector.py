@@ -6,7 +6,10 @@ batches writes to satellite.db every 5s.
 
 Data sources (in-process, zero HTTP):
 - L2Subscriber: real-time orderbook (100 levels/side)
-- TradeStream buffers: per-coin trade deques (px, sz, side, time)
+- TickFlow: per-second trade buckets fed by TradeStream on every trade
+  (wired via TradeStream.set_tick_flow), computed for all coins at once
+- TradeStream trade buffers: the trades of each window's partial edge
+  second, so 10/30/60s windows keep exact millisecond edges
 
 Research basis:
 - arXiv:2506.05764 "Better Inputs Matter More"
@@ -21,6 +24,10 @@ import time
 from collections import deque
 from pathlib import Path
 
+import numpy as np
+
+from hynous_data.engine.tick_flow import LARGE_TRADE_USD, TickFlow
+
 log = logging.getLogger(__name__)
 
 # Feature names — order matters, must match training.
@@ -79,6 +86,21 @@ _V2_FEATURES = [
     "trade_count_10s",
 ]
 
+# Trade-flow features computed for all coins at once by TickFlow.compute()
+_FLOW_FEATURES = [
+    "flow_imbalance_10s",
+    "flow_imbalance_30s",
+    "flow_imbalance_60s",
+    "flow_intensity_10s",
+    "flow_intensity_30s",
+    "trade_volume_10s_usd",
+    "trade_volume_30s_usd",
+    "large_trade_imbalance",
+    "max_trade_usd_60s",
+    "trade_count_60s",
+    "trade_count_10s",
+]
+
 # SQL for batch inserts
 _COLS = ["timestamp", "coin"] + TICK_FEATURE_NAMES + ["schema_version"]
 _INSERT_SQL = (
@@ -86,14 +108,12 @@ _INSERT_SQL = (
     f"VALUES ({', '.join(['?'] * len(_COLS))})"
 )
 
-LARGE_TRADE_USD = 10_000
-
 
 class TickCollector:
     """Computes tick-level features every 1s, writes to satellite.db every 5s.
 
     Runs as a daemon thread inside the data-layer process.
-    Reads directly from L2Subscriber and trade_stream buffers — no HTTP.
+    Reads directly from L2Subscriber and the TickFlow accumulators — no HTTP.
     """
 
     COMPUTE_INTERVAL = 1.0
@@ -108,6 +128,7 @@ class TickCollector:
         self._l2 = l2_subscriber
         self._coins = coins
         self._db_path = Path(satellite_db_path)
+        self._flow = TickFlow(coins, LARGE_TRADE_USD)
 
         self._running = False
         self._thread: threading.Thread | None = None
@@ -132,6 +153,7 @@ class TickCollector:
         # Latest snapshot as dict (for WS streaming — updated every 1s)
         self._latest_snapshot: dict | None = None
         self._latest_snapshot_lock = threading.Lock()
+        self._hub = None  # BroadcastHub for /ws/ticks (set_hub)
 
         # Stats
         self.snapshots_computed = 0
@@ -226,29 +248,7 @@ class TickCollector:
 
         while self._running:
             t0 = time.time()
-
-            for coin in self._coins:
-                try:
-                    row = self._compute(coin)
-                    if row:
-                        with self._buffer_lock:
-                            self._write_buffer.append(row)
-                        # Store latest as dict for WS streaming
-                        snap = dict(zip(
-                            ["timestamp", "coin"] + TICK_FEATURE_NAMES + ["schema_version"],
-                            row,
-                        ))
-                        with self._latest_snapshot_lock:
-                            self._latest_snapshot = snap
-                        self.snapshots_computed += 1
-                except Exception:
-                    self.compute_errors += 1
-                    if self.compute_errors <= 5 or self.compute_errors % 100 == 0:
-                        log.warning(
-                            "Tick compute error (%d total)",
-                            self.compute_errors,
-                            exc_info=True,
-                        )
+            self.tick(t0)
 
             if time.time() - last_write >= self.WRITE_INTERVAL:
                 self._flush_buffer()
@@ -271,138 +271,94 @@ class TickCollector:
 
         self._flush_buffer()
 
+    def tick(self, now: float) -> None:
+        """Compute, buffer and publish one snapshot per coin at `now`.
+
+        Called every COMPUTE_INTERVAL by the collector thread, or directly
+        on the recorded clock by FeedReplayer.
+        """
+        flow = self._flow.compute(now)  # trade-flow features for every coin at once
+
+        for i, coin in enumerate(self._coins):
+            try:
+                row = self._compute(coin, now, flow, i)
+                if row:
+                    with self._buffer_lock:
+                        self._write_buffer.append(row)
+                    # Store latest as dict for WS streaming
+                    snap = dict(zip(
+                        ["timestamp", "coin"] + TICK_FEATURE_NAMES + ["schema_version"],
+                        row,
+                    ))
+                    with self._latest_snapshot_lock:
+                        self._latest_snapshot = snap
+                    if self._hub is not None:
+                        self._hub.publish(coin, snap)
+                    self.snapshots_computed += 1
+            except Exception:
+                self.compute_errors += 1
+                if self.compute_errors <= 5 or self.compute_errors % 100 == 0:
+                    log.warning(
+                        "Tick compute error (%d total)",
+                        self.compute_errors,
+                        exc_info=True,
+                    )
+
     # ------------------------------------------------------------------
-    # Feature computation — reads from L2Subscriber + trade buffers
+    # Feature computation — reads from L2Subscriber + TickFlow
     # ------------------------------------------------------------------
 
-    def _compute(self, coin: str) -> tuple | None:
-        now = time.time()
+    def _compute(
+        self, coin: str, now: float | None = None,
+        flow: dict[str, np.ndarray] | None = None, i: int | None = None,
+    ) -> tuple | None:
+        now = now if now is not None else time.time()
+        if flow is None:
+            flow = self._flow.compute(now)
+            i = self._coins.index(coin)
 
         # --- L2 book from L2Subscriber ---
-        book = self._l2.get_book(coin)
-        if not book:
-            return None
-
-        # Reject stale book data (>10s old = WS likely disconnected)
-        book_age = now - book.get("updated_at", 0)
-        if book_age > 10:
+        book = self._l2.get_l2(coin)
+        if book is None:
             return None
 
-        # book format: bids/asks are lists of (price, size) tuples
-        bids = book.get("bids", [])
-        asks = book.get("asks", [])
-        mid = book.get("mid", 0)
-        if not mid or mid <= 0 or not bids or not asks:
-            return None
+        # One consistent read of the array-backed book (O(1) per feature)
+        with book.lock:
+            # Reject stale book data (>10s old = WS likely disconnected)
+            if now - book.updated_at > 10:
+                return None
+            mid = book.mid
+            if mid <= 0 or not book.n_bids or not book.n_asks:
+                return None
+            spread = book.spread
+            depth = {k: book.depth_at(k) for k in (5, 10, 20)}
 
         self._price_history[coin].append((now, mid))
 
-        # --- Trades from in-memory buffer (iterate deque once) ---
-        from hynous_data.collectors.trade_stream import get_trade_buffer
-
-        trade_buf = get_trade_buffer(coin)
-        now_ms = int(now * 1000)
-        cutoff_60s = now_ms - 60_000
-        cutoff_30s = now_ms - 30_000
-        cutoff_10s = now_ms - 10_000
-
-        # Single pass: bucket trades by window and side
-        buy_notional_60 = 0.0
-        sell_notional_60 = 0.0
-        buy_volume_60 = 0.0
-        sell_volume_60 = 0.0
-        buy_notional_30 = 0.0
-        sell_notional_30 = 0.0
-        buy_notional_10 = 0.0
-        sell_notional_10 = 0.0
-        count_60 = 0
-        count_30 = 0
-        count_10 = 0
-        large_buys = 0.0
-        large_sells = 0.0
-        max_trade_usd = 0.0  # v2: largest single trade
-
-        # Iterate deque directly (no list() copy — deque iteration is thread-safe for reads)
-        for t in trade_buf:
-            t_time = t["time"]
-            if t_time <= cutoff_60s:
-                continue
-            count_60 += 1
-            notional = t["px"] * t["sz"]
-            is_buy = t["side"] == "B"
-
-            # v2: track max trade size
-            if notional > max_trade_usd:
-                max_trade_usd = notional
-
-            if is_buy:
-                buy_notional_60 += notional
-                buy_volume_60 += t["sz"]
-            else:
-                sell_notional_60 += notional
-                sell_volume_60 += t["sz"]
-
-            if notional >= LARGE_TRADE_USD:
-                if is_buy:
-                    large_buys += notional
-                else:
-                    large_sells += notional
-
-            if t_time > cutoff_30s:
-                count_30 += 1
-                if is_buy:
-                    buy_notional_30 += notional
-                else:
-                    sell_notional_30 += notional
-
-                if t_time > cutoff_10s:
-                    count_10 += 1
-                    if is_buy:
-                        buy_notional_10 += notional
-                    else:
-                        sell_notional_10 += notional
-
         features: dict[str, float] = {}
 
         # === ORDERBOOK IMBALANCE ===
-        for depth, label in [(5, "5"), (10, "10"), (20, "20")]:
-            bid_vol = sum(px * sz for px, sz in bids[:depth])
-            ask_vol = sum(px * sz for px, sz in asks[:depth])
+        for k in (5, 10, 20):
+            bid_vol, ask_vol = depth[k]
             total = bid_vol + ask_vol
-            features[f"book_imbalance_{label}"] = bid_vol / total if total > 0 else 0.5
+            features[f"book_imbalance_{k}"] = bid_vol / total if total > 0 else 0.5
 
         # === DEPTH METRICS ===
-        bid_depth_5 = sum(px * sz for px, sz in bids[:5])
-        ask_depth_5 = sum(px * sz for px, sz in asks[:5])
+        bid_depth_5, ask_depth_5 = depth[5]
         features["bid_depth_usd_5"] = bid_depth_5
         features["ask_depth_usd_5"] = ask_depth_5
-        features["spread_pct"] = book.get("spread", 0) / mid if mid else 0
+        features["spread_pct"] = spread / mid if mid else 0
         features["mid_price"] = mid
 
         # === VWAP DEVIATIONS ===
-        if buy_volume_60 > 0:
-            features["buy_vwap_deviation"] = (buy_notional_60 / buy_volume_60 - mid) / mid
-        else:
-            features["buy_vwap_deviation"] = 0.0
+        buy_vwap = float(flow["buy_vwap"][i])
+        sell_vwap = float(flow["sell_vwap"][i])
+        features["buy_vwap_deviation"] = (buy_vwap - mid) / mid if buy_vwap > 0 else 0.0
+        features["sell_vwap_deviation"] = (sell_vwap - mid) / mid if sell_vwap > 0 else 0.0
 
-        if sell_volume_60 > 0:
-            features["sell_vwap_deviation"] = (sell_notional_60 / sell_volume_60 - mid) / mid
-        else:
-            features["sell_vwap_deviation"] = 0.0
-
-        # === TRADE FLOW AT MULTIPLE WINDOWS ===
-        windows = [
-            ("10s", buy_notional_10, sell_notional_10, count_10, 10),
-            ("30s", buy_notional_30, sell_notional_30, count_30, 30),
-            ("60s", buy_notional_60, sell_notional_60, count_60, 60),
-        ]
-        for label, buy_n, sell_n, cnt, window_s in windows:
-            total_vol = buy_n + sell_n
-            features[f"flow_imbalance_{label}"] = buy_n / total_vol if total_vol > 0 else 0.5
-
-            if label in ("10s", "30s"):
-                features[f"flow_intensity_{label}"] = cnt / window_s
-                features[f"trade_volume_{label}_usd"] = total_vol
+        # === TRADE FLOW, LARGE TRADES, SIZE DISTRIBUTION (vectorized in TickFlow) ===
+        for name in _FLOW_FEATURES:
+            features[name] = float(flow[name][i])
 
         # === MOMENTUM ===
         price_hist = self._price_history[coin]
@@ -419,10 +375,6 @@ class TickCollector:
             else:
                 features[f"price_change_{label}"] = 0.0
 
-        # === LARGE TRADE IMBALANCE ===
-        large_total = large_buys + large_sells
-        features["large_trade_imbalance"] = large_buys / large_total if large_total > 0 else 0.5
-
         # === v2: BOOK PRESSURE DELTA ===
         imbalance_5 = features["book_imbalance_5"]
         depth_ratio = bid_depth_5 / ask_depth_5 if ask_depth_5 > 0 else 1.0
@@ -456,11 +408,6 @@ class TickCollector:
         else:
             features["depth_ratio_change_5s"] = 0.0
 
-        # === v2: TRADE SIZE DISTRIBUTION ===
-        features["max_trade_usd_60s"] = max_trade_usd
-        features["trade_count_60s"] = float(count_60)
-        features["trade_count_10s"] = float(count_10)
-
         # Sanitize NaN/inf
         for k, v in features.items():
             if math.isnan(v) or math.isinf(v):
@@ -507,6 +454,15 @@ class TickCollector:
     # Status
     # ------------------------------------------------------------------
 
+    def set_hub(self, hub):
+        """Wire a BroadcastHub — each computed snapshot is published once to WS clients."""
+        self._hub = hub
+
+    @property
+    def flow(self) -> TickFlow:
+        """Trade-flow accumulators — wire into TradeStream.set_tick_flow()."""
+        return self._flow
+
     def get_latest_snapshot(self) -> dict | None:
         """Get the most recent tick snapshot as a dict. Thread-safe."""
         with self._latest_snapshot_lock:
@@ -524,4 +480,5 @@ class TickCollector:
             "db_path": str(self._db_path),
             "schema_version": TICK_SCHEMA_VERSION,
             "feature_count": TICK_FEATURE_COUNT,
+            "flow": self._flow.stats(),
         }
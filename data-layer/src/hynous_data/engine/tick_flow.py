@@ -0,0 +1,169 @@
+"""Rolling trade-flow accumulators for the 1Hz tick collector.
+
+TradeStream feeds every trade into `record_trade()`, which adds it to the
+coin's current 1-second bucket (buy/sell notional and size, counts, large
+trade notional, max trade). The buckets of all coins live in one flat
+`array("d")` ring, so per-trade writes are cheap scalar stores. The compute
+tick reads the same memory as a zero-copy (coins, slots, cols) numpy view.
+
+`compute(now)` derives every trade-flow tick feature for all coins at once.
+Buckets that have aged out of a window are masked on the tick, so the cost
+is O(coins × 64 slots) and does not depend on the trade rate.
+
+Window edges are exact to the millisecond, as the trained tick model expects:
+"10s" covers trades with time > now_ms - 10_000. Whole seconds inside the
+window come from the buckets. The one second the edge cuts through is read
+from the coin's TradeBuffer (a bisect plus that second's trades).
+"""
+
+import threading
+from array import array
+
+import numpy as np
+
+from hynous_data.collectors.trade_stream import get_all_buffers
+from hynous_data.core.trade_buffer import TradeWindow
+
+LARGE_TRADE_USD = 10_000
+SLOTS = 64  # ring length in seconds; must exceed the longest window (60s)
+WINDOWS = (10, 30, 60)
+
+# Bucket columns
+_BUY_USD, _SELL_USD, _BUY_SZ, _SELL_SZ, _BUY_N, _SELL_N, _LARGE_BUY, _LARGE_SELL, _MAX_USD = range(9)
+_NCOLS = 9
+
+
+class TickFlow:
+    """Per-second trade buckets for a fixed set of coins, vectorized on read."""
+
+    def __init__(self, coins: list[str], large_trade_usd: float = LARGE_TRADE_USD):
+        self._coins = list(coins)
+        self._index = {c: i for i, c in enumerate(self._coins)}
+        self._large = large_trade_usd
+        n = len(self._coins)
+        self._data = array("d", bytes(8 * n * SLOTS * _NCOLS))
+        self._secs = array("q", [-1]) * (n * SLOTS)
+        # Zero-copy views for the vectorized compute
+        self._view = np.frombuffer(self._data, dtype=np.float64).reshape(n, SLOTS, _NCOLS)
+        self._sec_view = np.frombuffer(self._secs, dtype=np.int64).reshape(n, SLOTS)
+        self._lock = threading.Lock()
+        self.total_trades = 0
+        self.total_late = 0
+
+    @property
+    def coins(self) -> list[str]:
+        return self._coins
+
+    def record_trade(self, coin: str, time_ms: int, px: float, sz: float, is_buy: bool) -> None:
+        """Fold one trade into its second's bucket. Called from TradeStream._on_trade."""
+        ci = self._index.get(coin)
+        if ci is None:
+            return
+        sec = time_ms // 1000
+        cell = ci * SLOTS + sec % SLOTS
+        base = cell * _NCOLS
+        notional = px * sz
+        d = self._data
+        with self._lock:
+            held = self._secs[cell]
+            if held != sec:
+                if sec < held:
+                    self.total_late += 1  # older than the ring — already expired
+                    return
+                for k in range(base, base + _NCOLS):
+                    d[k] = 0.0
+                self._secs[cell] = sec
+            if is_buy:
+                d[base + _BUY_USD] += notional
+                d[base + _BUY_SZ] += sz
+                d[base + _BUY_N] += 1
+                if notional >= self._large:
+                    d[base + _LARGE_BUY] += notional
+            else:
+                d[base + _SELL_USD] += notional
+                d[base + _SELL_SZ] += sz
+                d[base + _SELL_N] += 1
+                if notional >= self._large:
+                    d[base + _LARGE_SELL] += notional
+            if notional > d[base + _MAX_USD]:
+                d[base + _MAX_USD] = notional
+            self.total_trades += 1
+
+    def compute(self, now: float) -> dict[str, np.ndarray]:
+        """Trade-flow features for every coin, as arrays aligned with `coins`.
+
+        Keys are the tick feature names plus "buy_vwap"/"sell_vwap" (0 with no
+        trades). VWAP deviation needs the mid, so the caller derives it.
+        """
+        now_ms = int(now * 1000)
+        # First whole second inside each window; the second before it is partial
+        first = {w: (now_ms - w * 1000) // 1000 + 1 for w in WINDOWS}
+        with self._lock:
+            live = self._sec_view >= 0  # future-stamped trades stay in every window
+            sums = {}
+            for w in WINDOWS:
+                mask = (live & (self._sec_view >= first[w])).astype(np.float64)
+                sums[w] = np.einsum("cs,csk->ck", mask, self._view[:, :, :_MAX_USD])
+            max_usd = np.where(
+                live & (self._sec_view >= first[60]), self._view[:, :, _MAX_USD], 0.0,
+            ).max(axis=1)
+
+        buffers = get_all_buffers()
+        for ci, coin in enumerate(self._coins):
+            buf = buffers.get(coin)
+            if not buf:
+                continue
+            for w in WINDOWS:
+                edge = self._partial(buf.window(now_ms - w * 1000 + 1, first[w] * 1000 - 1))
+                if edge is not None:
+                    sums[w][ci] += edge[:_MAX_USD]
+                    if w == 60 and edge[_MAX_USD] > max_usd[ci]:
+                        max_usd[ci] = edge[_MAX_USD]
+
+        out: dict[str, np.ndarray] = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for w in WINDOWS:
+                s = sums[w]
+                total = s[:, _BUY_USD] + s[:, _SELL_USD]
+                out[f"flow_imbalance_{w}s"] = np.where(total > 0, s[:, _BUY_USD] / total, 0.5)
+                if w in (10, 30):
+                    out[f"flow_intensity_{w}s"] = (s[:, _BUY_N] + s[:, _SELL_N]) / w
+                    out[f"trade_volume_{w}s_usd"] = total
+            s60 = sums[60]
+            large_total = s60[:, _LARGE_BUY] + s60[:, _LARGE_SELL]
+            out["large_trade_imbalance"] = np.where(
+                large_total > 0, s60[:, _LARGE_BUY] / large_total, 0.5,
+            )
+            out["buy_vwap"] = np.where(s60[:, _BUY_SZ] > 0, s60[:, _BUY_USD] / s60[:, _BUY_SZ], 0.0)
+            out["sell_vwap"] = np.where(s60[:, _SELL_SZ] > 0, s60[:, _SELL_USD] / s60[:, _SELL_SZ], 0.0)
+        out["max_trade_usd_60s"] = max_usd
+        out["trade_count_60s"] = s60[:, _BUY_N] + s60[:, _SELL_N]
+        out["trade_count_10s"] = sums[10][:, _BUY_N] + sums[10][:, _SELL_N]
+        return out
+
+    def _partial(self, w: TradeWindow) -> np.ndarray | None:
+        """Bucket columns for the trades of a window's partial edge second."""
+        if not len(w):
+            return None
+        notional = w.notional
+        is_buy = w.is_buy
+        is_sell = ~is_buy
+        large = notional >= self._large
+        row = np.zeros(_NCOLS)
+        row[_BUY_USD] = notional[is_buy].sum()
+        row[_SELL_USD] = notional[is_sell].sum()
+        row[_BUY_SZ] = w.sz[is_buy].sum()
+        row[_SELL_SZ] = w.sz[is_sell].sum()
+        row[_BUY_N] = np.count_nonzero(is_buy)
+        row[_SELL_N] = np.count_nonzero(is_sell)
+        row[_LARGE_BUY] = notional[large & is_buy].sum()
+        row[_LARGE_SELL] = notional[large & is_sell].sum()
+        row[_MAX_USD] = notional.max()
+        return row
+
+    def stats(self) -> dict:
+        return {
+            "coins": len(self._coins),
+            "trades": self.total_trades,
+            "late_dropped": self.total_late,
+        }
@@ -12,10 +12,19 @@ class WhaleTracker:
 
     def __init__(self, db: Database):
         self._db = db
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Bumped each time the positions table changes (PositionPoller flushes)."""
+        return self._version
+
+    def mark_changed(self):
+        self._version += 1
 
     def get_whales(self, coin: str, top_n: int = 50) -> dict:
         """Get largest positions for a coin."""
-        conn = self._db.conn
+        conn = self._db.read_conn
         rows = conn.execute(
             """
             SELECT address, coin, side, size, size_usd, entry_px, mark_px,
@@ -50,7 +59,7 @@ class WhaleTracker:
 
     def get_whale_summary(self) -> dict:
         """Aggregate whale stats across all coins."""
-        conn = self._db.conn
+        conn = self._db.read_conn
         rows = conn.execute(
             """
             SELECT coin, side, COUNT(*) as cnt, SUM(size_usd) as total_usd
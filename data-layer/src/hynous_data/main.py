@@ -9,9 +9,12 @@ from pathlib import Path
 
 import uvicorn
 
+from hynous_data.core.broadcast import BroadcastHub
 from hynous_data.core.config import Config, load_config
 from hynous_data.core.db import Database
+from hynous_data.core.feed_log import FeedRecorder
 from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.core.response_cache import ResponseCache
 from hynous_data.collectors.trade_stream import TradeStream
 from hynous_data.collectors.position_poller import PositionPoller
 from hynous_data.collectors.hlp_tracker import HlpTracker
@@ -88,23 +91,44 @@ class Orchestrator:
         log.info("=== Hynous-Data starting ===")
 
         # Core
-        db = Database(self.cfg.db.path)
+        db = Database(
+            self.cfg.db.path,
+            read_cache_mb=self.cfg.db.read_cache_mb,
+            read_mmap_mb=self.cfg.db.read_mmap_mb,
+            slow_query_ms=self.cfg.db.slow_query_ms,
+            history_retention_days=self.cfg.db.history_retention_days,
+            history_partition_days=self.cfg.db.history_partition_days,
+        )
         db.connect()
         db.init_schema()
+        db.start_writer(
+            max_queue=self.cfg.db.writer_queue_size,
+            max_batch=self.cfg.db.writer_batch_size,
+            max_delay=self.cfg.db.writer_max_delay_ms / 1000,
+        )
         rate_limiter = RateLimiter(
             max_weight=self.cfg.rate_limit.max_weight_per_min,
             safety_pct=self.cfg.rate_limit.safety_pct,
+            reserve_critical_pct=self.cfg.rate_limit.reserve_critical_pct,
+            reserve_normal_pct=self.cfg.rate_limit.reserve_normal_pct,
         )
         self._components["db"] = db
         self._components["rate_limiter"] = rate_limiter
         self._components["start_time"] = self.start_time
+        self._components["response_cache"] = ResponseCache(
+            max_entries=self.cfg.server.response_cache_entries,
+        )
 
         # Engines (created before collectors so we can wire them)
         smart_money = SmartMoneyEngine(
             db, min_equity=self.cfg.smart_money.min_equity,
+            top_k=self.cfg.smart_money.rank_top_k,
+            rank_interval=self.cfg.smart_money.rank_interval,
+        )
+        order_flow = OrderFlowEngine(
+            windows=self.cfg.order_flow.windows, horizon=self.cfg.order_flow.horizon,
         )
-        order_flow = OrderFlowEngine(windows=self.cfg.order_flow.windows)
-        liq_heatmap = LiqHeatmapEngine(db, self.cfg.heatmap, base_url=BASE_URL, rate_limiter=rate_limiter)
+        liq_heatmap = LiqHeatmapEngine(db, self.cfg.heatmap)
         whale_tracker = WhaleTracker(db)
 
         # Smart money wallet profiler + position change tracker
@@ -113,6 +137,7 @@ class Orchestrator:
         profiler = WalletProfiler(db, rate_limiter, self.cfg.smart_money, base_url=BASE_URL)
         smart_money._profiler = profiler
         smart_money.start_drainer()
+        smart_money.start_ranker()
 
         self._components["order_flow"] = order_flow
         self._components["liq_heatmap"] = liq_heatmap
@@ -123,7 +148,11 @@ class Orchestrator:
 
         # Collectors
         if self.cfg.trade_stream.enabled:
-            ts = TradeStream(db, base_url=BASE_URL)
+            ts = TradeStream(
+                db, base_url=BASE_URL, coins=self.cfg.trade_stream.coins,
+                shards=self.cfg.trade_stream.shards, top_n=self.cfg.trade_stream.top_n,
+            )
+            ts.set_order_flow(order_flow)  # Wire incremental CVD
             ts.start()
             self._components["trade_stream"] = ts
             log.info("TradeStream started")
@@ -132,6 +161,8 @@ class Orchestrator:
             pp = PositionPoller(db, rate_limiter, self.cfg.position_poller, base_url=BASE_URL)
             pp.set_smart_money(smart_money)  # Wire PnL tracking
             pp.set_position_tracker(position_tracker)  # Wire change detection
+            pp.set_liq_heatmap(liq_heatmap)  # Wire incremental heatmap deltas
+            pp.set_whale_tracker(whale_tracker)  # Version whale/smart-money response caches
             pp.start()
             self._components["position_poller"] = pp
             log.info("PositionPoller started")
@@ -147,6 +178,7 @@ class Orchestrator:
             from hynous_data.collectors.l2_subscriber import L2Subscriber
             l2 = L2Subscriber(coins=self.cfg.l2_subscriber.coins)
             l2.start()
+            liq_heatmap.set_l2_subscriber(l2)  # Real-time mids for heatmap buckets
             self._components["l2_subscriber"] = l2
             log.info("L2Subscriber started")
 
@@ -161,12 +193,39 @@ class Orchestrator:
                     coins=self.cfg.tick_collector.coins,
                     satellite_db_path=sat_db,
                 )
+                hub = BroadcastHub(max_queue=self.cfg.server.ws_max_queue)
+                tc.set_hub(hub)  # Publish-once fan-out for /ws/ticks
+                ts = self._components.get("trade_stream")
+                if ts:
+                    ts.set_tick_flow(tc.flow)  # Rolling trade buckets, updated per trade
                 tc.start()
                 self._components["tick_collector"] = tc
+                self._components["tick_hub"] = hub
+                from hynous_data.engine.tick_archive import TickArchiver
+                archive_dir = self.cfg.tick_collector.archive_dir
+                self._components["tick_archiver"] = TickArchiver(
+                    sat_db,
+                    archive_dir=Path(self.cfg.project_root) / archive_dir if archive_dir else None,
+                    hot_hours=self.cfg.tick_collector.hot_hours,
+                    retention_days=self.cfg.tick_collector.retention_days,
+                )
                 log.info("TickCollector started → %s", sat_db)
             else:
                 log.warning("TickCollector requires L2Subscriber — enable l2_subscriber first")
 
+        # Raw feed recorder for offline replay (core/feed_log.py)
+        if self.cfg.recorder.enabled:
+            recorder = FeedRecorder(
+                Path(self.cfg.project_root) / self.cfg.recorder.dir,
+                flush_interval=self.cfg.recorder.flush_interval,
+            )
+            for name in ("trade_stream", "l2_subscriber"):
+                comp = self._components.get(name)
+                if comp:
+                    comp.set_recorder(recorder)
+            self._components["feed_recorder"] = recorder
+            log.info("FeedRecorder writing to %s", self.cfg.recorder.dir)
+
         # Start engine threads
         liq_heatmap.start()
         log.info("Signal engines started")
@@ -217,21 +276,13 @@ class Orchestrator:
                     if cur.rowcount:
                         db.conn.commit()
                         log.info("Pruned %d old position changes", cur.rowcount)
-                # Prune old tick_snapshots (>30 days) from satellite.db
-                tc = self._components.get("tick_collector")
-                if tc:
+                # Compact cold tick_snapshots into npz segments + apply retention
+                archiver = self._components.get("tick_archiver")
+                if archiver:
                     try:
-                        tick_cutoff = time.time() - 30 * 86400
-                        with tc._db_lock:
-                            cur = tc._conn.execute(
-                                "DELETE FROM tick_snapshots WHERE timestamp < ?",
-                                (tick_cutoff,),
-                            )
-                            if cur.rowcount:
-                                tc._conn.commit()
-                                log.info("Pruned %d old tick_snapshots (>30d)", cur.rowcount)
+                        archiver.run()
                     except Exception:
-                        log.warning("Failed to prune tick_snapshots", exc_info=True)
+                        log.warning("Failed to archive tick_snapshots", exc_info=True)
             except Exception:
                 log.exception("Pruner error")
 
@@ -255,7 +306,7 @@ class Orchestrator:
         """Gracefully shut down all components."""
         log.info("Shutting down...")
         self._stop_event.set()
-        for name in ("tick_collector", "trade_stream", "position_poller", "hlp_tracker", "liq_heatmap", "l2_subscriber"):
+        for name in ("tick_collector", "trade_stream", "position_poller", "hlp_tracker", "liq_heatmap", "l2_subscriber", "smart_money", "feed_recorder"):
             comp = self._components.get(name)
             if comp and hasattr(comp, "stop"):
                 comp.stop()
@@ -0,0 +1,32 @@
+"""Smoke tests for the benchmark suite and the regression comparison."""
+
+from benchmarks.compare import IMPROVED, NOISE, OK, REGRESSION, compare
+from benchmarks.harness import measure
+from benchmarks.run import BENCHMARKS, Params, run_suite
+
+
+def _doc(**medians):
+    return {"results": {
+        name: {"median_ns": m, "stdev_ns": s} for name, (m, s) in medians.items()
+    }}
+
+
+def test_compare_flags_regressions_beyond_threshold_and_noise():
+    base = _doc(a=(100, 1), b=(100, 1), c=(100, 1), d=(100, 20), gone=(100, 1))
+    new = _doc(a=(105, 1), b=(130, 1), c=(70, 1), d=(125, 20))
+    verdicts = {r["name"]: r["verdict"] for r in compare(base, new, threshold_pct=10)}
+    assert verdicts == {"a": OK, "b": REGRESSION, "c": IMPROVED, "d": NOISE}
+
+
+def test_measure_runs_setup_outside_timing_per_sample():
+    calls = []
+    r = measure(lambda state: calls.append(state), lambda: len(calls), items=4, repeat=3, warmup=1)
+    assert r["number"] == 1 and r["repeat"] == 3 and r["ns_per_item"] == r["median_ns"] / 4
+    assert calls == [0, 1, 2, 3]
+
+
+def test_quick_suite_runs_every_benchmark():
+    doc = run_suite(Params.quick())
+    assert set(doc["results"]) == set(BENCHMARKS)
+    assert all(r["median_ns"] > 0 for r in doc["results"].values())
+    assert doc["params"]["coins"] == 3
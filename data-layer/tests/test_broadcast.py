@@ -0,0 +1,95 @@
+"""Tests for the publish-once WebSocket broadcast hub."""
+
+import asyncio
+import json
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from hynous_data.api.routes import create_router
+from hynous_data.core.broadcast import BroadcastHub
+
+
+def _snap(coin, ts, **fields):
+    return {"timestamp": ts, "coin": coin, "mid_price": 100.0, "spread_pct": 0.01, **fields}
+
+
+async def _drain(sub, n):
+    return [json.loads(await asyncio.wait_for(sub.get(), 1)) for _ in range(n)]
+
+
+def test_fanout_filters_by_coin():
+    async def main():
+        hub = BroadcastHub()
+        all_sub = hub.subscribe()
+        btc_sub = hub.subscribe(topics={"BTC"})
+        hub.publish("BTC", _snap("BTC", 1))
+        hub.publish("ETH", _snap("ETH", 1))
+        await asyncio.sleep(0)
+        assert [f["coin"] for f in await _drain(all_sub, 2)] == ["BTC", "ETH"]
+        assert [f["coin"] for f in await _drain(btc_sub, 1)] == ["BTC"]
+        assert btc_sub.queue.empty()
+        assert hub.stats()["published"] == 2
+
+    asyncio.run(main())
+
+
+def test_publish_from_producer_thread_serializes_once():
+    async def main():
+        hub = BroadcastHub()
+        subs = [hub.subscribe() for _ in range(20)]
+        t = threading.Thread(target=hub.publish, args=("BTC", _snap("BTC", 1)))
+        t.start()
+        t.join()
+        frames = [await asyncio.wait_for(s.get(), 1) for s in subs]
+        # Every client got the very same pre-serialized string
+        assert all(f is frames[0] for f in frames)
+        assert hub.stats()["frames_sent"] == 20
+
+    asyncio.run(main())
+
+
+def test_delta_subscribers_get_full_then_changed_fields():
+    async def main():
+        hub = BroadcastHub()
+        hub.publish("BTC", _snap("BTC", 1))
+        sub = hub.subscribe(delta=True)  # primed with the latest full frame
+        hub.publish("BTC", _snap("BTC", 2, mid_price=101.0))
+        await asyncio.sleep(0)
+        full, delta = await _drain(sub, 2)
+        assert "delta" not in full and full["spread_pct"] == 0.01
+        assert delta == {"timestamp": 2, "coin": "BTC", "mid_price": 101.0, "delta": True}
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_is_dropped_without_blocking_others():
+    async def main():
+        hub = BroadcastHub(max_queue=4)
+        slow = hub.subscribe()
+        fast = hub.subscribe()
+        for i in range(10):
+            hub.publish("BTC", _snap("BTC", i))
+            await asyncio.sleep(0)
+            await fast.get()
+        assert await slow.get() is None
+        assert slow.dropped and not fast.dropped
+        assert hub.stats()["dropped_subscribers"] == 1
+
+    asyncio.run(main())
+
+
+def test_ws_route_streams_filtered_frames():
+    hub = BroadcastHub()
+    hub.publish("ETH", _snap("ETH", 1))
+    hub.publish("BTC", _snap("BTC", 1))
+    app = FastAPI()
+    app.include_router(create_router({"tick_hub": hub}))
+    with TestClient(app).websocket_connect("/ws/ticks?coins=btc&delta=true") as ws:
+        assert ws.receive_json()["coin"] == "BTC"
+        hub.publish("ETH", _snap("ETH", 2))
+        hub.publish("BTC", _snap("BTC", 2, spread_pct=0.02))
+        assert ws.receive_json() == {
+            "timestamp": 2, "coin": "BTC", "spread_pct": 0.02, "delta": True,
+        }
@@ -0,0 +1,102 @@
+"""Tests for per-thread read connections and query timing hooks."""
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from hynous_data.core.db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    d = Database(tmp_path / "test.db")
+    d.connect()
+    d.init_schema()
+    yield d
+    d.close()
+
+
+def _add_address(db, addr: str):
+    with db.write_lock:
+        db.conn.execute(
+            "INSERT INTO addresses (address, first_seen, last_seen) VALUES (?, 1, 1)", (addr,)
+        )
+        db.conn.commit()
+
+
+def test_read_conn_sees_committed_writes(db):
+    _add_address(db, "0xabc")
+    row = db.read_conn.execute("SELECT COUNT(*) AS cnt FROM addresses").fetchone()
+    assert row["cnt"] == 1
+
+
+def test_read_conn_is_query_only(db):
+    with pytest.raises(sqlite3.OperationalError):
+        db.read_conn.execute("DELETE FROM addresses")
+
+
+def test_one_connection_per_thread(db):
+    main_reader = db.read_conn
+    assert db.read_conn is main_reader
+
+    seen = []
+
+    def worker():
+        seen.append(db.read_conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(r) for r in seen + [main_reader]}) == 4
+    assert db.read_stats()["read_connections"] == 4
+
+
+def test_exited_threads_release_their_connections(db):
+    main_reader = db.read_conn
+    conns = []
+
+    def worker():
+        db.read_conn.execute("SELECT 1")
+        conns.append(db.read_conn._conn)
+
+    for _ in range(5):
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+    gc.collect()
+
+    assert db.read_stats()["read_connections"] == 1
+    assert db.read_conn is main_reader
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_query_hook_and_stats(db):
+    calls = []
+    db.add_query_hook(lambda sql, ms, n: calls.append((sql, ms, n)))
+    _add_address(db, "0xabc")
+    _add_address(db, "0xdef")
+
+    rows = db.read_conn.execute("SELECT address FROM addresses ORDER BY address").fetchall()
+    assert [r["address"] for r in rows] == ["0xabc", "0xdef"]
+    assert len(calls) == 1
+    assert calls[0][2] == 2
+    assert calls[0][1] >= 0
+
+    stats = db.read_stats()
+    assert stats["queries"] == 1
+
+
+def test_memory_db_reads_through_writer_connection():
+    d = Database(":memory:")
+    d.connect()
+    d.init_schema()
+    _add_address(d, "0xabc")
+    assert d.read_conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0] == 1
+    d.close()
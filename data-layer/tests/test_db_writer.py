@@ -0,0 +1,163 @@
+"""Tests for the write-behind group-commit writer."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from hynous_data.core.db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    d = Database(tmp_path / "test.db")
+    d.connect()
+    d.init_schema()
+    yield d
+    d.close()
+
+
+def _liq_count(db) -> int:
+    return db.conn.execute("SELECT COUNT(*) FROM liquidation_events").fetchone()[0]
+
+
+_LIQ_SQL = (
+    "INSERT INTO liquidation_events (coin, occurred_at, side, size_usd, price) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def test_inline_without_writer(db):
+    assert db.writer is None
+    db.write_sql(_LIQ_SQL, ("BTC", 1.0, "long", 500.0, 100.0))
+    assert _liq_count(db) == 1
+
+
+def test_queued_writes_are_committed(db):
+    db.start_writer(max_batch=50, max_delay=0.05)
+    for i in range(200):
+        assert db.write_sql(_LIQ_SQL, ("BTC", float(i), "long", 500.0, 100.0), block=False)
+    assert db.flush_writes(timeout=5)
+    assert _liq_count(db) == 200
+
+    stats = db.writer.stats()
+    assert stats["applied"] >= 200
+    # Group commit: far fewer commits than writes
+    assert stats["commits"] < 200
+    assert stats["queue_depth"] == 0
+
+
+def test_flush_returns_after_commit(db, tmp_path):
+    # Another connection must see the rows as soon as flush() returns, even
+    # when ops queued behind the flush keep its batch open for a while
+    db.start_writer(max_delay=0.5)
+    db.write_sql(_LIQ_SQL, ("BTC", 1.0, "long", 500.0, 100.0))
+    seen = {}
+
+    def _flush_then_read():
+        seen["flushed"] = db.flush_writes(timeout=5)
+        reader = sqlite3.connect(tmp_path / "test.db")
+        try:
+            seen["rows"] = reader.execute(
+                "SELECT COUNT(*) FROM liquidation_events").fetchone()[0]
+        finally:
+            reader.close()
+
+    t = threading.Thread(target=_flush_then_read)
+    t.start()
+    time.sleep(0.05)
+    db.write(lambda conn: time.sleep(0.2))
+    t.join(5)
+    assert seen == {"flushed": True, "rows": 1}
+
+
+def test_heterogeneous_batch(db):
+    db.start_writer(max_delay=0.05)
+    db.write_many(
+        "INSERT INTO pnl_snapshots (address, snapshot_at, equity, unrealized) VALUES (?, ?, ?, ?)",
+        [("0xabc", 1.0, 100.0, 0.0), ("0xdef", 1.0, 200.0, 0.0)],
+    )
+    db.write_sql(_LIQ_SQL, ("ETH", 1.0, "short", 1000.0, 3000.0))
+    db.flush_writes()
+    assert db.conn.execute("SELECT COUNT(*) FROM pnl_snapshots").fetchone()[0] == 2
+    assert _liq_count(db) == 1
+
+
+def test_failing_op_does_not_lose_batch(db):
+    db.start_writer(max_delay=0.2)
+    db.write_sql("INSERT INTO no_such_table VALUES (1)")
+    db.write_sql(_LIQ_SQL, ("BTC", 1.0, "long", 500.0, 100.0))
+    db.flush_writes()
+    assert _liq_count(db) == 1
+    assert db.writer.stats()["errors"] == 1
+
+
+def test_failing_op_leaves_nothing_behind(db):
+    db.write_sql(_LIQ_SQL, ("BTC", 1.0, "long", 500.0, 100.0))
+    db.start_writer(max_delay=0.2)
+
+    def _replace_all(conn):
+        # Like rebuild_rankings: clear, then repopulate — the insert fails
+        conn.execute("DELETE FROM liquidation_events")
+        conn.execute("INSERT INTO no_such_table VALUES (1)")
+
+    db.write(_replace_all)
+    db.write_sql(_LIQ_SQL, ("ETH", 2.0, "short", 500.0, 100.0))
+    db.flush_writes()
+    coins = [r[0] for r in db.conn.execute("SELECT coin FROM liquidation_events ORDER BY coin")]
+    assert coins == ["BTC", "ETH"]
+    assert db.writer.stats()["errors"] == 1
+
+
+def test_blocking_drop_logs_error(db, caplog):
+    writer = db.start_writer(max_queue=1, max_delay=0)
+    started = threading.Event()
+    gate = threading.Event()
+
+    def _stall(conn):
+        started.set()
+        gate.wait(5)
+
+    db.write(_stall)
+    assert started.wait(5)
+    assert writer.submit(lambda conn: None)
+    with caplog.at_level("ERROR", logger="hynous_data.core.db_writer"):
+        assert not writer.submit(lambda conn: None, timeout=0.05)
+    gate.set()
+    assert any("dropped a blocking write" in r.message for r in caplog.records)
+
+
+def test_backpressure_drops_when_full(db):
+    writer = db.start_writer(max_queue=5, max_delay=0)
+    started = threading.Event()
+    gate = threading.Event()
+
+    def _stall(conn):
+        started.set()
+        gate.wait(5)
+
+    # Stall the writer thread inside a commit so the queue fills up
+    db.write(_stall)
+    assert started.wait(5)
+    results = [
+        db.write_sql(_LIQ_SQL, ("BTC", float(i), "long", 500.0, 100.0), block=False)
+        for i in range(20)
+    ]
+    gate.set()
+    assert not all(results)
+    assert writer.stats()["dropped"] == results.count(False)
+    db.flush_writes()
+    assert _liq_count(db) == results.count(True)
+
+
+def test_close_drains_queue(tmp_path):
+    d = Database(tmp_path / "drain.db")
+    d.connect()
+    d.init_schema()
+    d.start_writer(max_delay=1.0)
+    for i in range(10):
+        d.write_sql(_LIQ_SQL, ("BTC", float(i), "long", 500.0, 100.0))
+    d._writer.stop()
+    assert _liq_count(d) == 10
+    d.close()
@@ -0,0 +1,91 @@
+"""Tests for the array-backed L2 book."""
+
+import random
+import time
+
+import pytest
+
+from hynous_data.collectors.l2_subscriber import L2Book, L2Subscriber
+from hynous_data.engine.tick_collector import _COLS, TickCollector
+
+
+def _levels(side_px: list[float], sizes: list[float]) -> list[dict]:
+    return [{"px": str(px), "sz": str(sz), "n": 1} for px, sz in zip(side_px, sizes)]
+
+
+def _msg(coin, bids, asks):
+    return {"channel": "l2Book", "data": {"coin": coin, "levels": [bids, asks], "time": 0}}
+
+
+@pytest.fixture
+def book_levels():
+    rng = random.Random(7)
+    bids = [(100.0 - i * 0.5, rng.uniform(0.1, 5)) for i in range(100)]
+    asks = [(100.5 + i * 0.5, rng.uniform(0.1, 5)) for i in range(100)]
+    return bids, asks
+
+
+def test_depth_and_imbalance_match_naive_sums(book_levels):
+    bids, asks = book_levels
+    book = L2Book("BTC")
+    book.apply(_levels(*zip(*bids)), _levels(*zip(*asks)))
+    for k in (1, 5, 10, 20, 100, 500):
+        bid_usd = sum(px * sz for px, sz in bids[:k])
+        ask_usd = sum(px * sz for px, sz in asks[:k])
+        assert book.depth_at(k) == pytest.approx((bid_usd, ask_usd))
+        assert book.imbalance(k) == pytest.approx(bid_usd / (bid_usd + ask_usd))
+    assert book.mid == pytest.approx(100.25)
+    assert book.spread == pytest.approx(0.5)
+
+
+def test_microprice_leans_toward_thin_side():
+    book = L2Book("BTC")
+    book.apply(_levels([100.0], [9.0]), _levels([101.0], [1.0]))
+    # Heavy bid, thin ask → microprice near the ask
+    assert book.microprice == pytest.approx(100.9)
+    assert book.mid < book.microprice < book.best_ask
+
+
+def test_shallower_update_reuses_buffers():
+    book = L2Book("ETH")
+    book.apply(_levels([10, 9, 8], [1, 1, 1]), _levels([11, 12, 13], [1, 1, 1]))
+    bid_buf = book.bid_px
+    book.apply(_levels([10], [2]), _levels([11, 12], [1, 1]))
+    assert book.bid_px is bid_buf
+    assert (book.n_bids, book.n_asks) == (1, 2)
+    assert book.depth_at(5) == (20.0, 23.0)
+    assert book.imbalance(0) == 0.5
+
+
+def test_subscriber_legacy_snapshot_and_malformed_messages():
+    sub = L2Subscriber(coins=["BTC"])
+    assert sub.get_book("BTC") is None and sub.get_mid("BTC") is None
+    sub._handle_message(_msg("BTC", _levels([100, 99], [1, 2]), _levels([101], [3])))
+    sub._handle_message(_msg("SOL", _levels([1], [1]), _levels([2], [1])))  # not subscribed
+    snap = sub.get_book("BTC")
+    assert snap["bids"] == [(100.0, 1.0), (99.0, 2.0)]
+    assert snap["asks"] == [(101.0, 3.0)]
+    assert snap["bid_depth_usd"] == 298.0
+    assert snap["levels_count"] == 2
+    assert sub.get_mid("BTC") == 100.5
+    assert sub.stats()["books_cached"] == 1
+
+    sub._handle_message(_msg("BTC", [{"px": "oops", "sz": "1"}], _levels([101], [3])))
+    assert sub.get_l2("BTC").n_bids == 0  # dropped, not half-applied
+
+
+def test_tick_collector_reads_book_features(book_levels, tmp_path):
+    bids, asks = book_levels
+    sub = L2Subscriber(coins=["BTC"])
+    sub._handle_message(_msg("BTC", _levels(*zip(*bids)), _levels(*zip(*asks))))
+    tc = TickCollector(sub, ["BTC"], tmp_path / "satellite.db")
+    row = dict(zip(_COLS, tc._compute("BTC")))
+    for k in (5, 10, 20):
+        bid_usd = sum(px * sz for px, sz in bids[:k])
+        ask_usd = sum(px * sz for px, sz in asks[:k])
+        assert row[f"book_imbalance_{k}"] == pytest.approx(bid_usd / (bid_usd + ask_usd))
+    assert row["bid_depth_usd_5"] == pytest.approx(sum(px * sz for px, sz in bids[:5]))
+    assert row["spread_pct"] == pytest.approx(0.5 / 100.25)
+
+    sub.get_l2("BTC").updated_at = time.time() - 60  # stale book → no snapshot
+    assert tc._compute("BTC") is None
@@ -44,6 +44,7 @@ def test_compute_heatmap():
     _insert_position(db, "0xaaa", "BTC", "long", 500000, 95000)   # long liq below
     _insert_position(db, "0xbbb", "BTC", "short", 300000, 105000)  # short liq above
     _insert_position(db, "0xccc", "BTC", "long", 200000, 92000)   # long liq below
+    engine.load_from_db()
 
     # Manually compute (bypass threading)
     result = engine._compute_coin_heatmap("BTC", 100000)
@@ -66,8 +67,119 @@ def test_out_of_range_positions():
 
     # Position with liq price way outside range (>5%)
     _insert_position(db, "0xaaa", "BTC", "long", 500000, 50000)
+    engine.load_from_db()
 
     result = engine._compute_coin_heatmap("BTC", 100000)
     # Out of range — no buckets populated
     assert result is not None
     assert result["summary"]["total_long_liq_usd"] == 0
+
+
+def _pos(address, side, size_usd, liq_px, mark_px=100000, coin="BTC", updated_at=None):
+    return {
+        "address": address, "coin": coin, "side": side, "size_usd": size_usd,
+        "mark_px": mark_px, "liq_px": liq_px,
+        "updated_at": updated_at if updated_at is not None else time.time(),
+    }
+
+
+class _FakeL2:
+    def __init__(self, mids):
+        self.mids = mids
+
+    def get_mid(self, coin):
+        return self.mids.get(coin)
+
+
+def test_incremental_deltas():
+    db = _make_db()
+    engine = LiqHeatmapEngine(db, HeatmapConfig(bucket_count=10, range_pct=10))
+
+    engine.on_positions_upserted([
+        _pos("0xaaa", "long", 500000, 95000),
+        _pos("0xbbb", "short", 300000, 105000),
+    ])
+    s = engine.get_heatmap("BTC")["summary"]
+    assert s["total_long_liq_usd"] == 500000
+    assert s["total_short_liq_usd"] == 300000
+
+    # Resize one position, close the other
+    engine.on_positions_upserted([_pos("0xaaa", "long", 200000, 95000)])
+    engine.on_positions_closed([("0xbbb", set())])
+    result = engine.get_heatmap("BTC")
+    assert result["summary"]["total_long_liq_usd"] == 200000
+    assert result["summary"]["total_short_liq_usd"] == 0
+    assert result["summary"]["total_positions"] == 1
+    assert sum(b["long_count"] for b in result["buckets"]) == 1
+
+    # Closing the last position empties the coin
+    engine.on_positions_closed([("0xaaa", {"ETH"})])
+    assert engine.get_heatmap("BTC") is None
+
+
+def test_small_and_bot_positions_filtered():
+    db = _make_db()
+    db.conn.execute(
+        "INSERT INTO wallet_profiles (address, computed_at, is_bot) VALUES (?, ?, 1)",
+        ("0xbot", time.time()),
+    )
+    db.conn.commit()
+    engine = LiqHeatmapEngine(db, HeatmapConfig(bucket_count=10, range_pct=10))
+    engine.load_from_db()
+
+    engine.on_positions_upserted([
+        _pos("0xsmall", "long", 500, 95000),
+        _pos("0xbot", "long", 50000, 95000),
+        _pos("0xvalid", "long", 50000, 95000),
+    ])
+    s = engine.get_heatmap("BTC")["summary"]
+    assert s["total_long_liq_usd"] == 50000
+    assert s["total_positions"] == 1
+
+
+def test_stale_positions_expire_on_sweep():
+    db = _make_db()
+    engine = LiqHeatmapEngine(db, HeatmapConfig(bucket_count=10, range_pct=10))
+    engine.on_positions_upserted([
+        _pos("0xold", "long", 50000, 95000, updated_at=time.time() - 2000),
+        _pos("0xnew", "long", 80000, 95000),
+    ])
+    engine._sweep()
+    s = engine.get_heatmap("BTC")["summary"]
+    assert s["total_long_liq_usd"] == 80000
+    assert s["total_positions"] == 1
+
+
+def test_rebuckets_only_on_mid_drift():
+    db = _make_db()
+    l2 = _FakeL2({"BTC": 100000})
+    engine = LiqHeatmapEngine(db, HeatmapConfig(bucket_count=10, range_pct=10, rebucket_drift_pct=0.5),
+                              l2_subscriber=l2)
+    engine.on_positions_upserted([_pos("0xaaa", "long", 500000, 95000)])
+
+    first = engine.get_heatmap("BTC")
+    assert first["mid_price"] == 100000
+    assert engine.total_rebuckets == 1
+
+    # Small move: same anchor, same buckets
+    l2.mids["BTC"] = 100200
+    second = engine.get_heatmap("BTC")
+    assert engine.total_rebuckets == 1
+    assert second["mid_price"] == 100200
+    assert second["buckets"] == first["buckets"]
+
+    # Large move: re-anchored around the new mid
+    l2.mids["BTC"] = 110000
+    third = engine.get_heatmap("BTC")
+    assert engine.total_rebuckets == 2
+    assert third["buckets"][0]["price_low"] == 99000
+    assert third["summary"]["total_long_liq_usd"] == 0  # 95k now below range
+
+
+def test_mid_falls_back_to_mark_price():
+    db = _make_db()
+    engine = LiqHeatmapEngine(db, HeatmapConfig(bucket_count=10, range_pct=10),
+                              l2_subscriber=_FakeL2({}))
+    engine.on_positions_upserted([_pos("0xaaa", "long", 500000, 95000, mark_px=100000, coin="SOL")])
+    assert engine.get_heatmap("SOL")["mid_price"] == 100000
+    assert engine.get_available_coins() == ["SOL"]
@@ -2,19 +2,16 @@
 
 import time
 
-from hynous_data.collectors.trade_stream import get_trade_buffer
 from hynous_data.engine.order_flow import OrderFlowEngine
 
 
-def _populate_buffer(coin: str, buys: int, sells: int, px: float = 100000):
-    """Insert fake trades into the buffer."""
-    buf = get_trade_buffer(coin)
-    buf.clear()
+def _populate(engine: OrderFlowEngine, coin: str, buys: int, sells: int, px: float = 100000):
+    """Feed fake trades into the engine (as TradeStream._on_trade would)."""
     now_ms = int(time.time() * 1000)
-    for i in range(buys):
-        buf.append({"coin": coin, "side": "B", "px": px, "sz": 0.1, "time": now_ms - i * 100})
-    for i in range(sells):
-        buf.append({"coin": coin, "side": "A", "px": px, "sz": 0.1, "time": now_ms - i * 100})
+    trades = [(now_ms - i * 100, True) for i in range(buys)]
+    trades += [(now_ms - i * 100, False) for i in range(sells)]
+    for t, is_buy in sorted(trades):
+        engine.record_trade(coin, t, px * 0.1, is_buy)
 
 
 def test_empty_flow():
@@ -25,8 +22,8 @@ def test_empty_flow():
 
 
 def test_basic_cvd():
-    _populate_buffer("BTC", buys=10, sells=5, px=100000)
     engine = OrderFlowEngine(windows=[3600])
+    _populate(engine, "BTC", buys=10, sells=5, px=100000)
 
     result = engine.get_order_flow("BTC")
     w = result["windows"]["1h"]
@@ -38,8 +35,8 @@ def test_basic_cvd():
 
 
 def test_multiple_windows():
-    _populate_buffer("ETH", buys=20, sells=20, px=3000)
     engine = OrderFlowEngine(windows=[60, 300, 3600])
+    _populate(engine, "ETH", buys=20, sells=20, px=3000)
 
     result = engine.get_order_flow("ETH")
     assert "1m" in result["windows"]
@@ -51,9 +48,70 @@ def test_multiple_windows():
 
 
 def test_all_cvd_summary():
-    _populate_buffer("SOL", buys=30, sells=10, px=200)
     engine = OrderFlowEngine()
+    _populate(engine, "SOL", buys=30, sells=10, px=200)
 
     summary = engine.get_all_cvd_summary()
     assert "SOL" in summary
     assert summary["SOL"] > 0  # More buys than sells
+
+
+def test_window_excludes_old_trades():
+    engine = OrderFlowEngine(windows=[60, 600])
+    now = 1_700_000_000
+    engine.record_trade("BTC", (now - 300) * 1000, 500.0, True)   # 5m ago
+    engine.record_trade("BTC", (now - 30) * 1000, 100.0, False)   # 30s ago
+    engine.record_trade("BTC", now * 1000, 50.0, True)
+
+    w60 = engine.get_window("BTC", 60, now=now)
+    assert w60["buy_volume_usd"] == 50.0
+    assert w60["sell_volume_usd"] == 100.0
+    assert w60["buy_count"] == 1
+
+    w600 = engine.get_window("BTC", 600, now=now)
+    assert w600["buy_volume_usd"] == 550.0
+    assert w600["cvd"] == 450.0
+
+
+def test_custom_window_capped_at_horizon():
+    engine = OrderFlowEngine(windows=[60], horizon=120)
+    now = 1_700_000_000
+    engine.record_trade("BTC", (now - 100) * 1000, 10.0, True)
+    w = engine.get_window("BTC", 10_000, now=now)
+    assert w["window_seconds"] == 120
+    assert w["buy_volume_usd"] == 10.0
+
+
+def test_ring_wraps_after_horizon():
+    engine = OrderFlowEngine(windows=[60], horizon=60)
+    start = 1_700_000_000
+    for i in range(200):  # 200s of one buy per second
+        engine.record_trade("BTC", (start + i) * 1000, 1.0, True)
+    now = start + 199
+    assert engine.get_window("BTC", 60, now=now)["buy_count"] == 60
+    assert engine.get_window("BTC", 10, now=now)["buy_count"] == 10
+    # Quiet period: 30s later, only the last 30s of trades are in a 60s window
+    assert engine.get_window("BTC", 60, now=now + 30)["buy_count"] == 30
+
+
+def test_custom_windows_in_order_flow():
+    engine = OrderFlowEngine(windows=[60], horizon=120)
+    _populate(engine, "BTC", buys=3, sells=1)
+    result = engine.get_order_flow("BTC", windows=[30, 120])
+    assert set(result["windows"]) == {"30s", "2m"}
+
+
+def test_window_labels_never_collide():
+    engine = OrderFlowEngine(windows=[60], horizon=7200)
+    _populate(engine, "BTC", buys=3, sells=1)
+    labels = engine.get_order_flow("BTC", windows=[60, 90, 5400, 3600, 7200])["windows"]
+    assert list(labels) == ["1m", "90s", "90m", "1h", "2h"]
+    assert labels["90s"]["window_seconds"] == 90
+
+
+def test_window_label_is_the_capped_window():
+    engine = OrderFlowEngine(windows=[60], horizon=120)
+    _populate(engine, "BTC", buys=1, sells=1)
+    result = engine.get_order_flow("BTC", windows=[10_000])
+    assert list(result["windows"]) == ["2m"]
+    assert result["windows"]["2m"]["window_seconds"] == 120
@@ -0,0 +1,190 @@
+"""Tests for time-partitioned historical series."""
+
+import sqlite3
+import time
+
+import pytest
+
+from hynous_data.core.db import Database
+
+DAY = 86400
+
+
+@pytest.fixture
+def db(tmp_path):
+    d = Database(tmp_path / "test.db")
+    d.connect()
+    d.init_schema()
+    yield d
+    d.close()
+
+
+def _tables(db, prefix):
+    return sorted(
+        r["name"] for r in db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (prefix + "%",),
+        ).fetchall()
+    )
+
+
+def _insert_funding(db, ts, rate=0.0001, coin="BTC", verb="INSERT"):
+    with db.write_lock:
+        db.conn.execute(
+            f"{verb} INTO funding_history (coin, recorded_at, rate) VALUES (?, ?, ?)",
+            (coin, ts, rate),
+        )
+        db.conn.commit()
+
+
+def test_series_are_views_over_partitions(db):
+    row = db.conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = 'funding_history'"
+    ).fetchone()
+    assert row["type"] == "view"
+    parts = db.history.partitions("funding_history")
+    # 90 days back + 14 days ahead in 7-day partitions
+    assert 14 <= len(parts) <= 17
+    assert all(b.lo == a.hi for a, b in zip(parts, parts[1:]))
+
+
+def test_rows_route_to_their_partition(db):
+    now = time.time()
+    _insert_funding(db, now)
+    _insert_funding(db, now - 30 * DAY)
+    target = [p for p in db.history.partitions("funding_history") if p.lo <= now < p.hi][0]
+    assert db.conn.execute(f"SELECT COUNT(*) FROM {target.name}").fetchone()[0] == 1
+    assert db.conn.execute("SELECT COUNT(*) FROM funding_history").fetchone()[0] == 2
+
+
+def test_conflict_clause_applies_through_view(db):
+    now = time.time()
+    _insert_funding(db, now, 0.0001)
+    _insert_funding(db, now, 0.0002, verb="INSERT OR IGNORE")
+    assert db.conn.execute("SELECT rate FROM funding_history").fetchone()[0] == 0.0001
+    _insert_funding(db, now, 0.0003, verb="INSERT OR REPLACE")
+    assert [r[0] for r in db.conn.execute("SELECT rate FROM funding_history").fetchall()] == [0.0003]
+    with pytest.raises(sqlite3.IntegrityError):
+        _insert_funding(db, now, 0.0004)
+
+
+def test_defaults_and_delete_through_view(db):
+    now = time.time()
+    with db.write_lock:
+        db.conn.execute(
+            "INSERT INTO trade_flow_history (coin, recorded_at, buy_volume_usd) VALUES (?, ?, ?)",
+            ("BTC", now, 100.0),
+        )
+        db.conn.executemany(
+            "INSERT INTO liquidation_events (coin, occurred_at, side, size_usd, price) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [("BTC", now - i * DAY, "long", 1000, 95000) for i in range(3)],
+        )
+        db.conn.execute(
+            "DELETE FROM liquidation_events WHERE occurred_at >= ?", (now - 1.5 * DAY,)
+        )
+        db.conn.commit()
+    assert db.conn.execute(
+        "SELECT sell_volume_usd FROM trade_flow_history"
+    ).fetchone()[0] == 0
+    assert db.conn.execute("SELECT COUNT(*) FROM liquidation_events").fetchone()[0] == 1
+
+
+def test_prune_drops_whole_partitions(db):
+    now = time.time()
+    _insert_funding(db, now - 80 * DAY)
+    before = db.history.partitions("funding_history")
+
+    # Advance the clock 20 days: the oldest partitions fall out of retention
+    with db.write_lock:
+        dropped, _ = db.history.maintain(db.conn, now=now + 20 * DAY)
+    after = db.history.partitions("funding_history")
+    gone = {p.name for p in before} - {p.name for p in after}
+    assert len(gone) >= 2
+    assert dropped >= len(gone)
+    assert after[0].lo > before[0].lo
+    assert after[-1].hi > before[-1].hi  # rolled forward
+    assert not gone & set(_tables(db, "funding_history_p"))
+    # The 80-day-old row is now 100 days old and went with its partition
+    assert db.conn.execute("SELECT COUNT(*) FROM funding_history").fetchone()[0] == 0
+
+
+def test_overflow_rows_rehomed_or_expired(db):
+    now = time.time()
+    far_future = db.history.partitions("funding_history")[-1].hi + 3 * DAY
+    _insert_funding(db, now - 200 * DAY)   # older than retention
+    _insert_funding(db, far_future)        # beyond the partitioned range
+    assert db.conn.execute(
+        "SELECT COUNT(*) FROM funding_history_overflow"
+    ).fetchone()[0] == 2
+
+    with db.write_lock:
+        _, expired = db.history.maintain(db.conn, now=now + 14 * DAY)
+    assert expired == 1
+    assert db.conn.execute(
+        "SELECT COUNT(*) FROM funding_history_overflow"
+    ).fetchone()[0] == 0
+    rows = db.conn.execute("SELECT recorded_at FROM funding_history").fetchall()
+    assert [r[0] for r in rows] == [far_future]
+
+
+def test_router_reads_only_overlapping_partitions(db):
+    now = time.time()
+    for i in range(40):
+        _insert_funding(db, now - i * DAY, rate=i)
+    _insert_funding(db, now, coin="ETH")
+
+    rows = db.history.query(
+        "funding_history", "rate", where="coin = ?", params=("BTC",),
+        since=now - 10.5 * DAY, until=now + 1, order_by="recorded_at",
+    )
+    assert [r["rate"] for r in rows] == list(range(10, -1, -1))
+    assert len(db.history.partitions("funding_history", now - 10.5 * DAY, now)) <= 3
+
+
+def test_legacy_flat_table_migrated(tmp_path):
+    path = tmp_path / "legacy.db"
+    now = time.time()
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE oi_history (
+            coin TEXT NOT NULL, recorded_at REAL NOT NULL, oi_usd REAL NOT NULL,
+            PRIMARY KEY (coin, recorded_at)
+        );
+        CREATE INDEX idx_oh_coin_time ON oi_history(coin, recorded_at);
+    """)
+    conn.executemany(
+        "INSERT INTO oi_history VALUES (?, ?, ?)",
+        [("BTC", now - 5 * DAY, 1.0), ("BTC", now - 200 * DAY, 2.0)],
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    db.connect()
+    db.init_schema()
+    try:
+        rows = db.conn.execute("SELECT oi_usd FROM oi_history").fetchall()
+        assert [r[0] for r in rows] == [1.0]  # out-of-retention row not carried over
+        assert not _tables(db, "oi_history_legacy")
+        db.init_schema()  # idempotent on the partitioned layout
+        assert db.conn.execute("SELECT COUNT(*) FROM oi_history").fetchone()[0] == 1
+    finally:
+        db.close()
+
+
+def test_prune_old_data_drops_expired_partitions(db):
+    now = time.time()
+    with db.write_lock:
+        db.history.maintain(db.conn, now=now - 20 * DAY)  # extends the range 20 days back
+    _insert_funding(db, now - 100 * DAY)
+    _insert_funding(db, now)
+    old = [p for p in db.history.partitions("funding_history")
+           if p.lo <= now - 100 * DAY < p.hi][0]
+    assert db.conn.execute(f"SELECT COUNT(*) FROM {old.name}").fetchone()[0] == 1
+
+    db.prune_old_data()
+
+    assert old.name not in _tables(db, "funding_history_p")
+    assert [r["recorded_at"] for r in db.conn.execute(
+        "SELECT recorded_at FROM funding_history")] == [now]
@@ -0,0 +1,185 @@
+"""Tests for the deadline-based position poll scheduler and worker pipeline."""
+
+import threading
+import time
+
+import pytest
+
+from hynous_data.collectors import position_poller
+from hynous_data.collectors.position_poller import PollScheduler, PositionPoller
+from hynous_data.core.config import PositionPollerConfig
+from hynous_data.core.db import Database
+from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.engine.whale_tracker import WhaleTracker
+
+INTERVALS = {1: 30, 2: 120, 3: 600}
+
+
+def test_next_returns_earliest_due_first():
+    now = 10_000.0
+    s = PollScheduler(INTERVALS)
+    s.upsert("small", 3, now - 700, now - 800, now)    # due now - 100
+    s.upsert("whale", 1, now - 40, now - 800, now)     # due now - 10
+    s.upsert("mid", 2, now - 60, now - 800, now)       # due now + 60
+    clock = lambda: now  # noqa: E731
+    assert s.next(timeout=0.01, now_fn=clock)[0] == "small"
+    assert s.next(timeout=0.01, now_fn=clock)[0] == "whale"
+    assert s.next(timeout=0.01, now_fn=clock) is None  # mid not yet due
+
+
+def test_never_polled_ordered_by_tier():
+    s = PollScheduler(INTERVALS)
+    for addr, tier in (("c", 3), ("a", 1), ("b", 2)):
+        s.upsert(addr, tier, None, time.time(), now=100.0)
+    assert [s.next(timeout=0.01)[0] for _ in range(3)] == ["a", "b", "c"]
+
+
+def test_activity_pulls_deadline_forward():
+    now = 10_000.0
+    s = PollScheduler(INTERVALS, active_boost=0.5)
+    s.upsert("x", 3, now - 400, now - 500, now)  # due in 200s
+    assert s.next(timeout=0.01, now_fn=lambda: now) is None
+    s.upsert("x", 3, None, now - 1, now)  # traded since last poll → 300s interval
+    item = s.next(timeout=0.01, now_fn=lambda: now)
+    assert item[0] == "x" and item[2] == now - 100
+
+
+def test_watched_capped_at_tier1_interval():
+    now = 10_000.0
+    s = PollScheduler(INTERVALS)
+    s.upsert("w", 3, now - 60, now - 3600, now)
+    s.set_watched({"w", "unknown"}, now)
+    clock = lambda: now  # noqa: E731
+    assert {s.next(timeout=0.01, now_fn=clock)[0] for _ in range(2)} == {"w", "unknown"}
+    s.done("w", 3, now)
+    assert s.next(timeout=0.01, now_fn=lambda: now + 29) is None
+    assert s.next(timeout=0.01, now_fn=lambda: now + 30)[0] == "w"
+
+
+def test_inflight_not_redispatched_and_done_reschedules_by_new_tier():
+    now = 10_000.0
+    s = PollScheduler(INTERVALS)
+    s.upsert("a", 3, None, now, now)
+    assert s.next(timeout=0.01, now_fn=lambda: now)[0] == "a"
+    s.upsert("a", 3, None, now + 5, now)  # activity while in flight
+    assert s.next(timeout=0.01, now_fn=lambda: now + 5) is None
+    s.done("a", 1, now + 5)  # reclassified as whale
+    assert s.next(timeout=0.01, now_fn=lambda: now + 34) is None
+    assert s.next(timeout=0.01, now_fn=lambda: now + 35)[1] == 1
+
+
+def test_inactive_addresses_dropped_and_lag_stats():
+    now = 10_000_000.0
+    s = PollScheduler(INTERVALS)
+    s.upsert("old", 1, None, now - 8 * 86400, now)
+    s.upsert("new", 1, None, now, now)
+    assert s.next(timeout=0.01, now_fn=lambda: now)[0] == "new"
+    assert len(s) == 1
+    for lag in (0.1, 0.2, 5.0):
+        s.record_lag(1, lag)
+    tier1 = s.stats(now)["tiers"][1]
+    assert tier1["polls"] == 3
+    assert tier1["lag_p50_s"] == 0.2
+    assert tier1["lag_max_s"] == 5.0
+
+
+def test_next_blocks_until_due():
+    s = PollScheduler(INTERVALS)
+    s.upsert("a", 1, time.time() - 29.8, time.time() - 100)
+    t0 = time.monotonic()
+    assert s.next(timeout=2)[0] == "a"
+    assert 0.1 < time.monotonic() - t0 < 1.5
+
+
+# ----------------------------------------------------------------------
+# Worker pipeline
+# ----------------------------------------------------------------------
+
+
+class _FakeInfo:
+    """user_state stub: one BTC position per address, `slow` hangs."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls: list[str] = []
+        self.release = threading.Event()
+
+    def user_state(self, address):
+        self.calls.append(address)
+        if address == "slow":
+            self.release.wait(5)
+        size = 50.0 if address == "whale" else 0.1
+        return {
+            "marginSummary": {"accountValue": "1000", "totalUnrealizedPnl": "0"},
+            "assetPositions": [{"position": {
+                "coin": "BTC", "szi": str(size), "entryPx": "50000",
+                "positionValue": str(size * 50000), "leverage": {"value": 10},
+                "liquidationPx": "45000", "marginUsed": "100", "unrealizedPnl": "0",
+            }}],
+        }
+
+
+@pytest.fixture
+def poller(tmp_path, monkeypatch):
+    monkeypatch.setattr(position_poller, "Info", _FakeInfo)
+    db = Database(tmp_path / "test.db")
+    db.connect()
+    db.init_schema()
+    now = time.time()
+    with db.write_lock:
+        db.conn.executemany(
+            "INSERT INTO addresses (address, first_seen, last_seen, tier) VALUES (?, ?, ?, 3)",
+            [(a, now, now) for a in ("slow", "whale", "a", "b", "c")],
+        )
+        db.conn.commit()
+    cfg = PositionPollerConfig(workers=2, flush_interval=0.05)
+    pp = PositionPoller(db, RateLimiter(max_weight=1200, safety_pct=100), cfg)
+    yield pp, db
+    pp._info.release.set()
+    pp.stop()
+    db.close()
+
+
+def test_slow_address_does_not_stall_pipeline(poller):
+    pp, db = poller
+    pp.start()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        n = db.read_conn.execute(
+            "SELECT COUNT(*) FROM addresses WHERE last_polled IS NOT NULL"
+        ).fetchone()[0]
+        if n == 4:
+            break
+        time.sleep(0.05)
+    # Everything except the hung address was polled and persisted
+    assert n == 4
+    assert db.read_conn.execute(
+        "SELECT last_polled FROM addresses WHERE address = 'slow'"
+    ).fetchone()[0] is None
+    assert db.read_conn.execute(
+        "SELECT tier FROM addresses WHERE address = 'whale'"
+    ).fetchone()[0] == 1
+    assert db.read_conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0] == 4
+
+    pp._info.release.set()
+    time.sleep(0.3)
+    stats = pp.stats()
+    assert stats["total_polls"] == 5
+    assert stats["scheduler"]["tiers"][1]["tracked"] == 1
+    assert stats["scheduler"]["tiers"][3]["polls"] == 5
+
+
+def test_whale_version_bumps_after_positions_commit(poller):
+    pp, db = poller
+    db.start_writer()
+    seen = []
+
+    class Tracker(WhaleTracker):
+        def mark_changed(self):
+            # What a request handler's connection sees under the new version
+            seen.append(db.read_conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0])
+            super().mark_changed()
+
+    pp.set_whale_tracker(Tracker(db))
+    positions, size, coins = pp._poll_address("a", acquire=False)
+    pp._flush_results([("a", positions, size, coins)])
+    assert seen == [1]
@@ -0,0 +1,166 @@
+"""Tests for incremental wallet profiling (fill cursors + persisted FIFO state)."""
+
+import time
+
+import pytest
+
+from hynous_data.core.config import SmartMoneyConfig
+from hynous_data.core.db import Database
+from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.engine import profiler as profiler_mod
+from hynous_data.engine.profiler import WalletProfiler
+
+ADDR = "0xabc"
+HOUR_MS = 3_600_000
+
+
+class _FakeInfo:
+    fills: list[dict] = []
+
+    def __init__(self, *args, **kwargs):
+        self.starts: list[int] = []
+
+    def user_fills_by_time(self, address, start_ms):
+        self.starts.append(start_ms)
+        return [f for f in self.fills if f["time"] >= start_ms]
+
+
+def _fill(tid, coin, direction, px, sz, t_ms, start_pos=0.0, pnl=0.0):
+    return {
+        "tid": tid, "coin": coin, "dir": direction, "px": str(px), "sz": str(sz),
+        "closedPnl": str(pnl), "time": t_ms, "startPosition": str(start_pos),
+    }
+
+
+def _round_trip(tid, coin, t_ms, entry, exit_, sz=1.0, hold_h=2):
+    """Open long + full close `hold_h` hours later."""
+    return [
+        _fill(tid, coin, "Open Long", entry, sz, t_ms),
+        _fill(tid + 1, coin, "Close Long", exit_, sz, t_ms + hold_h * HOUR_MS,
+              start_pos=sz, pnl=(exit_ - entry) * sz),
+    ]
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_mod, "Info", _FakeInfo)
+    db = Database(tmp_path / "test.db")
+    db.connect()
+    db.init_schema()
+    cfg = SmartMoneyConfig(min_trades_for_profile=3)
+    p = WalletProfiler(db, RateLimiter(max_weight=100_000, safety_pct=100), cfg)
+    yield p
+    db.close()
+
+
+def _history(now_ms, n=8):
+    fills = []
+    for i in range(n):
+        t = now_ms - (n - i) * 6 * HOUR_MS
+        fills += _round_trip(100 + 10 * i, "BTC" if i % 2 else "ETH", t,
+                             100.0, 103.0 if i % 3 else 98.0)
+    return fills
+
+
+def _stats(profile):
+    return {k: profile[k] for k in ("win_rate", "trade_count", "profit_factor",
+                                    "avg_hold_hours", "max_drawdown", "style")}
+
+
+def test_incremental_refreshes_match_full_recompute(profiler):
+    now = time.time()
+    now_ms = int(now * 1000)
+    fills = _history(now_ms)
+    full = profiler.compute_profile([dict(f) for f in fills])
+
+    # Ingest in three slices, including a trade that stays open across refreshes
+    cut1, cut2 = fills[5]["time"], fills[10]["time"]
+    for cut in (cut1, cut2, now_ms):
+        _FakeInfo.fills = [f for f in fills if f["time"] <= cut]
+        profile = profiler.update_profile(ADDR, now)
+    assert "_trades" not in profile
+    assert profile["trade_count"] == full["trade_count"] == 8
+    assert profile["win_rate"] == full["win_rate"]
+    assert profile["profit_factor"] == full["profit_factor"]
+    assert profile["avg_hold_hours"] == full["avg_hold_hours"]
+    assert profiler.total_incremental == 2
+    count = profiler._db.read_conn.execute(
+        "SELECT COUNT(*) FROM wallet_trades WHERE address = ?", (ADDR,)
+    ).fetchone()[0]
+    assert count == 8
+
+
+def test_refresh_fetches_from_cursor_and_dedups_overlap(profiler):
+    now = time.time()
+    now_ms = int(now * 1000)
+    fills = _history(now_ms, n=4)
+    # A second fill sharing the last timestamp arrives after the first refresh
+    late = _round_trip(900, "SOL", fills[-1]["time"] - 2 * HOUR_MS, 10.0, 11.0)
+    _FakeInfo.fills = list(fills)
+    profiler.update_profile(ADDR, now)
+    cursor = fills[-1]["time"]
+    _FakeInfo.fills = fills + late
+    profiler.update_profile(ADDR, now)
+
+    assert profiler._info.starts[-1] == cursor
+    assert profiler.total_fills_ingested == len(fills) + 1  # only the SOL close is new
+    rows = profiler._db.read_conn.execute(
+        "SELECT coin FROM wallet_trades WHERE address = ? ORDER BY exit_time", (ADDR,)
+    ).fetchall()
+    # SOL open precedes the cursor, so its close alone can't form a trade
+    assert [r["coin"] for r in rows] == ["ETH", "BTC", "ETH", "BTC"]
+
+
+def test_open_trade_state_survives_refresh(profiler):
+    now = time.time()
+    now_ms = int(now * 1000)
+    opened = _fill(1, "BTC", "Open Long", 100.0, 1.0, now_ms - 10 * HOUR_MS)
+    scaled = _fill(2, "BTC", "Open Long", 110.0, 1.0, now_ms - 9 * HOUR_MS)
+    closed = _fill(3, "BTC", "Close Long", 120.0, 2.0, now_ms - HOUR_MS, start_pos=2, pnl=30)
+    _FakeInfo.fills = [opened, scaled]
+    profiler.update_profile(ADDR, now)
+    _FakeInfo.fills = [opened, scaled, closed]
+    profiler.update_profile(ADDR, now)
+    row = profiler._db.read_conn.execute(
+        "SELECT entry_px, exit_px, pnl_usd, hold_hours FROM wallet_trades WHERE address = ?",
+        (ADDR,),
+    ).fetchone()
+    assert row["entry_px"] == pytest.approx(105.0)
+    assert row["exit_px"] == pytest.approx(120.0)
+    assert row["pnl_usd"] == pytest.approx(30.0)
+    assert row["hold_hours"] == pytest.approx(9.0)
+
+
+def test_window_expiry_and_stale_cursor_reset(profiler):
+    now = time.time()
+    now_ms = int(now * 1000)
+    _FakeInfo.fills = _history(now_ms)
+    assert profiler.update_profile(ADDR, now)["trade_count"] == 8
+
+    # 5.5 days later the two oldest trades fall out of the 7-day window
+    later = now + 5.5 * 86400
+    profile = profiler.update_profile(ADDR, later)
+    assert profile["trade_count"] == 6
+    n = profiler._db.read_conn.execute(
+        "SELECT COUNT(*) FROM wallet_trades WHERE address = ?", (ADDR,)
+    ).fetchone()[0]
+    assert n == profile["trade_count"]
+
+    # Cursor now older than the window → full-window refetch
+    profiler.update_profile(ADDR, now + 30 * 86400)
+    assert profiler._info.starts[-1] == int((now + 23 * 86400) * 1000)
+
+
+def test_failed_fetch_leaves_state_untouched(profiler, monkeypatch):
+    now = time.time()
+    _FakeInfo.fills = _history(int(now * 1000))
+    profiler.update_profile(ADDR, now)
+    before = dict(profiler._db.read_conn.execute(
+        "SELECT * FROM wallet_fill_state WHERE address = ?", (ADDR,)
+    ).fetchone())
+    monkeypatch.setattr(profiler, "_fetch_fills_since", lambda *a: None)
+    assert profiler.update_profile(ADDR, now) == {}
+    after = dict(profiler._db.read_conn.execute(
+        "SELECT * FROM wallet_fill_state WHERE address = ?", (ADDR,)
+    ).fetchone())
+    assert after == before
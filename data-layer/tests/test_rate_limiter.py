@@ -76,3 +76,79 @@ def test_stats():
     assert s["total_acquired"] == 10
     assert s["max"] == 100
     assert "available" in s
+
+
+def test_reserve_blocks_lower_classes():
+    rl = RateLimiter(max_weight=100, safety_pct=100,
+                     reserve_critical_pct=20, reserve_normal_pct=10)
+    assert rl.acquire(70, timeout=1, priority="bulk")
+    # 30 left: bulk must leave 30, normal must leave 20, critical may take all
+    assert rl.acquire(5, timeout=0.05, priority="bulk") is False
+    assert rl.acquire(10, timeout=0.05, priority="normal")
+    assert rl.acquire(20, timeout=0.05, priority="critical")
+
+
+def test_priority_order_when_tokens_refill():
+    rl = RateLimiter(max_weight=600, safety_pct=100)  # 10 tokens/sec
+    rl.acquire(600, timeout=1)
+    order = []
+
+    def take(priority):
+        assert rl.acquire(5, timeout=5, priority=priority)
+        order.append(priority)
+
+    bulk = threading.Thread(target=take, args=("bulk",))
+    bulk.start()
+    time.sleep(0.05)  # bulk is queued first
+    crit = threading.Thread(target=take, args=("critical",))
+    crit.start()
+    bulk.join()
+    crit.join()
+    assert order == ["critical", "bulk"]
+
+
+def test_head_waiter_wakes_on_deficit_not_polling():
+    rl = RateLimiter(max_weight=600, safety_pct=100)  # 10 tokens/sec
+    rl.acquire(600, timeout=1)
+    t0 = time.monotonic()
+    assert rl.acquire(3, timeout=2)
+    assert 0.25 <= time.monotonic() - t0 < 0.6
+
+
+def test_acquire_async_waits_without_blocking_loop():
+    import asyncio
+
+    rl = RateLimiter(max_weight=600, safety_pct=100)
+    rl.acquire(600, timeout=1)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        ok = await rl.acquire_async(2, timeout=2, priority="critical")
+        t.cancel()
+        return ok, ticks
+
+    ok, ticks = asyncio.run(main())
+    assert ok
+    assert ticks >= 10  # the loop kept running while we waited ~0.2s
+    assert asyncio.run(rl.acquire_async(1000, timeout=0.05)) is False
+
+
+def test_per_class_stats():
+    rl = RateLimiter(max_weight=100, safety_pct=100)
+    rl.acquire(10, timeout=1, priority="critical")
+    rl.acquire(5, timeout=1, priority="bulk")
+    rl.acquire(500, timeout=0.01, priority="bulk")
+    classes = rl.stats()["classes"]
+    assert classes["critical"]["weight_1m"] == 10
+    assert classes["critical"]["utilization_1m"] == 0.1
+    assert classes["critical"]["wait_hist"]["le_0.001s"] == 1
+    assert classes["bulk"]["acquired"] == 1 and classes["bulk"]["timeouts"] == 1
+    assert classes["normal"]["acquired"] == 0
@@ -0,0 +1,205 @@
+"""Tests for the versioned response cache on the read routes."""
+
+import json
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from hynous_data.api.routes import create_router
+from hynous_data.core import response_cache
+from hynous_data.core.db import Database
+from hynous_data.core.response_cache import ResponseCache
+from hynous_data.engine.smart_money import SmartMoneyEngine
+
+
+class _FakeWhales:
+    def __init__(self):
+        self.version = 0
+        self.calls = 0
+
+    def get_whales(self, coin, top_n):
+        self.calls += 1
+        return {"coin": coin, "positions": [], "count": 0, "version_seen": self.version}
+
+
+def _client(**components):
+    app = FastAPI()
+    app.include_router(create_router(components))
+    return TestClient(app)
+
+
+def test_repeated_reads_hit_cache_until_version_bumps():
+    whales = _FakeWhales()
+    client = _client(whale_tracker=whales)
+    first = client.get("/v1/whales/btc")
+    second = client.get("/v1/whales/BTC")
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert whales.calls == 1
+
+    whales.version += 1
+    third = client.get("/v1/whales/btc")
+    assert whales.calls == 2 and third.json()["version_seen"] == 1
+    # Different params are different entries
+    client.get("/v1/whales/btc?top_n=5")
+    assert whales.calls == 3
+
+
+def test_etag_conditional_get_returns_304():
+    whales = _FakeWhales()
+    client = _client(whale_tracker=whales)
+    r = client.get("/v1/whales/eth")
+    etag = r.headers["etag"]
+    r304 = client.get("/v1/whales/eth", headers={"If-None-Match": etag})
+    assert r304.status_code == 304 and r304.content == b""
+    assert r304.headers["etag"] == etag
+    # Same content after a version bump keeps the ETag (content-addressed)
+    whales.version += 1
+    whales.get_whales = lambda coin, top_n: {"coin": coin, "positions": [], "count": 0}
+    a = client.get("/v1/whales/eth")
+    b = client.get("/v1/whales/eth", headers={"If-None-Match": a.headers["etag"]})
+    assert b.status_code == 304
+
+
+def test_smart_money_read_after_rebuild_sees_new_rankings(tmp_path, monkeypatch):
+    db = Database(tmp_path / "test.db")
+    db.connect()
+    db.init_schema()
+    db.start_writer(max_delay=0.5)
+    sm = SmartMoneyEngine(db)
+    client = _client(smart_money=sm)
+    assert client.get("/v1/smart-money").json()["rankings"] == []
+
+    sm.batch_snapshot_pnl([("0xa", 100.0, 0)], now=1_700_000_000.0)
+    sm.batch_snapshot_pnl([("0xa", 150.0, 0)], now=1_700_000_060.0)
+    flush = db.flush_writes
+
+    def _flush_with_trailing_write(timeout=10.0):
+        # A write queued just behind the flush holds the rebuild's batch open
+        threading.Timer(0.05, lambda: db.write(lambda conn: time.sleep(0.2))).start()
+        return flush(timeout)
+
+    monkeypatch.setattr(db, "flush_writes", _flush_with_trailing_write)
+    sm.rebuild_rankings()
+    # The first read under the new version is the one that gets cached
+    first = client.get("/v1/smart-money").json()["rankings"]
+    assert [r["address"] for r in first] == ["0xa"]
+    assert client.get("/v1/smart-money").json()["rankings"] == first
+    db.close()
+
+
+def test_errors_are_not_cached():
+    class _Heatmap:
+        calls = 0
+
+        def version(self, coin):
+            return 1
+
+        def get_heatmap(self, coin):
+            self.calls += 1
+            return None
+
+        def get_available_coins(self):
+            return []
+
+    hm = _Heatmap()
+    client = _client(liq_heatmap=hm)
+    assert client.get("/v1/heatmap/BTC").status_code == 404
+    assert client.get("/v1/heatmap/BTC").status_code == 404
+    assert hm.calls == 2
+
+
+def test_ttl_expires_entry_without_version_change(monkeypatch):
+    cache = ResponseCache()
+    calls = []
+
+    class _Req:
+        headers = {}
+
+    clock = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: clock[0])
+    render = lambda: calls.append(1) or {"n": len(calls)}  # noqa: E731
+    cache.respond(_Req(), "k", 1, render, ttl=1.0)
+    cache.respond(_Req(), "k", 1, render, ttl=1.0)
+    clock[0] += 1.5
+    body = cache.respond(_Req(), "k", 1, render, ttl=1.0).body
+    assert len(calls) == 2 and json.loads(body) == {"n": 2}
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_bound_and_numpy_encoding():
+    import numpy as np
+
+    cache = ResponseCache(max_entries=2)
+
+    class _Req:
+        headers = {}
+
+    for i in range(3):
+        cache.respond(_Req(), i, 0, lambda: {"v": np.float64(1.5), "a": np.arange(2)})
+    assert cache.stats()["entries"] == 2
+    assert json.loads(response_cache.dumps({"a": np.arange(2)})) == {"a": [0, 1]}
+
+
+def test_batch_returns_results_in_order_with_per_item_status():
+    class _Flow:
+        def version(self, coin):
+            return 7
+
+        def get_order_flow(self, coin, windows):
+            return {"coin": coin, "windows": {"5m": {"cvd": 1.0}}, "windows_req": windows}
+
+    whales = _FakeWhales()
+    client = _client(whale_tracker=whales, order_flow=_Flow())
+    r = client.post("/v1/batch", json={"requests": [
+        {"kind": "whales", "coin": "btc", "params": {"top_n": 5}},
+        {"kind": "orderflow", "coin": "eth", "params": {"windows": "60,300"}},
+        {"kind": "heatmap", "coin": "BTC"},     # engine missing → 503
+        {"kind": "orderflow", "coin": "eth", "params": {"windows": "x"}},
+        {"kind": "nope"},
+        {"kind": "whales"},                     # missing coin
+        {"kind": "whales", "coin": "btc", "params": [1]},
+        {"kind": "whales", "coin": "btc", "params": "x"},
+        {"kind": "whales", "coin": 5},
+        {"kind": "hlp_positions", "coin": ["BTC"]},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 10
+    res = body["results"]
+    assert [x["status"] for x in res] == [200, 200, 503, 400, 400, 400, 400, 400, 400, 400]
+    assert res[6]["data"] == {"error": "params must be an object"}
+    assert res[8]["data"] == {"error": "coin must be a string"}
+    assert res[0]["data"]["coin"] == "BTC" and res[0]["kind"] == "whales"
+    assert res[1]["data"]["windows_req"] == [60, 300]
+    # Batch reads share the per-route cache
+    assert client.get("/v1/whales/BTC?top_n=5").json() == res[0]["data"]
+    assert whales.calls == 1
+
+
+def test_batch_parses_flags_like_query_params():
+    class _SmartMoney:
+        version = 0
+
+        def get_rankings(self, top_n, **kw):
+            return {"exclude_bots": kw["exclude_bots"]}
+
+    client = _client(smart_money=_SmartMoney())
+    values = [False, "false", "0", 0, "off", True, "true", "1", 1, "Yes", "maybe", 2, None]
+    r = client.post("/v1/batch", json={"requests": [
+        {"kind": "smart_money", "params": {"exclude_bots": v}} for v in values
+    ]})
+    res = r.json()["results"]
+    assert [x["status"] for x in res] == [200] * 10 + [400] * 3
+    assert [x["data"]["exclude_bots"] for x in res[:10]] == [False] * 5 + [True] * 5
+    get = client.get("/v1/smart-money?exclude_bots=false").json()
+    assert get == {"exclude_bots": False}
+
+
+def test_batch_rejects_bad_envelope():
+    client = _client()
+    assert client.post("/v1/batch", json={"requests": "x"}).status_code == 400
+    too_many = [{"kind": "hlp_positions"}] * 100
+    assert client.post("/v1/batch", json={"requests": too_many}).status_code == 400
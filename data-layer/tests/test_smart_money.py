@@ -0,0 +1,126 @@
+"""Tests for the rolling 24h PnL rollup and precomputed smart money rankings."""
+
+import pytest
+
+from hynous_data.core.db import Database
+from hynous_data.engine.smart_money import WINDOW_S, SmartMoneyEngine
+
+T0 = 1_700_000_000.0
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(tmp_path / "test.db")
+    db.connect()
+    db.init_schema()
+    yield db
+    db.close()
+
+
+def _profile(db, address, win_rate, style="swing", is_bot=0, trade_count=20, hold=4.0):
+    db.conn.execute(
+        "INSERT INTO wallet_profiles (address, computed_at, win_rate, trade_count, "
+        "profit_factor, avg_hold_hours, style, is_bot) VALUES (?, ?, ?, ?, 2.0, ?, ?, ?)",
+        (address, T0, win_rate, trade_count, hold, style, is_bot),
+    )
+    db.conn.commit()
+
+
+def _reference_pnl(db, now):
+    """Full-scan 24h PnL per address (the query rankings used to run per request)."""
+    rows = db.conn.execute(
+        "SELECT address, snapshot_at, equity FROM pnl_snapshots "
+        "WHERE snapshot_at >= ? ORDER BY snapshot_at",
+        (now - WINDOW_S,),
+    ).fetchall()
+    series: dict[str, list[float]] = {}
+    for r in rows:
+        series.setdefault(r["address"], []).append(r["equity"])
+    return {a: eq[-1] - eq[0] for a, eq in series.items() if len(eq) >= 2}
+
+
+def test_rollup_tracks_first_and_last_equity(db):
+    sm = SmartMoneyEngine(db)
+    sm.batch_snapshot_pnl([("0xa", 100.0, 0), ("0xb", 200.0, 0)], now=T0)
+    sm.batch_snapshot_pnl([("0xa", 150.0, 0), ("0xb", 180.0, 0)], now=T0 + 60)
+    sm.batch_snapshot_pnl([("0xa", 175.0, 0)], now=T0 + 120)
+    rows = {r["address"]: dict(r) for r in db.conn.execute("SELECT * FROM pnl_rollup")}
+    assert rows["0xa"]["first_equity"] == 100.0 and rows["0xa"]["last_equity"] == 175.0
+    assert rows["0xa"]["pnl"] == 75.0
+    assert rows["0xb"]["pnl"] == -20.0
+
+
+def test_expire_window_matches_full_scan(db):
+    sm = SmartMoneyEngine(db)
+    # 0xa snapshots every 6h for 36h; 0xb goes quiet after the first 6h
+    for i in range(7):
+        now = T0 + i * 6 * 3600
+        snaps = [("0xa", 100.0 + i * 10, 0)]
+        if i < 2:
+            snaps.append(("0xb", 500.0 - i * 50, 0))
+        sm.batch_snapshot_pnl(snaps, now=now)
+    now = T0 + 36 * 3600
+    sm.expire_window(now)
+
+    rollup = {r["address"]: r["pnl"] for r in db.conn.execute("SELECT address, pnl FROM pnl_rollup")}
+    assert "0xb" not in rollup  # last snapshot left the window
+    assert rollup == _reference_pnl(db, now)
+    # Matches a from-scratch rebuild too
+    sm.rebuild_rollup(now)
+    rebuilt = {r["address"]: r["pnl"] for r in db.conn.execute("SELECT address, pnl FROM pnl_rollup")}
+    assert rebuilt == rollup
+
+
+def test_rankings_top_k_filters_and_pagination(db):
+    sm = SmartMoneyEngine(db, top_k=4)
+    addrs = [f"0x{i}" for i in range(6)]
+    sm.batch_snapshot_pnl([(a, 100_000.0, 0) for a in addrs], now=T0)
+    sm.batch_snapshot_pnl([(a, 100_000.0 + i * 1000, 0) for i, a in enumerate(addrs)], now=T0 + 60)
+    _profile(db, "0x5", 0.7, style="scalper")
+    _profile(db, "0x4", 0.4)
+    _profile(db, "0x3", 0.8, is_bot=1, style="bot")
+    sm.rebuild_rankings()
+
+    data = sm.get_rankings(10)
+    assert [r["address"] for r in data["rankings"]] == ["0x5", "0x4", "0x3", "0x2"]
+    top = data["rankings"][0]
+    assert top["pnl_24h"] == 5000 and top["pnl_pct_24h"] == 5.0 and top["style"] == "scalper"
+
+    page = sm.get_rankings(2, offset=2)
+    assert [r["address"] for r in page["rankings"]] == ["0x3", "0x2"]
+    assert page["offset"] == 2
+
+    assert [r["address"] for r in sm.get_rankings(10, min_win_rate=0.5)["rankings"]] == ["0x5", "0x3"]
+    assert [r["address"] for r in sm.get_rankings(10, min_win_rate=0.5, exclude_bots=True)["rankings"]] == ["0x5"]
+    assert [r["address"] for r in sm.get_rankings(10, styles={"swing", "bot"})["rankings"]] == ["0x4", "0x3"]
+    assert [r["address"] for r in sm.get_rankings(10, max_hold_hours=5)["rankings"]] == ["0x5", "0x4", "0x3"]
+
+
+def test_single_snapshot_addresses_are_not_ranked(db):
+    sm = SmartMoneyEngine(db)
+    sm.batch_snapshot_pnl([("0xa", 100.0, 0)], now=T0)
+    sm.rebuild_rankings()
+    assert sm.get_rankings(10)["rankings"] == []
+
+
+def test_version_bumps_only_after_rankings_commit(db):
+    db.start_writer()
+    seen = []
+
+    class Engine(SmartMoneyEngine):
+        @property
+        def total_rebuilds(self):
+            return self._rebuilds
+
+        @total_rebuilds.setter
+        def total_rebuilds(self, n):
+            self._rebuilds = n
+            if n:  # what another connection sees when the version moves
+                seen.append(db.read_conn.execute(
+                    "SELECT COUNT(*) FROM smart_money_rankings").fetchone()[0])
+
+    sm = Engine(db)
+    sm.batch_snapshot_pnl([("0xa", 100.0, 0)], now=T0)
+    sm.batch_snapshot_pnl([("0xa", 150.0, 0)], now=T0 + 60)
+    sm.rebuild_rankings()
+    assert sm.version == 1 and seen == [1]
@@ -6,11 +6,13 @@ Run with: python3 -m pytest tests/test_smoke.py -v -s
 
 import time
 import threading
+import numpy as np
 import pytest
 
 from hynous_data.core.config import load_config
 from hynous_data.core.db import Database
 from hynous_data.core.rate_limiter import RateLimiter
+from hynous_data.core.trade_buffer import SIDE_BUY, SIDE_SELL
 from hynous_data.collectors.trade_stream import TradeStream, clear_all_buffers, get_all_buffers
 from hynous_data.collectors.position_poller import PositionPoller
 from hynous_data.collectors.hlp_tracker import HlpTracker
@@ -62,13 +64,14 @@ class TestTradeStreamLive:
             eth_buf = buffers.get("ETH", [])
             assert len(btc_buf) > 0 or len(eth_buf) > 0, "No BTC or ETH trades"
 
-            # Validate trade data quality
+            # Validate trade data quality over every buffered trade
             for coin, buf in list(buffers.items())[:5]:
-                for trade in list(buf)[:3]:
-                    assert trade["px"] > 0, f"Invalid price in {coin} trade"
-                    assert trade["sz"] > 0, f"Invalid size in {coin} trade"
-                    assert trade["side"] in ("B", "A"), f"Invalid side in {coin} trade"
-                    assert trade["time"] > 0, f"Invalid time in {coin} trade"
+                w = buf.snapshot()
+                assert (w.px > 0).all(), f"Invalid price in {coin} trades"
+                assert (w.sz > 0).all(), f"Invalid size in {coin} trades"
+                assert np.isin(w.side, (SIDE_BUY, SIDE_SELL)).all(), f"Invalid side in {coin} trades"
+                assert (w.time > 0).all(), f"Invalid time in {coin} trades"
+                assert (np.diff(w.time) >= 0).all(), f"Unsorted times in {coin} trades"
 
             print(f"\n  Trades received: {ts.total_trades}")
             print(f"  Invalid trades: {ts.total_invalid_trades}")
@@ -104,6 +107,7 @@ class TestTradeStreamLive:
 
         assert ts.total_trades == 0, "Corrupt trades should be rejected"
         assert ts.total_invalid_trades == 5, f"Expected 5 invalid, got {ts.total_invalid_trades}"
+        assert len(get_all_buffers().get("BTC", [])) == 0, "Corrupt trades reached the buffer"
 
 
 class TestHlpTrackerLive:
@@ -165,11 +169,12 @@ class TestOrderFlowLive:
     def test_cvd_with_live_data(self, db):
         """Get live trades, then compute CVD."""
         clear_all_buffers()
+        engine = OrderFlowEngine(windows=[60, 300])
         ts = TradeStream(db, base_url=BASE_URL)
+        ts.set_order_flow(engine)
         ts.start()
         time.sleep(10)  # Collect some trades
 
-        engine = OrderFlowEngine(windows=[60, 300])
         result = engine.get_order_flow("BTC")
 
         print(f"\n  BTC order flow:")
@@ -202,7 +207,7 @@ class TestAPILive:
             "rate_limiter": rate_limiter,
             "start_time": time.time(),
             "order_flow": OrderFlowEngine(),
-            "liq_heatmap": LiqHeatmapEngine(db, cfg.heatmap, base_url=BASE_URL),
+            "liq_heatmap": LiqHeatmapEngine(db, cfg.heatmap),
             "whale_tracker": WhaleTracker(db),
             "smart_money": smart,
             "hlp_tracker": hlp,
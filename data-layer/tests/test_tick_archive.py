@@ -0,0 +1,93 @@
+"""Tests for the tick snapshot archiver (hot SQLite → npz day segments)."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from hynous_data.engine.tick_archive import TickArchiver, segment_path
+from hynous_data.engine.tick_collector import _COLS, _INSERT_SQL, TICK_FEATURE_NAMES
+
+DAY = 86400
+T0 = 1_760_000_000 - 1_760_000_000 % DAY  # a UTC midnight
+
+
+@pytest.fixture
+def sat_db(tmp_path):
+    path = tmp_path / "satellite.db"
+    conn = sqlite3.connect(path)
+    cols = ["timestamp REAL NOT NULL", "coin TEXT NOT NULL"]
+    cols += [f"{f} REAL" for f in TICK_FEATURE_NAMES]
+    cols += ["schema_version INTEGER NOT NULL DEFAULT 1"]
+    conn.execute(
+        f"CREATE TABLE tick_snapshots ({', '.join(cols)}, PRIMARY KEY (coin, timestamp))"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _insert(path, timestamps, coin="BTC", version=2, null_feature=None):
+    rows = []
+    for ts in timestamps:
+        feats = [float(ts % 1000)] * len(TICK_FEATURE_NAMES)
+        if null_feature:
+            feats[TICK_FEATURE_NAMES.index(null_feature)] = None
+        rows.append((ts, coin, *feats, version))
+    assert len(rows[0]) == len(_COLS)
+    conn = sqlite3.connect(path)
+    conn.executemany(_INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+
+
+def _hot_count(path):
+    conn = sqlite3.connect(path)
+    n = conn.execute("SELECT COUNT(*) FROM tick_snapshots").fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_compacts_closed_days_outside_hot_window(sat_db, tmp_path):
+    archiver = TickArchiver(sat_db, archive_dir=tmp_path / "arc", hot_hours=24)
+    _insert(sat_db, [T0 + i * 10 for i in range(100)])            # day 0
+    _insert(sat_db, [T0 + DAY + i * 10 for i in range(50)])       # day 1
+    _insert(sat_db, [T0 + 2 * DAY + i * 10 for i in range(20)])   # day 2 (hot)
+
+    now = T0 + 2 * DAY + 12 * 3600  # hot window reaches back into day 1
+    assert archiver.compact(now) == 100
+    assert _hot_count(sat_db) == 70
+
+    seg = segment_path(tmp_path / "arc", "BTC", 2, T0)
+    with np.load(seg) as z:
+        assert set(z.files) == {"timestamp", *TICK_FEATURE_NAMES}
+        assert len(z["timestamp"]) == 100
+        assert np.all(np.diff(z["timestamp"]) > 0)
+        assert z["mid_price"][3] == (T0 + 30) % 1000
+
+
+def test_recompaction_merges_and_dedups(sat_db, tmp_path):
+    archiver = TickArchiver(sat_db, archive_dir=tmp_path / "arc", hot_hours=1)
+    now = T0 + 2 * DAY
+    _insert(sat_db, [T0 + i for i in range(10)])
+    archiver.compact(now)
+    # Late rows for an already-archived day (one duplicate timestamp)
+    _insert(sat_db, [T0 + 9, T0 + 500], null_feature="spread_pct")
+    archiver.compact(now)
+
+    with np.load(segment_path(tmp_path / "arc", "BTC", 2, T0)) as z:
+        assert z["timestamp"].tolist() == [T0 + i for i in range(10)] + [T0 + 500]
+        assert np.isnan(z["spread_pct"][-1])
+        assert not np.isnan(z["spread_pct"][9])  # archived row wins on conflict
+    assert _hot_count(sat_db) == 0
+
+
+def test_prune_removes_expired_segments_and_rows(sat_db, tmp_path):
+    archiver = TickArchiver(sat_db, archive_dir=tmp_path / "arc", hot_hours=1, retention_days=30)
+    _insert(sat_db, [T0 + 1, T0 + 40 * DAY + 1])
+    archiver.compact(T0 + 42 * DAY)
+    assert archiver.stats()["segments"] == 2
+
+    assert archiver.prune(T0 + 45 * DAY) == 1
+    assert not segment_path(tmp_path / "arc", "BTC", 2, T0).exists()
+    assert segment_path(tmp_path / "arc", "BTC", 2, T0 + 40 * DAY).exists()
@@ -0,0 +1,143 @@
+"""Tests for the rolling per-second trade-flow accumulators."""
+
+import random
+
+import numpy as np
+import pytest
+
+from hynous_data.collectors.trade_stream import clear_all_buffers, get_trade_buffer
+from hynous_data.engine.tick_flow import LARGE_TRADE_USD, TickFlow
+
+NOW = 1_700_000_000.4
+
+
+@pytest.fixture(autouse=True)
+def _fresh_buffers():
+    clear_all_buffers()
+    yield
+    clear_all_buffers()
+
+
+def _feed(flow, coin, t_ms, px, sz, is_buy):
+    """What TradeStream._on_trade does: buffer the trade, then bucket it."""
+    get_trade_buffer(coin).append(t_ms, px, sz, "B" if is_buy else "A")
+    flow.record_trade(coin, t_ms, px, sz, is_buy)
+
+
+def _trades(seed, n=2000, span_s=90):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        t_ms = int((NOW - rng.uniform(0, span_s)) * 1000)
+        px = 100 + rng.uniform(-1, 1)
+        sz = rng.choice([0.5, 5, 50, 200])
+        out.append((t_ms, px, sz, rng.random() < 0.55))
+    return sorted(out)
+
+
+def _naive(trades, now):
+    """The pre-TickFlow per-trade scan: exact millisecond window edges."""
+    now_ms = int(now * 1000)
+    feats = {}
+    def window(w):
+        return [t for t in trades if t[0] > now_ms - w * 1000]
+    for w in (10, 30, 60):
+        tw = window(w)
+        buy = sum(px * sz for _, px, sz, b in tw if b)
+        sell = sum(px * sz for _, px, sz, b in tw if not b)
+        feats[f"flow_imbalance_{w}s"] = buy / (buy + sell) if buy + sell else 0.5
+        if w in (10, 30):
+            feats[f"flow_intensity_{w}s"] = len(tw) / w
+            feats[f"trade_volume_{w}s_usd"] = buy + sell
+    t60 = window(60)
+    lb = sum(px * sz for _, px, sz, b in t60 if b and px * sz >= LARGE_TRADE_USD)
+    ls = sum(px * sz for _, px, sz, b in t60 if not b and px * sz >= LARGE_TRADE_USD)
+    feats["large_trade_imbalance"] = lb / (lb + ls) if lb + ls else 0.5
+    feats["max_trade_usd_60s"] = max((px * sz for _, px, sz, _ in t60), default=0.0)
+    feats["trade_count_60s"] = len(t60)
+    feats["trade_count_10s"] = len(window(10))
+    buys = [(px, sz) for _, px, sz, b in t60 if b]
+    feats["buy_vwap"] = sum(p * s for p, s in buys) / sum(s for _, s in buys)
+    return feats
+
+
+def test_matches_naive_window_scan_for_every_coin():
+    coins = ["BTC", "ETH", "SOL"]
+    flow = TickFlow(coins)
+    trades = {c: _trades(i) for i, c in enumerate(coins)}
+    for c in coins:
+        for t_ms, px, sz, is_buy in trades[c]:
+            _feed(flow, c, t_ms, px, sz, is_buy)
+    for now in (NOW, NOW + 0.6, NOW + 2.999):
+        out = flow.compute(now)
+        for i, c in enumerate(coins):
+            for name, expected in _naive(trades[c], now).items():
+                assert out[name][i] == pytest.approx(expected), (c, name, now)
+
+
+def test_window_edges_are_exact_to_the_millisecond():
+    flow = TickFlow(["BTC"])
+    now_ms = int(NOW * 1000)
+    # Same second, either side of the 10s edge
+    _feed(flow, "BTC", now_ms - 10_000, 100.0, 1.0, True)
+    _feed(flow, "BTC", now_ms - 9_999, 100.0, 2.0, False)
+    out = flow.compute(NOW)
+    assert out["trade_count_10s"][0] == 1
+    assert out["trade_volume_10s_usd"][0] == 200.0
+    assert out["flow_imbalance_10s"][0] == 0.0
+    assert out["trade_count_60s"][0] == 2
+    # One millisecond later the second trade leaves the window too
+    assert flow.compute(NOW + 0.001)["trade_count_10s"][0] == 0
+
+
+def test_buckets_expire_on_compute_tick():
+    flow = TickFlow(["BTC"])
+    flow.record_trade("BTC", int(NOW * 1000), 100.0, 200.0, True)
+    assert flow.compute(NOW)["trade_count_10s"][0] == 1
+    assert flow.compute(NOW + 10)["trade_count_10s"][0] == 0
+    assert flow.compute(NOW + 59)["trade_count_60s"][0] == 1
+    later = flow.compute(NOW + 60)
+    assert later["trade_count_60s"][0] == 0
+    assert later["max_trade_usd_60s"][0] == 0
+    assert later["flow_imbalance_60s"][0] == 0.5
+
+
+def test_slot_reuse_and_late_trades():
+    flow = TickFlow(["BTC"])
+    t0 = int(NOW) * 1000
+    flow.record_trade("BTC", t0, 100.0, 1.0, True)
+    # Same ring slot one lap later resets the bucket
+    flow.record_trade("BTC", t0 + 64_000, 100.0, 2.0, False)
+    out = flow.compute(NOW + 64)
+    assert out["trade_count_10s"][0] == 1
+    assert out["flow_imbalance_10s"][0] == 0.0
+    # A trade older than the slot's current second is dropped
+    flow.record_trade("BTC", t0 + 1, 100.0, 1.0, True)
+    assert flow.stats()["late_dropped"] == 1
+    # Unknown coins are ignored
+    flow.record_trade("DOGE", t0, 1.0, 1.0, True)
+    assert flow.stats()["trades"] == 2
+
+
+def test_empty_coins_get_neutral_defaults():
+    out = TickFlow(["BTC", "ETH"]).compute(NOW)
+    assert np.all(out["flow_imbalance_30s"] == 0.5)
+    assert np.all(out["large_trade_imbalance"] == 0.5)
+    assert np.all(out["buy_vwap"] == 0)
+
+
+def test_tick_collector_row_uses_flow(tmp_path):
+    from hynous_data.collectors.l2_subscriber import L2Subscriber
+    from hynous_data.engine.tick_collector import _COLS, TickCollector
+
+    sub = L2Subscriber(coins=["BTC"])
+    levels = [[{"px": "99", "sz": "1"}], [{"px": "101", "sz": "1"}]]
+    sub._handle_message({"channel": "l2Book", "data": {"coin": "BTC", "levels": levels}})
+    tc = TickCollector(sub, ["BTC"], tmp_path / "satellite.db")
+    now = sub.get_l2("BTC").updated_at
+    tc.flow.record_trade("BTC", int(now * 1000), 102.0, 1.0, True)
+    row = dict(zip(_COLS, tc._compute("BTC", now)))
+    assert row["trade_count_10s"] == 1
+    assert row["flow_imbalance_10s"] == 1.0
+    assert row["buy_vwap_deviation"] == pytest.approx(0.02)
+    assert row["sell_vwap_deviation"] == 0.0
@@ -0,0 +1,96 @@
+"""Tests for the columnar trade ring buffer."""
+
+import numpy as np
+
+from hynous_data.core.trade_buffer import TradeBuffer
+
+
+def test_empty_buffer():
+    buf = TradeBuffer(capacity=8)
+    assert len(buf) == 0
+    assert not buf
+    w = buf.window(0)
+    assert len(w) == 0
+    assert buf.latest_time == 0
+
+
+def test_append_and_window():
+    buf = TradeBuffer(capacity=8)
+    for i in range(5):
+        buf.append(1000 + i * 100, 100.0 + i, 1.0, "B" if i % 2 == 0 else "A")
+
+    w = buf.window(1200)
+    assert w.time.tolist() == [1200, 1300, 1400]
+    assert w.px.tolist() == [102.0, 103.0, 104.0]
+    assert w.side.tolist() == [1, -1, 1]
+    assert buf.latest_time == 1400
+
+
+def test_window_until():
+    buf = TradeBuffer(capacity=8)
+    for i in range(5):
+        buf.append(1000 + i * 100, 100.0, 1.0, "B")
+    w = buf.window(1100, until_ms=1300)
+    assert w.time.tolist() == [1100, 1200, 1300]
+
+
+def test_wraparound_keeps_latest_contiguous():
+    buf = TradeBuffer(capacity=4)
+    for i in range(10):
+        buf.append(i, float(i), 1.0, "B")
+
+    assert len(buf) == 4
+    w = buf.window(0)
+    assert w.time.tolist() == [6, 7, 8, 9]
+
+
+def test_full_window_survives_next_append():
+    buf = TradeBuffer(capacity=4)
+    for i in range(4):
+        buf.append(i, float(i), 1.0, "B")
+    w = buf.window(0)  # spans the whole ring
+    buf.append(4, 4.0, 1.0, "A")
+    assert w.px.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert not np.shares_memory(w.px, buf._px)
+
+
+def test_out_of_order_time_clamped():
+    buf = TradeBuffer(capacity=8)
+    buf.append(2000, 1.0, 1.0, "B")
+    buf.append(1500, 1.0, 1.0, "A")  # late arrival
+    w = buf.window(0)
+    assert w.time.tolist() == [2000, 2000]
+
+
+def test_notional_and_cvd():
+    buf = TradeBuffer(capacity=8)
+    buf.append(1, 100.0, 2.0, "B")
+    buf.append(2, 100.0, 1.0, "A")
+    w = buf.window(0)
+    assert w.notional.tolist() == [200.0, 100.0]
+    assert float(np.dot(w.notional, w.side)) == 100.0
+
+
+def test_snapshot_is_detached():
+    buf = TradeBuffer(capacity=2)
+    buf.append(1, 1.0, 1.0, "B")
+    snap = buf.snapshot()
+    buf.append(2, 2.0, 1.0, "B")
+    buf.append(3, 3.0, 1.0, "B")
+    assert snap.px.tolist() == [1.0]
+
+
+def test_iter_yields_dicts():
+    buf = TradeBuffer(capacity=4)
+    buf.append(1, 100.0, 0.5, "A")
+    trades = list(buf)
+    assert trades == [{"side": "A", "px": 100.0, "sz": 0.5, "time": 1}]
+
+
+def test_clear():
+    buf = TradeBuffer(capacity=4)
+    buf.append(5, 1.0, 1.0, "B")
+    buf.clear()
+    assert len(buf) == 0
+    buf.append(1, 1.0, 1.0, "B")
+    assert buf.window(0).time.tolist() == [1]
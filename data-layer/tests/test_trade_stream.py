@@ -0,0 +1,110 @@
+"""Tests for the sharded trade subscription manager."""
+
+import time
+
+import pytest
+
+from hynous_data.collectors import trade_stream
+from hynous_data.collectors.trade_stream import TradeStream, assign_shards, top_perps
+from hynous_data.core.db import Database
+
+
+class _FakeInfo:
+    """Stands in for hyperliquid Info: records subscriptions, never connects."""
+
+    instances: list["_FakeInfo"] = []
+
+    def __init__(self, base_url=None, skip_ws=False, timeout=None):
+        self.subs: dict[str, object] = {}
+        self.disconnected = False
+        _FakeInfo.instances.append(self)
+
+    def subscribe(self, sub, callback):
+        self.subs[sub["coin"]] = callback
+
+    def disconnect_websocket(self):
+        self.disconnected = True
+
+    def meta_and_asset_ctxs(self):
+        universe = [{"name": "BTC"}, {"name": "DOGE"}, {"name": "OLD", "isDelisted": True}, {"name": "ETH"}]
+        ctxs = [{"dayNtlVlm": "900"}, {"dayNtlVlm": "50"}, {"dayNtlVlm": "5000"}, {"dayNtlVlm": "400"}]
+        return {"universe": universe}, ctxs
+
+
+def _trades(coin, n=1, px=100.0, sz=1.0):
+    t = int(time.time() * 1000)
+    return {"channel": "trades", "data": [
+        {"coin": coin, "px": str(px), "sz": str(sz), "side": "B", "time": t} for _ in range(n)
+    ]}
+
+
+def _wait(cond, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def stream(tmp_path, monkeypatch):
+    _FakeInfo.instances = []
+    monkeypatch.setattr(trade_stream, "Info", _FakeInfo)
+    monkeypatch.setattr(trade_stream, "WS_SETTLE_DELAY", 0)
+    monkeypatch.setattr(trade_stream, "SHARD_STAGGER_S", 0)
+    monkeypatch.setattr(trade_stream, "WS_RECONNECT_DELAY", 0)
+    db = Database(tmp_path / "t.db")
+    db.connect()
+    db.init_schema()
+    ts = TradeStream(db, coins=["BTC", "ETH", "SOL", "HYPE", "DOGE"], shards=2)
+    yield ts
+    ts.stop()
+    db.close()
+
+
+def test_assign_shards_deals_round_robin():
+    assert assign_shards(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+    assert assign_shards(["a", "b"], 8) == [["a"], ["b"]]
+    assert assign_shards([], 4) == []
+
+
+def test_top_perps_ranks_by_volume_and_skips_delisted():
+    assert top_perps(_FakeInfo(), 2) == ["BTC", "ETH"]
+
+
+def test_shards_subscribe_disjoint_coins_and_count_trades(stream):
+    stream.start()
+    assert _wait(lambda: len(stream._shards) == 2 and all(s.connected for s in stream._shards))
+    subscribed = [set(info.subs) for info in _FakeInfo.instances]
+    assert sorted(c for s in subscribed for c in s) == ["BTC", "DOGE", "ETH", "HYPE", "SOL"]
+    assert not subscribed[0] & subscribed[1]
+
+    shard = next(s for s in stream._shards if "ETH" in s.coins)
+    shard.info.subs["ETH"](_trades("ETH", n=3))
+    assert shard.trades == 3 and stream.total_trades == 3
+    assert len(trade_stream.get_trade_buffer("ETH")) == 3
+    stats = stream.stats()
+    assert stats["subscribed_coins"] == 5 and stats["shards_healthy"] == 2
+
+
+def test_dead_shard_reconnects_alone(stream, monkeypatch):
+    stream.start()
+    assert _wait(lambda: len(stream._shards) == 2 and all(s.connected for s in stream._shards))
+    dead, alive = stream._shards
+    old_info = dead.info
+    monkeypatch.setattr(trade_stream, "WS_DEAD_THRESHOLD", 0.5)
+    # Keep one shard fed; the other goes silent and must reconnect on its own
+    deadline = time.time() + 3
+    while dead.reconnect_count == 0 and time.time() < deadline:
+        alive.last_trade_time = time.time()
+        time.sleep(0.05)
+    assert dead.reconnect_count >= 1 and old_info.disconnected
+    assert alive.reconnect_count == 0
+    assert _wait(lambda: dead.connected and dead.info is not old_info)
+
+
+def test_top_n_widens_configured_coins(monkeypatch):
+    monkeypatch.setattr(trade_stream, "Info", _FakeInfo)
+    ts = TradeStream(None, coins=["SOL", "BTC"], top_n=2)
+    assert ts._resolve_coins() == ["BTC", "ETH", "SOL"]
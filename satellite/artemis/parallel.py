@@ -0,0 +1,453 @@
+"""Parallel, resumable multi-day Artemis backfill.
+
+process_date_range() runs this when ArtemisConfig.workers > 1. Each day goes
+through three stages, recorded in a JSON manifest as it completes:
+
+  ingested       a pool worker downloaded the day and wrote it (perp
+                 balances, node fills) into its own staging SQLite file
+  merged         the main process copied the staging file into the
+                 data-layer DB
+  reconstructed  a pool worker rebuilt the day's snapshots and labels into a
+                 staging satellite DB, and the main process merged them
+
+Workers never write to the shared databases, so the main process is the
+only writer and SQLite never sees concurrent writers. A day's
+reconstruction reads history from earlier days and labels from the next
+day's candles. It is dispatched in date order, once the day and the day
+after it are merged. Its snapshots then match the sequential pipeline's,
+and so do its labels, except that a day's last 4h of snapshots are
+labelled over their full window (the sequential pipeline labels them
+before the next day's candles exist).
+
+A rerun with the same manifest skips finished stages: merged days go
+straight to reconstruction, and staging files left by an interrupted run
+are merged without downloading again. Merges are idempotent (INSERT OR
+IGNORE keyed on the tables' primary keys; snapshots are unique per coin and
+timestamp), so a crash between a merge and its manifest update is safe.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from satellite.artemis.pipeline import (
+    CANDLES_DDL,
+    TRADE_FLOW_DDL,
+    ArtemisConfig,
+    DayResult,
+    ingest_day,
+)
+
+log = logging.getLogger(__name__)
+
+STAGE_INGESTED = "ingested"
+STAGE_MERGED = "merged"
+STAGE_RECONSTRUCTED = "reconstructed"
+
+# Data-layer tables a day's ingest writes, as staging creates them
+STAGING_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS oi_history (
+    coin TEXT NOT NULL, recorded_at REAL NOT NULL, oi_usd REAL NOT NULL,
+    PRIMARY KEY (coin, recorded_at)
+);
+CREATE TABLE IF NOT EXISTS volume_history (
+    coin TEXT NOT NULL, recorded_at REAL NOT NULL, volume_usd REAL NOT NULL,
+    PRIMARY KEY (coin, recorded_at)
+);
+CREATE TABLE IF NOT EXISTS liquidation_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    coin TEXT NOT NULL, occurred_at REAL NOT NULL, side TEXT NOT NULL,
+    size_usd REAL NOT NULL, price REAL, address TEXT
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT PRIMARY KEY, first_seen REAL, last_seen REAL,
+    trade_count INTEGER DEFAULT 0, last_polled REAL, tier INTEGER DEFAULT 3,
+    total_size_usd REAL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS wallet_profiles (
+    address TEXT PRIMARY KEY, computed_at REAL, win_rate REAL,
+    trade_count INTEGER, profit_factor REAL, avg_hold_hours REAL,
+    avg_pnl_pct REAL, max_drawdown REAL, style TEXT, is_bot INTEGER,
+    equity REAL
+);
+{TRADE_FLOW_DDL};
+{CANDLES_DDL};
+"""
+
+# (table, columns, conflict clause) copied from staging into the data-layer DB.
+# liquidation_events is handled separately (replace-by-day, no natural key).
+_MERGED_TABLES = (
+    ("oi_history", "coin, recorded_at, oi_usd", "OR IGNORE"),
+    ("volume_history", "coin, recorded_at, volume_usd", "OR IGNORE"),
+    ("trade_flow_history", "coin, recorded_at, buy_volume_usd, sell_volume_usd", "OR IGNORE"),
+    ("candles_history", "coin, interval, open_time, open, high, low, close, volume", "OR IGNORE"),
+    ("addresses", "address, first_seen, last_seen, trade_count, last_polled, tier, "
+     "total_size_usd", "OR IGNORE"),
+    ("wallet_profiles", "address, computed_at, win_rate, trade_count, profit_factor, "
+     "avg_hold_hours, avg_pnl_pct, max_drawdown, style, is_bot, equity", "OR REPLACE"),
+)
+_LIQ_COLUMNS = "coin, occurred_at, side, size_usd, price, address"
+
+_RESULT_FIELDS = (
+    "addresses_discovered", "liquidation_events", "trades_processed",
+    "profiles_computed", "snapshots_reconstructed", "labels_computed",
+    "elapsed_seconds",
+)
+
+
+# ─── Manifest ───────────────────────────────────────────────────────────────
+
+class Manifest:
+    """Per-day stage checkpoints, persisted as JSON after every update.
+
+    Layout: {"YYYY-MM-DD": {"stage": ..., <DayResult counters>...}}. Only
+    the main process writes it. Each save replaces the file atomically.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.days: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self.days = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                log.warning("Unreadable backfill manifest %s — starting fresh", self.path)
+
+    def stage(self, date_str: str) -> str | None:
+        return self.days.get(date_str, {}).get("stage")
+
+    def update(self, date_str: str, stage: str, **counters) -> None:
+        entry = self.days.setdefault(date_str, {})
+        entry["stage"] = stage
+        for name, value in counters.items():
+            if name == "elapsed_seconds":
+                value += entry.get(name, 0.0)
+            entry[name] = value
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.days, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+    def result(self, date_str: str) -> DayResult:
+        entry = self.days[date_str]
+        return DayResult(
+            date=date_str, **{f: entry.get(f, 0) for f in _RESULT_FIELDS},
+        )
+
+
+# ─── Worker side (runs in pool processes) ───────────────────────────────────
+
+class _SQLiteDB:
+    """The .conn/.write_lock pair the pipeline functions expect, for a path."""
+
+    def __init__(self, path: str | Path, read_only: bool = False, staging: bool = False):
+        if read_only:
+            uri = Path(path).resolve().as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, timeout=30)
+        else:
+            self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        if staging:
+            # Disposable: an interrupted worker's file is rebuilt from S3
+            self.conn.execute("PRAGMA journal_mode=OFF")
+            self.conn.execute("PRAGMA synchronous=OFF")
+        self.write_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _ingest_worker(
+    date_str: str, staging_path: str, config: ArtemisConfig, skip_profiling: bool,
+) -> dict:
+    """Download and process one day into a fresh staging DB."""
+    t0 = time.time()
+    Path(staging_path).unlink(missing_ok=True)
+    db = _SQLiteDB(staging_path, staging=True)
+    try:
+        db.conn.executescript(STAGING_SCHEMA)
+        addresses, trades, profiles, liqs = ingest_day(
+            date_str, db, config, skip_profiling=skip_profiling,
+        )
+        db.conn.commit()
+    finally:
+        db.close()
+    return {
+        "addresses_discovered": addresses,
+        "trades_processed": trades,
+        "profiles_computed": profiles,
+        "liquidation_events": liqs,
+        "elapsed_seconds": time.time() - t0,
+    }
+
+
+def _reconstruct_worker(
+    date_str: str, data_layer_path: str, staging_path: str, config: ArtemisConfig,
+) -> dict:
+    """Reconstruct one day from the merged data-layer DB into a staging store."""
+    from satellite.artemis.reconstruct import reconstruct_day
+    from satellite.store import SatelliteStore
+
+    t0 = time.time()
+    Path(staging_path).unlink(missing_ok=True)
+    data_layer_db = _SQLiteDB(data_layer_path, read_only=True)
+    store = SatelliteStore(staging_path)
+    store.connect()
+    try:
+        snapshots, labels = reconstruct_day(date_str, data_layer_db, store, config)
+    finally:
+        store.close()
+        data_layer_db.close()
+    return {
+        "snapshots_reconstructed": snapshots,
+        "labels_computed": labels,
+        "elapsed_seconds": time.time() - t0,
+    }
+
+
+def _init_worker(log_level: int) -> None:
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s [%(levelname)s] %(processName)s %(name)s: %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+
+def _executor(workers: int) -> Executor:
+    # spawn, not fork: the parent holds open SQLite connections, which must
+    # not be inherited by child processes
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(logging.getLogger().getEffectiveLevel(),),
+    )
+
+
+# ─── Merges (main process, single writer) ───────────────────────────────────
+
+def _attach(db: object, staging_path: Path):
+    """ATTACH a staging file to db's connection; caller holds write_lock."""
+    db.conn.commit()  # ATTACH cannot run inside a transaction
+    db.conn.execute("ATTACH DATABASE ? AS staging", (str(staging_path),))
+
+
+def _detach(db: object) -> None:
+    db.conn.commit()
+    db.conn.execute("DETACH DATABASE staging")
+
+
+def merge_ingest(data_layer_db: object, staging_path: Path, date_str: str) -> None:
+    """Copy one day's ingest staging DB into the data-layer DB (one transaction)."""
+    day_start = datetime.strptime(date_str, "%Y-%m-%d").replace(
+        tzinfo=timezone.utc,
+    ).timestamp()
+    conn = data_layer_db.conn
+    with data_layer_db.write_lock:
+        conn.execute(TRADE_FLOW_DDL)
+        conn.execute(CANDLES_DDL)
+        _attach(data_layer_db, staging_path)
+        try:
+            for table, cols, conflict in _MERGED_TABLES:
+                conn.execute(
+                    f"INSERT {conflict} INTO {table} ({cols}) "
+                    f"SELECT {cols} FROM staging.{table}",
+                )
+            # Same as _process_node_fills_parquet: a day with liquidations
+            # replaces whatever that day held before
+            if conn.execute("SELECT 1 FROM staging.liquidation_events LIMIT 1").fetchone():
+                conn.execute(
+                    "DELETE FROM liquidation_events "
+                    "WHERE occurred_at >= ? AND occurred_at < ?",
+                    (day_start, day_start + 86400),
+                )
+                conn.execute(
+                    f"INSERT INTO liquidation_events ({_LIQ_COLUMNS}) "
+                    f"SELECT {_LIQ_COLUMNS} FROM staging.liquidation_events ORDER BY id",
+                )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _detach(data_layer_db)
+
+
+def merge_reconstruct(satellite_store: object, staging_path: Path) -> None:
+    """Copy one day's staged snapshots, raw data and labels (one transaction).
+
+    Snapshots already present for a (coin, created_at) are kept, and the
+    staged rows hanging off them are dropped, so re-merging a day is a no-op.
+    """
+    conn = satellite_store.conn
+    with satellite_store.write_lock:
+        _attach(satellite_store, staging_path)
+        try:
+            for table, conflict in (
+                ("snapshots", "OR IGNORE"),
+                ("raw_snapshots", "OR REPLACE"),
+                ("snapshot_labels", "OR REPLACE"),
+            ):
+                cols = ", ".join(
+                    r[1] for r in conn.execute(f"PRAGMA staging.table_info({table})")
+                )
+                where = (
+                    "" if table == "snapshots" else
+                    " WHERE snapshot_id IN (SELECT snapshot_id FROM main.snapshots)"
+                )
+                conn.execute(
+                    f"INSERT {conflict} INTO main.{table} ({cols}) "
+                    f"SELECT {cols} FROM staging.{table}{where}",
+                )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _detach(satellite_store)
+
+
+# ─── Orchestrator ───────────────────────────────────────────────────────────
+
+def _db_file(db: object) -> str:
+    """Path of db's main database file (workers open their own connections)."""
+    for row in db.conn.execute("PRAGMA database_list").fetchall():
+        if row[1] == "main" and row[2]:
+            return row[2]
+    raise ValueError("parallel backfill needs a file-backed data-layer DB")
+
+
+def process_date_range_parallel(
+    start_date: date,
+    end_date: date,
+    data_layer_db: object,
+    satellite_store: object,
+    config: ArtemisConfig,
+    skip_profiling: bool = False,
+) -> list[DayResult]:
+    """Process a range of dates with config.workers processes, resumably.
+
+    Returns a DayResult for every day in the range that is fully
+    reconstructed, including days finished by earlier runs.
+    """
+    from satellite.artemis.reconstruct import _relabel_previous_day
+
+    days = [
+        (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
+        for i in range((end_date - start_date).days + 1)
+    ]
+    staging_dir = Path(config.temp_dir) / "staging"
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(config.manifest_path or Path(config.temp_dir) / "manifest.json")
+    data_layer_path = _db_file(data_layer_db)
+    coins = config.coins or ["BTC", "ETH", "SOL"]
+
+    def ingest_file(d: str) -> Path:
+        return staging_dir / f"{d}.ingest.db"
+
+    def satellite_file(d: str) -> Path:
+        return staging_dir / f"{d}.satellite.db"
+
+    staged: set[str] = set()   # ingested, waiting for earlier days to merge
+    failed: set[str] = set()
+    pending: dict[Future, tuple[str, str]] = {}
+    merged_upto = 0            # days[:merged_upto] are merged (or failed)
+
+    def merge_in_order() -> None:
+        # Date order, as the sequential pipeline writes: INSERT OR IGNORE
+        # keeps the earliest day's row (e.g. an address's first_seen)
+        nonlocal merged_upto
+        while merged_upto < len(days):
+            d = days[merged_upto]
+            if d in staged:
+                try:
+                    merge_ingest(data_layer_db, ingest_file(d), d)
+                except Exception:
+                    log.exception("Failed to merge day %s", d)
+                    failed.add(d)
+                else:
+                    manifest.update(d, STAGE_MERGED)
+                    ingest_file(d).unlink(missing_ok=True)
+            elif d not in failed and manifest.stage(d) not in (
+                STAGE_MERGED, STAGE_RECONSTRUCTED,
+            ):
+                return
+            merged_upto += 1
+
+    with _executor(config.workers) as pool:
+        for d in days:
+            stage = manifest.stage(d)
+            if stage == STAGE_INGESTED and ingest_file(d).exists():
+                staged.add(d)
+            elif stage not in (STAGE_MERGED, STAGE_RECONSTRUCTED):
+                fut = pool.submit(_ingest_worker, d, str(ingest_file(d)), config, skip_profiling)
+                pending[fut] = ("ingest", d)
+
+        next_day = 0
+        while True:
+            merge_in_order()
+            # Dispatch reconstructions in date order: day i needs days <= i+1
+            while next_day + 1 < merged_upto or (
+                merged_upto == len(days) and next_day < len(days)
+            ):
+                d = days[next_day]
+                next_day += 1
+                if d in failed or manifest.stage(d) == STAGE_RECONSTRUCTED:
+                    continue
+                fut = pool.submit(
+                    _reconstruct_worker, d, data_layer_path, str(satellite_file(d)), config,
+                )
+                pending[fut] = ("reconstruct", d)
+
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, d = pending.pop(fut)
+                try:
+                    counters = fut.result()
+                except Exception:
+                    log.exception("Failed to %s day %s", kind, d)
+                    if kind == "ingest":
+                        failed.add(d)
+                    continue
+
+                if kind == "ingest":
+                    manifest.update(d, STAGE_INGESTED, **counters)
+                    staged.add(d)
+                    continue
+
+                try:
+                    merge_reconstruct(satellite_store, satellite_file(d))
+                    # Late snapshots of a day reconstructed by an earlier run
+                    # (or before the range) get their 4h labels now
+                    prev_labels = _relabel_previous_day(
+                        datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=timezone.utc),
+                        coins, data_layer_db, satellite_store,
+                    )
+                except Exception:
+                    log.exception("Failed to merge snapshots for day %s", d)
+                    continue
+                counters["labels_computed"] += prev_labels
+                manifest.update(d, STAGE_RECONSTRUCTED, **counters)
+                satellite_file(d).unlink(missing_ok=True)
+                result = manifest.result(d)
+                log.info(
+                    "Day %s: %d addresses, %d trades, %d snapshots (%.0fs)",
+                    d, result.addresses_discovered, result.trades_processed,
+                    result.snapshots_reconstructed, result.elapsed_seconds,
+                )
+
+    results = [
+        manifest.result(d) for d in days if manifest.stage(d) == STAGE_RECONSTRUCTED
+    ]
+    log.info(
+        "Backfill complete: %d/%d days, %d total snapshots",
+        len(results), len(days), sum(r.snapshots_reconstructed for r in results),
+    )
+    return results
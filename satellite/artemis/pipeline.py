@@ -16,8 +16,11 @@ import shutil
 import time
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta, timezone
+from itertools import repeat
 from pathlib import Path
 
+import numpy as np
+
 log = logging.getLogger(__name__)
 
 
@@ -39,6 +42,11 @@ class ArtemisConfig:
     # Rate limiting for HL API (candle/funding fetch)
     api_delay_seconds: float = 0.5
 
+    # Parallel backfill (see parallel.py). workers > 1 runs days concurrently
+    # in a process pool; each worker needs temp disk for one day's download.
+    workers: int = 1
+    manifest_path: str = ""        # per-day stage checkpoints; "" = <temp_dir>/manifest.json
+
 
 @dataclass
 class DayResult:
@@ -62,8 +70,19 @@ def process_date_range(
     config: ArtemisConfig | None = None,
     skip_profiling: bool = False,
 ) -> list[DayResult]:
-    """Process a range of dates from Artemis S3."""
+    """Process a range of dates from Artemis S3.
+
+    Days run one after another unless config.workers > 1, in which case the
+    range goes through the parallel, resumable pipeline in parallel.py.
+    """
     cfg = config or ArtemisConfig()
+    if cfg.workers > 1:
+        from satellite.artemis.parallel import process_date_range_parallel
+        return process_date_range_parallel(
+            start_date, end_date, data_layer_db, satellite_store,
+            cfg, skip_profiling=skip_profiling,
+        )
+
     results = []
 
     current = start_date
@@ -107,6 +126,46 @@ def process_single_day(
 ) -> DayResult:
     """Process one day of Artemis data."""
     t0 = time.time()
+    addresses, trades, profiles, liq_count = ingest_day(
+        date_str, data_layer_db, config, skip_profiling=skip_profiling,
+    )
+
+    # Phase 3: Candles + Funding + Feature Reconstruction
+    from satellite.artemis.reconstruct import reconstruct_day
+    snapshots, labels = reconstruct_day(
+        date_str=date_str,
+        data_layer_db=data_layer_db,
+        satellite_store=satellite_store,
+        config=config,
+    )
+
+    return DayResult(
+        date=date_str,
+        addresses_discovered=addresses,
+        liquidation_events=liq_count,
+        trades_processed=trades,
+        profiles_computed=profiles,
+        snapshots_reconstructed=snapshots,
+        labels_computed=labels,
+        elapsed_seconds=time.time() - t0,
+    )
+
+
+def ingest_day(
+    date_str: str,
+    data_layer_db: object,
+    config: ArtemisConfig,
+    skip_profiling: bool = False,
+) -> tuple[int, int, int, int]:
+    """Download one day from S3 and write it into the data-layer DB.
+
+    Phases 1 and 2 of a day (perp balances, node fills). Reads nothing from
+    other days, so days can be ingested concurrently into separate DBs.
+
+    Returns:
+        (addresses_discovered, trades_processed, profiles_computed,
+         liquidation_events)
+    """
     temp_dir = Path(config.temp_dir) / date_str
     temp_dir.mkdir(parents=True, exist_ok=True)
 
@@ -144,28 +203,10 @@ def process_single_day(
             )
         _safe_delete(temp_dir / "node_fills")
 
-        # Phase 3: Candles + Funding + Feature Reconstruction
-        from satellite.artemis.reconstruct import reconstruct_day
-        snapshots, labels = reconstruct_day(
-            date_str=date_str,
-            data_layer_db=data_layer_db,
-            satellite_store=satellite_store,
-            config=config,
-        )
-
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
 
-    return DayResult(
-        date=date_str,
-        addresses_discovered=addresses,
-        liquidation_events=liq_count,
-        trades_processed=trades,
-        profiles_computed=profiles,
-        snapshots_reconstructed=snapshots,
-        labels_computed=labels,
-        elapsed_seconds=time.time() - t0,
-    )
+    return addresses, trades, profiles, liq_count
 
 
 # ─── S3 Operations ──────────────────────────────────────────────────────────
@@ -295,6 +336,232 @@ def _process_perp_balances(
 
 # ─── Node Fills Processing (Parquet) ────────────────────────────────────────
 
+# Tables node fills creates on first use (older data-layer DBs lack them)
+TRADE_FLOW_DDL = (
+    "CREATE TABLE IF NOT EXISTS trade_flow_history ("
+    "coin TEXT NOT NULL, recorded_at REAL NOT NULL, "
+    "buy_volume_usd REAL DEFAULT 0, "
+    "sell_volume_usd REAL DEFAULT 0, "
+    "PRIMARY KEY (coin, recorded_at))"
+)
+CANDLES_DDL = (
+    "CREATE TABLE IF NOT EXISTS candles_history ("
+    "coin TEXT NOT NULL, interval TEXT NOT NULL, "
+    "open_time REAL NOT NULL, open REAL NOT NULL, "
+    "high REAL NOT NULL, low REAL NOT NULL, "
+    "close REAL NOT NULL, volume REAL NOT NULL, "
+    "PRIMARY KEY (coin, interval, open_time))"
+)
+
+# Fills outside this range (epoch seconds) carry corrupt timestamps
+_MIN_FILL_TS = 1_700_000_000
+_MAX_FILL_TS = 1_900_000_000
+
+# Rows per record batch when streaming a Parquet file's row groups
+_FILL_BATCH_ROWS = 65_536
+
+_CANDLE_FIELDS = {
+    "open": 0.0, "high": -np.inf, "low": np.inf, "close": 0.0, "volume": 0.0,
+    "first_ts": np.inf, "last_ts": -np.inf,
+}
+
+
+class _Buckets:
+    """Running per-(coin, time bucket) reductions over streamed fills.
+
+    Each field is a float array indexed by slot; a key gets the next slot
+    the first time it is seen. Reductions use numpy's ufunc.at, which is
+    unbuffered and visits rows in order, so sums accumulate exactly as a
+    row-by-row loop would.
+    """
+
+    def __init__(self, width: int, **fields: float):
+        self.width = width
+        self.slots: dict[tuple[str, int], int] = {}
+        self._initial = fields
+        self._arrays = {name: np.empty(0) for name in fields}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def index(self, coins: list[str], codes: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        """Slot of each row, from dictionary-encoded coins and epoch seconds."""
+        buckets = np.floor_divide(ts, self.width).astype(np.int64)
+        keys, inverse = np.unique(
+            (codes.astype(np.int64) << 32) | buckets, return_inverse=True,
+        )
+        slot_of = np.array([
+            self.slots.setdefault(
+                (coins[k >> 32], (k & 0xFFFFFFFF) * self.width), len(self.slots),
+            )
+            for k in keys.tolist()
+        ], dtype=np.int64)
+        capacity = len(self._arrays[next(iter(self._arrays))])
+        if len(self.slots) > capacity:
+            extra = max(len(self.slots), 2 * capacity) - capacity
+            for name, initial in self._initial.items():
+                self._arrays[name] = np.concatenate(
+                    [self._arrays[name], np.full(extra, initial)],
+                )
+        return slot_of[inverse.reshape(-1)]
+
+
+def _update_candles(
+    candles: _Buckets, slot: np.ndarray, ts: np.ndarray, px: np.ndarray, sz: np.ndarray,
+) -> None:
+    """Fold a batch of trades into OHLCV builders.
+
+    Open is the price of the earliest trade (the first seen on a tie) and
+    close the price of the latest (the last seen on a tie).
+    """
+    if not len(slot):
+        return
+    np.maximum.at(candles["high"], slot, px)
+    np.minimum.at(candles["low"], slot, px)
+    np.add.at(candles["volume"], slot, sz)
+
+    order = np.lexsort((ts, slot))  # stable, so ties keep row order
+    edges = np.flatnonzero(slot[order][1:] != slot[order][:-1])
+    first = order[np.r_[0, edges + 1]]
+    last = order[np.r_[edges, len(order) - 1]]
+    groups = slot[first]
+
+    take = ts[first] < candles["first_ts"][groups]
+    candles["first_ts"][groups[take]] = ts[first[take]]
+    candles["open"][groups[take]] = px[first[take]]
+    take = ts[last] >= candles["last_ts"][groups]
+    candles["last_ts"][groups[take]] = ts[last[take]]
+    candles["close"][groups[take]] = px[last[take]]
+
+
+def _fill_seconds(col) -> np.ndarray:
+    """Epoch seconds of a non-null fills "time" column (NaN if unusable).
+
+    Two Parquet encodings exist:
+    1. Early data (Aug 2025): raw ms stored as timestamp[ns]
+       → reads as 1970, the stored integer IS the ms value
+    2. Later data (Sep+ 2025): proper timestamps (naive ones are UTC)
+    Plain numeric columns hold ms.
+    """
+    import pyarrow as pa
+
+    if pa.types.is_timestamp(col.type):
+        raw = col.cast(pa.int64()).to_numpy()
+        if col.type.unit == "ns":
+            micros = raw // 1000
+        else:
+            micros = raw * {"s": 1_000_000, "ms": 1000, "us": 1}[col.type.unit]
+        seconds = micros / 1e6
+        # Detect mis-encoded timestamps (show as 1970)
+        return np.where(seconds < _MIN_FILL_TS, raw / 1000, seconds)
+    if pa.types.is_integer(col.type) or pa.types.is_floating(col.type):
+        return col.cast(pa.float64()).to_numpy() / 1000
+    return np.full(len(col), np.nan)
+
+
+class _NodeFillAggregates:
+    """What _process_node_fills_parquet derives from fills, fed per batch.
+
+    Each trade appears twice (buyer + seller); only crossed=True (taker)
+    fills count towards volume, CVD, candles, liquidations and OI.
+    """
+
+    def __init__(self, profile: bool):
+        self.trades = 0
+        self.flow = _Buckets(300, volume_usd=0.0, buy_usd=0.0, sell_usd=0.0, **_CANDLE_FIELDS)
+        self.candles_1m = _Buckets(60, **_CANDLE_FIELDS)
+        self.oi_delta = _Buckets(300, delta=0.0)
+        self.liq_events: list[tuple] = []
+        self.trade_records: dict[str, list] | None = {} if profile else None
+
+    def add(self, batch) -> None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        def flags(arr) -> np.ndarray:
+            return pc.fill_null(arr, False).to_numpy(zero_copy_only=False)
+
+        batch = batch.filter(pc.and_(
+            pc.and_(pc.is_valid(batch.column("px")), pc.is_valid(batch.column("sz"))),
+            pc.is_valid(batch.column("time")),
+        ))
+        ts = _fill_seconds(batch.column("time"))
+        # Sanity check timestamp (should be 2025-2026)
+        keep = (ts >= _MIN_FILL_TS) & (ts <= _MAX_FILL_TS)
+        batch, ts = batch.filter(pa.array(keep)), ts[keep]
+        self.trades += len(ts)
+
+        px = batch.column("px").cast(pa.float64()).to_numpy()
+        sz = batch.column("sz").cast(pa.float64()).to_numpy()
+        size_usd = px * sz
+        notional = np.abs(size_usd)
+        coin = pc.fill_null(batch.column("coin").cast(pa.string()), "")
+        encoded = pc.dictionary_encode(coin)
+        coins = encoded.dictionary.to_pylist()
+        codes = encoded.indices.to_numpy()
+        buy = flags(pc.equal(batch.column("side"), "B"))
+        taker = flags(batch.column("crossed").cast(pa.bool_())) & flags(pc.not_equal(coin, ""))
+
+        # dir column may not exist in all Parquet files
+        names = batch.schema.names
+        if "dir" in names and pa.types.is_string(batch.schema.field("dir").type):
+            dir_col = pc.fill_null(batch.column("dir"), "")
+            liq = flags(pc.match_substring(dir_col, "Liq"))
+            long_side = flags(pc.match_substring(dir_col, "Long"))
+            opens = flags(pc.starts_with(dir_col, "Open"))
+            closes = flags(pc.starts_with(dir_col, "Close")) | flags(pc.starts_with(dir_col, "Liq"))
+        else:
+            liq = long_side = opens = closes = np.zeros(len(ts), dtype=bool)
+
+        # Liquidation extraction: dir contains "Liq Long" or "Liq Short",
+        # above the live $100 dust filter
+        rows = np.flatnonzero(taker & liq & (notional >= 100))
+        self.liq_events.extend(zip(
+            coin.take(rows).to_pylist(), ts[rows].tolist(),
+            np.where(long_side[rows], "long", "short").tolist(),
+            notional[rows].tolist(), px[rows].tolist(), repeat(None),
+        ))
+
+        # OI deltas: "Open*" increases OI, "Close*" and "Liq*" decrease it
+        rows = taker & (opens | closes)
+        slot = self.oi_delta.index(coins, codes[rows], ts[rows])
+        np.add.at(
+            self.oi_delta["delta"], slot,
+            np.where(opens[rows], notional[rows], -notional[rows]),
+        )
+
+        # Volume, CVD and 5m/1m OHLCV candles
+        rows = taker & (size_usd > 0)
+        t_ts, t_px, t_sz, t_usd, t_buy = ts[rows], px[rows], sz[rows], size_usd[rows], buy[rows]
+        slot = self.flow.index(coins, codes[rows], t_ts)
+        np.add.at(self.flow["volume_usd"], slot, t_usd)
+        np.add.at(self.flow["buy_usd"], slot[t_buy], t_usd[t_buy])
+        np.add.at(self.flow["sell_usd"], slot[~t_buy], t_usd[~t_buy])
+        _update_candles(self.flow, slot, t_ts, t_px, t_sz)
+        _update_candles(
+            self.candles_1m, self.candles_1m.index(coins, codes[rows], t_ts),
+            t_ts, t_px, t_sz,
+        )
+
+        # Collect trades per address for profiling (all fills)
+        if self.trade_records is not None:
+            user = pc.fill_null(batch.column("user").cast(pa.string()), "")
+            rows = np.flatnonzero(flags(pc.not_equal(user, "")) & (size_usd >= 100))
+            for address, c, is_buy, p, s, usd, t in zip(
+                user.take(rows).to_pylist(), coin.take(rows).to_pylist(),
+                buy[rows].tolist(), px[rows].tolist(), sz[rows].tolist(),
+                size_usd[rows].tolist(), ts[rows].tolist(),
+            ):
+                self.trade_records.setdefault(address, []).append({
+                    "coin": c,
+                    "side": "buy" if is_buy else "sell",
+                    "px": p,
+                    "sz": s,
+                    "size_usd": usd,
+                    "time": t,
+                })
+
+
 def _process_node_fills_parquet(
     file_paths: list[Path],
     db: object,
@@ -307,8 +574,9 @@ def _process_node_fills_parquet(
     Parquet columns: user, coin, px, sz, side (B/A), time, dir,
         closedPnl, crossed (taker flag), fee, tid, ...
 
-    Each trade appears twice (buyer + seller). We use crossed=True
-    (taker) for volume/CVD/OI to avoid double-counting.
+    Files are streamed a record batch at a time and aggregated with
+    pyarrow.compute/numpy (see _NodeFillAggregates), so memory is bounded
+    by the batch size rather than the file.
 
     Args:
         skip_profiling: If True, skip wallet profiling to save memory.
@@ -316,196 +584,46 @@ def _process_node_fills_parquet(
     Returns:
         (trades_processed, profiles_computed, liquidation_events)
     """
+    import pyarrow as pa
     import pyarrow.parquet as pq
 
     from satellite.artemis.profiler import batch_profile
 
-    total_trades = 0
-    volume_by_coin_bucket: dict[tuple[str, int], float] = {}
-    buy_vol_by_coin_bucket: dict[tuple[str, int], float] = {}
-    sell_vol_by_coin_bucket: dict[tuple[str, int], float] = {}
-    trade_records: dict[str, list] = {} if not skip_profiling else None
-
-    # OHLCV candle builders: (coin, interval, bucket) -> {open_time, open, high, low, close, volume, first_ts}
-    candle_builders_5m: dict[tuple[str, int], dict] = {}
-    candle_builders_1m: dict[tuple[str, int], dict] = {}
-
-    # NEW: track liquidation events and OI deltas per 5m bucket
-    liq_events: list[tuple] = []
-    oi_delta_by_coin_bucket: dict[tuple[str, int], float] = {}
+    fills = _NodeFillAggregates(profile=not skip_profiling)
+    columns = ["coin", "px", "sz", "side", "crossed", "time"]
+    if not skip_profiling:
+        columns.append("user")
 
     for fp in sorted(file_paths):
-        base_cols = ["coin", "px", "sz", "side", "crossed", "time"]
-        if not skip_profiling:
-            base_cols.append("user")
-
-        # Try reading with dir column; fall back without if column doesn't exist
         try:
-            table = pq.read_table(str(fp), columns=base_cols + ["dir"])
+            pf = pq.ParquetFile(str(fp))
         except Exception:
-            try:
-                table = pq.read_table(str(fp), columns=base_cols)
-            except Exception:
-                log.warning("Failed to read Parquet: %s", fp)
-                continue
-
-        # dir column may not exist in all Parquet files
+            log.warning("Failed to read Parquet: %s", fp)
+            continue
+        available = set(pf.schema_arrow.names)
+        if not available.issuperset(columns):
+            log.warning("Failed to read Parquet: %s", fp)
+            continue
         try:
-            col_dir = table.column("dir")
-        except KeyError:
-            col_dir = None
-
-        # Use PyArrow columnar access (no Pandas, much less memory)
-        n_rows = table.num_rows
-        col_coin = table.column("coin")
-        col_px = table.column("px")
-        col_sz = table.column("sz")
-        col_side = table.column("side")
-        col_crossed = table.column("crossed")
-        col_time = table.column("time")
-        col_user = table.column("user") if not skip_profiling else None
-
-        for i in range(n_rows):
-            try:
-                coin = str(col_coin[i].as_py())
-                px = float(col_px[i].as_py())
-                sz = float(col_sz[i].as_py())
-                size_usd = px * sz
-                side = str(col_side[i].as_py())
-                crossed = bool(col_crossed[i].as_py())
-
-                # Convert timestamp: Two Parquet encodings exist:
-                # 1. Early data (Aug 2025): raw ms stored as timestamp[ns]
-                #    → .as_py() shows 1970, .value IS the ms value
-                # 2. Later data (Sep+ 2025): proper datetime timestamps
-                #    → .as_py() shows correct date, .timestamp() works
-                ts_raw = col_time[i].as_py()
-                if hasattr(ts_raw, "timestamp"):
-                    timestamp = ts_raw.timestamp()
-                    # Detect mis-encoded timestamps (show as 1970)
-                    if timestamp < 1700000000:
-                        # Raw ms stored as ns — .value is the real ms
-                        timestamp = int(ts_raw.value) / 1000
-                elif isinstance(ts_raw, (int, float)):
-                    timestamp = float(ts_raw) / 1000
-                else:
-                    continue
-
-                # Sanity check timestamp (should be 2025-2026)
-                if timestamp < 1700000000 or timestamp > 1900000000:
-                    continue
-
-                total_trades += 1
-
-                # Extract dir column for liquidations + OI tracking
-                raw_dir = col_dir[i].as_py() if col_dir is not None else None
-                dir_val = raw_dir if isinstance(raw_dir, str) else ""
-
-                # Liquidation extraction: dir contains "Liq Long" or "Liq Short"
-                if "Liq" in dir_val and crossed and coin:
-                    liq_side = "long" if "Long" in dir_val else "short"
-                    liq_size_usd = abs(px * sz)
-                    if liq_size_usd >= 100:  # match live $100 dust filter
-                        liq_events.append((
-                            coin, timestamp, liq_side,
-                            liq_size_usd, px, None,
-                        ))
-
-                # OI delta tracking from taker fills only (avoid double-counting)
-                # "Open*" increases OI, "Close*" and "Liq*" decrease OI
-                if crossed and coin and dir_val:
-                    bucket_5m = int(timestamp // 300) * 300
-                    oi_key = (coin, bucket_5m)
-                    change_usd = abs(px * sz)
-                    if dir_val.startswith("Open"):
-                        oi_delta_by_coin_bucket[oi_key] = (
-                            oi_delta_by_coin_bucket.get(oi_key, 0) + change_usd
-                        )
-                    elif dir_val.startswith("Close") or dir_val.startswith("Liq"):
-                        oi_delta_by_coin_bucket[oi_key] = (
-                            oi_delta_by_coin_bucket.get(oi_key, 0) - change_usd
-                        )
+            for batch in pf.iter_batches(
+                batch_size=_FILL_BATCH_ROWS,
+                columns=columns + (["dir"] if "dir" in available else []),
+            ):
+                fills.add(batch)
+        except (pa.ArrowException, OSError):
+            log.warning("Failed reading Parquet %s part-way — keeping rows read so far", fp)
 
-                # Only count TAKER fills for volume/CVD/candles (avoid double-counting)
-                if crossed and coin and size_usd > 0:
-                    bucket_5m = int(timestamp // 300) * 300
-                    key = (coin, bucket_5m)
-                    volume_by_coin_bucket[key] = (
-                        volume_by_coin_bucket.get(key, 0) + size_usd
-                    )
-                    if side == "B":
-                        buy_vol_by_coin_bucket[key] = (
-                            buy_vol_by_coin_bucket.get(key, 0) + size_usd
-                        )
-                    else:
-                        sell_vol_by_coin_bucket[key] = (
-                            sell_vol_by_coin_bucket.get(key, 0) + size_usd
-                        )
-
-                    # Build 5m and 1m OHLCV candles from taker trades
-                    for builders, bucket_size in [
-                        (candle_builders_5m, 300),
-                        (candle_builders_1m, 60),
-                    ]:
-                        bucket = int(timestamp // bucket_size) * bucket_size
-                        bkey = (coin, bucket)
-                        if bkey not in builders:
-                            builders[bkey] = {
-                                "first_ts": timestamp,
-                                "open": px, "high": px,
-                                "low": px, "close": px,
-                                "volume": sz, "last_ts": timestamp,
-                            }
-                        else:
-                            b = builders[bkey]
-                            if px > b["high"]:
-                                b["high"] = px
-                            if px < b["low"]:
-                                b["low"] = px
-                            if timestamp < b["first_ts"]:
-                                b["first_ts"] = timestamp
-                                b["open"] = px
-                            if timestamp >= b["last_ts"]:
-                                b["last_ts"] = timestamp
-                                b["close"] = px
-                            b["volume"] += sz
-
-                # Collect trades per address for profiling (all fills)
-                if trade_records is not None and col_user is not None:
-                    user = str(col_user[i].as_py())
-                    if user and size_usd >= 100:
-                        if user not in trade_records:
-                            trade_records[user] = []
-                        trade_records[user].append({
-                            "coin": coin,
-                            "side": "buy" if side == "B" else "sell",
-                            "px": px,
-                            "sz": sz,
-                            "size_usd": size_usd,
-                            "time": timestamp,
-                        })
-
-            except (ValueError, TypeError, KeyError):
-                continue
-
-        # Free memory after each file
-        del table
+    flow, candles_1m, oi_delta = fills.flow, fills.candles_1m, fills.oi_delta
+    liq_events = fills.liq_events
 
     # Write volume history + trade flow (CVD data)
     with db.write_lock:
         # Ensure tables exist
-        db.conn.execute(
-            "CREATE TABLE IF NOT EXISTS trade_flow_history ("
-            "coin TEXT NOT NULL, recorded_at REAL NOT NULL, "
-            "buy_volume_usd REAL DEFAULT 0, "
-            "sell_volume_usd REAL DEFAULT 0, "
-            "PRIMARY KEY (coin, recorded_at))",
-        )
+        db.conn.execute(TRADE_FLOW_DDL)
 
-        vol_rows = [
-            (coin, epoch, vol_usd)
-            for (coin, epoch), vol_usd in volume_by_coin_bucket.items()
-        ]
+        volume = flow["volume_usd"].tolist()
+        buy_vol, sell_vol = flow["buy_usd"].tolist(), flow["sell_usd"].tolist()
+        vol_rows = [(coin, epoch, volume[i]) for (coin, epoch), i in flow.slots.items()]
         if vol_rows:
             db.conn.executemany(
                 "INSERT OR IGNORE INTO volume_history "
@@ -513,17 +631,10 @@ def _process_node_fills_parquet(
                 vol_rows,
             )
 
-        flow_rows = []
-        all_keys = (
-            set(buy_vol_by_coin_bucket) | set(sell_vol_by_coin_bucket)
-        )
-        for key in all_keys:
-            coin_k, epoch_k = key
-            flow_rows.append((
-                coin_k, epoch_k,
-                buy_vol_by_coin_bucket.get(key, 0),
-                sell_vol_by_coin_bucket.get(key, 0),
-            ))
+        flow_rows = [
+            (coin, epoch, buy_vol[i], sell_vol[i])
+            for (coin, epoch), i in flow.slots.items()
+        ]
         if flow_rows:
             db.conn.executemany(
                 "INSERT OR IGNORE INTO trade_flow_history "
@@ -533,25 +644,14 @@ def _process_node_fills_parquet(
             )
 
         # Write reconstructed OHLCV candles
-        db.conn.execute(
-            "CREATE TABLE IF NOT EXISTS candles_history ("
-            "coin TEXT NOT NULL, interval TEXT NOT NULL, "
-            "open_time REAL NOT NULL, open REAL NOT NULL, "
-            "high REAL NOT NULL, low REAL NOT NULL, "
-            "close REAL NOT NULL, volume REAL NOT NULL, "
-            "PRIMARY KEY (coin, interval, open_time))",
-        )
+        db.conn.execute(CANDLES_DDL)
         candle_rows = []
-        for (coin_k, bucket_k), b in candle_builders_5m.items():
-            candle_rows.append((
-                coin_k, "5m", float(bucket_k),
-                b["open"], b["high"], b["low"], b["close"], b["volume"],
-            ))
-        for (coin_k, bucket_k), b in candle_builders_1m.items():
-            candle_rows.append((
-                coin_k, "1m", float(bucket_k),
-                b["open"], b["high"], b["low"], b["close"], b["volume"],
-            ))
+        for interval, candles in (("5m", flow), ("1m", candles_1m)):
+            ohlcv = [candles[f].tolist() for f in ("open", "high", "low", "close", "volume")]
+            for (coin_k, bucket_k), i in candles.slots.items():
+                candle_rows.append((
+                    coin_k, interval, float(bucket_k), *(field[i] for field in ohlcv),
+                ))
         if candle_rows:
             db.conn.executemany(
                 "INSERT OR IGNORE INTO candles_history "
@@ -600,9 +700,10 @@ def _process_node_fills_parquet(
             anchor_oi = float(anchor_row["oi_usd"])
 
             # Get sorted 5m buckets for this coin
+            deltas = oi_delta["delta"]
             coin_buckets = sorted(
-                (bucket, delta)
-                for (c, bucket), delta in oi_delta_by_coin_bucket.items()
+                (bucket, float(deltas[i]))
+                for (c, bucket), i in oi_delta.slots.items()
                 if c == coin_name
             )
 
@@ -635,21 +736,20 @@ def _process_node_fills_parquet(
 
     # Profile significant wallets (skipped during backfill to save memory)
     profiles = 0
-    if trade_records is not None:
+    if fills.trade_records is not None:
         significant_traders = {
             addr: trades
-            for addr, trades in trade_records.items()
+            for addr, trades in fills.trade_records.items()
             if sum(t["size_usd"] for t in trades) >= config.min_position_usd
         }
         profiles = batch_profile(db, significant_traders, date_str)
 
     log.info(
         "Node Fills %s: %d trades, %d vol buckets, %d 5m candles, %d 1m candles, %d liqs, %d OI buckets, %d profiles",
-        date_str, total_trades, len(volume_by_coin_bucket),
-        len(candle_builders_5m), len(candle_builders_1m),
-        len(liq_events), len(oi_delta_by_coin_bucket), profiles,
+        date_str, fills.trades, len(flow.slots), len(flow.slots),
+        len(candles_1m.slots), len(liq_events), len(oi_delta.slots), profiles,
     )
-    return total_trades, profiles, len(liq_events)
+    return fills.trades, profiles, len(liq_events)
 
 
 def _safe_delete(path: Path) -> None:
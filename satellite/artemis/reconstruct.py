@@ -15,6 +15,7 @@ All 12 structural features are reconstructable:
   - sessions_overlapping:   <- Clock math (trivial)
 """
 
+import bisect
 import logging
 import time
 from datetime import datetime, timedelta, timezone
@@ -44,8 +45,8 @@ def reconstruct_day(
     Returns:
         (snapshots_created, labels_computed)
     """
-    from satellite.features import compute_features
-    from satellite.labeler import compute_labels, save_labels
+    from satellite.features import compute_features_batch
+    from satellite.labeler import compute_labels_batch, save_labels_many
 
     dt = datetime.strptime(date_str, "%Y-%m-%d").replace(
         tzinfo=timezone.utc,
@@ -61,86 +62,84 @@ def reconstruct_day(
     candles_1m_by_coin = {}
     funding_by_coin = {}
     for coin in coins:
-        candles_by_coin[coin] = _load_candles_from_db(
+        candles_by_coin[coin] = _TimeIndex(_load_candles_from_db(
             data_layer_db, coin, "5m",
             day_start - 3600, day_end + 14400,
-        )
+        ))
         candles_1m_by_coin[coin] = _load_candles_from_db(
             data_layer_db, coin, "1m",
             day_start - 3600, day_end + 300,
         )
-        funding_by_coin[coin] = _load_funding_from_db(
+        funding_by_coin[coin] = _TimeIndex(_load_funding_from_db(
             data_layer_db, coin,
             day_start - 30 * 86400, day_end,
-        )
+        ), key="time", scale=1)
 
     snapshots_created = 0
     labels_computed = 0
 
-    # Create a snapshot every 300s
+    # Snapshot every 300s; features for a whole coin-day in one batch
+    snapshot_times = []
     snapshot_time = day_start
     while snapshot_time < day_end:
-        for coin in coins:
-            try:
-                # Build a synthetic "snapshot" object for compute_features()
-                synthetic_snapshot = _build_synthetic_snapshot(
-                    coin, snapshot_time, candles_by_coin[coin],
-                    funding_by_coin[coin], data_layer_db,
-                )
+        snapshot_times.append(snapshot_time)
+        snapshot_time += 300  # next 5-minute mark
 
-                # Filter candles to window around this snapshot
-                # (compute_features uses last few candles relative to 'now')
-                snap_ms = snapshot_time * 1000
-                c5m = [
-                    c for c in candles_by_coin[coin]
-                    if c["t"] <= snap_ms
-                ]
-                c1m = [
-                    c for c in candles_1m_by_coin[coin]
-                    if c["t"] <= snap_ms
-                ]
-
-                result = compute_features(
-                    coin=coin,
-                    snapshot=synthetic_snapshot,
-                    data_layer_db=data_layer_db,
-                    heatmap_engine=None,
-                    order_flow_engine=None,
-                    config=None,
-                    timestamp=snapshot_time,
-                    candles_5m=c5m,
-                    candles_1m=c1m,
+    for coin in coins:
+        candles = candles_by_coin[coin]
+        try:
+            # Build synthetic "snapshot" objects for the feature engine
+            synthetic_snapshots = [
+                _build_synthetic_snapshot(
+                    coin, t, candles, funding_by_coin[coin], data_layer_db,
                 )
+                for t in snapshot_times
+            ]
+            # Each timestamp sees the candles opened at or before it
+            results = compute_features_batch(
+                coin=coin,
+                timestamps=snapshot_times,
+                data_layer_db=data_layer_db,
+                snapshots=synthetic_snapshots,
+                config=None,
+                candles_5m=candles.records,
+                candles_1m=candles_1m_by_coin[coin],
+            )
+        except Exception:
+            log.warning("Feature batch failed for %s on %s", coin, date_str, exc_info=True)
+            continue
 
-                # CVD directional features now read from trade_flow_history
-                # directly inside compute_features() — no enrichment needed.
-
-                # Mark as backfill
-                result.raw_data = result.raw_data or {}
-                result.raw_data["source"] = "artemis_backfill"
+        for result in results:
+            # CVD directional features now read from trade_flow_history
+            # directly inside the feature engine — no enrichment needed.
 
-                # Save snapshot
-                satellite_store.save_snapshot(result)
-                snapshots_created += 1
+            # Mark as backfill
+            result.raw_data = result.raw_data or {}
+            result.raw_data["source"] = "artemis_backfill"
 
-                # Label immediately (we have the candle data)
-                label_result = compute_labels(
-                    snapshot_id=result.snapshot_id,
-                    entry_time=snapshot_time,
+        # Label immediately (we have the candle data)
+        try:
+            labels = [
+                label for label in compute_labels_batch(
+                    snapshot_ids=[result.snapshot_id for result in results],
+                    entry_times=snapshot_times,
                     coin=coin,
-                    candles=candles_by_coin[coin],
+                    candles=candles.records,
                 )
-                if label_result:
-                    save_labels(satellite_store, label_result)
-                    labels_computed += 1
-
-            except Exception:
-                log.debug(
-                    "Failed snapshot at %s for %s",
-                    snapshot_time, coin, exc_info=True,
-                )
-
-        snapshot_time += 300  # next 5-minute mark
+                if label
+            ]
+        except Exception:
+            log.debug("Failed labels for %s on %s", coin, date_str, exc_info=True)
+            labels = []
+
+        # One transaction each for the coin-day's snapshots and labels
+        try:
+            satellite_store.save_snapshots(results)
+            snapshots_created += len(results)
+            save_labels_many(satellite_store, labels)
+            labels_computed += len(labels)
+        except Exception:
+            log.warning("Failed to save %s snapshots for %s", date_str, coin, exc_info=True)
 
     # Re-label previous day's unlabeled snapshots.
     # When day N was processed, snapshots after ~20:00 UTC couldn't get 4h labels
@@ -180,7 +179,7 @@ def _relabel_previous_day(
     Returns:
         Number of labels computed.
     """
-    from satellite.labeler import compute_labels, save_labels
+    from satellite.labeler import compute_labels_batch, save_labels_many
 
     prev_dt = current_dt - timedelta(days=1)
     prev_start = prev_dt.timestamp()
@@ -214,22 +213,21 @@ def _relabel_previous_day(
         if not candles:
             continue
 
-        for row in unlabeled:
-            try:
-                label_result = compute_labels(
-                    snapshot_id=row["snapshot_id"],
-                    entry_time=row["created_at"],
+        try:
+            labels = [
+                label for label in compute_labels_batch(
+                    snapshot_ids=[row["snapshot_id"] for row in unlabeled],
+                    entry_times=[row["created_at"] for row in unlabeled],
                     coin=coin,
                     candles=candles,
                 )
-                if label_result:
-                    save_labels(satellite_store, label_result)
-                    labels_added += 1
-            except Exception:
-                log.debug(
-                    "Failed relabel for %s at %s",
-                    coin, row["created_at"], exc_info=True,
-                )
+                if label
+            ]
+        except Exception:
+            log.debug("Failed relabel for %s", coin, exc_info=True)
+            continue
+        save_labels_many(satellite_store, labels)
+        labels_added += len(labels)
 
         if labels_added:
             log.info(
@@ -250,11 +248,29 @@ class _SyntheticSnapshot:
         self.volume_usd: dict[str, float] = {}
 
 
+class _TimeIndex:
+    """Time-sorted records plus their time column, for bisect lookups.
+
+    Replaces per-snapshot scans of the whole day's lists: a lookup is a
+    bisect, not a walk over the day.
+    """
+
+    def __init__(self, records: list[dict], key: str = "t", scale: float = 1000) -> None:
+        self.records = records
+        self.times = [r[key] for r in records]
+        self._scale = scale  # record time units per second (candles: ms)
+
+    def at_or_before(self, timestamp: float) -> dict | None:
+        """Latest record with time <= timestamp (seconds)."""
+        i = bisect.bisect_right(self.times, timestamp * self._scale)
+        return self.records[i - 1] if i else None
+
+
 def _build_synthetic_snapshot(
     coin: str,
     timestamp: float,
-    candles: list[dict],
-    funding_history: list[dict],
+    candles: _TimeIndex,
+    funding_history: _TimeIndex,
     data_layer_db: object,
 ) -> _SyntheticSnapshot:
     """Build a snapshot-like object from historical data.
@@ -263,7 +279,7 @@ def _build_synthetic_snapshot(
         coin: Coin symbol.
         timestamp: Snapshot time.
         candles: 5m candle data.
-        funding_history: Funding rate history.
+        funding_history: Funding rate history (key "time", seconds).
         data_layer_db: For OI/volume queries.
 
     Returns:
@@ -272,25 +288,20 @@ def _build_synthetic_snapshot(
     snap = _SyntheticSnapshot()
 
     # Price from nearest candle (HL-format keys: t=ms, c=close)
-    nearest_candle = _find_nearest_candle(candles, timestamp)
+    nearest_candle = candles.at_or_before(timestamp)
     if nearest_candle:
         snap.prices[coin] = nearest_candle["c"]
 
     # Funding from nearest historical record
-    nearest_funding = _find_nearest_record(
-        funding_history, timestamp, "time",
-    )
+    nearest_funding = funding_history.at_or_before(timestamp)
     if nearest_funding:
         snap.funding[coin] = nearest_funding["fundingRate"]
 
     # OI from oi_history table (populated by Phase 1)
+    from satellite.features import _SqlSeries
+
     try:
-        oi_row = data_layer_db.conn.execute(
-            "SELECT oi_usd FROM oi_history "
-            "WHERE coin = ? AND recorded_at <= ? "
-            "ORDER BY recorded_at DESC LIMIT 1",
-            (coin, timestamp),
-        ).fetchone()
+        oi_row = _SqlSeries(data_layer_db, coin).asof("oi", timestamp)
         if oi_row:
             snap.oi_usd[coin] = oi_row["oi_usd"]
     except Exception:
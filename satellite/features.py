@@ -20,11 +20,15 @@ v2 features (14 total):
 import hashlib
 import logging
 import math
+import sqlite3
 import time
 import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
+import numpy as np
+
 from satellite import SCHEMA_VERSION
 from satellite.config import SatelliteConfig
 
@@ -179,6 +183,198 @@ class FeatureResult:
     schema_version: int
 
 
+# ─── History Series ──────────────────────────────────────────────────────────
+
+# Historical series the computers read: name -> (table, time column, value
+# columns, extra filter, tie-break). Rows are (time, *values), oldest first,
+# and every window sum is taken in Python over that order, so the per-query
+# and batch engines reduce identical sequences.
+_SERIES: dict[str, tuple[str, str, str, str, str]] = {
+    "oi": ("oi_history", "recorded_at", "oi_usd", "", ""),
+    "funding": ("funding_history", "recorded_at", "rate", "", ""),
+    "volume": ("volume_history", "recorded_at", "volume_usd", "", ""),
+    "liq": ("liquidation_events", "occurred_at", "side, size_usd", "", ", id"),
+    "flow": (
+        "trade_flow_history", "recorded_at",
+        "buy_volume_usd, sell_volume_usd", "", "",
+    ),
+    "candles_5m": (
+        "candles_history", "open_time", "close", " AND interval = '5m'", "",
+    ),
+}
+
+# Longest window each series is read over, in seconds before `now`.
+_LOOKBACK_S: dict[str, float] = {
+    "oi": 7 * 86400,
+    "funding": 30 * 86400,
+    "volume": 5 * 3600,
+    "liq": 4 * 3600,
+    "flow": 3600,
+    "candles_5m": 4 * 3600,
+}
+
+
+class _SqlSeries:
+    """One coin's history, one query per lookup (single timestamp)."""
+
+    def __init__(self, data_layer_db: object, coin: str) -> None:
+        self._db = data_layer_db
+        self._coin = coin
+
+    def window(self, name: str, lo: float, hi: float, hi_open: bool = False) -> list:
+        """Rows with lo <= time <= hi (time < hi if hi_open), oldest first."""
+        table, tcol, cols, extra, tie = _SERIES[name]
+        return self._db.conn.execute(
+            f"SELECT {tcol}, {cols} FROM {table} WHERE coin = ?{extra} "
+            f"AND {tcol} >= ? AND {tcol} {'<' if hi_open else '<='} ? "
+            f"ORDER BY {tcol}{tie}",
+            (self._coin, lo, hi),
+        ).fetchall()
+
+    def values(
+        self, name: str, lo: float, hi: float, col: int = 1, hi_open: bool = False,
+    ) -> list[float]:
+        """One column of window(), through safe_float."""
+        return [safe_float(r[col]) for r in self.window(name, lo, hi, hi_open)]
+
+    def asof(self, name: str, t: float):
+        """Latest row with time <= t, or None."""
+        table, tcol, cols, extra, _ = _SERIES[name]
+        return _asof_row(
+            self._db.conn, table, f"SELECT {tcol}, {cols} FROM {{}} WHERE coin = ?{extra} "
+            f"AND {tcol} <= ? ORDER BY {tcol} DESC LIMIT 1",
+            (self._coin, t), t,
+        )
+
+
+def _asof_row(conn, table: str, sql: str, args: tuple, t: float):
+    """Run an as-of query with partition pruning.
+
+    `sql` selects the time column first, from `{}`, ordered newest first. On a
+    partitioned data-layer DB the series name is a UNION ALL view over every
+    partition, so ORDER BY ... LIMIT 1 through it probes all of them. Walk the
+    partitions in `history_partitions` newest first instead and stop at the
+    first hit; `<table>_overflow` holds rows past the newest partition or
+    before the oldest one. Flat tables (backfill/staging DBs) have no registry
+    entries and are queried directly.
+    """
+    try:
+        parts = conn.execute(
+            "SELECT name, hi FROM history_partitions WHERE series = ? AND lo <= ? "
+            "ORDER BY lo DESC",
+            (table, t),
+        )
+    except sqlite3.OperationalError:
+        return conn.execute(sql.format(table), args).fetchone()
+    overflow = sql.format(f"{table}_overflow")
+    try:
+        newest = True
+        for name, hi in parts:
+            # Partitions are contiguous, so t past the first one's end is past them all
+            if newest and t >= hi:
+                row = conn.execute(overflow, args).fetchone()
+                if row is not None and row[0] >= hi:
+                    return row
+            newest = False
+            row = conn.execute(sql.format(name), args).fetchone()
+            if row is not None:
+                return row
+        if newest and conn.execute(
+            "SELECT 1 FROM history_partitions WHERE series = ? LIMIT 1", (table,),
+        ).fetchone() is None:
+            return conn.execute(sql.format(table), args).fetchone()
+        return conn.execute(overflow, args).fetchone()
+    except sqlite3.OperationalError:  # partition retired mid-walk
+        return conn.execute(sql.format(table), args).fetchone()
+
+
+class _ArraySeries:
+    """One coin's history loaded once, lookups by binary search (batch).
+
+    Each series is read on first use for [start - lookback, end] plus the
+    row at or before that range (as-of lookups can reach back further), with
+    its times in a float64 array. A series whose read failed raises again on
+    every lookup, so the computers fall back exactly as on a failed query.
+    """
+
+    def __init__(self, data_layer_db: object, coin: str, start: float, end: float) -> None:
+        self._sql = _SqlSeries(data_layer_db, coin)
+        self._start = start
+        self._end = end
+        self._loaded: dict[str, tuple[np.ndarray, list] | Exception] = {}
+        self._columns: dict[tuple[str, int], list[float]] = {}
+
+    def _get(self, name: str) -> tuple[np.ndarray, list]:
+        got = self._loaded.get(name)
+        if got is None:
+            try:
+                lo = self._start - _LOOKBACK_S[name]
+                rows = [tuple(r) for r in self._sql.window(name, lo, self._end)]
+                head = self._sql.asof(name, lo)
+                if head and head[0] < lo:
+                    rows.insert(0, tuple(head))
+                got = (np.array([r[0] for r in rows], dtype=np.float64), rows)
+            except Exception as e:
+                got = e
+            self._loaded[name] = got
+        if isinstance(got, Exception):
+            raise got
+        return got
+
+    def _bounds(self, times: np.ndarray, lo: float, hi: float, hi_open: bool) -> tuple[int, int]:
+        return (
+            int(np.searchsorted(times, lo, "left")),
+            int(np.searchsorted(times, hi, "left" if hi_open else "right")),
+        )
+
+    def window(self, name: str, lo: float, hi: float, hi_open: bool = False) -> list:
+        times, rows = self._get(name)
+        i, j = self._bounds(times, lo, hi, hi_open)
+        return rows[i:j]
+
+    def values(
+        self, name: str, lo: float, hi: float, col: int = 1, hi_open: bool = False,
+    ) -> list[float]:
+        times, rows = self._get(name)
+        column = self._columns.get((name, col))
+        if column is None:
+            column = self._columns[(name, col)] = [safe_float(r[col]) for r in rows]
+        i, j = self._bounds(times, lo, hi, hi_open)
+        return column[i:j]
+
+    def asof(self, name: str, t: float):
+        times, rows = self._get(name)
+        j = int(np.searchsorted(times, t, "right"))
+        return rows[j - 1] if j else None
+
+
+class _HistorySnapshot:
+    """Snapshot stand-in with the latest recorded OI and funding."""
+
+    def __init__(self) -> None:
+        self.oi_usd: dict[str, float] = {}
+        self.funding: dict[str, float] = {}
+
+
+def _history_snapshot(coin: str, series: object, now: float) -> _HistorySnapshot:
+    """Snapshot as of `now` from oi_history and funding_history."""
+    snap = _HistorySnapshot()
+    for attr, name in (("oi_usd", "oi"), ("funding", "funding")):
+        try:
+            row = series.asof(name, now)
+        except Exception:
+            continue
+        if row:
+            getattr(snap, attr)[coin] = row[1]
+    return snap
+
+
+def _open_times(candles: list[dict] | None) -> np.ndarray | None:
+    if candles is None:
+        return None
+    return np.array([c["t"] for c in candles], dtype=np.float64)
+
+
 # ─── Core Computation ────────────────────────────────────────────────────────
 
 def compute_features(
@@ -200,10 +396,90 @@ def compute_features(
       2. reconstruct.py backfill — historical reconstruction from Artemis
       3. inference — live model prediction
 
-    All paths produce IDENTICAL feature vectors.
+    All paths produce IDENTICAL feature vectors. compute_features_batch()
+    runs the same computers over many timestamps at once.
     """
     cfg = config or SatelliteConfig()
     now = timestamp or time.time()
+    return _compute_all(
+        coin, snapshot, _SqlSeries(data_layer_db, coin), now, cfg,
+        candles_5m, candles_1m,
+    )
+
+
+def compute_features_batch(
+    coin: str,
+    timestamps: Sequence[float],
+    data_layer_db: object,
+    snapshots: Sequence[object] | None = None,
+    config: SatelliteConfig | None = None,
+    candles_5m: list[dict] | None = None,
+    candles_1m: list[dict] | None = None,
+) -> list[FeatureResult]:
+    """Compute features for one coin at many timestamps.
+
+    Each coin's history is read once into numpy-indexed arrays and every
+    window or as-of lookup becomes a binary search, instead of ~20 queries
+    per timestamp. The computers are the ones compute_features() runs, fed
+    the same rows in the same order, so each result is bit-identical to
+    compute_features() at that timestamp with the same snapshot and the
+    candles that opened at or before it.
+
+    Args:
+        coin: Coin symbol.
+        timestamps: Snapshot times (any order).
+        data_layer_db: data-layer Database (has historical tables).
+        snapshots: Snapshot-like objects aligned with timestamps. None builds
+            them from history (latest OI and funding at or before each time).
+        config: SatelliteConfig.
+        candles_5m: Full 5m candle series (HL format, sorted by open time).
+        candles_1m: Full 1m candle series (HL format, sorted by open time).
+
+    Returns:
+        One FeatureResult per timestamp, in input order.
+    """
+    cfg = config or SatelliteConfig()
+    times = [float(t) for t in timestamps]
+    if not times:
+        return []
+    if snapshots is not None and len(snapshots) != len(times):
+        raise ValueError("snapshots must align with timestamps")
+
+    series = _ArraySeries(data_layer_db, coin, min(times), max(times))
+    t5 = _open_times(candles_5m)
+    t1 = _open_times(candles_1m)
+
+    results = []
+    for i, now in enumerate(times):
+        snap = snapshots[i] if snapshots is not None else _history_snapshot(coin, series, now)
+        c5m = c1m = None
+        now_ms = now * 1000
+        # Trailing views that still hold everything the computers read from
+        # the full prefix: the last 5m candle at/before now-4h plus the one
+        # before it (price_trend_4h) and at least 13 (the length gates); 1m
+        # candles since now-4h and at least 60 (vol_of_vol).
+        if candles_5m is not None:
+            end = int(np.searchsorted(t5, now_ms, "right"))
+            j = int(np.searchsorted(t5, (now - 4 * 3600) * 1000, "right")) - 1
+            c5m = candles_5m[max(0, min(j - 1, end - 13)):end]
+        if candles_1m is not None:
+            end = int(np.searchsorted(t1, now_ms, "right"))
+            j = int(np.searchsorted(t1, (now - 4 * 3600) * 1000, "left"))
+            c1m = candles_1m[max(0, min(j, end - 60)):end]
+        results.append(_compute_all(coin, snap, series, now, cfg, c5m, c1m))
+    return results
+
+
+def _compute_all(
+    coin: str,
+    snapshot: object,
+    series: object,
+    now: float,
+    cfg: SatelliteConfig,
+    candles_5m: list[dict] | None,
+    candles_1m: list[dict] | None,
+) -> FeatureResult:
+    """Run every feature computer for one coin at `now`."""
     features: dict[str, float] = {}
     avail: dict[str, int] = {}
     raw_data: dict = {}
@@ -212,19 +488,19 @@ def compute_features(
 
     # 1. oi_vs_7d_avg_ratio
     _compute_oi_ratio(
-        coin, features, avail, raw_data, snapshot, data_layer_db, now,
+        coin, features, avail, raw_data, snapshot, series, now,
     )
 
     # 2-3. liq_cascade_active + liq_1h_vs_4h_avg
     _compute_liq_cascade(
-        coin, features, avail, raw_data, data_layer_db, now, cfg,
+        coin, features, avail, raw_data, series, now, cfg,
     )
 
     # ─── FUNDING MECHANISM (3 features) ──────────────────────────────
 
     # 4. funding_vs_30d_zscore
     _compute_funding_zscore(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
     )
 
     # 5. hours_to_funding
@@ -232,19 +508,19 @@ def compute_features(
 
     # 6. oi_funding_pressure
     _compute_oi_funding_pressure(
-        coin, features, avail, raw_data, snapshot, data_layer_db, now,
+        coin, features, avail, raw_data, snapshot, series, now,
     )
 
     # ─── MAGNITUDE (2 features) ──────────────────────────────────────
 
     # 7. volume_vs_1h_avg_ratio
     _compute_volume_ratio(
-        coin, features, avail, raw_data, snapshot, data_layer_db, now,
+        coin, features, avail, raw_data, snapshot, series, now,
     )
 
     # 8. realized_vol_1h
     _compute_realized_vol(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
         candles_1m=candles_1m,
     )
 
@@ -252,12 +528,12 @@ def compute_features(
 
     # 9-10. cvd_ratio_30m + cvd_acceleration (from trade_flow_history)
     _compute_cvd_directional(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
     )
 
     # 11. price_trend_1h (from candles)
     _compute_price_trend_1h(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
         candles_5m=candles_5m,
     )
 
@@ -268,13 +544,13 @@ def compute_features(
 
     # 13. oi_price_direction (from oi_history + candles)
     _compute_oi_price_direction(
-        coin, features, avail, raw_data, snapshot, data_layer_db, now,
+        coin, features, avail, raw_data, snapshot, series, now,
         candles_5m=candles_5m,
     )
 
     # 14. liq_imbalance_1h (from liquidation_events)
     _compute_liq_imbalance(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
     )
 
     # ─── NEW FEATURES (v3) ────────────────────────────────────────────
@@ -290,7 +566,7 @@ def compute_features(
 
     # 18. realized_vol_4h (4h realized vol from 1m candles)
     _compute_realized_vol_4h(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
         candles_1m=candles_1m,
     )
 
@@ -299,17 +575,17 @@ def compute_features(
 
     # 20. volume_acceleration (5m vol spike vs 1h avg)
     _compute_volume_acceleration(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
     )
 
     # 21. cvd_ratio_1h (1h CVD)
     _compute_cvd_1h(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
     )
 
     # 22. price_trend_4h (4h price change %)
     _compute_price_trend_4h(
-        coin, features, avail, raw_data, data_layer_db, now,
+        coin, features, avail, raw_data, series, now,
         candles_5m=candles_5m,
     )
 
@@ -322,7 +598,7 @@ def compute_features(
     _compute_candle_ratios(features, avail, candles_5m=candles_5m, now=now)
 
     # 26. funding_velocity (rate change over 8h)
-    _compute_funding_velocity(coin, features, avail, data_layer_db, now)
+    _compute_funding_velocity(coin, features, avail, series, now)
 
     # 27-28. hour_sin + hour_cos (cyclical time encoding)
     _compute_hour_encoding(features, now)
@@ -351,7 +627,7 @@ def _compute_oi_ratio(
     avail: dict,
     raw_data: dict,
     snapshot: object,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """oi_vs_7d_avg_ratio: current_oi / rolling_7d_mean_oi."""
@@ -363,13 +639,9 @@ def _compute_oi_ratio(
 
     try:
         cutoff = now - 7 * 86400
-        row = data_layer_db.conn.execute(
-            "SELECT AVG(oi_usd) as avg_oi FROM oi_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff, now),
-        ).fetchone()
+        oi = series.values("oi", cutoff, now)
 
-        avg_oi = safe_float(row["avg_oi"]) if row else 0
+        avg_oi = safe_float(sum(oi) / len(oi)) if oi else 0
         if avg_oi <= 0:
             features["oi_vs_7d_avg_ratio"] = NEUTRAL_VALUES["oi_vs_7d_avg_ratio"]
             avail["oi_7d_avail"] = 0
@@ -391,7 +663,7 @@ def _compute_liq_cascade(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
     cfg: SatelliteConfig,
 ) -> None:
@@ -400,22 +672,8 @@ def _compute_liq_cascade(
         cutoff_1h = now - 3600
         cutoff_4h = now - 4 * 3600
 
-        row_1h = data_layer_db.conn.execute(
-            "SELECT COALESCE(SUM(size_usd), 0) as total "
-            "FROM liquidation_events "
-            "WHERE coin = ? AND occurred_at >= ? AND occurred_at <= ?",
-            (coin, cutoff_1h, now),
-        ).fetchone()
-
-        row_4h = data_layer_db.conn.execute(
-            "SELECT COALESCE(SUM(size_usd), 0) as total "
-            "FROM liquidation_events "
-            "WHERE coin = ? AND occurred_at >= ? AND occurred_at <= ?",
-            (coin, cutoff_4h, now),
-        ).fetchone()
-
-        liq_1h = safe_float(row_1h["total"])
-        liq_4h = safe_float(row_4h["total"])
+        liq_1h = safe_float(sum(series.values("liq", cutoff_1h, now, col=2)))
+        liq_4h = safe_float(sum(series.values("liq", cutoff_4h, now, col=2)))
 
         raw_data["liq_1h_usd"] = liq_1h
         raw_data["liq_4h_usd"] = liq_4h
@@ -446,7 +704,7 @@ def _compute_funding_zscore(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """funding_vs_30d_zscore: (current - 30d_mean) / 30d_std.
@@ -456,32 +714,22 @@ def _compute_funding_zscore(
     try:
         cutoff_30d = now - 30 * 86400
 
-        current_row = data_layer_db.conn.execute(
-            "SELECT rate FROM funding_history "
-            "WHERE coin = ? AND recorded_at <= ? "
-            "ORDER BY recorded_at DESC LIMIT 1",
-            (coin, now),
-        ).fetchone()
+        current_row = series.asof("funding", now)
 
         if current_row is None:
             features["funding_vs_30d_zscore"] = NEUTRAL_VALUES["funding_vs_30d_zscore"]
             avail["funding_zscore_avail"] = 0
             return
 
-        current_rate = safe_float(current_row["rate"])
+        current_rate = safe_float(current_row[1])
 
-        rows = data_layer_db.conn.execute(
-            "SELECT rate FROM funding_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff_30d, now),
-        ).fetchall()
+        rates = series.values("funding", cutoff_30d, now)
 
-        if len(rows) < 10:
+        if len(rates) < 10:
             features["funding_vs_30d_zscore"] = NEUTRAL_VALUES["funding_vs_30d_zscore"]
             avail["funding_zscore_avail"] = 0
             return
 
-        rates = [safe_float(r["rate"]) for r in rows]
         mean_rate = sum(rates) / len(rates)
         variance = sum((r - mean_rate) ** 2 for r in rates) / (len(rates) - 1)
         std_rate = math.sqrt(variance) if variance > 0 else 0
@@ -536,7 +784,7 @@ def _compute_oi_funding_pressure(
     avail: dict,
     raw_data: dict,
     snapshot: object,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """oi_funding_pressure: oi_change_1h_pct * funding_rate.
@@ -553,13 +801,9 @@ def _compute_oi_funding_pressure(
             return
 
         cutoff_1h = now - 3600
-        row = data_layer_db.conn.execute(
-            "SELECT oi_usd FROM oi_history WHERE coin = ? "
-            "AND recorded_at <= ? ORDER BY recorded_at DESC LIMIT 1",
-            (coin, cutoff_1h),
-        ).fetchone()
+        row = series.asof("oi", cutoff_1h)
 
-        oi_1h_ago = safe_float(row["oi_usd"]) if row else 0
+        oi_1h_ago = safe_float(row[1]) if row else 0
 
         if oi_1h_ago > 0:
             oi_change_1h_pct = (current_oi - oi_1h_ago) / oi_1h_ago * 100
@@ -582,7 +826,7 @@ def _compute_volume_ratio(
     avail: dict,
     raw_data: dict,
     snapshot: object,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """volume_vs_1h_avg_ratio: recent_1h_volume / previous_4h_avg_hourly.
@@ -593,24 +837,15 @@ def _compute_volume_ratio(
         cutoff_1h = now - 3600
         cutoff_5h = now - 5 * 3600
 
-        row_1h = data_layer_db.conn.execute(
-            "SELECT SUM(volume_usd) as total FROM volume_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff_1h, now),
-        ).fetchone()
-        current_1h = safe_float(row_1h["total"]) if row_1h else 0
+        current_1h = safe_float(sum(series.values("volume", cutoff_1h, now)))
 
         if current_1h <= 0:
             features["volume_vs_1h_avg_ratio"] = NEUTRAL_VALUES["volume_vs_1h_avg_ratio"]
             avail["volume_avail"] = 0
             return
 
-        row_avg = data_layer_db.conn.execute(
-            "SELECT SUM(volume_usd) / 4.0 as avg_hourly FROM volume_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at < ?",
-            (coin, cutoff_5h, cutoff_1h),
-        ).fetchone()
-        avg_hourly = safe_float(row_avg["avg_hourly"]) if row_avg else 0
+        prior_4h = series.values("volume", cutoff_5h, cutoff_1h, hi_open=True)
+        avg_hourly = safe_float(sum(prior_4h) / 4.0)
 
         if avg_hourly <= 0:
             features["volume_vs_1h_avg_ratio"] = NEUTRAL_VALUES["volume_vs_1h_avg_ratio"]
@@ -633,7 +868,7 @@ def _compute_realized_vol(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
     candles_1m: list[dict] | None = None,
 ) -> None:
@@ -685,7 +920,7 @@ def _compute_cvd_directional(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """Compute cvd_ratio_30m and cvd_acceleration from trade_flow_history.
@@ -705,12 +940,7 @@ def _compute_cvd_directional(
         cutoff_30m = now - 1800
         cutoff_5m = now - 300
 
-        rows = data_layer_db.conn.execute(
-            "SELECT recorded_at, buy_volume_usd, sell_volume_usd "
-            "FROM trade_flow_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff_30m, now),
-        ).fetchall()
+        rows = series.window("flow", cutoff_30m, now)
 
         if not rows:
             features["cvd_ratio_30m"] = NEUTRAL_VALUES["cvd_ratio_30m"]
@@ -726,9 +956,9 @@ def _compute_cvd_directional(
         total_sell_5m = 0.0
 
         for r in rows:
-            buy = safe_float(r["buy_volume_usd"])
-            sell = safe_float(r["sell_volume_usd"])
-            recorded = float(r["recorded_at"])
+            buy = safe_float(r[1])
+            sell = safe_float(r[2])
+            recorded = float(r[0])
 
             total_buy_30m += buy
             total_sell_30m += sell
@@ -777,7 +1007,7 @@ def _compute_price_trend_1h(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
     candles_5m: list[dict] | None = None,
 ) -> None:
@@ -811,23 +1041,12 @@ def _compute_price_trend_1h(
                     return
 
         # Fallback: query candles_history table
-        row_now = data_layer_db.conn.execute(
-            "SELECT close FROM candles_history "
-            "WHERE coin = ? AND interval = '5m' AND open_time <= ? "
-            "ORDER BY open_time DESC LIMIT 1",
-            (coin, now),
-        ).fetchone()
-
-        row_1h = data_layer_db.conn.execute(
-            "SELECT close FROM candles_history "
-            "WHERE coin = ? AND interval = '5m' AND open_time <= ? "
-            "ORDER BY open_time DESC LIMIT 1",
-            (coin, now - 3600),
-        ).fetchone()
+        row_now = series.asof("candles_5m", now)
+        row_1h = series.asof("candles_5m", now - 3600)
 
         if row_now and row_1h:
-            close_now = safe_float(row_now["close"])
-            close_1h = safe_float(row_1h["close"])
+            close_now = safe_float(row_now[1])
+            close_1h = safe_float(row_1h[1])
             if close_1h > 0 and close_now > 0:
                 pct = (close_now - close_1h) / close_1h * 100
                 features["price_trend_1h"] = pct
@@ -894,7 +1113,7 @@ def _compute_oi_price_direction(
     avail: dict,
     raw_data: dict,
     snapshot: object,
-    data_layer_db: object,
+    series: object,
     now: float,
     candles_5m: list[dict] | None = None,
 ) -> None:
@@ -918,18 +1137,14 @@ def _compute_oi_price_direction(
 
         # Get OI from 1h ago
         cutoff_1h = now - 3600
-        row = data_layer_db.conn.execute(
-            "SELECT oi_usd FROM oi_history WHERE coin = ? "
-            "AND recorded_at <= ? ORDER BY recorded_at DESC LIMIT 1",
-            (coin, cutoff_1h),
-        ).fetchone()
+        row = series.asof("oi", cutoff_1h)
 
         if not row:
             features["oi_price_direction"] = NEUTRAL_VALUES["oi_price_direction"]
             avail["oi_price_dir_avail"] = 0
             return
 
-        oi_1h_ago = safe_float(row["oi_usd"])
+        oi_1h_ago = safe_float(row[1])
         if oi_1h_ago <= 0:
             features["oi_price_direction"] = NEUTRAL_VALUES["oi_price_direction"]
             avail["oi_price_dir_avail"] = 0
@@ -972,7 +1187,7 @@ def _compute_liq_imbalance(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """liq_imbalance_1h: (short_liq_usd - long_liq_usd) / total.
@@ -985,21 +1200,10 @@ def _compute_liq_imbalance(
     try:
         cutoff_1h = now - 3600
 
-        rows = data_layer_db.conn.execute(
-            "SELECT side, COALESCE(SUM(size_usd), 0) as total_usd "
-            "FROM liquidation_events "
-            "WHERE coin = ? AND occurred_at >= ? AND occurred_at <= ? "
-            "GROUP BY side",
-            (coin, cutoff_1h, now),
-        ).fetchall()
+        rows = series.window("liq", cutoff_1h, now)
 
-        long_liq = 0.0
-        short_liq = 0.0
-        for r in rows:
-            if r["side"] == "long":
-                long_liq = safe_float(r["total_usd"])
-            elif r["side"] == "short":
-                short_liq = safe_float(r["total_usd"])
+        long_liq = safe_float(sum(safe_float(r[2]) for r in rows if r[1] == "long"))
+        short_liq = safe_float(sum(safe_float(r[2]) for r in rows if r[1] == "short"))
 
         total = long_liq + short_liq
 
@@ -1066,7 +1270,7 @@ def _compute_realized_vol_4h(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
     candles_1m: list[dict] | None = None,
 ) -> None:
@@ -1166,7 +1370,7 @@ def _compute_volume_acceleration(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """volume_acceleration: recent_5m_volume / hourly_avg_5m_volume.
@@ -1177,19 +1381,10 @@ def _compute_volume_acceleration(
         cutoff_5m = now - 300
         cutoff_1h = now - 3600
 
-        row_5m = data_layer_db.conn.execute(
-            "SELECT SUM(volume_usd) as total FROM volume_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff_5m, now),
-        ).fetchone()
-        vol_5m = safe_float(row_5m["total"]) if row_5m else 0
+        vol_5m = safe_float(sum(series.values("volume", cutoff_5m, now)))
 
-        row_1h = data_layer_db.conn.execute(
-            "SELECT SUM(volume_usd) / 12.0 as avg_5m FROM volume_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at < ?",
-            (coin, cutoff_1h, cutoff_5m),
-        ).fetchone()
-        avg_5m = safe_float(row_1h["avg_5m"]) if row_1h else 0
+        prior_1h = series.values("volume", cutoff_1h, cutoff_5m, hi_open=True)
+        avg_5m = safe_float(sum(prior_1h) / 12.0)
 
         if avg_5m > 0 and vol_5m > 0:
             features["volume_acceleration"] = vol_5m / avg_5m
@@ -1209,7 +1404,7 @@ def _compute_cvd_1h(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """cvd_ratio_1h: (buy - sell) / (buy + sell) over 1 hour.
@@ -1219,20 +1414,15 @@ def _compute_cvd_1h(
     try:
         cutoff_1h = now - 3600
 
-        rows = data_layer_db.conn.execute(
-            "SELECT buy_volume_usd, sell_volume_usd "
-            "FROM trade_flow_history "
-            "WHERE coin = ? AND recorded_at >= ? AND recorded_at <= ?",
-            (coin, cutoff_1h, now),
-        ).fetchall()
+        rows = series.window("flow", cutoff_1h, now)
 
         if not rows:
             features["cvd_ratio_1h"] = NEUTRAL_VALUES["cvd_ratio_1h"]
             avail["cvd_1h_avail"] = 0
             return
 
-        total_buy = sum(safe_float(r["buy_volume_usd"]) for r in rows)
-        total_sell = sum(safe_float(r["sell_volume_usd"]) for r in rows)
+        total_buy = sum(safe_float(r[1]) for r in rows)
+        total_sell = sum(safe_float(r[2]) for r in rows)
         total = total_buy + total_sell
 
         if total < 1:
@@ -1254,7 +1444,7 @@ def _compute_price_trend_4h(
     features: dict,
     avail: dict,
     raw_data: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
     candles_5m: list[dict] | None = None,
 ) -> None:
@@ -1280,23 +1470,12 @@ def _compute_price_trend_4h(
                     return
 
         # Fallback: candles_history table
-        row_now = data_layer_db.conn.execute(
-            "SELECT close FROM candles_history "
-            "WHERE coin = ? AND interval = '5m' AND open_time <= ? "
-            "ORDER BY open_time DESC LIMIT 1",
-            (coin, now),
-        ).fetchone()
-
-        row_4h = data_layer_db.conn.execute(
-            "SELECT close FROM candles_history "
-            "WHERE coin = ? AND interval = '5m' AND open_time <= ? "
-            "ORDER BY open_time DESC LIMIT 1",
-            (coin, now - 4 * 3600),
-        ).fetchone()
+        row_now = series.asof("candles_5m", now)
+        row_4h = series.asof("candles_5m", now - 4 * 3600)
 
         if row_now and row_4h:
-            close_now = safe_float(row_now["close"])
-            close_4h = safe_float(row_4h["close"])
+            close_now = safe_float(row_now[1])
+            close_4h = safe_float(row_4h[1])
             if close_4h > 0 and close_now > 0:
                 features["price_trend_4h"] = (close_now - close_4h) / close_4h * 100
                 avail["price_trend_4h_avail"] = 1
@@ -1447,28 +1626,17 @@ def _compute_funding_velocity(
     coin: str,
     features: dict,
     avail: dict,
-    data_layer_db: object,
+    series: object,
     now: float,
 ) -> None:
     """funding_velocity: current_rate - rate_8h_ago. Direction of funding movement."""
     try:
-        current_row = data_layer_db.conn.execute(
-            "SELECT rate FROM funding_history "
-            "WHERE coin = ? AND recorded_at <= ? "
-            "ORDER BY recorded_at DESC LIMIT 1",
-            (coin, now),
-        ).fetchone()
-
-        past_row = data_layer_db.conn.execute(
-            "SELECT rate FROM funding_history "
-            "WHERE coin = ? AND recorded_at <= ? "
-            "ORDER BY recorded_at DESC LIMIT 1",
-            (coin, now - 8 * 3600),
-        ).fetchone()
+        current_row = series.asof("funding", now)
+        past_row = series.asof("funding", now - 8 * 3600)
 
         if current_row and past_row:
-            current_rate = safe_float(current_row["rate"])
-            past_rate = safe_float(past_row["rate"])
+            current_rate = safe_float(current_row[1])
+            past_rate = safe_float(past_row[1])
             features["funding_velocity"] = current_rate - past_rate
             avail["funding_velocity_avail"] = 1
         else:
@@ -15,6 +15,8 @@ import logging
 import time
 from dataclasses import dataclass
 
+import numpy as np
+
 log = logging.getLogger(__name__)
 
 
@@ -40,6 +42,10 @@ LABEL_WINDOWS = {
 ROE_CLIP_MIN = -20.0  # %
 ROE_CLIP_MAX = 20.0   # %
 
+# run_labeler() fetches candles once per run of snapshots spanning at most
+# this long (1 day of 5m candles + the 4h window stays well under API limits).
+LABEL_BATCH_SPAN = 86400
+
 # Minimum age (seconds) before a snapshot can be labeled.
 # Must be >= longest label window (4h = 14400s).
 MIN_LABEL_AGE = 14400
@@ -133,28 +139,50 @@ def compute_labels(
     if entry_price <= 0:
         return None
 
-    # Compute gross ROE for each window
-    result_data = {}
+    # Highest high / lowest low over each window's future candles
+    extremes = {}
     for window_name, window_seconds in LABEL_WINDOWS.items():
         window_end_ms = (entry_time + window_seconds) * 1000
         window_candles = [
             c for c in future_candles
             if c["t"] <= window_end_ms
         ]
+        extremes[window_name] = (
+            (max(c["h"] for c in window_candles),
+             min(c["l"] for c in window_candles))
+            if window_candles else None
+        )
 
-        if not window_candles:
+    return _label_result(snapshot_id, entry_price, extremes, leverage)
+
+
+def _label_result(
+    snapshot_id: str,
+    entry_price: float,
+    extremes: dict[str, tuple[float, float] | None],
+    leverage: int,
+) -> LabelResult:
+    """Build a LabelResult from each window's (highest high, lowest low).
+
+    Shared by compute_labels() and compute_labels_batch(), so both apply
+    the same arithmetic. A window maps to None when it has no candles.
+    """
+    # Gross ROE for each window
+    result_data = {}
+    for window_name, window_extremes in extremes.items():
+        if window_extremes is None:
             result_data[f"best_long_roe_{window_name}_gross"] = None
             result_data[f"best_short_roe_{window_name}_gross"] = None
             continue
 
+        best_high, best_low = window_extremes
+
         # Best long ROE: highest high in window
-        best_high = max(c["h"] for c in window_candles)
         long_roe_gross = (
             (best_high - entry_price) / entry_price * leverage * 100
         )
 
         # Best short ROE: lowest low in window
-        best_low = min(c["l"] for c in window_candles)
         short_roe_gross = (
             (1 - best_low / entry_price) * leverage * 100
         )
@@ -183,9 +211,7 @@ def compute_labels(
     )
 
     # MAE (30m window — worst drawdown before best exit)
-    mae_long, mae_short = _compute_mae(
-        future_candles, entry_price, entry_time, 1800, leverage,
-    )
+    mae_long, mae_short = _mae(entry_price, extremes.get("30m"), leverage)
 
     # Binary labels at various thresholds (for evaluation, not training)
     binary_long = _binary_labels(long_30m_net)
@@ -266,12 +292,27 @@ def _compute_mae(
     if not window_candles:
         return None, None
 
+    return _mae(
+        entry_price,
+        (max(c["h"] for c in window_candles), min(c["l"] for c in window_candles)),
+        leverage,
+    )
+
+
+def _mae(
+    entry_price: float,
+    window_extremes: tuple[float, float] | None,
+    leverage: int,
+) -> tuple[float | None, float | None]:
+    """Long/short MAE from a window's (highest high, lowest low)."""
+    if window_extremes is None:
+        return None, None
+    worst_high, worst_low = window_extremes
+
     # Long MAE: worst low relative to entry
-    worst_low = min(c["l"] for c in window_candles)
     mae_long = (worst_low - entry_price) / entry_price * leverage * 100
 
     # Short MAE: worst high relative to entry
-    worst_high = max(c["h"] for c in window_candles)
     mae_short = (1 - worst_high / entry_price) * leverage * 100
 
     return _clip_roe(mae_long), _clip_roe(mae_short)
@@ -294,6 +335,135 @@ def _binary_labels(net_roe: float | None) -> dict[str, int | None]:
     }
 
 
+# ─── Batch Labeling ──────────────────────────────────────────────────────────
+
+def _sparse_table(values: np.ndarray, op: np.ufunc) -> list[np.ndarray]:
+    """Level k holds op over values[i:i + 2**k] at index i."""
+    table = [values]
+    width = 1
+    while 2 * width <= len(values):
+        prev = table[-1]
+        table.append(op(prev[:-width], prev[width:]))
+        width *= 2
+    return table
+
+
+def _range_query(
+    table: list[np.ndarray], op: np.ufunc, lo: np.ndarray, hi: np.ndarray,
+) -> np.ndarray:
+    """op over values[lo:hi] for every (lo, hi) pair; NaN where the range is empty.
+
+    Two overlapping power-of-two blocks cover any range, so each query is
+    two lookups whatever the window length.
+    """
+    out = np.full(lo.shape, np.nan)
+    length = hi - lo
+    nonempty = length > 0
+    level = np.zeros(lo.shape, dtype=np.int64)
+    level[nonempty] = np.frexp(length[nonempty].astype(np.float64))[1] - 1
+    for k in np.unique(level[nonempty]).tolist():
+        mask = nonempty & (level == k)
+        out[mask] = op(table[k][lo[mask]], table[k][hi[mask] - (1 << k)])
+    return out
+
+
+class _CandleArrays:
+    """A sorted candle list as numpy columns with range max-high/min-low.
+
+    Windows are index ranges found by searchsorted on the open times (ms),
+    so the labels for every snapshot come from one vectorized pass rather
+    than a scan of the candle list per snapshot and window.
+    """
+
+    def __init__(self, candles: list[dict]) -> None:
+        self.t = np.array([c["t"] for c in candles], dtype=np.float64)
+        self._highs = _sparse_table(
+            np.array([c["h"] for c in candles], dtype=np.float64), np.maximum,
+        )
+        self._lows = _sparse_table(
+            np.array([c["l"] for c in candles], dtype=np.float64), np.minimum,
+        )
+
+    def after(self, ms: np.ndarray) -> np.ndarray:
+        """Index of the first candle with t > ms."""
+        return np.searchsorted(self.t, ms, "right")
+
+    def max_high(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        return _range_query(self._highs, np.maximum, lo, hi)
+
+    def min_low(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        return _range_query(self._lows, np.minimum, lo, hi)
+
+
+def compute_labels_batch(
+    snapshot_ids: list[str],
+    entry_times: list[float],
+    coin: str,
+    candles: list[dict],
+    leverage: int = DEFAULT_LEVERAGE,
+) -> list[LabelResult | None]:
+    """Label many snapshots of one coin against one candle list.
+
+    Gives the same labels as calling compute_labels() per snapshot with the
+    same candles, but finds every window's highest high and lowest low in
+    one vectorized pass over sparse tables instead of re-filtering the
+    candle list per snapshot and window.
+
+    Args:
+        snapshot_ids: Snapshot UUIDs, aligned with entry_times.
+        entry_times: Unix timestamps of the snapshots (any order).
+        coin: Coin symbol (for logging only).
+        candles: 5m candle dicts sorted by time ascending (HL-format keys),
+            covering every snapshot's entry candle through its +4h window.
+        leverage: Position leverage (default 20x).
+
+    Returns:
+        One LabelResult per snapshot, or None where data is insufficient.
+    """
+    arrays = _CandleArrays(candles)
+    times = np.asarray(entry_times, dtype=np.float64)
+    first_future = arrays.after(times * 1000)
+
+    extremes = {}
+    for window_name, window_seconds in LABEL_WINDOWS.items():
+        window_end = arrays.after((times + window_seconds) * 1000)
+        extremes[window_name] = (
+            (window_end > first_future).tolist(),
+            arrays.max_high(first_future, window_end).tolist(),
+            arrays.min_low(first_future, window_end).tolist(),
+        )
+
+    results = []
+    for i, (snapshot_id, first) in enumerate(zip(snapshot_ids, first_future.tolist())):
+        if len(candles) - first < 3:
+            log.debug(
+                "Insufficient candles for labeling %s at %s", coin, entry_times[i],
+            )
+            results.append(None)
+            continue
+        if first == 0:
+            log.debug("No entry candle found for %s at %s", coin, entry_times[i])
+            results.append(None)
+            continue
+
+        entry_price = candles[first - 1]["c"]
+        if entry_price <= 0:
+            results.append(None)
+            continue
+
+        results.append(_label_result(
+            snapshot_id,
+            entry_price,
+            {
+                window_name: (highs[i], lows[i]) if nonempty[i] else None
+                for window_name, (nonempty, highs, lows) in extremes.items()
+            },
+            leverage,
+        ))
+
+    return results
+
+
 # ─── Label Storage ───────────────────────────────────────────────────────────
 
 def save_labels(store: object, result: LabelResult) -> None:
@@ -303,8 +473,20 @@ def save_labels(store: object, result: LabelResult) -> None:
         store: SatelliteStore instance.
         result: LabelResult from compute_labels().
     """
+    save_labels_many(store, [result])
+
+
+def save_labels_many(store: object, results: list[LabelResult]) -> None:
+    """Write many label results in one transaction.
+
+    Args:
+        store: SatelliteStore instance.
+        results: LabelResults from compute_labels().
+    """
+    if not results:
+        return
     with store.write_lock:
-        store.conn.execute(
+        store.conn.executemany(
             """
             INSERT OR REPLACE INTO snapshot_labels (
                 label_id, snapshot_id,
@@ -317,24 +499,27 @@ def save_labels(store: object, result: LabelResult) -> None:
                 labeled_at, label_version
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (
-                f"lbl-{result.snapshot_id}",
-                result.snapshot_id,
-                result.best_long_roe_15m_gross,
-                result.best_long_roe_30m_gross,
-                result.best_long_roe_1h_gross,
-                result.best_long_roe_4h_gross,
-                result.best_short_roe_15m_gross,
-                result.best_short_roe_30m_gross,
-                result.best_short_roe_1h_gross,
-                result.best_short_roe_4h_gross,
-                result.best_long_roe_30m_net,
-                result.best_short_roe_30m_net,
-                result.worst_long_mae_30m,
-                result.worst_short_mae_30m,
-                result.labeled_at,
-                result.label_version,
-            ),
+            [
+                (
+                    f"lbl-{result.snapshot_id}",
+                    result.snapshot_id,
+                    result.best_long_roe_15m_gross,
+                    result.best_long_roe_30m_gross,
+                    result.best_long_roe_1h_gross,
+                    result.best_long_roe_4h_gross,
+                    result.best_short_roe_15m_gross,
+                    result.best_short_roe_30m_gross,
+                    result.best_short_roe_1h_gross,
+                    result.best_short_roe_4h_gross,
+                    result.best_long_roe_30m_net,
+                    result.best_short_roe_30m_net,
+                    result.worst_long_mae_30m,
+                    result.worst_short_mae_30m,
+                    result.labeled_at,
+                    result.label_version,
+                )
+                for result in results
+            ],
         )
         store.conn.commit()
 
@@ -350,11 +535,14 @@ def run_labeler(
     """Run the labeler on all unlabeled snapshots old enough to label.
 
     This is designed to run periodically (e.g., every hour via daemon or cron).
+    Snapshots are labeled in runs of up to LABEL_BATCH_SPAN seconds, each with
+    one candle fetch and one compute_labels_batch() call.
 
     Args:
         store: SatelliteStore instance.
         candle_fetcher: Callable(coin, start_time, end_time) -> list[dict].
-            Must return 5m candles covering the requested range.
+            Must return 5m candles covering the requested range, sorted
+            ascending.
         coins: List of coins to label.
         leverage: Default leverage for ROE computation.
 
@@ -364,33 +552,38 @@ def run_labeler(
     labeled = 0
 
     for coin in coins:
-        unlabeled = store.get_unlabeled_snapshots(coin)
+        unlabeled = sorted(
+            store.get_unlabeled_snapshots(coin), key=lambda s: s["created_at"],
+        )
 
-        for snap in unlabeled:
+        for group in _span_groups(unlabeled, LABEL_BATCH_SPAN):
+            first = group[0]["created_at"]
+            last = group[-1]["created_at"]
             try:
-                # Fetch candles covering snapshot time through +4h
-                start = snap["created_at"] - 300  # include entry candle
-                end = snap["created_at"] + LABEL_WINDOWS["4h"] + 300
+                # One fetch covering the group's entry candles through +4h
+                start = first - 300  # include entry candle
+                end = last + LABEL_WINDOWS["4h"] + 300
 
                 candles = candle_fetcher(coin, start, end)
                 if not candles:
                     continue
 
-                result = compute_labels(
-                    snapshot_id=snap["snapshot_id"],
-                    entry_time=snap["created_at"],
+                results = compute_labels_batch(
+                    snapshot_ids=[snap["snapshot_id"] for snap in group],
+                    entry_times=[snap["created_at"] for snap in group],
                     coin=coin,
                     candles=candles,
                     leverage=leverage,
                 )
+                results = [r for r in results if r]
 
-                if result:
-                    save_labels(store, result)
-                    labeled += 1
+                save_labels_many(store, results)
+                labeled += len(results)
 
             except Exception:
                 log.exception(
-                    "Labeling failed for snapshot %s", snap["snapshot_id"],
+                    "Labeling failed for %d %s snapshots from %s",
+                    len(group), coin, first,
                 )
 
     if labeled:
@@ -399,6 +592,17 @@ def run_labeler(
     return labeled
 
 
+def _span_groups(snapshots: list, span: float) -> list[list]:
+    """Split time-sorted snapshots into runs covering at most span seconds."""
+    groups: list[list] = []
+    for snap in snapshots:
+        if groups and snap["created_at"] - groups[-1][0]["created_at"] <= span:
+            groups[-1].append(snap)
+        else:
+            groups.append([snap])
+    return groups
+
+
 # ─── Simulated Exit Training Data ────────────────────────────────────────────
 
 @dataclass
@@ -450,88 +654,119 @@ def generate_simulated_exits(
     Returns:
         List of SimulatedExit rows for both long and short.
     """
-    entry_ms = entry_time * 1000
-    future_candles = [c for c in candles if c["t"] > entry_ms]
-    if len(future_candles) < 2:
-        return []
+    return generate_simulated_exits_batch(
+        [snapshot_id], [entry_time], coin, candles,
+        leverage, checkpoint_interval, hold_window,
+    )
 
-    entry_candle = _find_entry_candle(candles, entry_time)
-    if entry_candle is None:
-        return []
-    entry_price = entry_candle["c"]
-    if entry_price <= 0:
-        return []
 
-    fee_roe = FEE_ROUND_TRIP * leverage * 100
-    results = []
+def generate_simulated_exits_batch(
+    snapshot_ids: list[str],
+    entry_times: list[float],
+    coin: str,
+    candles: list[dict],
+    leverage: int = DEFAULT_LEVERAGE,
+    checkpoint_interval: int = 300,
+    hold_window: int = 1800,
+) -> list[SimulatedExit]:
+    """Simulated exits for many snapshots of one coin in one pass.
 
-    for side in ("long", "short"):
-        for checkpoint_offset in range(
-            checkpoint_interval, hold_window + 1, checkpoint_interval,
-        ):
-            checkpoint_time = entry_time + checkpoint_offset
+    The best remaining high/low after every checkpoint of every snapshot
+    comes from one vectorized range query (see _CandleArrays). Rows are
+    grouped per snapshot in input order, each as generate_simulated_exits()
+    returns them.
 
-            # Find candle at checkpoint
-            checkpoint_candle = _find_entry_candle(
-                future_candles, checkpoint_time,
-            )
-            if checkpoint_candle is None:
-                continue
+    Args:
+        snapshot_ids: Source snapshot UUIDs, aligned with entry_times.
+        entry_times: When each simulated trade opens.
+        coin: Coin symbol.
+        candles: 5m candles sorted ascending, covering every entry candle
+            through its hold window.
+        leverage: Position leverage.
+        checkpoint_interval: Seconds between exit decision points.
+        hold_window: Total time window for exit simulation.
 
-            checkpoint_price = checkpoint_candle["c"]
+    Returns:
+        SimulatedExit rows for both sides of every snapshot.
+    """
+    arrays = _CandleArrays(candles)
+    times = np.asarray(entry_times, dtype=np.float64)
+    offsets = np.array(
+        range(checkpoint_interval, hold_window + 1, checkpoint_interval),
+        dtype=np.float64,
+    )
+    checkpoint_times = times[:, None] + offsets[None, :]
 
-            # Current ROE at checkpoint (fee-adjusted — net ROE)
-            if side == "long":
-                current_roe = (
-                    (checkpoint_price - entry_price)
-                    / entry_price * leverage * 100 - fee_roe
-                )
-            else:
-                current_roe = (
-                    (1 - checkpoint_price / entry_price)
-                    * leverage * 100 - fee_roe
-                )
+    first_future = arrays.after(times * 1000).tolist()
+    # Candles strictly after each checkpoint, up to the end of the hold window
+    remaining_start = arrays.after(checkpoint_times * 1000)
+    remaining_end = np.broadcast_to(
+        arrays.after((times + hold_window) * 1000)[:, None], remaining_start.shape,
+    )
+    has_remaining = (remaining_end > remaining_start).tolist()
+    best_highs = arrays.max_high(remaining_start, remaining_end).tolist()
+    best_lows = arrays.min_low(remaining_start, remaining_end).tolist()
+    remaining_start = remaining_start.tolist()
+    checkpoint_times = checkpoint_times.tolist()
+
+    fee_roe = FEE_ROUND_TRIP * leverage * 100
+    results = []
+
+    for i, (snapshot_id, first) in enumerate(zip(snapshot_ids, first_future)):
+        if len(candles) - first < 2 or first == 0:
+            continue
+        entry_price = candles[first - 1]["c"]
+        if entry_price <= 0:
+            continue
+
+        for side in ("long", "short"):
+            for j, checkpoint_time in enumerate(checkpoint_times[i]):
+                # Candle at checkpoint (must be a future candle)
+                checkpoint_index = remaining_start[i][j] - 1
+                if checkpoint_index < first:
+                    continue
 
-            # Best remaining ROE (from checkpoint to end of window)
-            checkpoint_ms = checkpoint_time * 1000
-            window_end_ms = (entry_time + hold_window) * 1000
-            remaining_candles = [
-                c for c in future_candles
-                if checkpoint_ms < c["t"] <= window_end_ms
-            ]
+                checkpoint_price = candles[checkpoint_index]["c"]
 
-            if remaining_candles:
+                # Current ROE at checkpoint (fee-adjusted — net ROE)
                 if side == "long":
-                    best_remaining_high = max(
-                        c["h"] for c in remaining_candles
-                    )
-                    remaining_roe = (
-                        (best_remaining_high - entry_price)
+                    current_roe = (
+                        (checkpoint_price - entry_price)
                         / entry_price * leverage * 100 - fee_roe
                     )
                 else:
-                    best_remaining_low = min(
-                        c["l"] for c in remaining_candles
-                    )
-                    remaining_roe = (
-                        (1 - best_remaining_low / entry_price)
+                    current_roe = (
+                        (1 - checkpoint_price / entry_price)
                         * leverage * 100 - fee_roe
                     )
-            else:
-                remaining_roe = current_roe  # no future data = stay flat
-
-            should_hold = 1 if remaining_roe > current_roe else 0
-
-            results.append(SimulatedExit(
-                snapshot_id=snapshot_id,
-                coin=coin,
-                side=side,
-                entry_price=entry_price,
-                checkpoint_time=checkpoint_time,
-                checkpoint_price=checkpoint_price,
-                current_roe=_clip_roe(current_roe),
-                remaining_roe=_clip_roe(remaining_roe),
-                should_hold=should_hold,
-            ))
+
+                # Best remaining ROE (from checkpoint to end of window)
+                if has_remaining[i][j]:
+                    if side == "long":
+                        remaining_roe = (
+                            (best_highs[i][j] - entry_price)
+                            / entry_price * leverage * 100 - fee_roe
+                        )
+                    else:
+                        remaining_roe = (
+                            (1 - best_lows[i][j] / entry_price)
+                            * leverage * 100 - fee_roe
+                        )
+                else:
+                    remaining_roe = current_roe  # no future data = stay flat
+
+                should_hold = 1 if remaining_roe > current_roe else 0
+
+                results.append(SimulatedExit(
+                    snapshot_id=snapshot_id,
+                    coin=coin,
+                    side=side,
+                    entry_price=entry_price,
+                    checkpoint_time=checkpoint_time,
+                    checkpoint_price=checkpoint_price,
+                    current_roe=_clip_roe(current_roe),
+                    remaining_roe=_clip_roe(remaining_roe),
+                    should_hold=should_hold,
+                ))
 
     return results
@@ -66,28 +66,38 @@ class SatelliteStore:
         Args:
             result: FeatureResult from compute_features().
         """
-        f = result.features
-        a = result.availability
-
-        values = (
-            result.snapshot_id, result.created_at, result.coin,
-            *(f.get(name) for name in FEATURE_NAMES),
-            *(a.get(col, 1) for col in AVAIL_COLUMNS),
-            result.schema_version,
-            "satellite",
-        )
+        self.save_snapshots([result])
 
-        with self.write_lock:
-            self._conn.execute(_INSERT_SQL, values)
+    def save_snapshots(self, results: list[FeatureResult]) -> None:
+        """Write many feature snapshots in one transaction (backfill).
 
-            # Store raw data if available
-            if result.raw_data is not None:
-                self._conn.execute(
+        Args:
+            results: FeatureResults from compute_features_batch().
+        """
+        values = [
+            (
+                r.snapshot_id, r.created_at, r.coin,
+                *(r.features.get(name) for name in FEATURE_NAMES),
+                *(r.availability.get(col, 1) for col in AVAIL_COLUMNS),
+                r.schema_version,
+                "satellite",
+            )
+            for r in results
+        ]
+        # Store raw data if available
+        raw = [
+            (r.snapshot_id, json.dumps(r.raw_data, default=str))
+            for r in results if r.raw_data is not None
+        ]
+
+        with self.write_lock:
+            self._conn.executemany(_INSERT_SQL, values)
+            if raw:
+                self._conn.executemany(
                     "INSERT OR IGNORE INTO raw_snapshots (snapshot_id, raw_json) "
                     "VALUES (?, ?)",
-                    (result.snapshot_id, json.dumps(result.raw_data, default=str)),
+                    raw,
                 )
-
             self._conn.commit()
 
     def save_prediction(
@@ -0,0 +1,102 @@
+"""Tests for the streamed, vectorized node-fills aggregation in artemis/pipeline.py."""
+
+import sqlite3
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from satellite.artemis import pipeline
+from satellite.artemis.parallel import STAGING_SCHEMA
+from satellite.artemis.pipeline import ArtemisConfig, _process_node_fills_parquet
+
+DAY = "2025-09-01"
+T0 = 1_756_684_800  # 2025-09-01 00:00 UTC, the OI anchor
+S = T0 + 300        # fills start in the second 5m bucket
+
+
+class _DB:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(STAGING_SCHEMA)
+        self.conn.execute("INSERT INTO oi_history VALUES ('BTC', ?, 1000000.0)", (T0,))
+        self.write_lock = threading.Lock()
+
+
+def _write(path, fills, time_type=pa.timestamp("ms", tz="UTC")):
+    cols = ("coin", "px", "sz", "side", "crossed", "time", "dir", "user")
+    data = {c: [f[i] for f in fills] for i, c in enumerate(cols)}
+    data["time"] = pa.array(data["time"], type=pa.int64()).cast(time_type)
+    pq.write_table(pa.table(data), path, row_group_size=3)
+    return path
+
+
+def _fill(coin, px, sz, side, offset_ms, dir_val="Open Long", crossed=True, user="0xa"):
+    return (coin, px, sz, side, crossed, S * 1000 + offset_ms, dir_val, user)
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(pipeline, "_FILL_BATCH_ROWS", 2)
+
+
+def test_aggregates_across_batches_and_files(tmp_path, small_batches):
+    first = _write(tmp_path / "00.parquet", [
+        _fill("BTC", 100.0, 1.0, "B", 10_000),
+        _fill("BTC", 105.0, 2.0, "A", 5_000),                   # earliest → open
+        _fill("BTC", 999.0, 1.0, "B", 5_000, crossed=False),    # maker side: no volume
+        _fill("BTC", 90.0, 1.0, "A", 70_000, "Close Long"),
+        _fill("BTC", 95.0, 2.0, "A", 70_000, "Liq Long"),       # last on a tie → close
+    ])
+    second = _write(tmp_path / "01.parquet", [
+        _fill("BTC", 101.0, 1.0, "B", 5_000),                   # ties the open, seen later
+        _fill("ETH", 50.0, 0.5, "B", 400_000, "Liq Short"),     # below the $100 dust filter
+        _fill("BTC", 1.0, 1.0, "B", -86_400_000 * 365 * 3),     # outside the sane range
+    ])
+    db = _DB()
+    trades, profiles, liqs = _process_node_fills_parquet(
+        [second, first], db, DAY, ArtemisConfig(coins=["BTC"]), skip_profiling=True,
+    )
+    assert (trades, profiles, liqs) == (7, 0, 1)
+
+    candles = {
+        (r["coin"], r["interval"], r["open_time"]): tuple(r)[3:]
+        for r in db.conn.execute("SELECT * FROM candles_history")
+    }
+    assert candles[("BTC", "5m", S)] == (105.0, 105.0, 90.0, 95.0, 7.0)
+    assert candles[("BTC", "1m", S)] == (105.0, 105.0, 100.0, 100.0, 4.0)
+    assert candles[("BTC", "1m", S + 60)] == (90.0, 95.0, 90.0, 95.0, 3.0)
+    assert candles[("ETH", "5m", S + 300)] == (50.0, 50.0, 50.0, 50.0, 0.5)
+
+    assert tuple(db.conn.execute(
+        "SELECT buy_volume_usd, sell_volume_usd FROM trade_flow_history "
+        "WHERE coin = 'BTC' AND recorded_at = ?", (S,)).fetchone()) == (201.0, 490.0)
+    assert db.conn.execute(
+        "SELECT volume_usd FROM volume_history WHERE coin = 'BTC'").fetchone()[0] == 691.0
+
+    assert [tuple(r) for r in db.conn.execute(
+        "SELECT coin, occurred_at, side, size_usd, price FROM liquidation_events")] == [
+        ("BTC", S + 70.0, "long", 190.0, 95.0),
+    ]
+    # Anchor + opens (100 + 210 + 101) - closes/liqs (90 + 190)
+    assert db.conn.execute(
+        "SELECT oi_usd FROM oi_history WHERE coin = 'BTC' AND recorded_at = ?", (S,),
+    ).fetchone()[0] == 1_000_131.0
+
+
+def test_misencoded_nanosecond_timestamps_read_as_ms(tmp_path):
+    # Early Artemis files store the ms value in a timestamp[ns] column
+    path = _write(tmp_path / "early.parquet", [
+        _fill("BTC", 100.0, 1.0, "B", 61_500),
+        _fill("BTC", 100.0, 1.0, "A", 62_000, "Liq Short"),
+    ], time_type=pa.timestamp("ns"))
+    db = _DB()
+    assert _process_node_fills_parquet(
+        [path], db, DAY, ArtemisConfig(coins=["BTC"]), skip_profiling=True,
+    ) == (2, 0, 1)
+    assert db.conn.execute(
+        "SELECT occurred_at FROM liquidation_events").fetchone()[0] == S + 62.0
+    assert db.conn.execute(
+        "SELECT open_time FROM candles_history WHERE interval = '1m'").fetchone()[0] == S + 60
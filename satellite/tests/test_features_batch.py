@@ -0,0 +1,220 @@
+"""Parity tests: compute_features_batch() vs per-timestamp compute_features()."""
+
+import random
+import sqlite3
+import time
+
+from satellite.features import (
+    FEATURE_NAMES,
+    _history_snapshot,
+    _SqlSeries,
+    compute_features,
+    compute_features_batch,
+)
+
+T0 = 1_699_920_000.0  # 2023-11-14 00:00 UTC
+
+SCHEMA = """
+CREATE TABLE funding_history (coin TEXT, recorded_at REAL, rate REAL,
+    PRIMARY KEY (coin, recorded_at));
+CREATE TABLE oi_history (coin TEXT, recorded_at REAL, oi_usd REAL,
+    PRIMARY KEY (coin, recorded_at));
+CREATE TABLE volume_history (coin TEXT, recorded_at REAL, volume_usd REAL,
+    PRIMARY KEY (coin, recorded_at));
+CREATE TABLE liquidation_events (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    coin TEXT, occurred_at REAL, side TEXT, size_usd REAL, price REAL, address TEXT);
+CREATE TABLE trade_flow_history (coin TEXT, recorded_at REAL,
+    buy_volume_usd REAL DEFAULT 0, sell_volume_usd REAL DEFAULT 0,
+    PRIMARY KEY (coin, recorded_at));
+CREATE TABLE candles_history (coin TEXT, interval TEXT, open_time REAL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (coin, interval, open_time));
+"""
+
+
+class _DB:
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _candles(rng, start, end, step):
+    out, px = [], 30_000.0
+    for t in range(int(start), int(end), step):
+        o = px
+        px *= 1 + rng.gauss(0, 0.002)
+        hi = max(o, px) * (1 + rng.random() * 0.001)
+        lo = min(o, px) * (1 - rng.random() * 0.001)
+        out.append({"t": float(t) * 1000, "o": o, "h": hi, "l": lo, "c": px, "v": rng.random()})
+    return out
+
+
+def _make_db(seed=0):
+    """A data-layer DB with ~8 days of irregular, gappy history for BTC."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    end = T0 + 86400
+    conn.executemany(
+        "INSERT INTO funding_history VALUES ('BTC', ?, ?)",
+        [(T0 - 32 * 86400 + h * 3600 + rng.random(), rng.gauss(1e-4, 5e-5))
+         for h in range(33 * 24)],
+    )
+    conn.executemany(
+        "INSERT INTO oi_history VALUES ('BTC', ?, ?)",
+        [(t + rng.random() * 30, 1e9 * (1 + rng.gauss(0, 0.01)))
+         for t in range(int(T0 - 8 * 86400), int(end), 300) if rng.random() > 0.05],
+    )
+    conn.executemany(
+        "INSERT INTO volume_history VALUES ('BTC', ?, ?)",
+        [(float(t), rng.uniform(1e5, 1e7))
+         for t in range(int(T0 - 6 * 3600), int(end), 300) if rng.random() > 0.1],
+    )
+    liqs = []
+    for _ in range(600):
+        t = T0 - 5 * 3600 + rng.random() * (86400 + 5 * 3600)
+        for _ in range(rng.choice((1, 1, 1, 3))):  # same-timestamp bursts
+            liqs.append((t, rng.choice(("long", "short")), rng.uniform(50, 5e5)))
+    conn.executemany(
+        "INSERT INTO liquidation_events (coin, occurred_at, side, size_usd, price) "
+        "VALUES ('BTC', ?, ?, ?, 1)",
+        liqs,
+    )
+    conn.executemany(
+        "INSERT INTO trade_flow_history VALUES ('BTC', ?, ?, ?)",
+        [(float(t), rng.uniform(0, 1e6), rng.uniform(0, 1e6))
+         for t in range(int(T0 - 2 * 3600), int(end), 300) if rng.random() > 0.1],
+    )
+    c5 = _candles(rng, T0 - 6 * 3600, end, 300)
+    c1 = _candles(rng, T0 - 6 * 3600, end, 60)
+    conn.executemany(
+        "INSERT INTO candles_history VALUES ('BTC', '5m', ?, ?, ?, ?, ?, ?)",
+        [(c["t"] / 1000, c["o"], c["h"], c["l"], c["c"], c["v"]) for c in c5],
+    )
+    conn.commit()
+    return _DB(conn), c5, c1
+
+
+def _timestamps():
+    # 5-minute marks (each lands exactly on a candle open), plus off-grid times
+    return [T0 + k * 300 for k in range(288)] + [T0 + 17.25, T0 + 3599.5, T0 + 43210.125]
+
+
+def _as_bits(result):
+    return (
+        [(k, float(v).hex()) for k, v in result.features.items()],
+        sorted(result.availability.items()),
+        [(k, float(v).hex()) for k, v in sorted(result.raw_data.items())],
+    )
+
+
+def _single(db, ts, snapshot, c5, c1):
+    ms = ts * 1000
+    return compute_features(
+        coin="BTC", snapshot=snapshot, data_layer_db=db, timestamp=ts,
+        candles_5m=None if c5 is None else [c for c in c5 if c["t"] <= ms],
+        candles_1m=None if c1 is None else [c for c in c1 if c["t"] <= ms],
+    )
+
+
+def test_batch_is_bit_identical_to_single_timestamp_path():
+    db, c5, c1 = _make_db()
+    times = _timestamps()
+    batch = compute_features_batch("BTC", times, db, candles_5m=c5, candles_1m=c1)
+
+    assert len(batch) == len(times)
+    for ts, b in zip(times, batch):
+        snap = _history_snapshot("BTC", _SqlSeries(db, "BTC"), ts)
+        s = _single(db, ts, snap, c5, c1)
+        assert b.created_at == ts and set(b.features) == set(FEATURE_NAMES)
+        assert _as_bits(b) == _as_bits(s), ts
+    # The fixture exercises the computers, not just their neutral fallbacks
+    assert all(sum(b.availability.values()) > 10 for b in batch[60:])
+
+
+def test_explicit_snapshots_and_no_candles():
+    db, _, _ = _make_db(seed=1)
+    times = _timestamps()[::7]
+
+    class Snap:
+        def __init__(self, i):
+            self.oi_usd = {"BTC": 1e9 + i * 1e6}
+            self.funding = {"BTC": 1e-4 * (i % 5 - 2)}
+
+    snaps = [Snap(i) for i in range(len(times))]
+    batch = compute_features_batch("BTC", times, db, snapshots=snaps)
+    for ts, snap, b in zip(times, snaps, batch):
+        assert _as_bits(b) == _as_bits(_single(db, ts, snap, None, None))
+
+
+def test_missing_tables_fall_back_like_failed_queries():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE funding_history (coin TEXT, recorded_at REAL, rate REAL)")
+    conn.execute("INSERT INTO funding_history VALUES ('BTC', ?, 0.0001)", (T0 - 3600,))
+    db = _DB(conn)
+    times = [T0, T0 + 300]
+    batch = compute_features_batch("BTC", times, db)
+    for ts, b in zip(times, batch):
+        snap = _history_snapshot("BTC", _SqlSeries(db, "BTC"), ts)
+        assert _as_bits(b) == _as_bits(_single(db, ts, snap, None, None))
+    assert batch[0].features["funding_rate_raw"] == 0.0001
+    assert batch[0].availability["oi_7d_avail"] == 0
+
+
+def _partitioned_db(days=84, width=7 * 86400, step=60):
+    """The data-layer's partitioned layout: one table per week, overflow, view."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE history_partitions (name TEXT PRIMARY KEY, "
+                 "series TEXT NOT NULL, lo REAL NOT NULL, hi REAL NOT NULL)")
+    conn.execute("CREATE INDEX idx_hp_series ON history_partitions(series, lo)")
+    ddl = "coin TEXT, recorded_at REAL, rate REAL, PRIMARY KEY (coin, recorded_at)"
+    first = T0 - days * 86400
+    names = []
+    for lo in range(int(first), int(T0), width):
+        name = f"funding_history_p{lo}"
+        names.append(name)
+        conn.execute(f"CREATE TABLE {name} ({ddl})")
+        conn.execute("INSERT INTO history_partitions VALUES (?, 'funding_history', ?, ?)",
+                     (name, lo, lo + width))
+        conn.executemany(f"INSERT INTO {name} VALUES ('BTC', ?, 1e-4)",
+                         [(float(t),) for t in range(lo, lo + width, step)])
+    conn.execute(f"CREATE TABLE funding_history_overflow ({ddl})")
+    conn.executemany("INSERT INTO funding_history_overflow VALUES ('BTC', ?, 2e-4)",
+                     [(first - 86400,), (T0 + 3600,)])
+    conn.execute("CREATE VIEW funding_history AS " + " UNION ALL ".join(
+        f"SELECT * FROM {n}" for n in names + ["funding_history_overflow"]))
+    conn.commit()
+    return _DB(conn), first
+
+
+def test_asof_walks_partitions_newest_first():
+    db, first = _partitioned_db(days=28, step=3600)
+    conn = db.conn
+    series = _SqlSeries(db, "BTC")
+    view = ("SELECT recorded_at, rate FROM funding_history WHERE coin = 'BTC' "
+            "AND recorded_at <= ? ORDER BY recorded_at DESC LIMIT 1")
+    for t in (first - 2 * 86400, first - 1, first, first + 7 * 86400 - 0.5,
+              T0 - 1, T0, T0 + 3599, T0 + 3600, T0 + 86400):
+        got = series.asof("funding", t)
+        want = conn.execute(view, (t,)).fetchone()
+        assert (got and tuple(got)) == (want and tuple(want)), t
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert series.asof("funding", T0 - 1)[0] == T0 - 3600
+    conn.set_trace_callback(None)
+    # The registry, then only the newest partition; never the view
+    assert len(statements) == 2 and "funding_history_p" in statements[1]
+
+
+def test_asof_latency_on_partitioned_history():
+    db, _ = _partitioned_db()  # 12 weekly partitions, one row a minute
+    series = _SqlSeries(db, "BTC")
+    times = [T0 - k * 3600.5 for k in range(200)]
+    start = time.perf_counter()
+    for t in times:
+        assert series.asof("funding", t) is not None
+    # ~10µs per lookup, independent of how many partitions the view spans
+    assert (time.perf_counter() - start) / len(times) < 1e-3
@@ -0,0 +1,148 @@
+"""Parity tests: batch labeler vs per-snapshot compute_labels()/exit simulation."""
+
+import random
+from dataclasses import asdict
+
+import pytest
+
+from satellite.features import FEATURE_NAMES, NEUTRAL_VALUES, FeatureResult
+from satellite.labeler import (
+    FEE_ROUND_TRIP,
+    compute_labels,
+    compute_labels_batch,
+    generate_simulated_exits,
+    generate_simulated_exits_batch,
+    run_labeler,
+)
+from satellite.store import SatelliteStore
+
+T0 = 1_699_920_000.0
+
+
+def _candles(n=600, seed=0):
+    """Sorted HL-format 5m candles with random gaps."""
+    rng = random.Random(seed)
+    out, px = [], 30_000.0
+    for k in range(n):
+        if rng.random() < 0.08:
+            continue
+        o = px
+        px *= 1 + rng.gauss(0, 0.004)
+        out.append({
+            "t": (T0 + k * 300) * 1000, "o": o,
+            "h": max(o, px) * (1 + rng.random() * 0.002),
+            "l": min(o, px) * (1 - rng.random() * 0.002),
+            "c": px, "v": 1.0,
+        })
+    return out
+
+
+def _entry_times(n_candles=600, seed=0):
+    # On-grid, off-grid, before the first candle and past the last one
+    rng = random.Random(seed)
+    grid = [T0 + k * 300 for k in range(-2, n_candles + 2)]
+    return grid + [T0 - 900 + rng.random() * (n_candles + 3) * 300 for _ in range(500)]
+
+
+def _fields(label):
+    return label and {k: v for k, v in asdict(label).items() if k != "labeled_at"}
+
+
+@pytest.mark.parametrize("leverage", [20, 7])
+def test_labels_match_per_snapshot_path(leverage):
+    candles = _candles()
+    times = _entry_times()
+    ids = [f"snap-{i}" for i in range(len(times))]
+    batch = compute_labels_batch(ids, times, "BTC", candles, leverage=leverage)
+
+    assert len(batch) == len(times)
+    for sid, t, b in zip(ids, times, batch):
+        assert _fields(b) == _fields(compute_labels(sid, t, "BTC", candles, leverage)), t
+    assert sum(b is None for b in batch) < 20  # only near the ends of the candles
+
+
+def test_labels_without_candles():
+    assert compute_labels_batch(["a", "b"], [T0, T0 + 300], "BTC", []) == [None, None]
+
+
+def _reference_exits(snapshot_id, entry_time, candles, leverage, interval, window):
+    """The straightforward per-checkpoint scan the batch version replaces."""
+    entry_ms = entry_time * 1000
+    future = [c for c in candles if c["t"] > entry_ms]
+    past = [c for c in candles if c["t"] <= entry_ms]
+    if len(future) < 2 or not past or past[-1]["c"] <= 0:
+        return []
+    entry = past[-1]["c"]
+    fee = FEE_ROUND_TRIP * leverage * 100
+    rows = []
+    for side in ("long", "short"):
+        for offset in range(interval, window + 1, interval):
+            cp = entry_time + offset
+            at = [c for c in future if c["t"] <= cp * 1000]
+            if not at:
+                continue
+            price = at[-1]["c"]
+            rest = [c for c in future if cp * 1000 < c["t"] <= (entry_time + window) * 1000]
+            if side == "long":
+                current = (price - entry) / entry * leverage * 100 - fee
+                remaining = ((max(c["h"] for c in rest) - entry) / entry * leverage * 100 - fee
+                             if rest else current)
+            else:
+                current = (1 - price / entry) * leverage * 100 - fee
+                remaining = ((1 - min(c["l"] for c in rest) / entry) * leverage * 100 - fee
+                             if rest else current)
+            rows.append((side, cp, price, current, remaining, int(remaining > current)))
+    return rows
+
+
+@pytest.mark.parametrize("interval,window", [(300, 1800), (60, 600), (900, 3600)])
+def test_simulated_exits_match_reference(interval, window):
+    candles = _candles(n=300, seed=1)
+    times = _entry_times(300, seed=1)
+    ids = [f"snap-{i}" for i in range(len(times))]
+    batch = generate_simulated_exits_batch(ids, times, "BTC", candles, 20, interval, window)
+
+    expected = []
+    for sid, t in zip(ids, times):
+        for side, cp, price, current, remaining, hold in _reference_exits(
+            sid, t, candles, 20, interval, window,
+        ):
+            expected.append((sid, side, cp, price, min(20.0, max(-20.0, current)),
+                             min(20.0, max(-20.0, remaining)), hold))
+    got = [(e.snapshot_id, e.side, e.checkpoint_time, e.checkpoint_price,
+            e.current_roe, e.remaining_roe, e.should_hold) for e in batch]
+    assert got == expected
+
+    single = generate_simulated_exits(ids[5], times[5], "BTC", candles, 20, interval, window)
+    assert single == [e for e in batch if e.snapshot_id == ids[5]]
+
+
+def test_run_labeler_fetches_once_per_day_of_snapshots():
+    candles = _candles(n=700)
+    store = SatelliteStore(":memory:")
+    store.connect()
+    store.save_snapshots([
+        FeatureResult(
+            snapshot_id=f"s{k}", created_at=T0 + k * 300, coin="BTC",
+            features={n: NEUTRAL_VALUES[n] for n in FEATURE_NAMES},
+            availability={}, raw_data=None, schema_version=1,
+        )
+        for k in range(0, 500, 3)
+    ])
+    snaps = store.get_unlabeled_snapshots("BTC")
+    fetches = []
+
+    def fetcher(coin, start, end):
+        fetches.append((start, end))
+        return [c for c in candles if start * 1000 <= c["t"] <= end * 1000]
+
+    labeled = run_labeler(store, fetcher, ["BTC"])
+
+    # The snapshots span ~1.7 days: two runs, one candle fetch each
+    assert len(fetches) == 2
+    expected = [compute_labels(s["snapshot_id"], s["created_at"], "BTC", candles) for s in snaps]
+    assert labeled == sum(1 for r in expected if r)
+    stored = dict(store.conn.execute(
+        "SELECT snapshot_id, best_long_roe_1h_gross FROM snapshot_labels",
+    ).fetchall())
+    assert stored == {r.snapshot_id: r.best_long_roe_1h_gross for r in expected if r}
@@ -0,0 +1,62 @@
+"""Tests for reconstruct_day's bisect-indexed lookups and batched saves."""
+
+import random
+
+from satellite.artemis.reconstruct import _TimeIndex
+from satellite.features import FEATURE_NAMES, NEUTRAL_VALUES, FeatureResult
+from satellite.labeler import compute_labels_batch, save_labels_many
+from satellite.store import SatelliteStore
+
+T0 = 1_699_920_000.0
+
+
+def _candles(n=400, seed=0, gaps=True):
+    rng = random.Random(seed)
+    out, px = [], 30_000.0
+    for k in range(n):
+        if gaps and rng.random() < 0.05:
+            continue
+        o = px
+        px *= 1 + rng.gauss(0, 0.003)
+        out.append({
+            "t": (T0 + k * 300) * 1000, "o": o,
+            "h": max(o, px) * 1.001, "l": min(o, px) * 0.999, "c": px, "v": 1.0,
+        })
+    return out
+
+
+def test_at_or_before_uses_record_units():
+    funding = _TimeIndex([{"time": T0 + h * 3600, "rate": h} for h in range(5)],
+                         key="time", scale=1)
+    assert funding.at_or_before(T0 - 1) is None
+    assert funding.at_or_before(T0 + 3600)["rate"] == 1
+    assert funding.at_or_before(T0 + 7199)["rate"] == 1
+    candles = _TimeIndex(_candles(10, gaps=False))
+    assert candles.at_or_before(T0 + 650)["t"] == (T0 + 600) * 1000
+
+
+def test_batched_saves_round_trip():
+    store = SatelliteStore(":memory:")
+    store.connect()
+    candles = _candles(120, gaps=False)
+    snaps = [
+        FeatureResult(
+            snapshot_id=f"snap-{k}", created_at=T0 + k * 300, coin="BTC",
+            features={n: NEUTRAL_VALUES[n] for n in FEATURE_NAMES},
+            availability={}, raw_data={"source": "test"} if k % 2 else None,
+            schema_version=1,
+        )
+        for k in range(40)
+    ]
+    store.save_snapshots(snaps)
+    labels = compute_labels_batch(
+        [s.snapshot_id for s in snaps], [s.created_at for s in snaps], "BTC", candles,
+    )
+    assert all(labels)
+    save_labels_many(store, labels)
+    save_labels_many(store, [])
+
+    conn = store.conn
+    assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 40
+    assert conn.execute("SELECT COUNT(*) FROM raw_snapshots").fetchone()[0] == 20
+    assert conn.execute("SELECT COUNT(*) FROM snapshot_labels").fetchone()[0] == 40
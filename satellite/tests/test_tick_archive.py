@@ -0,0 +1,160 @@
+"""Tests for the unified hot (SQLite) + cold (npz segment) tick reader."""
+
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from satellite import tick_archive
+from satellite.tick_archive import load_ticks
+from satellite.tick_features import TICK_FEATURE_NAMES
+
+DAY = 86400
+T0 = 1_760_000_000 - 1_760_000_000 % DAY  # a UTC midnight
+
+
+def _row_values(ts: float) -> list[float]:
+    return [ts % 1000 + i for i in range(len(TICK_FEATURE_NAMES))]
+
+
+@pytest.fixture
+def sat_db(tmp_path):
+    path = tmp_path / "satellite.db"
+    conn = sqlite3.connect(path)
+    cols = ["timestamp REAL NOT NULL", "coin TEXT NOT NULL"]
+    cols += [f"{f} REAL" for f in TICK_FEATURE_NAMES]
+    cols += ["schema_version INTEGER NOT NULL DEFAULT 1"]
+    conn.execute(
+        f"CREATE TABLE tick_snapshots ({', '.join(cols)}, PRIMARY KEY (coin, timestamp))"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _insert_hot(path, timestamps, version=2, coin="BTC"):
+    names = ["timestamp", "coin"] + TICK_FEATURE_NAMES + ["schema_version"]
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        f"INSERT INTO tick_snapshots ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+        [(ts, coin, *_row_values(ts), version) for ts in timestamps],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _write_segment(archive, timestamps, version=2, coin="BTC", drop=()):
+    day = datetime.fromtimestamp(timestamps[0] - timestamps[0] % DAY, tz=timezone.utc)
+    path = archive / coin / f"v{version}" / f"{day:%Y%m%d}.npz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    matrix = np.array([_row_values(ts) for ts in timestamps], dtype=np.float64)
+    arrays = {"timestamp": np.array(timestamps, dtype=np.float64)}
+    arrays.update({f: matrix[:, i] for i, f in enumerate(TICK_FEATURE_NAMES) if f not in drop})
+    np.savez_compressed(path, **arrays)
+
+
+class TestLoadTicks:
+
+    def test_merges_cold_and_hot_sorted_and_deduped(self, sat_db, tmp_path):
+        archive = tmp_path / "tick_archive"
+        _write_segment(archive, [T0 + i for i in range(0, 50, 5)])
+        _write_segment(archive, [T0 + DAY + i for i in range(0, 50, 5)])
+        # Hot rows overlap the last archived second (mid-compaction)
+        _insert_hot(sat_db, [T0 + DAY + 45, T0 + 2 * DAY, T0 + 2 * DAY + 5])
+        _insert_hot(sat_db, [T0 + 2 * DAY + 1], version=1)
+        _insert_hot(sat_db, [T0 + 2 * DAY + 2], coin="ETH")
+
+        cols = load_ticks(sat_db, "BTC")
+        ts = cols["timestamp"]
+        assert len(ts) == 22
+        assert np.all(np.diff(ts) > 0)
+        assert set(cols) == {"timestamp", *TICK_FEATURE_NAMES}
+        i = int(np.searchsorted(ts, T0 + 2 * DAY + 5))
+        assert cols["mid_price"][i] == _row_values(T0 + 2 * DAY + 5)[
+            TICK_FEATURE_NAMES.index("mid_price")
+        ]
+
+    def test_time_bounds_and_columns(self, sat_db, tmp_path):
+        archive = tmp_path / "tick_archive"
+        _write_segment(archive, [T0 + i for i in range(0, 50, 5)])
+        _write_segment(archive, [T0 + DAY + i for i in range(0, 50, 5)])
+        _insert_hot(sat_db, [T0 + 2 * DAY])
+
+        cols = load_ticks(sat_db, "BTC", since=T0 + 20, until=T0 + DAY + 10,
+                          columns=["mid_price"])
+        assert set(cols) == {"timestamp", "mid_price"}
+        assert cols["timestamp"].tolist() == (
+            [T0 + i for i in range(20, 50, 5)] + [T0 + DAY, T0 + DAY + 5]
+        )
+
+    def test_missing_columns_in_old_segments_are_nan(self, sat_db, tmp_path):
+        _write_segment(tmp_path / "tick_archive", [T0, T0 + 5], drop=("trade_count_10s",))
+        cols = load_ticks(sat_db, "BTC")
+        assert np.isnan(cols["trade_count_10s"]).all()
+        assert not np.isnan(cols["mid_price"]).any()
+
+    def test_compaction_between_reads_loses_nothing(self, sat_db, tmp_path, monkeypatch):
+        day = [T0 + i for i in range(20)]
+        _insert_hot(sat_db, day)
+        compacted = []
+
+        def _compact():
+            # What TickArchiver._compact_day does: write the segment, then delete
+            _write_segment(tmp_path / "tick_archive", day)
+            conn = sqlite3.connect(sat_db)
+            conn.execute("DELETE FROM tick_snapshots")
+            conn.commit()
+            conn.close()
+            compacted.append(True)
+
+        def _then_compact(load):
+            def wrapper(*args):
+                out = load(*args)
+                if not compacted:
+                    _compact()
+                return out
+            return wrapper
+
+        monkeypatch.setattr(tick_archive, "_load_hot", _then_compact(tick_archive._load_hot))
+        monkeypatch.setattr(tick_archive, "_load_cold", _then_compact(tick_archive._load_cold))
+        cols = load_ticks(sat_db, "BTC")
+        assert compacted
+        assert cols["timestamp"].tolist() == day
+
+    def test_empty(self, tmp_path):
+        cols = load_ticks(tmp_path / "missing.db", "BTC")
+        assert len(cols["timestamp"]) == 0
+
+
+class TestTrainingLoadParity:
+
+    def test_archived_and_hot_load_identically(self, tmp_path):
+        from satellite.training.train_tick_direction import load_tick_data
+
+        timestamps = [T0 + i for i in range(0, 2 * DAY, 7)][:2000]
+        split = 1200
+
+        hot_dir = tmp_path / "hot"
+        hot_dir.mkdir()
+        mixed_dir = tmp_path / "mixed"
+        mixed_dir.mkdir()
+        for d in (hot_dir, mixed_dir):
+            conn = sqlite3.connect(d / "satellite.db")
+            cols = ["timestamp REAL NOT NULL", "coin TEXT NOT NULL"]
+            cols += [f"{f} REAL" for f in TICK_FEATURE_NAMES]
+            cols += ["schema_version INTEGER NOT NULL DEFAULT 1"]
+            conn.execute(f"CREATE TABLE tick_snapshots ({', '.join(cols)}, "
+                         "PRIMARY KEY (coin, timestamp))")
+            conn.commit()
+            conn.close()
+
+        _insert_hot(hot_dir / "satellite.db", timestamps)
+        _write_segment(mixed_dir / "tick_archive", timestamps[:split])
+        _insert_hot(mixed_dir / "satellite.db", timestamps[split:])
+
+        x_hot, ts_hot, names = load_tick_data(str(hot_dir / "satellite.db"))
+        x_mix, ts_mix, _ = load_tick_data(str(mixed_dir / "satellite.db"))
+        assert names
+        np.testing.assert_array_equal(ts_hot, ts_mix)
+        np.testing.assert_array_equal(x_hot, x_mix)
@@ -0,0 +1,138 @@
+"""Unified reader for tick snapshots across hot SQLite rows and cold npz segments.
+
+The data-layer TickArchiver keeps only the last ~48h of tick_snapshots in
+satellite.db and compacts older closed days into compressed columnar
+segments. `load_ticks()` stitches both back together as numpy arrays.
+
+Segment layout (writer: data-layer/engine/tick_archive.py — keep in sync):
+    <archive_dir>/<COIN>/v<schema_version>/<YYYYMMDD>.npz
+    arrays: "timestamp" (float64, sorted, unique) + one float64 array per
+            feature column (NaN where the row had NULL)
+
+Usage:
+    cols = load_ticks("storage/satellite.db", "BTC")
+    cols["timestamp"], cols["mid_price"]  # aligned float64 arrays
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from satellite.tick_features import TICK_FEATURE_NAMES, TICK_SCHEMA_VERSION
+
+log = logging.getLogger(__name__)
+
+DAY_S = 86400
+
+
+def default_archive_dir(db_path: str | Path) -> Path:
+    """Archive directory next to satellite.db (storage/tick_archive)."""
+    return Path(db_path).parent / "tick_archive"
+
+
+def _day_key(ts: float) -> str:
+    return datetime.fromtimestamp((int(ts) // DAY_S) * DAY_S, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _load_cold(
+    archive_dir: Path, coin: str, schema_version: int, columns: list[str],
+    since: float | None, until: float | None,
+) -> list[dict[str, np.ndarray]]:
+    seg_dir = archive_dir / coin / f"v{schema_version}"
+    if not seg_dir.is_dir():
+        return []
+    lo = _day_key(since) if since is not None else None
+    hi = _day_key(until) if until is not None else None
+    parts = []
+    for path in sorted(seg_dir.glob("*.npz")):
+        if (lo and path.stem < lo) or (hi and path.stem > hi):
+            continue
+        with np.load(path) as z:
+            n = len(z["timestamp"])
+            parts.append({
+                c: z[c] if c in z.files else np.full(n, np.nan) for c in columns
+            })
+    return parts
+
+
+def _load_hot(
+    db_path: Path, coin: str, schema_version: int, columns: list[str],
+    since: float | None, until: float | None,
+) -> dict[str, np.ndarray] | None:
+    if not db_path.exists():
+        return None
+    sql = (
+        f"SELECT {', '.join(columns)} FROM tick_snapshots "
+        "WHERE coin = ? AND schema_version = ?"
+    )
+    params: list = [coin, schema_version]
+    if since is not None:
+        sql += " AND timestamp >= ?"
+        params.append(since)
+    if until is not None:
+        sql += " AND timestamp < ?"
+        params.append(until)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute(sql + " ORDER BY timestamp ASC", params).fetchall()
+    except sqlite3.OperationalError:
+        return None  # no tick_snapshots table yet
+    finally:
+        conn.close()
+    if not rows:
+        return None
+    matrix = np.array(rows, dtype=np.float64)  # NULL → NaN
+    return {c: matrix[:, i] for i, c in enumerate(columns)}
+
+
+def load_ticks(
+    db_path: str | Path,
+    coin: str = "BTC",
+    schema_version: int = TICK_SCHEMA_VERSION,
+    since: float | None = None,
+    until: float | None = None,
+    columns: list[str] | None = None,
+    archive_dir: str | Path | None = None,
+) -> dict[str, np.ndarray]:
+    """Tick snapshots for one coin/schema as aligned float64 column arrays.
+
+    Reads archived day segments plus the hot rows still in SQLite, sorted by
+    timestamp with duplicates (rows present in both during compaction)
+    removed. `since`/`until` bound timestamps as [since, until).
+
+    Returns {"timestamp": ..., <feature>: ...}; empty arrays if no data.
+    """
+    feats = list(columns) if columns is not None else list(TICK_FEATURE_NAMES)
+    cols = ["timestamp"] + [c for c in feats if c != "timestamp"]
+    db_path = Path(db_path)
+    archive = Path(archive_dir) if archive_dir else default_archive_dir(db_path)
+
+    # Hot rows first: compaction writes a day's segment before deleting its
+    # rows, so a day compacted between the two reads is still in the segments
+    hot = _load_hot(db_path, coin, schema_version, cols, since, until)
+    parts = _load_cold(archive, coin, schema_version, cols, since, until)
+    n_segments = len(parts)
+    if hot is not None:
+        parts.append(hot)
+    if not parts:
+        return {c: np.array([], dtype=np.float64) for c in cols}
+
+    merged = {c: np.concatenate([p[c] for p in parts]) for c in cols}
+    ts = merged["timestamp"]
+    mask = np.ones(len(ts), dtype=bool)
+    if since is not None:
+        mask &= ts >= since
+    if until is not None:
+        mask &= ts < until
+    # np.unique sorts and keeps the first occurrence (cold before hot)
+    _, keep = np.unique(ts[mask], return_index=True)
+    idx = np.flatnonzero(mask)[keep]
+    result = {c: a[idx] for c, a in merged.items()}
+
+    log.debug("Loaded %d ticks for %s v%d (%d segments + %d hot rows)",
+              len(idx), coin, schema_version, n_segments,
+              0 if hot is None else len(hot["timestamp"]))
+    return result
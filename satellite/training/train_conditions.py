@@ -13,19 +13,19 @@ import argparse
 import hashlib
 import json
 import logging
-import math
 import sqlite3
 import sys
 import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from types import SimpleNamespace
 
 import numpy as np
 import xgboost as xgb
 from scipy.stats import spearmanr
 
-from satellite.features import FEATURE_NAMES, NEUTRAL_VALUES
+from satellite.features import FEATURE_NAMES, NEUTRAL_VALUES, compute_features_batch
 from satellite.training.feature_sets import get_features_for_model
 from satellite.training.condition_artifact import (
     ConditionArtifact,
@@ -156,431 +156,49 @@ def load_snapshots_with_labels(db_path: str, coin: str) -> list[dict]:
     return [dict(row) for row in rows]
 
 
+# Features added after the original 14; historical snapshots lack them.
+ENRICHED_FEATURES = (
+    "liq_total_1h_usd", "funding_rate_raw", "oi_change_rate_1h",
+    "realized_vol_4h", "vol_of_vol", "volume_acceleration", "cvd_ratio_1h",
+    "price_trend_4h", "return_autocorrelation", "body_ratio_1h",
+    "upper_wick_ratio_1h", "funding_velocity", "hour_sin", "hour_cos",
+)
+
+# Rows per feature batch (~1 week of 5m snapshots) — bounds the candles held.
+_ENRICH_CHUNK = 2016
+
+
 def enrich_with_new_features(rows: list[dict], coin: str, data_db_path: str) -> list[dict]:
-    """Compute v3 features from data-layer DB for historical snapshots.
+    """Compute v3/v4 features from data-layer DB for historical snapshots.
 
-    Historical snapshots only have the original 14 features.
-    This function bulk-computes the 8 new features from raw data tables
+    Historical snapshots only have the original 14 features. The newer ones
+    come from compute_features_batch() over the raw data tables
     (funding_history, oi_history, volume_history, liquidation_events,
-    trade_flow_history, candles_history).
-
-    Runs in ~30s for 57k snapshots (bulk queries, not per-row).
+    trade_flow_history, candles_history), so training sees exactly what
+    live inference computes. Snapshot OI and funding are the latest
+    recorded at or before each row.
     """
+    from satellite.artemis.reconstruct import _load_candles_from_db
+
     conn = sqlite3.connect(data_db_path)
     conn.row_factory = sqlite3.Row
+    data_db = SimpleNamespace(conn=conn)
 
     log.info("Enriching %d rows with v3 features from %s...", len(rows), data_db_path)
 
-    # ── 1. liq_total_1h_usd: log10(total liq in 1h) ──
-    # Already have liq data in raw_data from _compute_liq_cascade,
-    # but for historical rows we need to query liquidation_events.
-    # Bulk approach: for each row, sum liqs in [created_at - 3600, created_at]
-    # We'll use a sliding window approach for efficiency.
-    log.info("  Computing liq_total_1h_usd...")
-    liq_rows = conn.execute(
-        "SELECT occurred_at, size_usd FROM liquidation_events "
-        "WHERE coin = ? ORDER BY occurred_at ASC",
-        (coin,),
-    ).fetchall()
-    liq_times = [float(r["occurred_at"]) for r in liq_rows]
-    liq_sizes = [float(r["size_usd"]) for r in liq_rows]
-
-    liq_idx = 0
-    for row in rows:
-        t = row["created_at"]
-        t_start = t - 3600
-        total_liq = 0.0
-        for j in range(len(liq_times)):
-            if liq_times[j] < t_start:
-                continue
-            if liq_times[j] > t:
-                break
-            total_liq += liq_sizes[j]
-        row["liq_total_1h_usd"] = math.log10(total_liq + 1) if total_liq > 0 else 0.0
-
-    # ── 2. funding_rate_raw ──
-    log.info("  Computing funding_rate_raw...")
-    funding_rows = conn.execute(
-        "SELECT recorded_at, rate FROM funding_history "
-        "WHERE coin = ? ORDER BY recorded_at ASC",
-        (coin,),
-    ).fetchall()
-    fund_times = [float(r["recorded_at"]) for r in funding_rows]
-    fund_rates = [float(r["rate"]) for r in funding_rows]
-
-    fidx = 0
-    for row in rows:
-        t = row["created_at"]
-        # Find most recent funding rate before t
-        rate = 0.0
-        while fidx < len(fund_times) - 1 and fund_times[fidx + 1] <= t:
-            fidx += 1
-        if fidx < len(fund_times) and fund_times[fidx] <= t:
-            rate = fund_rates[fidx]
-        row["funding_rate_raw"] = rate
-    fidx = 0  # reset for safety
-
-    # ── 3. oi_change_rate_1h ──
-    log.info("  Computing oi_change_rate_1h...")
-    oi_rows = conn.execute(
-        "SELECT recorded_at, oi_usd FROM oi_history "
-        "WHERE coin = ? ORDER BY recorded_at ASC",
-        (coin,),
-    ).fetchall()
-    oi_times = [float(r["recorded_at"]) for r in oi_rows]
-    oi_vals = [float(r["oi_usd"]) for r in oi_rows]
-
-    def _find_oi_at(target_t):
-        """Binary search for OI closest to target_t."""
-        lo, hi = 0, len(oi_times) - 1
-        best = -1
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if oi_times[mid] <= target_t:
-                best = mid
-                lo = mid + 1
-            else:
-                hi = mid - 1
-        return oi_vals[best] if best >= 0 else 0.0
-
-    for row in rows:
-        t = row["created_at"]
-        oi_now = _find_oi_at(t)
-        oi_1h = _find_oi_at(t - 3600)
-        if oi_1h > 0 and oi_now > 0:
-            row["oi_change_rate_1h"] = (oi_now - oi_1h) / oi_1h * 100
-        else:
-            row["oi_change_rate_1h"] = 0.0
-
-    # ── 4. price_trend_4h ──
-    log.info("  Computing price_trend_4h...")
-    candle_rows = conn.execute(
-        "SELECT open_time, close FROM candles_history "
-        "WHERE coin = ? AND interval = '5m' ORDER BY open_time ASC",
-        (coin,),
-    ).fetchall()
-    candle_times = [float(r["open_time"]) for r in candle_rows]
-    candle_closes = [float(r["close"]) for r in candle_rows]
-
-    def _find_close_at(target_t):
-        lo, hi = 0, len(candle_times) - 1
-        best = -1
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if candle_times[mid] <= target_t:
-                best = mid
-                lo = mid + 1
-            else:
-                hi = mid - 1
-        return candle_closes[best] if best >= 0 else 0.0
-
-    for row in rows:
-        t = row["created_at"]
-        close_now = _find_close_at(t)
-        close_4h = _find_close_at(t - 4 * 3600)
-        if close_4h > 0 and close_now > 0:
-            row["price_trend_4h"] = (close_now - close_4h) / close_4h * 100
-        else:
-            row["price_trend_4h"] = 0.0
-
-    # ── 5. volume_acceleration ──
-    log.info("  Computing volume_acceleration...")
-    vol_rows = conn.execute(
-        "SELECT recorded_at, volume_usd FROM volume_history "
-        "WHERE coin = ? ORDER BY recorded_at ASC",
-        (coin,),
-    ).fetchall()
-    vol_times = [float(r["recorded_at"]) for r in vol_rows]
-    vol_vals = [float(r["volume_usd"]) for r in vol_rows]
-
-    def _sum_vol_between(t_start, t_end):
-        lo, hi = 0, len(vol_times) - 1
-        # find first >= t_start
-        start_idx = len(vol_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if vol_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-        total = 0.0
-        for j in range(start_idx, len(vol_times)):
-            if vol_times[j] > t_end:
-                break
-            total += vol_vals[j]
-        return total
-
-    for row in rows:
-        t = row["created_at"]
-        vol_5m = _sum_vol_between(t - 300, t)
-        vol_1h = _sum_vol_between(t - 3600, t - 300)
-        avg_5m = vol_1h / 11.0 if vol_1h > 0 else 0  # 55min / 5min = 11 buckets
-        if avg_5m > 0 and vol_5m > 0:
-            row["volume_acceleration"] = vol_5m / avg_5m
-        else:
-            row["volume_acceleration"] = 1.0
-
-    # ── 6. cvd_ratio_1h ──
-    log.info("  Computing cvd_ratio_1h...")
-    tf_rows = conn.execute(
-        "SELECT recorded_at, buy_volume_usd, sell_volume_usd "
-        "FROM trade_flow_history WHERE coin = ? ORDER BY recorded_at ASC",
-        (coin,),
-    ).fetchall()
-    tf_times = [float(r["recorded_at"]) for r in tf_rows]
-    tf_buys = [float(r["buy_volume_usd"]) for r in tf_rows]
-    tf_sells = [float(r["sell_volume_usd"]) for r in tf_rows]
-
-    def _cvd_between(t_start, t_end):
-        lo, hi = 0, len(tf_times) - 1
-        start_idx = len(tf_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if tf_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-        total_buy, total_sell = 0.0, 0.0
-        for j in range(start_idx, len(tf_times)):
-            if tf_times[j] > t_end:
-                break
-            total_buy += tf_buys[j]
-            total_sell += tf_sells[j]
-        return total_buy, total_sell
-
-    for row in rows:
-        t = row["created_at"]
-        buy, sell = _cvd_between(t - 3600, t)
-        total = buy + sell
-        if total < 1:
-            row["cvd_ratio_1h"] = 0.0
-        else:
-            row["cvd_ratio_1h"] = max(-1.0, min(1.0, (buy - sell) / total))
-
-    # ── 7. realized_vol_4h (from 5m candles — approx) ──
-    log.info("  Computing realized_vol_4h...")
-    for row in rows:
-        t = row["created_at"]
-        # Find candles in [t-4h, t]
-        t_start = t - 4 * 3600
-        lo, hi = 0, len(candle_times) - 1
-        start_idx = len(candle_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if candle_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-
-        closes = []
-        for j in range(start_idx, len(candle_times)):
-            if candle_times[j] > t:
-                break
-            closes.append(candle_closes[j])
-
-        if len(closes) < 10:
-            row["realized_vol_4h"] = 0.0
-            continue
-
-        returns = []
-        for i in range(1, len(closes)):
-            if closes[i - 1] > 0 and closes[i] > 0:
-                returns.append(math.log(closes[i] / closes[i - 1]))
-
-        if len(returns) < 5:
-            row["realized_vol_4h"] = 0.0
-            continue
-
-        mean_r = sum(returns) / len(returns)
-        var_r = sum((r - mean_r) ** 2 for r in returns) / len(returns)
-        # Scale: 5m candles, so sqrt(12) to annualize to 1h equivalent, * 100 for %
-        row["realized_vol_4h"] = math.sqrt(var_r) * math.sqrt(12) * 100
-
-    # ── 8. vol_of_vol (from 5m candles — approx using 15min windows) ──
-    log.info("  Computing vol_of_vol...")
-    for row in rows:
-        t = row["created_at"]
-        t_start = t - 3600
-        lo, hi = 0, len(candle_times) - 1
-        start_idx = len(candle_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if candle_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-
-        closes = []
-        for j in range(start_idx, len(candle_times)):
-            if candle_times[j] > t:
-                break
-            closes.append(candle_closes[j])
-
-        if len(closes) < 12:
-            row["vol_of_vol"] = 0.0
-            continue
-
-        # 15min windows (3 candles each for 5m data)
-        window_vols = []
-        for ws in range(0, len(closes) - 2, 3):
-            window = closes[ws:ws + 3]
-            rets = []
-            for i in range(1, len(window)):
-                if window[i - 1] > 0 and window[i] > 0:
-                    rets.append(math.log(window[i] / window[i - 1]))
-            if len(rets) >= 2:
-                mr = sum(rets) / len(rets)
-                vr = sum((r - mr) ** 2 for r in rets) / len(rets)
-                window_vols.append(math.sqrt(vr) * math.sqrt(12) * 100)
-
-        if len(window_vols) < 3:
-            row["vol_of_vol"] = 0.0
-            continue
-
-        mv = sum(window_vols) / len(window_vols)
-        vv = sum((v - mv) ** 2 for v in window_vols) / len(window_vols)
-        row["vol_of_vol"] = math.sqrt(vv)
-
-    # ── 9. return_autocorrelation (from 5m candles) ──
-    log.info("  Computing return_autocorrelation...")
-    for row in rows:
-        t = row["created_at"]
-        t_start = t - 3600
-        lo, hi = 0, len(candle_times) - 1
-        start_idx = len(candle_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if candle_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-
-        closes = []
-        for j in range(start_idx, len(candle_times)):
-            if candle_times[j] > t:
-                break
-            closes.append(candle_closes[j])
-
-        if len(closes) < 8:
-            row["return_autocorrelation"] = 0.0
-            continue
-
-        log_returns = []
-        for k in range(1, len(closes)):
-            if closes[k - 1] > 0 and closes[k] > 0:
-                log_returns.append(math.log(closes[k] / closes[k - 1]))
-
-        if len(log_returns) < 4:
-            row["return_autocorrelation"] = 0.0
-            continue
-
-        r1 = log_returns[:-1]
-        r2 = log_returns[1:]
-        n_r = len(r1)
-        m1 = sum(r1) / n_r
-        m2 = sum(r2) / n_r
-        cov = sum((r1[ii] - m1) * (r2[ii] - m2) for ii in range(n_r)) / n_r
-        s1 = math.sqrt(sum((x - m1) ** 2 for x in r1) / n_r)
-        s2 = math.sqrt(sum((x - m2) ** 2 for x in r2) / n_r)
-        if s1 < 1e-12 or s2 < 1e-12:
-            row["return_autocorrelation"] = 0.0
-        else:
-            row["return_autocorrelation"] = max(-1.0, min(1.0, cov / (s1 * s2)))
-
-    # ── 10-11. body_ratio_1h + upper_wick_ratio_1h (from 5m candles) ──
-    log.info("  Computing body_ratio_1h + upper_wick_ratio_1h...")
-    # Need OHLC data — re-query candles with all fields
-    candle_ohlc = conn.execute(
-        "SELECT open_time, open, high, low, close FROM candles_history "
-        "WHERE coin = ? AND interval = '5m' ORDER BY open_time ASC",
-        (coin,),
-    ).fetchall()
-    co_times = [float(r["open_time"]) for r in candle_ohlc]
-    co_opens = [float(r["open"]) for r in candle_ohlc]
-    co_highs = [float(r["high"]) for r in candle_ohlc]
-    co_lows = [float(r["low"]) for r in candle_ohlc]
-    co_closes = [float(r["close"]) for r in candle_ohlc]
-
-    for row in rows:
-        t = row["created_at"]
-        t_start = t - 3600
-        lo, hi = 0, len(co_times) - 1
-        start_idx = len(co_times)
-        while lo <= hi:
-            mid = (lo + hi) // 2
-            if co_times[mid] >= t_start:
-                start_idx = mid
-                hi = mid - 1
-            else:
-                lo = mid + 1
-
-        body_ratios = []
-        wick_ratios = []
-        for j in range(start_idx, len(co_times)):
-            if co_times[j] > t:
-                break
-            h_val = co_highs[j]
-            l_val = co_lows[j]
-            rng = h_val - l_val
-            if rng <= 0:
-                continue
-            body_ratios.append(abs(co_closes[j] - co_opens[j]) / rng)
-            wick_ratios.append((h_val - max(co_opens[j], co_closes[j])) / rng)
-
-        if len(body_ratios) >= 6:
-            row["body_ratio_1h"] = sum(body_ratios) / len(body_ratios)
-            row["upper_wick_ratio_1h"] = sum(wick_ratios) / len(wick_ratios)
-        else:
-            row["body_ratio_1h"] = 0.5
-            row["upper_wick_ratio_1h"] = 0.5
-
-    # ── 12. funding_velocity (current - 8h ago) ──
-    log.info("  Computing funding_velocity...")
-    for row in rows:
-        t = row["created_at"]
-        t_8h = t - 8 * 3600
-        # Find current rate (reuse fund_times/fund_rates from earlier)
-        curr_rate = 0.0
-        past_rate = 0.0
-        # Binary search for current
-        lo_f, hi_f = 0, len(fund_times) - 1
-        best_c = -1
-        while lo_f <= hi_f:
-            mid = (lo_f + hi_f) // 2
-            if fund_times[mid] <= t:
-                best_c = mid
-                lo_f = mid + 1
-            else:
-                hi_f = mid - 1
-        if best_c >= 0:
-            curr_rate = fund_rates[best_c]
-        # Binary search for 8h ago
-        lo_f, hi_f = 0, len(fund_times) - 1
-        best_p = -1
-        while lo_f <= hi_f:
-            mid = (lo_f + hi_f) // 2
-            if fund_times[mid] <= t_8h:
-                best_p = mid
-                lo_f = mid + 1
-            else:
-                hi_f = mid - 1
-        if best_p >= 0:
-            past_rate = fund_rates[best_p]
-        row["funding_velocity"] = curr_rate - past_rate
-
-    # ── 13-14. hour_sin + hour_cos (from timestamp) ──
-    log.info("  Computing hour_sin + hour_cos...")
-    for row in rows:
-        t = row["created_at"]
-        dt = datetime.fromtimestamp(t, tz=timezone.utc)
-        hour_frac = dt.hour + dt.minute / 60 + dt.second / 3600
-        row["hour_sin"] = math.sin(2 * math.pi * hour_frac / 24)
-        row["hour_cos"] = math.cos(2 * math.pi * hour_frac / 24)
+    for i in range(0, len(rows), _ENRICH_CHUNK):
+        chunk = rows[i:i + _ENRICH_CHUNK]
+        times = [float(r["created_at"]) for r in chunk]
+        start, end = min(times) - 5 * 3600, max(times)
+        results = compute_features_batch(
+            coin, times, data_db,
+            candles_5m=_load_candles_from_db(data_db, coin, "5m", start, end),
+            candles_1m=_load_candles_from_db(data_db, coin, "1m", start, end),
+        )
+        for row, result in zip(chunk, results):
+            for name in ENRICHED_FEATURES:
+                row[name] = result.features[name]
+        log.info("  %d/%d rows", i + len(chunk), len(rows))
 
     conn.close()
     log.info("  Enrichment complete — %d rows enriched", len(rows))
@@ -21,7 +21,6 @@ import argparse
 import hashlib
 import json
 import logging
-import sqlite3
 import sys
 import time
 from dataclasses import asdict, dataclass, field
@@ -32,6 +31,8 @@ import numpy as np
 import xgboost as xgb
 from scipy.stats import spearmanr
 
+from satellite.tick_archive import load_ticks
+
 log = logging.getLogger(__name__)
 
 # ─── Tick Feature Names ─────────────────────────────────────────────────────
@@ -92,6 +93,9 @@ TICKS_PER_DAY = 86400 // DOWNSAMPLE_INTERVAL  # 17280 at 5s resolution
 def load_tick_data(db_path: str, coin: str = "BTC") -> tuple[np.ndarray, np.ndarray, list[str]]:
     """Load tick snapshots, downsample, compute rolling features and labels.
 
+    Reads hot rows from satellite.db plus archived npz day segments
+    (see satellite/tick_archive.py) as column arrays.
+
     Returns:
         X: Feature matrix (N, F) — float32
         timestamps: Array of unix timestamps (N,)
@@ -99,37 +103,26 @@ def load_tick_data(db_path: str, coin: str = "BTC") -> tuple[np.ndarray, np.ndar
     """
     log.info("Loading tick data from %s for %s...", db_path, coin)
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-
     # Load v2 tick snapshots (v1 rows lack v2 features)
-    rows = conn.execute(
-        """
-        SELECT * FROM tick_snapshots
-        WHERE coin = ? AND schema_version = 2
-        ORDER BY timestamp ASC
-        """,
-        (coin,),
-    ).fetchall()
-    conn.close()
-
-    if not rows:
+    cols = load_ticks(db_path, coin, schema_version=2, columns=BASE_TICK_FEATURES)
+    all_ts = cols["timestamp"]
+
+    if not len(all_ts):
         log.error("No v2 tick snapshots found")
         return np.array([]), np.array([]), []
 
     log.info("Loaded %d v2 tick rows (%.1f days)",
-             len(rows), (rows[-1]["timestamp"] - rows[0]["timestamp"]) / 86400)
+             len(all_ts), (all_ts[-1] - all_ts[0]) / 86400)
 
     # Downsample to DOWNSAMPLE_INTERVAL seconds
-    downsampled = _downsample(rows, DOWNSAMPLE_INTERVAL)
-    log.info("Downsampled to %d rows (%ds interval)", len(downsampled), DOWNSAMPLE_INTERVAL)
-
-    # Extract base features + timestamps
-    timestamps = np.array([r["timestamp"] for r in downsampled], dtype=np.float64)
-    base_matrix = np.array(
-        [[r[f] or 0.0 for f in BASE_TICK_FEATURES] for r in downsampled],
-        dtype=np.float32,
-    )
+    idx = _downsample(all_ts, DOWNSAMPLE_INTERVAL)
+    log.info("Downsampled to %d rows (%ds interval)", len(idx), DOWNSAMPLE_INTERVAL)
+
+    # Extract base features + timestamps (NULL → 0.0)
+    timestamps = all_ts[idx]
+    base_matrix = np.nan_to_num(
+        np.column_stack([cols[f][idx] for f in BASE_TICK_FEATURES]), nan=0.0,
+    ).astype(np.float32)
 
     # Compute rolling aggregate features
     rolling_matrix = _compute_rolling_features(base_matrix, timestamps)
@@ -142,17 +135,17 @@ def load_tick_data(db_path: str, coin: str = "BTC") -> tuple[np.ndarray, np.ndar
     return X, timestamps, feature_names
 
 
-def _downsample(rows: list, interval_s: int) -> list:
-    """Keep one row per interval (closest to interval boundary)."""
-    if not rows:
-        return []
-    result = [rows[0]]
-    last_t = rows[0]["timestamp"]
-    for r in rows[1:]:
-        if r["timestamp"] - last_t >= interval_s - 0.5:
-            result.append(r)
-            last_t = r["timestamp"]
-    return result
+def _downsample(timestamps: np.ndarray, interval_s: int) -> np.ndarray:
+    """Indices keeping one row per interval (closest to interval boundary)."""
+    if not len(timestamps):
+        return np.array([], dtype=np.int64)
+    keep = [0]
+    last_t = timestamps[0]
+    for i, t in enumerate(timestamps.tolist()):
+        if t - last_t >= interval_s - 0.5:
+            keep.append(i)
+            last_t = t
+    return np.array(keep, dtype=np.int64)
 
 
 def _compute_rolling_features(base: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
@@ -6,11 +6,17 @@ Usage:
     python3 scripts/backfill.py --check          # verify prerequisites
     python3 scripts/backfill.py --start 2025-08-01 --end 2026-02-27
     python3 scripts/backfill.py --start 2025-08-01 --end 2025-08-03  # small test first
+    python3 scripts/backfill.py --start 2025-08-01 --end 2026-02-27 --workers 4
 
 Processes one day at a time:
   S3 download (~10GB) → extract → delete → next day.
   Peak temp disk usage: ~10GB. Final satellite.db growth: ~15MB/day.
 
+With --workers N, N days are downloaded and processed at once (peak temp
+disk ~10GB × N). Progress is checkpointed per day in
+storage/artemis-manifest.json, so an interrupted run resumes where it left
+off when restarted with the same dates.
+
 Cost: ~$15-30 for full 6-month backfill (S3 requester-pays transfer).
 """
 
@@ -66,7 +72,16 @@ class DataLayerDB:
 
 
 def _ensure_historical_tables(db: DataLayerDB) -> None:
-    """Create historical tables if they don't exist (idempotent)."""
+    """Create historical tables if they don't exist (idempotent).
+
+    A data-layer DB that has already been started is time-partitioned (the
+    history names are views) and manages its own schema — leave it alone.
+    """
+    row = db.conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = 'funding_history'"
+    ).fetchone()
+    if row and row[0] == "view":
+        return
     db.conn.executescript("""
         CREATE TABLE IF NOT EXISTS funding_history (
             coin TEXT NOT NULL,
@@ -421,7 +436,9 @@ def _prefetch_funding(
 
 # ─── Main backfill logic ────────────────────────────────────────────────────
 
-def run_backfill(start_date: date, end_date: date, dry_run: bool = False) -> None:
+def run_backfill(
+    start_date: date, end_date: date, dry_run: bool = False, workers: int = 1,
+) -> None:
     """Run the Artemis backfill pipeline."""
     total_days = (end_date - start_date).days + 1
     log.info(
@@ -460,6 +477,8 @@ def run_backfill(start_date: date, end_date: date, dry_run: bool = False) -> Non
         batch_size=10000,
         min_position_usd=50_000,
         api_delay_seconds=0.5,
+        workers=workers,
+        manifest_path=str(PROJECT_ROOT / "storage" / "artemis-manifest.json"),
     )
 
     t0 = time.time()
@@ -534,6 +553,10 @@ def main():
         "--dry-run", action="store_true",
         help="Check what would be done without actually processing",
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Days processed in parallel (default: 1, sequential)",
+    )
     args = parser.parse_args()
 
     if args.check:
@@ -559,7 +582,7 @@ def main():
         sys.exit(1)
 
     print()
-    run_backfill(start, end, dry_run=args.dry_run)
+    run_backfill(start, end, dry_run=args.dry_run, workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -179,6 +179,7 @@ class DataLayerConfig:
     url: str = "http://127.0.0.1:8100"
     enabled: bool = True
     timeout: int = 5
+    pool_size: int = 16  # Pooled keep-alive connections (concurrent requests)
 
 
 @dataclass
@@ -382,6 +383,7 @@ def load_config(config_path: Optional[str] = None) -> Config:
             url=dl_raw.get("url", "http://127.0.0.1:8100"),
             enabled=dl_raw.get("enabled", True),
             timeout=dl_raw.get("timeout", 5),
+            pool_size=dl_raw.get("pool_size", 16),
         ),
         sections=SectionsConfig(
             enabled=sections_raw.get("enabled", True),
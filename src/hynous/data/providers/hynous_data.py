@@ -6,13 +6,25 @@ Provides liquidation heatmaps, order flow, whale tracking, HLP positions, smart
 
 Singleton pattern — use get_client() to get the shared instance.
 Sync (requests.Session) — matches the rest of the Hynous stack.
+
+Concurrency: one pooled Session shared by all threads, with no lock around
+HTTP. Identical concurrent GETs are coalesced: one request goes out and
+every waiter decodes the same body. GET bodies are also kept for a short
+per-endpoint TTL (_TTL_S). Once the TTL expires they are revalidated with
+If-None-Match, so an unchanged payload comes back as an empty 304. Writes
+invalidate the cached smart-money reads. client_stats() reports per-endpoint
+latency, errors, cache hits and coalesced calls.
 """
 
+import json
 import logging
 import threading
+import time
+from collections import deque
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from ...core.config import load_config
 
@@ -21,6 +33,16 @@ log = logging.getLogger(__name__)
 _client: Optional["HynousDataClient"] = None
 _client_lock = threading.Lock()
 
+# Seconds a GET body is reused without asking the server, by endpoint prefix
+_TTL_S = {
+    "/v1/orderflow": 1.0,
+    "/v1/heatmap": 2.0,
+    "/v1/whales": 5.0,
+    "/v1/hlp": 10.0,
+    "/v1/smart-money": 10.0,
+}
+_LATENCY_SAMPLES = 500  # Recent latencies kept per endpoint for percentiles
+
 
 def get_client() -> "HynousDataClient":
     """Get or create the singleton HynousDataClient. Thread-safe."""
@@ -32,132 +54,245 @@ def get_client() -> "HynousDataClient":
                 _client = HynousDataClient(
                     base_url=cfg.data_layer.url,
                     timeout=cfg.data_layer.timeout,
+                    pool_size=cfg.data_layer.pool_size,
                 )
     return _client
 
 
+def _endpoint(path: str) -> str:
+    """Metrics/TTL bucket for a path: '/v1/heatmap/BTC' → '/v1/heatmap'."""
+    parts = path.split("/")
+    return "/".join(parts[:3]) if len(parts) > 2 else path
+
+
+class _Cached:
+    __slots__ = ("body", "etag", "fetched_at")
+
+    def __init__(self, body: bytes, etag: str | None, fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+
+class _InFlight:
+    __slots__ = ("event", "body")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.body: bytes | None = None
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "errors", "cache_hits", "coalesced", "not_modified", "latencies")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+
 class HynousDataClient:
     """HTTP client for the hynous-data service.
 
-    Thread-safe — uses a lock around the shared requests.Session.
+    Thread-safe — requests run concurrently over a pooled Session; only the
+    cache/in-flight bookkeeping takes a (short, HTTP-free) lock.
     """
 
-    def __init__(self, base_url: str = "http://127.0.0.1:8100", timeout: int = 5):
+    def __init__(self, base_url: str = "http://127.0.0.1:8100", timeout: int = 5,
+                 pool_size: int = 16):
         self.base_url = base_url.rstrip("/")
         self._timeout = timeout
         self._session = requests.Session()
-        self._lock = threading.Lock()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._state_lock = threading.Lock()
+        self._cache: dict[tuple, _Cached] = {}
+        self._inflight: dict[tuple, _InFlight] = {}
+        self._stats: dict[str, _EndpointStats] = {}
         self._available = False
         log.info("HynousDataClient initialized → %s", self.base_url)
 
-    def _get(self, path: str, params: dict | None = None) -> dict | None:
-        """GET request with timeout and graceful failure.
+    # ---- Transport ----
 
-        Thread-safe. Handles ConnectionError, Timeout, HTTPError, and
-        malformed JSON gracefully. Sets _available flag only on full success.
-        """
+    def _endpoint_stats(self, endpoint: str) -> _EndpointStats:
+        st = self._stats.get(endpoint)
+        if st is None:
+            st = self._stats.setdefault(endpoint, _EndpointStats())
+        return st
+
+    def _request(self, method: str, path: str, endpoint: str, *,
+                 params: dict | None = None, json_body: dict | None = None,
+                 headers: dict | None = None) -> requests.Response | None:
+        """Send one request; None on failure (logged like the old per-verb helpers)."""
+        st = self._endpoint_stats(endpoint)
+        t0 = time.perf_counter()
         try:
-            with self._lock:
-                resp = self._session.get(
-                    f"{self.base_url}{path}",
-                    params=params,
-                    timeout=self._timeout,
-                )
+            resp = self._session.request(
+                method,
+                f"{self.base_url}{path}",
+                params=params,
+                json=json_body,
+                headers=headers,
+                timeout=self._timeout,
+            )
             resp.raise_for_status()
-            data = resp.json()
             self._available = True
-            return data
+            return resp
         except (requests.ConnectionError, requests.Timeout):
+            st.errors += 1
             if self._available:
                 log.warning("hynous-data unavailable at %s", self.base_url)
             self._available = False
             return None
         except requests.HTTPError as e:
+            st.errors += 1
             log.warning("hynous-data HTTP error: %s %s", e.response.status_code, path)
-            self._available = False
+            if method == "GET":
+                self._available = False
             return None
         except Exception:
+            st.errors += 1
             log.debug("hynous-data request failed: %s", path, exc_info=True)
             return None
+        finally:
+            with self._state_lock:
+                st.requests += 1
+                st.latencies.append((time.perf_counter() - t0) * 1000)
+
+    @staticmethod
+    def _decode(body: bytes | None) -> dict | None:
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            log.debug("hynous-data returned malformed JSON")
+            return None
+
+    def _get(self, path: str, params: dict | None = None) -> dict | None:
+        """GET request with timeout and graceful failure.
+
+        Thread-safe. Serves fresh cached bodies, joins an identical in-flight
+        request if there is one, and revalidates stale bodies by ETag. Each
+        caller gets its own decoded dict.
+        """
+        endpoint = _endpoint(path)
+        ttl = _TTL_S.get(endpoint, 0.0)
+        key = (path, tuple(sorted((params or {}).items())))
+        st = self._endpoint_stats(endpoint)
+
+        with self._state_lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached.fetched_at < ttl:
+                st.cache_hits += 1
+                return self._decode(cached.body)
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+            else:
+                st.coalesced += 1
+
+        if not leader:
+            call.event.wait(self._timeout + 1)
+            return self._decode(call.body)
+
+        body = None
+        try:
+            headers = {"If-None-Match": cached.etag} if cached is not None and cached.etag else None
+            resp = self._request("GET", path, endpoint, params=params, headers=headers)
+            if resp is not None:
+                if resp.status_code == 304 and cached is not None:
+                    st.not_modified += 1
+                    body = cached.body
+                else:
+                    body = resp.content
+                if ttl and self._decode(body) is not None:
+                    with self._state_lock:
+                        self._cache[key] = _Cached(body, resp.headers.get("ETag"), time.monotonic())
+        finally:
+            call.body = body
+            with self._state_lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+        return self._decode(body)
+
+    def _write(self, method: str, path: str, json_body: dict | None = None) -> dict | None:
+        endpoint = _endpoint(path)
+        resp = self._request(method, path, endpoint, json_body=json_body)
+        self._invalidate(endpoint)
+        return self._decode(resp.content) if resp is not None else None
+
+    def _invalidate(self, endpoint: str):
+        """Drop cached GETs under `endpoint` after a write to it."""
+        with self._state_lock:
+            for key in [k for k in self._cache if _endpoint(k[0]) == endpoint]:
+                del self._cache[key]
 
     def _post(self, path: str, json_body: dict) -> dict | None:
         """POST request with timeout and graceful failure."""
-        try:
-            with self._lock:
-                resp = self._session.post(
-                    f"{self.base_url}{path}",
-                    json=json_body,
-                    timeout=self._timeout,
-                )
-            resp.raise_for_status()
-            data = resp.json()
-            self._available = True
-            return data
-        except (requests.ConnectionError, requests.Timeout):
-            if self._available:
-                log.warning("hynous-data unavailable at %s", self.base_url)
-            self._available = False
-            return None
-        except requests.HTTPError as e:
-            log.warning("hynous-data HTTP error: %s %s", e.response.status_code, path)
-            return None
-        except Exception:
-            log.debug("hynous-data request failed: %s", path, exc_info=True)
-            return None
+        return self._write("POST", path, json_body)
 
     def _patch(self, path: str, json_body: dict) -> dict | None:
         """PATCH request with timeout and graceful failure."""
-        try:
-            with self._lock:
-                resp = self._session.patch(
-                    f"{self.base_url}{path}",
-                    json=json_body,
-                    timeout=self._timeout,
-                )
-            resp.raise_for_status()
-            data = resp.json()
-            self._available = True
-            return data
-        except (requests.ConnectionError, requests.Timeout):
-            if self._available:
-                log.warning("hynous-data unavailable at %s", self.base_url)
-            self._available = False
-            return None
-        except requests.HTTPError as e:
-            log.warning("hynous-data HTTP error: %s %s", e.response.status_code, path)
-            return None
-        except Exception:
-            log.debug("hynous-data request failed: %s", path, exc_info=True)
-            return None
+        return self._write("PATCH", path, json_body)
 
     def _delete(self, path: str) -> dict | None:
         """DELETE request with timeout and graceful failure."""
-        try:
-            with self._lock:
-                resp = self._session.delete(
-                    f"{self.base_url}{path}",
-                    timeout=self._timeout,
-                )
-            resp.raise_for_status()
-            data = resp.json()
-            self._available = True
-            return data
-        except (requests.ConnectionError, requests.Timeout):
-            if self._available:
-                log.warning("hynous-data unavailable at %s", self.base_url)
-            self._available = False
-            return None
-        except requests.HTTPError as e:
-            log.warning("hynous-data HTTP error: %s %s", e.response.status_code, path)
-            return None
-        except Exception:
-            log.debug("hynous-data request failed: %s", path, exc_info=True)
-            return None
+        return self._write("DELETE", path)
+
+    def client_stats(self) -> dict:
+        """Client-side per-endpoint request counts, latency percentiles (ms), cache and coalescing hits."""
+        out = {}
+        with self._state_lock:
+            items = [(ep, st, sorted(st.latencies)) for ep, st in self._stats.items()]
+            cached = len(self._cache)
+        for ep, st, lat in items:
+            out[ep] = {
+                "requests": st.requests,
+                "errors": st.errors,
+                "cache_hits": st.cache_hits,
+                "coalesced": st.coalesced,
+                "not_modified": st.not_modified,
+                "p50_ms": round(lat[len(lat) // 2], 2) if lat else None,
+                "p95_ms": round(lat[int(len(lat) * 0.95)], 2) if lat else None,
+                "max_ms": round(lat[-1], 2) if lat else None,
+            }
+        return {"endpoints": out, "cached_bodies": cached}
 
     @property
     def is_available(self) -> bool:
         return self._available
 
+    # ---- Batch ----
+
+    def batch(self, items: list[tuple[str, str | None, dict | None]]) -> list[dict | None] | None:
+        """Fetch many reads in one round trip via /v1/batch.
+
+        Each item is (kind, coin, params) with kind one of heatmap,
+        orderflow, whales, hlp_positions, hlp_sentiment, smart_money (params
+        mirror the single endpoints' query strings). Returns data aligned
+        with `items` (None for items that failed), or None if the batch
+        call itself failed.
+        """
+        if not items:
+            return []
+        body = {"requests": [
+            {"kind": kind, "coin": coin.upper() if coin else None, "params": params or {}}
+            for kind, coin, params in items
+        ]}
+        data = self._post("/v1/batch", body)
+        if not data or "results" not in data:
+            return None
+        return [
+            r.get("data") if r.get("status") == 200 else None
+            for r in data["results"]
+        ]
+
     # ---- Health ----
 
     def health(self) -> dict | None:
@@ -169,9 +304,13 @@ class HynousDataClient:
         """Get liquidation heatmap for a coin."""
         return self._get(f"/v1/heatmap/{coin.upper()}")
 
-    def heatmap_summary(self, coin: str) -> str | None:
-        """Get a compact text summary of the heatmap for context injection."""
-        data = self.heatmap(coin)
+    def heatmap_summary(self, coin: str, data: dict | None = None) -> str | None:
+        """Get a compact text summary of the heatmap for context injection.
+
+        Pass `data` (e.g. from batch()) to format without another request.
+        """
+        if data is None:
+            data = self.heatmap(coin)
         if not data or "error" in data:
             return None
 
@@ -202,9 +341,10 @@ class HynousDataClient:
         """Get HLP sentiment (side flips, deltas)."""
         return self._get("/v1/hlp/sentiment", params={"hours": hours})
 
-    def hlp_summary(self) -> str | None:
+    def hlp_summary(self, data: dict | None = None) -> str | None:
         """Compact HLP summary for context injection."""
-        data = self.hlp_positions()
+        if data is None:
+            data = self.hlp_positions()
         if not data:
             return None
 
@@ -225,9 +365,10 @@ class HynousDataClient:
         """Get order flow / CVD for a coin."""
         return self._get(f"/v1/orderflow/{coin.upper()}")
 
-    def order_flow_summary(self, coin: str) -> str | None:
+    def order_flow_summary(self, coin: str, data: dict | None = None) -> str | None:
         """Compact CVD summary for context injection."""
-        data = self.order_flow(coin)
+        if data is None:
+            data = self.order_flow(coin)
         if not data:
             return None
 
@@ -275,9 +416,11 @@ class HynousDataClient:
 
     def smart_money(self, top_n: int = 50, min_win_rate: float = 0,
                     style: str = "", exclude_bots: bool = False,
-                    min_trades: int = 0) -> dict | None:
+                    min_trades: int = 0, offset: int = 0) -> dict | None:
         """Get most profitable traders with optional filters."""
         params: dict = {"top_n": top_n}
+        if offset:
+            params["offset"] = offset
         if min_win_rate:
             params["min_win_rate"] = min_win_rate
         if style:
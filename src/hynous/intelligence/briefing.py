@@ -721,18 +721,27 @@ def _build_data_layer_section(config, symbols: list[str]) -> str:
             return ""
 
         parts = []
+        syms = symbols[:3]
+
+        # HLP + heatmap + CVD for tracked symbols in one round trip
+        reqs = [("hlp_positions", None, None)]
+        for sym in syms:
+            reqs += [("heatmap", sym, None), ("orderflow", sym, None)]
+        results = client.batch(reqs)
+        if results is None:
+            return ""
 
-        # HLP summary
-        hlp_text = client.hlp_summary()
+        hlp = results[0]
+        hlp_text = client.hlp_summary(hlp) if hlp else None
         if hlp_text:
             parts.append(hlp_text)
 
-        # Heatmap + CVD for tracked symbols
-        for sym in symbols[:3]:
-            hm_text = client.heatmap_summary(sym)
+        for i, sym in enumerate(syms):
+            hm, flow = results[1 + 2 * i], results[2 + 2 * i]
+            hm_text = client.heatmap_summary(sym, hm) if hm else None
             if hm_text:
                 parts.append(hm_text)
-            flow_text = client.order_flow_summary(sym)
+            flow_text = client.order_flow_summary(sym, flow) if flow else None
             if flow_text:
                 parts.append(flow_text)
 
@@ -353,8 +353,22 @@ def _build_data_layer(config, position_coins: list[str]) -> str:
 
         parts = []
 
+        # CVD for tracked symbols + open position coins (no extra HTTP call)
+        symbols = list(config.execution.symbols)
+        for coin in position_coins:
+            if coin not in symbols:
+                symbols.append(coin)
+        symbols = symbols[:5]
+
+        # HLP + every symbol's order flow in one round trip
+        results = client.batch(
+            [("hlp_positions", None, None)] + [("orderflow", sym, None) for sym in symbols]
+        )
+        if results is None:
+            return ""
+        hlp, flows = results[0], results[1:]
+
         # HLP summary (single line)
-        hlp = client.hlp_positions()
         if hlp and hlp.get("positions"):
             positions = hlp["positions"]
             long_usd = sum(p.get("size_usd", 0) for p in positions if p.get("side") == "long")
@@ -362,15 +376,8 @@ def _build_data_layer(config, position_coins: list[str]) -> str:
             bias = "LONG" if long_usd > short_usd else "SHORT"
             parts.append(f"HLP: ${(long_usd + short_usd) / 1e6:.0f}M notional, {bias}-biased")
 
-        # CVD for tracked symbols + open position coins (no extra HTTP call)
-        symbols = list(config.execution.symbols)
-        for coin in position_coins:
-            if coin not in symbols:
-                symbols.append(coin)
-
         flow_parts = []
-        for sym in symbols[:5]:
-            flow = client.order_flow(sym)
+        for sym, flow in zip(symbols, flows):
             if flow and flow.get("windows"):
                 w = flow["windows"].get("5m")
                 if w and (w.get("buy_count", 0) + w.get("sell_count", 0)) > 0:
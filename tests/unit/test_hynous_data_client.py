@@ -0,0 +1,155 @@
+"""
+Unit tests for HynousDataClient batching and concurrency.
+
+Tests verify:
+1. batch() sends one /v1/batch request with normalized items
+2. Results align with the requests, None for failed items
+3. Summaries format pre-fetched data without extra requests
+4. Identical concurrent GETs coalesce; different ones run in parallel
+5. TTL cache, ETag revalidation and write invalidation
+"""
+
+
+def _client(monkeypatch, response):
+    from hynous.data.providers.hynous_data import HynousDataClient
+    client = HynousDataClient()
+    calls = []
+
+    def fake_post(path, json_body):
+        calls.append((path, json_body))
+        return response
+
+    monkeypatch.setattr(client, "_post", fake_post)
+    monkeypatch.setattr(client, "_get", lambda *a, **k: calls.append(("GET",) + a))
+    return client, calls
+
+
+class TestBatch:
+
+    def test_one_round_trip_aligned_results(self, monkeypatch):
+        client, calls = _client(monkeypatch, {"results": [
+            {"kind": "hlp_positions", "coin": None, "status": 200, "data": {"positions": []}},
+            {"kind": "heatmap", "coin": "BTC", "status": 404, "data": {"error": "none"}},
+            {"kind": "orderflow", "coin": "BTC", "status": 200, "data": {"windows": {}}},
+        ]})
+        out = client.batch([
+            ("hlp_positions", None, None),
+            ("heatmap", "btc", None),
+            ("orderflow", "btc", {"windows": "60"}),
+        ])
+        assert out == [{"positions": []}, None, {"windows": {}}]
+        assert len(calls) == 1
+        path, body = calls[0]
+        assert path == "/v1/batch"
+        assert body["requests"][1] == {"kind": "heatmap", "coin": "BTC", "params": {}}
+        assert body["requests"][2]["params"] == {"windows": "60"}
+
+    def test_failed_batch_returns_none(self, monkeypatch):
+        client, _ = _client(monkeypatch, None)
+        assert client.batch([("heatmap", "BTC", None)]) is None
+
+    def test_summary_uses_prefetched_data(self, monkeypatch):
+        client, calls = _client(monkeypatch, None)
+        flow = {"windows": {"5m": {"cvd": 25_000, "buy_pct": 60}}}
+        text = client.order_flow_summary("BTC", flow)
+        assert "BUY pressure" in text
+        assert calls == []
+
+
+class _Resp:
+    def __init__(self, body, status=200, etag=None):
+        self.content = body
+        self.status_code = status
+        self.headers = {"ETag": etag} if etag else {}
+
+    def raise_for_status(self):
+        pass
+
+
+class TestConcurrency:
+
+    def test_identical_concurrent_gets_coalesce(self):
+        import threading
+        import time
+
+        from hynous.data.providers.hynous_data import HynousDataClient
+
+        client = HynousDataClient()
+        calls = []
+        gate = threading.Event()
+
+        def fake_request(method, url, **kw):
+            calls.append(url)
+            gate.wait(2)
+            return _Resp(b'{"coin": "BTC"}')
+
+        client._session.request = fake_request
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.whales("BTC")))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        gate.set()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert results == [{"coin": "BTC"}] * 5
+        # Every caller got its own dict
+        assert len({id(r) for r in results}) == 5
+        assert client.client_stats()["endpoints"]["/v1/whales"]["coalesced"] == 4
+
+    def test_different_requests_run_in_parallel(self):
+        import threading
+        import time
+
+        from hynous.data.providers.hynous_data import HynousDataClient
+
+        client = HynousDataClient()
+
+        def slow_request(method, url, **kw):
+            time.sleep(0.2)
+            return _Resp(b'{}')
+
+        client._session.request = slow_request
+        t0 = time.monotonic()
+        threads = [threading.Thread(target=client.order_flow, args=(c,))
+                   for c in ("BTC", "ETH", "SOL", "DOGE")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert time.monotonic() - t0 < 0.5
+
+    def test_ttl_cache_and_etag_revalidation(self, monkeypatch):
+        from hynous.data.providers import hynous_data as mod
+
+        client = mod.HynousDataClient()
+        sent = []
+
+        def fake_request(method, url, headers=None, **kw):
+            sent.append(headers)
+            if headers and headers.get("If-None-Match") == '"v1"':
+                return _Resp(b"", status=304, etag='"v1"')
+            return _Resp(b'{"positions": []}', etag='"v1"')
+
+        client._session.request = fake_request
+        clock = [100.0]
+        monkeypatch.setattr(mod.time, "monotonic", lambda: clock[0])
+        assert client.hlp_positions() == {"positions": []}
+        assert client.hlp_positions() == {"positions": []}
+        assert len(sent) == 1  # second read served from the TTL cache
+        clock[0] += 60
+        assert client.hlp_positions() == {"positions": []}
+        assert sent[-1] == {"If-None-Match": '"v1"'}
+        assert client.client_stats()["endpoints"]["/v1/hlp"]["not_modified"] == 1
+
+    def test_writes_invalidate_cached_reads(self):
+        from hynous.data.providers.hynous_data import HynousDataClient
+
+        client = HynousDataClient()
+        bodies = iter([b'{"wallets": []}', b'{"ok": true}', b'{"wallets": [1]}'])
+        client._session.request = lambda method, url, **kw: _Resp(next(bodies))
+        assert client.sm_watchlist() == {"wallets": []}
+        client.sm_watch("0xabc")
+        assert client.sm_watchlist() == {"wallets": [1]}